@@ -0,0 +1,76 @@
+"""
+Benchmark the rendering of a unit with several Mind Map blocks.
+
+The page is rendered with the process-wide resource caches and with the
+caches emptied before every block, which reproduces reading the assets and
+parsing the templates on each render.
+
+Usage:
+    PYTHONPATH=. DJANGO_SETTINGS_MODULE=mindmap.settings.test python benchmarks/render_blocks.py
+"""
+import argparse
+import time
+from unittest.mock import Mock, patch
+
+import django
+
+
+def make_block():
+    """
+    Return a Mind Map block with the services mocked out.
+    """
+    from xblock.field_data import DictFieldData  # pylint: disable=import-outside-toplevel
+
+    from mindmap.mindmap import MindMapXBlock  # pylint: disable=import-outside-toplevel
+
+    block = MindMapXBlock(runtime=Mock(), field_data=DictFieldData({}), scope_ids=Mock())
+    user_service = Mock()
+    user_service.get_current_user.return_value = Mock(
+        full_name="Learner", opt_attrs={"edx-platform.user_role": "student"},
+    )
+    # Without an i18n service the templates are rendered with the Django translations.
+    block.runtime.service.side_effect = lambda _block, name: user_service if name == "user" else None
+    block.get_weighted_score = Mock(return_value=None)
+    block.get_due_date = Mock(return_value=None)
+    return block
+
+
+def render_page(blocks, cached):
+    """
+    Render the student view of every block of the page.
+    """
+    from mindmap.resources import clear_resource_caches  # pylint: disable=import-outside-toplevel
+
+    for block in blocks:
+        if not cached:
+            clear_resource_caches()
+        block.student_view()
+
+
+def main():
+    """
+    Run the benchmark and print the renders per second.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=20, help="Number of blocks in the page.")
+    parser.add_argument("--pages", type=int, default=50, help="Number of page renders to time.")
+    args = parser.parse_args()
+
+    django.setup()
+    blocks = [make_block() for _ in range(args.blocks)]
+
+    with patch("mindmap.mindmap.Fragment.initialize_js"):
+        for label, cached in (("uncached", False), ("cached", True)):
+            render_page(blocks, cached)
+            start = time.perf_counter()
+            for _ in range(args.pages):
+                render_page(blocks, cached)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:>8}: {args.pages / elapsed:8.1f} pages/s "
+                f"{args.pages * args.blocks / elapsed:9.1f} block renders/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
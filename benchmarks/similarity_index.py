@@ -0,0 +1,92 @@
+"""
+Benchmark the detection of similar mind maps among the submissions of a block.
+
+The submissions are copies of a few starter mind maps, some left untouched
+and some edited, plus original mind maps. The signatures are computed
+without their cache, and the clustering is timed separately.
+
+Usage:
+    PYTHONPATH=. python benchmarks/similarity_index.py
+"""
+import argparse
+import random
+import time
+
+from mindmap.similarity import SimilarityIndex, get_features, get_signature
+
+WORDS = (
+    "energy cell water light plant carbon oxygen growth root leaf soil sun cycle "
+    "protein membrane nucleus enzyme reaction glucose respiration photosynthesis"
+).split()
+
+
+def make_mind_map(generator, size):
+    """
+    Return a `node_array` mind map with random topics.
+    """
+    nodes = [{"id": "root", "isroot": True, "topic": " ".join(generator.sample(WORDS, 2))}]
+    for index in range(1, size):
+        nodes.append({
+            "id": f"node_{index}",
+            "parentid": nodes[generator.randrange(index)]["id"],
+            "topic": " ".join(generator.sample(WORDS, 3)),
+        })
+    return {"format": "node_array", "data": nodes}
+
+
+def edit_mind_map(generator, mind_map, edits):
+    """
+    Return a copy of a mind map with some topics changed.
+    """
+    nodes = [dict(node) for node in mind_map["data"]]
+    for node in generator.sample(nodes, min(edits, len(nodes))):
+        node["topic"] = " ".join(generator.sample(WORDS, 3))
+    return {"format": "node_array", "data": nodes}
+
+
+def make_submissions(count, size, seed=0):
+    """
+    Return the mind maps of `count` submissions.
+    """
+    generator = random.Random(seed)
+    starters = [make_mind_map(generator, size) for _ in range(5)]
+    submissions = []
+    for _ in range(count):
+        kind = generator.random()
+        if kind < 0.3:
+            submissions.append(generator.choice(starters))
+        elif kind < 0.6:
+            submissions.append(edit_mind_map(generator, generator.choice(starters), generator.randrange(1, 4)))
+        else:
+            submissions.append(make_mind_map(generator, size))
+    return submissions
+
+
+def main():
+    """
+    Run the benchmark and print the time spent per stage.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=10000, help="Number of submissions.")
+    parser.add_argument("--nodes", type=int, default=30, help="Number of nodes of each mind map.")
+    args = parser.parse_args()
+
+    submissions = make_submissions(args.submissions, args.nodes)
+
+    start = time.perf_counter()
+    signatures = [get_signature(get_features(mind_map)) for mind_map in submissions]
+    signed = time.perf_counter()
+    index = SimilarityIndex()
+    for position, signature in enumerate(signatures):
+        index.add(position, signature)
+    clusters = index.get_clusters()
+    clustered = time.perf_counter()
+
+    print(f"{args.submissions} submissions of {args.nodes} nodes:")
+    print(f"  signatures: {(signed - start) * 1000:8.1f} ms")
+    print(f"  clusters:   {(clustered - signed) * 1000:8.1f} ms")
+    print(f"  {len(clusters)} clusters of {sum(len(cluster['keys']) for cluster in clusters)} submissions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark the compact encoding of the learner mind maps.
+
+For each mind map size, compare the size of the StudentModule state and the
+time to encode and decode it, with the plain JSON used when the compact
+encoding is disabled.
+
+Usage:
+    PYTHONPATH=. python benchmarks/storage_encoding.py
+"""
+import argparse
+import json
+import timeit
+
+from mindmap.storage import COMPRESS_THRESHOLD, decode_mind_map, encode_mind_map
+
+
+def make_mind_map(size):
+    """
+    Return a `node_array` mind map with the given number of nodes.
+    """
+    nodes = [{"id": "root", "isroot": True, "topic": "Root"}]
+    for index in range(1, size):
+        nodes.append({
+            "id": f"b{index:08x}",
+            "parentid": nodes[(index - 1) // 4]["id"],
+            "topic": f"Topic number {index}",
+            "direction": "right" if index % 2 else "left",
+            "expanded": True,
+        })
+    return {"meta": {"name": "Mind Map", "author": "Learner", "version": "0.1"}, "format": "node_array", "data": nodes}
+
+
+def time_call(function, repeat):
+    """
+    Return the best time in milliseconds of calling the function.
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    """
+    Run the benchmark and print a row per mind map size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Numbers of nodes.")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed runs per size.")
+    parser.add_argument("--threshold", type=int, default=COMPRESS_THRESHOLD, help="Compression threshold in bytes.")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'plain bytes':>12} {'compact bytes':>14} {'ratio':>6} "
+          f"{'json ms':>9} {'encode ms':>10} {'decode ms':>10}")
+    for size in args.sizes:
+        mind_map = make_mind_map(size)
+        # The runtime serializes the whole state as JSON, the encoding adds to that cost.
+        plain = json.dumps({"mindmap_student_body": mind_map})
+        compact = json.dumps({"mindmap_student_body": encode_mind_map(mind_map, args.threshold)})
+
+        plain_ms = time_call(lambda: json.loads(json.dumps({"mindmap_student_body": mind_map})), args.repeat)
+        encode_ms = time_call(
+            lambda: json.dumps({"mindmap_student_body": encode_mind_map(mind_map, args.threshold)}), args.repeat
+        )
+        decode_ms = time_call(lambda: decode_mind_map(json.loads(compact)["mindmap_student_body"]), args.repeat)
+        print(f"{size:>6} {len(plain):>12} {len(compact):>14} {len(plain) / len(compact):>6.1f} "
+              f"{plain_ms:>9.2f} {encode_ms:>10.2f} {decode_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Aggregated grading statistics of a block.
+
+The statistics are computed by the database with a few aggregate queries,
+whatever the number of learners, and cached until a submission or a grade of
+the block changes:
+
+- the learners by submission status, from the student modules;
+- the distribution, mean and median of the raw scores, from the latest
+  visible score of each learner;
+- the number of submissions by day;
+- the average size of the submitted mind maps, from their blob or their
+  embedded JSON.
+"""
+
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncDate
+
+from mindmap.blobs import get_answer_size
+from mindmap.edxapp_wrapper.student import student_module as StudentModule
+from mindmap.utils import SubmissionStatus
+
+# The summary is invalidated when the submissions or grades of the block
+# change, the timeout only bounds the changes made outside of the block.
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+# Number of bins of the raw score histogram.
+SCORE_HISTOGRAM_BINS = 10
+
+
+def get_summary_cache_key(usage_id: str) -> str:
+    """
+    Return the cache key of the grading summary of a block.
+    """
+    return f"mindmap.grading_summary.{usage_id}"
+
+
+def invalidate_grading_summary(usage_id: str) -> None:
+    """
+    Drop the cached grading summary of a block, after its submissions or grades changed.
+    """
+    cache.delete(get_summary_cache_key(usage_id))
+
+
+def get_grading_summary(block) -> dict:
+    """
+    Return the grading statistics of a block, cached until they change.
+
+    Args:
+        block (MindMapXBlock): The block to summarize.
+
+    Returns:
+        dict: The `statuses`, `scores`, `submissions_by_day` and `average_map_size` of the block.
+    """
+    cache_key = get_summary_cache_key(block.block_id)
+    summary = cache.get(cache_key)
+    if summary is None:
+        summary = {
+            "statuses": count_statuses(block),
+            "scores": get_score_statistics(block),
+            "submissions_by_day": count_submissions_by_day(block),
+            "average_map_size": get_average_map_size(block),
+        }
+        cache.set(cache_key, summary, SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def count_statuses(block) -> dict:
+    """
+    Return the number of learners of the block by submission status, with a single query.
+
+    The learners with a student module but no submission status did not attempt the assignment.
+    """
+    # The student module state is a JSON text, serialized with the default separators.
+    counts = StudentModule().objects.filter(  # pylint: disable=no-member
+        course_id=block.course_id,
+        module_state_key=block.location,
+    ).aggregate(
+        total=Count("id"),
+        **{
+            status.name: Count("id", filter=Q(state__contains=f'"submission_status": "{status.value}"'))
+            for status in (SubmissionStatus.SUBMITTED, SubmissionStatus.COMPLETED)
+        },
+    )
+    return {
+        SubmissionStatus.NOT_ATTEMPTED.value: (
+            counts["total"] - counts[SubmissionStatus.SUBMITTED.name] - counts[SubmissionStatus.COMPLETED.name]
+        ),
+        SubmissionStatus.SUBMITTED.value: counts[SubmissionStatus.SUBMITTED.name],
+        SubmissionStatus.COMPLETED.value: counts[SubmissionStatus.COMPLETED.name],
+    }
+
+
+def get_score_statistics(block) -> dict:
+    """
+    Return the distribution, mean and median of the raw scores of the block.
+
+    The learners are grouped by points earned in the database, so only one
+    row per distinct score is read. The raw scores are converted from the
+    weighted scores, as in `MindMapXBlock.get_raw_score_from_weighted`.
+
+    Returns:
+        dict: The `count` of graded learners, the `mean` and `median` raw
+        scores, None without grades, and the `histogram` of the raw scores
+        as bins with their `start`, `end` and `count`.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import ScoreSummary  # pylint: disable=import-outside-toplevel
+
+    rows = ScoreSummary.objects.filter(
+        student_item__course_id=block.block_course_id,
+        student_item__item_id=block.block_id,
+        # By convention, scores are hidden if "points possible" is set to 0.
+        latest__points_possible__gt=0,
+    ).values("latest__points_earned").annotate(count=Count("id")).order_by("latest__points_earned")
+    distribution = [
+        (round(row["latest__points_earned"] * block.points / block.weight) if block.weight else 0, row["count"])
+        for row in rows
+    ]
+
+    bin_size = max(block.points, 1) / SCORE_HISTOGRAM_BINS
+    histogram = [
+        {"start": round(index * bin_size, 2), "end": round((index + 1) * bin_size, 2), "count": 0}
+        for index in range(SCORE_HISTOGRAM_BINS)
+    ]
+    for raw_score, count in distribution:
+        histogram[min(max(int(raw_score // bin_size), 0), SCORE_HISTOGRAM_BINS - 1)]["count"] += count
+
+    total = sum(count for _raw_score, count in distribution)
+    return {
+        "count": total,
+        "mean": round(sum(raw_score * count for raw_score, count in distribution) / total, 2) if total else None,
+        "median": get_median(distribution, total) if total else None,
+        "histogram": histogram,
+    }
+
+
+def get_median(distribution: list, total: int) -> float:
+    """
+    Return the median of a sorted distribution of values with their counts.
+    """
+    middle_values = []
+    seen = 0
+    for value, count in distribution:
+        seen += count
+        # The middle value for an odd total, the two middle values for an even total.
+        while len(middle_values) < 2 - total % 2 and seen > (total - 1) // 2 + len(middle_values):
+            middle_values.append(value)
+    return sum(middle_values) / len(middle_values)
+
+
+def count_submissions_by_day(block) -> list:
+    """
+    Return the number of submissions of the block for each day with submissions.
+
+    Returns:
+        list: The `date` in ISO format and the `count` of submissions, oldest first.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    rows = Submission.objects.filter(
+        student_item__course_id=block.block_course_id,
+        student_item__item_id=block.block_id,
+    ).annotate(date=TruncDate("submitted_at")).values("date").annotate(count=Count("id")).order_by("date")
+    return [{"date": row["date"].isoformat(), "count": row["count"]} for row in rows]
+
+
+def get_average_map_size(block) -> float | None:
+    """
+    Return the average length of the JSON of the mind maps submitted to the block.
+
+    The size of a mind map stored as a blob is the length of the blob, the
+    size of an embedded mind map is the length of the answer.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    average = Submission.objects.filter(
+        student_item__course_id=block.block_course_id,
+        student_item__item_id=block.block_id,
+    ).aggregate(size=Avg(get_answer_size()))["size"]
+    return round(average, 2) if average is not None else None
@@ -0,0 +1,232 @@
+"""
+Archives of the mind maps of a course, for course reruns and migrations.
+
+An archive is a gzip compressed JSON lines file: a header, then a line with
+the `mindmap_body` of every mind map block of the course, then a line with
+the `mindmap_student_body` of every learner state of those blocks. The
+blocks are matched by their block id when restored, so an archive of a
+course can be restored into a rerun of it.
+
+The learner states are read and written a batch at a time, with keyset
+pagination over the student modules and bulk updates, so the memory used
+does not depend on the number of learners.
+"""
+
+from __future__ import annotations
+
+import json
+
+from django.db import transaction
+
+from mindmap.edxapp_wrapper.student import student_module as StudentModule
+from mindmap.edxapp_wrapper.xmodule import get_course_blocks, update_block
+from mindmap.utils import chunked, utcnow
+
+ARCHIVE_VERSION = 1
+ARCHIVE_BATCH_SIZE = 1000
+
+BLOCK_TYPE = "mindmap"
+
+
+class ArchiveError(ValueError):
+    """
+    Raised when an archive cannot be restored.
+    """
+
+
+def iter_student_modules(course_id: str, usage_ids: list, batch_size: int = ARCHIVE_BATCH_SIZE):
+    """
+    Yield the student modules of the blocks of a course in batches, ordered by id.
+
+    Args:
+        course_id (str): The course of the blocks.
+        usage_ids (list): The usage ids of the blocks.
+        batch_size (int, optional): The maximum number of student modules of each batch.
+
+    Yields:
+        list: The StudentModule objects of each batch.
+    """
+    last_id = 0
+    while True:
+        batch = list(StudentModule().objects.filter(
+            course_id=course_id,
+            module_state_key__in=usage_ids,
+            id__gt=last_id,
+        ).only("id", "student_id", "module_state_key", "state").order_by("id")[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def iter_archive_lines(course_id: str, batch_size: int = ARCHIVE_BATCH_SIZE, progress_callback=None):
+    """
+    Yield the lines of the archive of the mind maps of a course.
+
+    Args:
+        course_id (str): The course to archive.
+        batch_size (int, optional): The number of learner states loaded at a time.
+        progress_callback (callable, optional): Called with the number of
+            learner states read after each batch.
+
+    Yields:
+        dict: The header, then a line for each block and learner state.
+    """
+    blocks = get_course_blocks(course_id, BLOCK_TYPE)
+    block_ids = {str(block.location): block.location.block_id for block in blocks}
+
+    yield {"version": ARCHIVE_VERSION, "course_id": str(course_id)}
+    for block in blocks:
+        yield {"type": "block", "block_id": block.location.block_id, "mindmap_body": block.mindmap_body}
+
+    count = 0
+    for batch in iter_student_modules(course_id, list(block_ids), batch_size):
+        for student_module in batch:
+            state = json.loads(student_module.state or "{}")
+            if state.get("mindmap_student_body"):
+                yield {
+                    "type": "state",
+                    "block_id": block_ids[str(student_module.module_state_key)],
+                    "student_id": student_module.student_id,
+                    "mindmap_student_body": state["mindmap_student_body"],
+                }
+        count += len(batch)
+        if progress_callback:
+            progress_callback(count)
+
+
+def export_course(stream, course_id: str, batch_size: int = ARCHIVE_BATCH_SIZE, progress_callback=None) -> int:
+    """
+    Write the archive of the mind maps of a course to a text stream.
+
+    Args:
+        stream (file): The text stream to write to.
+        course_id (str): The course to archive.
+        batch_size (int, optional): The number of learner states loaded at a time.
+        progress_callback (callable, optional): Called with the number of
+            learner states read after each batch.
+
+    Returns:
+        int: The number of lines written, without the header.
+    """
+    count = -1
+    for count, line in enumerate(iter_archive_lines(course_id, batch_size, progress_callback)):
+        stream.write(json.dumps(line, separators=(",", ":")))
+        stream.write("\n")
+    return count
+
+
+def read_archive(stream) -> tuple:
+    """
+    Read the header of an archive and return it with an iterator over its lines.
+
+    Raises:
+        ArchiveError: If the archive is empty or of an unsupported version.
+    """
+    lines = (json.loads(line) for line in stream if line.strip())
+    header = next(lines, None)
+    if not header or header.get("version") != ARCHIVE_VERSION:
+        raise ArchiveError("Not a mind map archive or unsupported archive version")
+    return header, lines
+
+
+def import_course(
+    stream,
+    course_id: str,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    progress_callback=None,
+    user_id: int = None,
+) -> dict:
+    """
+    Restore the mind maps of an archive into the blocks of a course.
+
+    The `mindmap_body` of the blocks is saved to the modulestore and
+    published, and the learner states are merged into the existing student
+    modules, or created, with a bulk update and a bulk create per batch. The
+    blocks of the archive missing from the course are skipped.
+
+    Args:
+        stream (file): The text stream of the archive.
+        course_id (str): The course to restore the mind maps into.
+        batch_size (int, optional): The number of learner states written at a time.
+        progress_callback (callable, optional): Called with the number of
+            learner states written after each batch.
+        user_id (int, optional): The user saving the blocks to the modulestore,
+            the management command user by default.
+
+    Returns:
+        dict: The number of blocks and learner states restored and skipped.
+
+    Raises:
+        ArchiveError: If the archive is not valid.
+    """
+    _header, lines = read_archive(stream)
+    blocks = {block.location.block_id: block for block in get_course_blocks(course_id, BLOCK_TYPE)}
+    stats = {"blocks": 0, "states": 0, "skipped": 0}
+
+    def iter_states():
+        for line in lines:
+            block = blocks.get(line.get("block_id"))
+            if not block:
+                stats["skipped"] += 1
+            elif line.get("type") == "block":
+                block.mindmap_body = line["mindmap_body"]
+                update_block(block, user_id)
+                stats["blocks"] += 1
+            elif line.get("type") == "state":
+                yield str(block.location), line["student_id"], line["mindmap_student_body"]
+            else:
+                raise ArchiveError(f"Unknown archive line type: {line.get('type')}")
+
+    for batch in chunked(iter_states(), batch_size):
+        import_states(course_id, batch)
+        stats["states"] += len(batch)
+        if progress_callback:
+            progress_callback(stats["states"])
+    return stats
+
+
+def import_states(course_id: str, states: list) -> None:
+    """
+    Save a batch of learner mind maps in a single transaction.
+
+    Args:
+        course_id (str): The course of the blocks.
+        states (list): The usage id, student id and `mindmap_student_body` of each state.
+    """
+    model = StudentModule()
+    with transaction.atomic():
+        student_modules = {
+            (student_module.student_id, str(student_module.module_state_key)): student_module
+            for student_module in model.objects.filter(
+                course_id=course_id,
+                module_state_key__in={usage_id for usage_id, _student_id, _body in states},
+                student_id__in={student_id for _usage_id, student_id, _body in states},
+            )
+        }
+
+        updated_modules = []
+        created_modules = []
+        now = utcnow()
+        for usage_id, student_id, mind_map in states:
+            student_module = student_modules.get((student_id, usage_id))
+            if student_module:
+                state = json.loads(student_module.state or "{}")
+                state["mindmap_student_body"] = mind_map
+                # The hash of the previous mind map would skip the next save of an identical one.
+                state.pop("mindmap_student_hash", None)
+                student_module.state = json.dumps(state)
+                # bulk_update does not set the auto_now fields.
+                student_module.modified = now
+                updated_modules.append(student_module)
+            else:
+                created_modules.append(model(
+                    student_id=student_id,
+                    course_id=course_id,
+                    module_state_key=usage_id,
+                    module_type=BLOCK_TYPE,
+                    state=json.dumps({"mindmap_student_body": mind_map}),
+                ))
+
+        model.objects.bulk_update(updated_modules, ["state", "modified"])
+        model.objects.bulk_create(created_modules)
@@ -0,0 +1,58 @@
+"""
+Rate limiting of the autosaves of the learner mind maps.
+
+The browser autosaves the mind map a few seconds after the learner stops
+editing it. Each learner of a block can only autosave once every
+`MINDMAP_AUTOSAVE_MIN_INTERVAL` seconds, so heavy editing does not turn into
+a storm of student module writes: the autosaves rejected in between are
+retried by the browser with the latest mind map. The explicit saves are not
+limited.
+
+The slots are taken with `cache.add`, which is atomic in the shared cache
+backends, so concurrent requests of a learner cannot both take the slot.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Seconds without changes after which the browser autosaves the mind map.
+AUTOSAVE_DELAY = 3
+# Minimum seconds between two autosaves of a learner in a block.
+AUTOSAVE_MIN_INTERVAL = 15
+
+
+def get_autosave_settings() -> dict:
+    """
+    Return the autosave settings passed to the browser.
+
+    Returns:
+        dict: The `delay` and `min_interval` of the autosaves, in seconds.
+    """
+    return {
+        "delay": getattr(settings, "MINDMAP_AUTOSAVE_DELAY", AUTOSAVE_DELAY),
+        "min_interval": getattr(settings, "MINDMAP_AUTOSAVE_MIN_INTERVAL", AUTOSAVE_MIN_INTERVAL),
+    }
+
+
+def get_autosave_cache_key(usage_id: str, user_id) -> str:
+    """
+    Return the cache key of the last autosave of a learner in a block.
+    """
+    return f"mindmap.autosave.{usage_id}.{user_id}"
+
+
+def acquire_autosave_slot(usage_id: str, user_id) -> bool:
+    """
+    Take the autosave slot of a learner in a block, free once per minimum interval.
+
+    Args:
+        usage_id (str): The usage id of the block.
+        user_id: The id of the learner.
+
+    Returns:
+        bool: True if the mind map can be autosaved, False if it was autosaved too recently.
+    """
+    min_interval = get_autosave_settings()["min_interval"]
+    if not min_interval:
+        return True
+    return cache.add(get_autosave_cache_key(usage_id, user_id), True, min_interval)
@@ -0,0 +1,173 @@
+"""
+Content-addressed storage of the submitted mind maps.
+
+Many learners submit the starter mind map of the block, or identical copies
+of a mind map, so the submissions do not embed their mind map: it is stored
+once as a `MindMapBlob`, keyed by the SHA-256 of its canonical JSON, and the
+submission answer only references it. The blobs never change, so they are
+also kept in the Django cache once committed, which spares the database
+lookups when the same mind maps are graded again.
+
+The answers of the submissions created before are still read: they embed
+the mind map as JSON under `mindmap_student_body`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Length, Substr
+
+# Key of the blob hash in the submission answers.
+BLOB_ANSWER_KEY = "mindmap_blob"
+# Key of the embedded mind map in the submission answers created before the blobs.
+LEGACY_ANSWER_KEY = "mindmap_student_body"
+# Prefix of the blob answers as stored by the submissions API, the blob hash follows it.
+BLOB_ANSWER_PREFIX = f'{{"{BLOB_ANSWER_KEY}": "'
+
+# The blobs never change, they are kept in the cache for a week after their last use.
+BLOB_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def canonical_json(mind_map: dict) -> str:
+    """
+    Return the JSON of a mind map with sorted keys and without whitespace.
+    """
+    return json.dumps(mind_map, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def get_content_hash(content: str) -> str:
+    """
+    Return the SHA-256 hex digest of the canonical JSON of a mind map.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def get_blob_cache_key(content_hash: str) -> str:
+    """
+    Return the cache key of the content of a blob.
+    """
+    return f"mindmap.blob.{content_hash}"
+
+
+def store_mind_map(mind_map: dict) -> str:
+    """
+    Store a mind map once for its content.
+
+    Args:
+        mind_map (dict): The mind map to store.
+
+    Returns:
+        str: The hash referencing the stored mind map.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapBlob  # pylint: disable=import-outside-toplevel
+
+    content = canonical_json(mind_map)
+    content_hash = get_content_hash(content)
+    cache_key = get_blob_cache_key(content_hash)
+    # The insert is always made: the cache is not proof that the blob was committed.
+    # A concurrent submission of the same content may store it first.
+    MindMapBlob.objects.bulk_create(
+        [MindMapBlob(content_hash=content_hash, content=content)], ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: cache.set(cache_key, content, BLOB_CACHE_TIMEOUT))
+    return content_hash
+
+
+def make_answer(mind_map: dict) -> dict:
+    """
+    Store a mind map and return the submission answer referencing it.
+    """
+    return {BLOB_ANSWER_KEY: store_mind_map(mind_map)}
+
+
+def get_answer_hash(answer) -> str | None:
+    """
+    Return the hash of the blob referenced by a submission answer, if any.
+    """
+    if isinstance(answer, dict):
+        return answer.get(BLOB_ANSWER_KEY)
+    return None
+
+
+def get_answer_size():
+    """
+    Return the expression of the length of the JSON of the mind map of a submission.
+
+    The size of a mind map stored as a blob is the length of the blob, read
+    with a subquery on the hash in the answer; the size of an embedded mind
+    map is the length of the answer.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapBlob  # pylint: disable=import-outside-toplevel
+
+    blob_size = MindMapBlob.objects.filter(
+        content_hash=Substr(OuterRef("answer"), len(BLOB_ANSWER_PREFIX) + 1, 64),
+    ).annotate(size=Length("content")).values("size")[:1]
+    return Coalesce(Subquery(blob_size, output_field=IntegerField()), Length("answer"))
+
+
+def load_blobs(content_hashes) -> dict:
+    """
+    Return the content of the blobs, from the cache or with a single query.
+
+    Args:
+        content_hashes (iterable): The hashes of the blobs.
+
+    Returns:
+        dict: The canonical JSON of the blobs keyed by hash, without the missing ones.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapBlob  # pylint: disable=import-outside-toplevel
+
+    content_hashes = set(content_hashes)
+    if not content_hashes:
+        return {}
+    cache_keys = {get_blob_cache_key(content_hash): content_hash for content_hash in content_hashes}
+    contents = {cache_keys[key]: content for key, content in cache.get_many(list(cache_keys)).items()}
+
+    missing = content_hashes - contents.keys()
+    if missing:
+        loaded = dict(MindMapBlob.objects.filter(content_hash__in=missing).values_list("content_hash", "content"))
+        cache.set_many(
+            {get_blob_cache_key(content_hash): content for content_hash, content in loaded.items()},
+            BLOB_CACHE_TIMEOUT,
+        )
+        contents.update(loaded)
+    return contents
+
+
+def get_answer_bodies(answers: list) -> list:
+    """
+    Return the mind maps of submission answers as JSON, loading their blobs in bulk.
+
+    Args:
+        answers (list): The answers of the submissions.
+
+    Returns:
+        list: The JSON of the mind map of each answer, None if it has none.
+    """
+    contents = load_blobs(filter(None, map(get_answer_hash, answers)))
+    bodies = []
+    for answer in answers:
+        content_hash = get_answer_hash(answer)
+        if content_hash:
+            bodies.append(contents.get(content_hash))
+        elif isinstance(answer, dict):
+            bodies.append(answer.get(LEGACY_ANSWER_KEY))
+        else:
+            bodies.append(None)
+    return bodies
+
+
+def get_answer_mind_map(answer) -> dict | None:
+    """
+    Return the mind map of a submission answer.
+    """
+    body = get_answer_bodies([answer])[0]
+    return json.loads(body) if body is not None else None
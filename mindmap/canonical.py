@@ -0,0 +1,104 @@
+"""
+Canonical form of the mind maps saved and submitted.
+
+jsMind exports the mind maps with attributes which do not change how they
+are drawn: the `expanded` flag of every node, true unless the node is
+collapsed, the `direction` of every node although only the children of the
+root are placed by it, and the `meta.author` that the views add when they
+show the mind map. The canonical form leaves them out, collapses the
+whitespace of the topics and sorts the keys, so identical mind maps are
+stored once and hash the same whatever editor produced them. The keys are
+interned, as the same few keys are repeated in every node.
+
+The mind maps are canonicalized after they are validated.
+"""
+
+from __future__ import annotations
+
+import sys
+
+# Keys of the mind map metadata set by the views, not by the learners.
+PRESENTATION_META_KEYS = frozenset({"author"})
+
+
+def collapse_whitespace(topic):
+    """
+    Return a topic without leading and trailing whitespace, and with single spaces between its words.
+
+    The case and accents are kept, unlike `mindmap.similarity.normalize_topic`
+    which also folds them to compare the topics.
+    """
+    return " ".join(topic.split()) if isinstance(topic, str) else topic
+
+
+def canonicalize_node(node: dict, is_root_child: bool) -> dict:
+    """
+    Return the canonical form of the attributes of a node, with an empty list of children if it has some.
+
+    Args:
+        node (dict): The node.
+        is_root_child (bool): Whether the node is a child of the root, placed by its direction.
+
+    Returns:
+        dict: The attributes of the node, with sorted and interned keys.
+    """
+    canonical = {}
+    for key in sorted(node):
+        value = node[key]
+        if (key == "expanded" and value in (True, "true")) or (key == "direction" and not is_root_child):
+            continue
+        if key == "children":
+            value = []
+        elif key == "topic":
+            value = collapse_whitespace(value)
+        canonical[sys.intern(key)] = value
+    return canonical
+
+
+def canonicalize_node_array(nodes: list) -> list:
+    """
+    Return the canonical form of the nodes of a mind map in the `node_array` format.
+    """
+    root_id = next((node.get("id") for node in nodes if node.get("isroot") in (True, "true")), None)
+    return [canonicalize_node(node, node.get("parentid") == root_id) for node in nodes]
+
+
+def canonicalize_node_tree(root: dict) -> dict:
+    """
+    Return the canonical form of the root of a mind map in the `node_tree` format, with its descendants.
+    """
+    canonical_root = canonicalize_node(root, False)
+    stack = [(root, canonical_root, True)]
+    while stack:
+        node, canonical, is_root = stack.pop()
+        for child in node.get("children") or []:
+            canonical_child = canonicalize_node(child, is_root)
+            canonical["children"].append(canonical_child)
+            stack.append((child, canonical_child, False))
+    return canonical_root
+
+
+def canonicalize_mind_map(mind_map: dict) -> dict:
+    """
+    Return the canonical form of a valid mind map, in the `node_array` or `node_tree` format.
+
+    Args:
+        mind_map (dict): The mind map, as exported by jsMind.
+
+    Returns:
+        dict: A new mind map, drawn as the given one.
+    """
+    canonical = {}
+    for key in sorted(mind_map):
+        value = mind_map[key]
+        if key == "meta" and isinstance(value, dict):
+            value = {
+                sys.intern(meta_key): value[meta_key]
+                for meta_key in sorted(value) if meta_key not in PRESENTATION_META_KEYS
+            }
+        elif key == "data" and isinstance(value, list):
+            value = canonicalize_node_array(value)
+        elif key == "data" and isinstance(value, dict):
+            value = canonicalize_node_tree(value)
+        canonical[sys.intern(key)] = value
+    return canonical
@@ -0,0 +1,416 @@
+"""
+Mind maps shared and edited concurrently by the learners of a cohort or team.
+
+The learners of a group edit the same mind map with the node-level
+operations of `mindmap.patching`. Each batch of operations sent by a browser
+is applied on top of the version of the shared mind map it was made on, in
+the order the server receives the batches:
+
+- The operations address the nodes by id, so the operations of concurrent
+  batches on different nodes commute and are applied as they are.
+- An operation which no longer applies to the shared mind map, such as the
+  update of a node deleted meanwhile or a move under a node moved into the
+  moved node, is dropped: the deletions win and the last topic received
+  wins.
+
+Every applied batch gets the next version of the shared mind map and is
+broadcast to the group through the Django Channels layer, when Channels is
+installed and configured, to the browsers connected with
+`mindmap.consumers.MindMapSharedMapConsumer`. The browsers without a
+WebSocket poll the batches since the version they have.
+
+The shared mind map and the latest batches live in the Django cache, shared
+by the LMS processes, and a lock taken with `cache.add` serializes the
+batches of a group. The mind map is compacted to a `MindMapSharedMap` row
+every `MINDMAP_SHARED_COMPACTION_OPERATIONS` batches or
+`MINDMAP_SHARED_COMPACTION_INTERVAL` seconds, and when the last browser of
+a group disconnects, rather than on every edit. The browsers connected to a
+group are counted in the cache, and the count leaves it with the shared mind
+map if a process dies without closing its connections.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from mindmap.blobs import canonical_json
+from mindmap.canonical import canonicalize_mind_map
+from mindmap.patching import OPERATIONS, MindMapPatchError, NodeArray
+from mindmap.validation import get_limits, validate_mind_map
+
+try:
+    from channels.layers import get_channel_layer
+except ImportError:
+    get_channel_layer = None
+
+# Kinds of groups sharing a mind map.
+SHARED_GROUP_TYPES = ("cohort", "team")
+
+# Default compaction thresholds, overridden with the MINDMAP_SHARED_* settings.
+COMPACTION_OPERATIONS = 50
+COMPACTION_INTERVAL = 30
+# Seconds between two polls of the browsers without a WebSocket.
+POLL_INTERVAL = 5
+
+# Number of batches kept to bring the browsers up to date, the ones further behind reload the mind map.
+OPERATIONS_LOG_SIZE = 200
+# The shared mind maps not edited for a day leave the cache, they are read again from their last compaction.
+STATE_TIMEOUT = 60 * 60 * 24
+
+# The lock of a group is released after a few seconds if its holder dies.
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 100
+LOCK_WAIT = 0.02
+
+# The WebSocket tokens identify the group of a learner for a few hours.
+TOKEN_SALT = "mindmap.collaboration"
+TOKEN_MAX_AGE = 60 * 60 * 12
+
+# Type of the Channels messages broadcasting a batch, handled by `MindMapSharedMapConsumer.mindmap_operations`.
+BROADCAST_MESSAGE_TYPE = "mindmap.operations"
+
+
+class SharedMapOutdated(Exception):
+    """
+    Raised when a batch is made on a version of the shared mind map too old to be brought up to date.
+    """
+
+
+class SharedMapBusy(Exception):
+    """
+    Raised when the lock of a shared mind map cannot be taken.
+    """
+
+
+def get_compaction_settings() -> dict:
+    """
+    Return the compaction thresholds of the shared mind maps.
+
+    Returns:
+        dict: The number of batches and the seconds after which a shared mind map is compacted.
+    """
+    return {
+        "operations": getattr(settings, "MINDMAP_SHARED_COMPACTION_OPERATIONS", COMPACTION_OPERATIONS),
+        "interval": getattr(settings, "MINDMAP_SHARED_COMPACTION_INTERVAL", COMPACTION_INTERVAL),
+    }
+
+
+def get_shared_map_name(usage_key: str, group_id: str) -> str:
+    """
+    Return the name of a shared mind map, used as its cache key and Channels group name.
+
+    The Channels group names are limited to 100 ASCII letters, digits, hyphens and periods.
+    """
+    digest = hashlib.sha256(f"{usage_key}\n{group_id}".encode("utf-8")).hexdigest()[:32]
+    return f"mindmap.shared.{digest}"
+
+
+def get_shared_map_settings(usage_key: str, group_id: str) -> dict:
+    """
+    Return the settings of the shared mind map editing passed to the browser.
+
+    Returns:
+        dict: The `client_id` identifying the browser in the batches, the
+        `poll_interval` in seconds, and the `websocket_url` receiving the
+        batches with the token of the group, None if no WebSocket is served.
+    """
+    websocket_url = getattr(settings, "MINDMAP_SHARED_WEBSOCKET_URL", None)
+    if websocket_url:
+        websocket_url = f"{websocket_url}?{urlencode({'token': make_shared_map_token(usage_key, group_id)})}"
+    return {
+        "client_id": uuid.uuid4().hex,
+        "poll_interval": getattr(settings, "MINDMAP_SHARED_POLL_INTERVAL", POLL_INTERVAL),
+        "websocket_url": websocket_url or None,
+    }
+
+
+def make_shared_map_token(usage_key: str, group_id: str) -> str:
+    """
+    Return a signed token giving access to the broadcasts of a shared mind map.
+    """
+    return signing.dumps({"usage_key": usage_key, "group_id": group_id}, salt=TOKEN_SALT)
+
+
+def read_shared_map_token(token: str) -> dict:
+    """
+    Return the `usage_key` and `group_id` of a token made by `make_shared_map_token`.
+
+    Raises:
+        django.core.signing.BadSignature: If the token is not valid or has expired.
+    """
+    return signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+
+
+@contextmanager
+def shared_map_lock(name: str):
+    """
+    Hold the lock of a shared mind map, waiting for the batch being applied.
+
+    Raises:
+        SharedMapBusy: If the lock is not released in time.
+    """
+    lock_key = f"{name}.lock"
+    for _attempt in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, True, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        raise SharedMapBusy(f"The shared mind map {name} is locked")
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def add_shared_map_connection(usage_key: str, group_id: str) -> int:
+    """
+    Count a browser connected to the Channels group of a shared mind map.
+
+    Returns:
+        int: The number of browsers connected to the group.
+    """
+    connections_key = f"{get_shared_map_name(usage_key, group_id)}.connections"
+    cache.add(connections_key, 0, STATE_TIMEOUT)
+    return cache.incr(connections_key)
+
+
+def remove_shared_map_connection(usage_key: str, group_id: str) -> int:
+    """
+    Stop counting a browser disconnected from the Channels group of a shared mind map.
+
+    Returns:
+        int: The number of browsers still connected to the group, 0 when the count left the cache.
+    """
+    connections_key = f"{get_shared_map_name(usage_key, group_id)}.connections"
+    try:
+        connections = cache.decr(connections_key)
+    except ValueError:
+        return 0
+    if connections <= 0:
+        cache.delete(connections_key)
+        return 0
+    return connections
+
+
+def load_shared_map(usage_key: str, group_id: str, initial_mind_map: dict) -> dict:
+    """
+    Return the state of a shared mind map, from the cache or its last compaction.
+
+    Args:
+        usage_key (str): The usage key of the block.
+        group_id (str): The group sharing the mind map.
+        initial_mind_map (dict): The mind map the group starts from.
+
+    Returns:
+        dict: The `mind_map`, its `version`, the latest batches as `log`, and
+        the `compacted_version` and `compacted_at` time of its last compaction.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapSharedMap  # pylint: disable=import-outside-toplevel
+
+    name = get_shared_map_name(usage_key, group_id)
+    state = cache.get(name)
+    if state is not None:
+        return state
+
+    shared_map = MindMapSharedMap.objects.filter(usage_key=usage_key, group_id=group_id).first()
+    version = shared_map.version if shared_map else 0
+    state = {
+        "mind_map": json.loads(shared_map.content) if shared_map else canonicalize_mind_map(initial_mind_map),
+        "version": version,
+        "log": [],
+        "compacted_version": version,
+        "compacted_at": time.time(),
+    }
+    # Another process may have loaded and edited the mind map meanwhile.
+    if not cache.add(name, state, STATE_TIMEOUT):
+        state = cache.get(name, state)
+    return state
+
+
+def rebase_operations(mind_map: dict, operations: list) -> tuple:
+    """
+    Apply the operations which still apply to a shared mind map, dropping the others.
+
+    Args:
+        mind_map (dict): The shared mind map, in the `node_array` format.
+        operations (list): The operations of a batch, in order.
+
+    Returns:
+        tuple: The new mind map and the operations applied.
+
+    Raises:
+        MindMapPatchError: If the mind map is not a `node_array` or the operations are malformed.
+    """
+    if mind_map.get("format") != "node_array" or not isinstance(mind_map.get("data"), list):
+        raise MindMapPatchError("Only mind maps in the node_array format can be shared")
+    if not isinstance(operations, list):
+        raise MindMapPatchError("Operations must be a list")
+
+    rebased = copy.deepcopy(mind_map)
+    nodes = NodeArray(rebased["data"])
+    applied = []
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise MindMapPatchError("Operations must be objects")
+        if operation.get("op") not in OPERATIONS:
+            raise MindMapPatchError(f"Unknown operation: {operation.get('op')}")
+        try:
+            # The NodeArray operations check they apply before changing the nodes.
+            getattr(nodes, operation["op"])(operation)
+        except MindMapPatchError:
+            continue
+        applied.append(operation)
+    return rebased, applied
+
+
+def is_compaction_due(state: dict) -> bool:
+    """
+    Return whether the batches applied to a shared mind map since its last compaction should be written.
+    """
+    pending = state["version"] - state["compacted_version"]
+    compaction = get_compaction_settings()
+    return pending > 0 and (
+        pending >= compaction["operations"] or time.time() - state["compacted_at"] >= compaction["interval"]
+    )
+
+
+def write_shared_map(usage_key: str, group_id: str, state: dict) -> None:
+    """
+    Write a shared mind map to the database, marking its state as compacted.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapSharedMap  # pylint: disable=import-outside-toplevel
+
+    MindMapSharedMap.objects.update_or_create(
+        usage_key=usage_key,
+        group_id=group_id,
+        defaults={"content": canonical_json(state["mind_map"]), "version": state["version"]},
+    )
+    state["compacted_version"] = state["version"]
+    state["compacted_at"] = time.time()
+
+
+def apply_shared_map_operations(
+    usage_key: str,
+    group_id: str,
+    initial_mind_map: dict,
+    version: int,
+    operations: list,
+    *,
+    client_id: str = "",
+) -> dict:
+    """
+    Apply a batch of operations made on a version of a shared mind map.
+
+    Args:
+        usage_key (str): The usage key of the block.
+        group_id (str): The group sharing the mind map.
+        initial_mind_map (dict): The mind map the group starts from.
+        version (int): The version of the shared mind map the operations were made on.
+        operations (list): The operations of the batch.
+        client_id (str, optional): The browser which sent the batch, so it recognizes its broadcast.
+
+    Returns:
+        dict: The batch applied, with its `version`, `client_id`, the
+        `operations` applied and the number of operations `dropped`.
+
+    Raises:
+        SharedMapOutdated: If the batches since the version are no longer kept.
+        SharedMapBusy: If the lock of the shared mind map is not released in time.
+        MindMapPatchError: If the operations are malformed.
+        MindMapValidationError: If the shared mind map would not be valid.
+    """
+    name = get_shared_map_name(usage_key, group_id)
+    with shared_map_lock(name):
+        state = load_shared_map(usage_key, group_id, initial_mind_map)
+        if not state["version"] - len(state["log"]) <= version <= state["version"]:
+            raise SharedMapOutdated(f"Version {version} of {name} cannot be brought up to date")
+
+        mind_map, applied = rebase_operations(state["mind_map"], operations)
+        validate_mind_map(mind_map, **get_limits())
+        batch = {
+            "version": state["version"] + 1,
+            "client_id": client_id,
+            "operations": applied,
+            "dropped": len(operations) - len(applied),
+        }
+        state["mind_map"] = canonicalize_mind_map(mind_map)
+        state["version"] = batch["version"]
+        state["log"] = state["log"][-(OPERATIONS_LOG_SIZE - 1):] + [batch]
+        if is_compaction_due(state):
+            write_shared_map(usage_key, group_id, state)
+        cache.set(name, state, STATE_TIMEOUT)
+    return batch
+
+
+def compact_shared_map(usage_key: str, group_id: str) -> bool:
+    """
+    Write the batches applied to a shared mind map since its last compaction, if any.
+
+    Returns:
+        bool: Whether the shared mind map was written.
+    """
+    name = get_shared_map_name(usage_key, group_id)
+    with shared_map_lock(name):
+        state = cache.get(name)
+        if state is None or state["version"] == state["compacted_version"]:
+            return False
+        write_shared_map(usage_key, group_id, state)
+        cache.set(name, state, STATE_TIMEOUT)
+    return True
+
+
+def read_shared_map(usage_key: str, group_id: str, initial_mind_map: dict, since: int = None) -> dict:
+    """
+    Return a shared mind map, or the batches applied since a version the browser has.
+
+    Args:
+        usage_key (str): The usage key of the block.
+        group_id (str): The group sharing the mind map.
+        initial_mind_map (dict): The mind map the group starts from.
+        since (int, optional): The version of the shared mind map the browser has.
+
+    Returns:
+        dict: The current `version`, and the `batches` since the given
+        version, or the whole `mind_map` if the batches are no longer kept.
+    """
+    state = load_shared_map(usage_key, group_id, initial_mind_map)
+    if is_compaction_due(state):
+        compact_shared_map(usage_key, group_id)
+
+    if since is not None and state["version"] - len(state["log"]) <= since <= state["version"]:
+        return {
+            "version": state["version"],
+            "batches": [batch for batch in state["log"] if batch["version"] > since],
+        }
+    return {
+        "version": state["version"],
+        "mind_map": state["mind_map"],
+    }
+
+
+def broadcast_shared_map_operations(usage_key: str, group_id: str, batch: dict) -> None:
+    """
+    Send a batch applied to a shared mind map to the browsers of the group connected with a WebSocket.
+
+    Nothing is sent when Django Channels is not installed or has no channel layer configured.
+    """
+    channel_layer = get_channel_layer() if get_channel_layer is not None else None
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        get_shared_map_name(usage_key, group_id),
+        {"type": BROADCAST_MESSAGE_TYPE, "batch": batch},
+    )
@@ -0,0 +1,77 @@
+"""
+WebSocket consumer broadcasting the edits of the shared mind maps, with Django Channels.
+
+The browsers of a group send their operations to the `apply_shared_operations`
+handler of the block, which checks the learner belongs to the group, and
+receive the batches applied by the whole group from this consumer. A browser
+connects with the token of its group given by the student view, in the
+`token` query parameter.
+
+The LMS serves the consumer by adding `mindmap.routing.websocket_urlpatterns`
+to its ASGI application, with a channel layer shared by its processes. The
+`channels.layers.InMemoryChannelLayer` is enough for the tests and a single
+local process.
+"""
+
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.core.signing import BadSignature
+
+from mindmap.collaboration import (
+    add_shared_map_connection,
+    compact_shared_map,
+    get_shared_map_name,
+    read_shared_map_token,
+    remove_shared_map_connection,
+)
+
+
+class MindMapSharedMapConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Send the batches applied to a shared mind map to a browser of its group.
+    """
+
+    shared_map = None
+    group_name = None
+
+    async def connect(self):
+        """
+        Join the Channels group of the shared mind map of the token, or close the connection.
+        """
+        query = parse_qs(self.scope.get("query_string", b"").decode("utf-8"))
+        try:
+            self.shared_map = read_shared_map_token(query.get("token", [""])[0])
+        except BadSignature:
+            await self.close(code=4403)
+            return
+
+        self.group_name = get_shared_map_name(self.shared_map["usage_key"], self.shared_map["group_id"])
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await sync_to_async(add_shared_map_connection)(self.shared_map["usage_key"], self.shared_map["group_id"])
+        await self.accept()
+
+    async def disconnect(self, code):
+        """
+        Leave the Channels group, and compact the shared mind map when the last browser of the group leaves.
+        """
+        if self.group_name is None:
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        usage_key, group_id = self.shared_map["usage_key"], self.shared_map["group_id"]
+        if await sync_to_async(remove_shared_map_connection)(usage_key, group_id):
+            return
+        await database_sync_to_async(compact_shared_map)(usage_key, group_id)
+
+    async def receive_json(self, content, **kwargs):
+        """
+        Ignore the messages of the browsers, which send their operations to the block handler.
+        """
+
+    async def mindmap_operations(self, event):
+        """
+        Send a batch broadcast by `broadcast_shared_map_operations` to the browser.
+        """
+        await self.send_json(event["batch"])
@@ -0,0 +1,32 @@
+"""
+Course groups definitions for Open edX Palm release.
+"""
+# pylint: disable=import-error
+from lms.djangoapps.teams.models import CourseTeamMembership
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.course_groups.cohorts import get_cohort
+
+
+def get_user_cohort_id(user, course_id):
+    """
+    Get the id of the cohort of a user in a course, without assigning one.
+
+    Returns:
+        int: The id of the cohort, None if the user is not in a cohort.
+    """
+    cohort = get_cohort(user, CourseKey.from_string(str(course_id)), assign=False)
+    return cohort.id if cohort else None
+
+
+def get_user_team_id(user, course_id):
+    """
+    Get the id of the team of a user in a course, the first one by id if the user is in teams of several teamsets.
+
+    Returns:
+        str: The id of the team, None if the user is not in a team.
+    """
+    membership = CourseTeamMembership.objects.filter(
+        user=user,
+        team__course_id=CourseKey.from_string(str(course_id)),
+    ).select_related("team").order_by("team__team_id").first()
+    return membership.team.team_id if membership else None
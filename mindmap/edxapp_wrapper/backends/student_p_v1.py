@@ -2,7 +2,11 @@
 Student module definitions for Open edX Palm release.
 """
 # pylint: disable=import-error
-from common.djangoapps.student.models import user_by_anonymous_id
+from functools import reduce
+from operator import or_
+
+from common.djangoapps.student.models import AnonymousUserId, user_by_anonymous_id
+from django.db.models import Q
 from lms.djangoapps.courseware.models import StudentModule
 
 
@@ -16,6 +20,49 @@ def get_user_by_anonymous_id(*args, **kwargs):
     return user_by_anonymous_id(*args, **kwargs)
 
 
+def get_users_by_anonymous_ids(anonymous_user_ids):
+    """
+    Get the users for a batch of anonymous ids in a single query.
+
+    Returns:
+        dict: User objects keyed by anonymous user id.
+    """
+    anonymous_users = AnonymousUserId.objects.filter(
+        anonymous_user_id__in=anonymous_user_ids,
+    ).select_related("user")
+    return {
+        anonymous_user.anonymous_user_id: anonymous_user.user
+        for anonymous_user in anonymous_users
+    }
+
+
+def get_block_anonymous_user_ids(course_id, usage_key, states_containing=(), username_prefix=None):
+    """
+    Get the anonymous ids of the users with a student module of a block, as a subquery.
+
+    Args:
+        course_id (CourseKey): The course of the block.
+        usage_key (UsageKey): The usage key of the block.
+        states_containing (iterable, optional): Only the users whose student
+            module state contains one of these texts.
+        username_prefix (str, optional): Only the users whose username starts
+            with this prefix, ignoring the case.
+
+    Returns:
+        QuerySet: The `anonymous_user_id` values of the users.
+    """
+    student_modules = StudentModule.objects.filter(course_id=course_id, module_state_key=usage_key)
+    if states_containing:
+        student_modules = student_modules.filter(reduce(or_, (Q(state__contains=text) for text in states_containing)))
+    anonymous_users = AnonymousUserId.objects.filter(
+        course_id=course_id,
+        user_id__in=student_modules.values("student_id"),
+    )
+    if username_prefix:
+        anonymous_users = anonymous_users.filter(user__username__istartswith=username_prefix)
+    return anonymous_users.values("anonymous_user_id")
+
+
 def get_student_module():
     """
     Get StudentModule model.
@@ -1,7 +1,11 @@
 """
 Xmodule definitions for Open edX Palm release.
 """
-from xmodule.util.duedate import get_extended_due_date  # pylint: disable=import-error
+# pylint: disable=import-error
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.util.duedate import get_extended_due_date
 
 
 def get_extended_due_date_util(*args, **kwargs):
@@ -12,3 +16,29 @@ def get_extended_due_date_util(*args, **kwargs):
         datetime.datetime: Extended due date for the problem.
     """
     return get_extended_due_date(*args, **kwargs)
+
+
+def get_course_blocks_util(course_id, category):
+    """
+    Get the blocks of a category in a course.
+
+    Returns:
+        list: The blocks of the draft branch of the course.
+    """
+    return modulestore().get_items(CourseKey.from_string(str(course_id)), qualifiers={"category": category})
+
+
+def update_block_util(block, user_id=None):
+    """
+    Save the settings and content of a block to the modulestore, and publish it.
+
+    Returns:
+        XBlock: The updated block.
+    """
+    if user_id is None:
+        user_id = ModuleStoreEnum.UserID.mgmt_command
+    store = modulestore()
+    block = store.update_item(block, user_id)
+    # The draft branch is updated, the block is published so the LMS serves it.
+    store.publish(block.location, user_id)
+    return block
@@ -0,0 +1,28 @@
+"""
+Course groups generalized definitions.
+"""
+
+from importlib import import_module
+from django.conf import settings
+
+
+def get_user_cohort_id_function(*args, **kwargs):
+    """Get the cohort of a user in a course."""
+
+    backend_function = settings.MINDMAP_COURSE_GROUPS_BACKEND
+    backend = import_module(backend_function)
+
+    return backend.get_user_cohort_id(*args, **kwargs)
+
+
+def get_user_team_id_function(*args, **kwargs):
+    """Get the team of a user in a course."""
+
+    backend_function = settings.MINDMAP_COURSE_GROUPS_BACKEND
+    backend = import_module(backend_function)
+
+    return backend.get_user_team_id(*args, **kwargs)
+
+
+get_user_cohort_id = get_user_cohort_id_function
+get_user_team_id = get_user_team_id_function
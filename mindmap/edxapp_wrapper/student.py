@@ -15,6 +15,24 @@ def get_anonymous_user_id_function(*args, **kwargs):
     return backend.get_user_by_anonymous_id(*args, **kwargs)
 
 
+def get_users_by_anonymous_ids_function(*args, **kwargs):
+    """Get users for a batch of anonymous ids."""
+
+    backend_function = settings.MINDMAP_STUDENT_MODULE_BACKEND
+    backend = import_module(backend_function)
+
+    return backend.get_users_by_anonymous_ids(*args, **kwargs)
+
+
+def get_block_anonymous_user_ids_function(*args, **kwargs):
+    """Get the anonymous ids of the users with a student module of a block."""
+
+    backend_function = settings.MINDMAP_STUDENT_MODULE_BACKEND
+    backend = import_module(backend_function)
+
+    return backend.get_block_anonymous_user_ids(*args, **kwargs)
+
+
 def get_student_module_function():
     """Get StudentModule model."""
 
@@ -26,3 +44,5 @@ def get_student_module_function():
 
 student_module = get_student_module_function
 user_by_anonymous_id = get_anonymous_user_id_function
+users_by_anonymous_ids = get_users_by_anonymous_ids_function
+block_anonymous_user_ids = get_block_anonymous_user_ids_function
@@ -16,3 +16,25 @@ def get_extended_due_date_function(*args, **kwargs):
 
 
 get_extended_due_date = get_extended_due_date_function
+
+
+def get_course_blocks_function(*args, **kwargs):
+    """Get the blocks of a type in a course."""
+
+    backend_function = settings.MINDMAP_XMODULE_BACKEND
+    backend = import_module(backend_function)
+
+    return backend.get_course_blocks_util(*args, **kwargs)
+
+
+def update_block_function(*args, **kwargs):
+    """Save the settings of a block to the modulestore and publish it."""
+
+    backend_function = settings.MINDMAP_XMODULE_BACKEND
+    backend = import_module(backend_function)
+
+    return backend.update_block_util(*args, **kwargs)
+
+
+get_course_blocks = get_course_blocks_function
+update_block = update_block_function
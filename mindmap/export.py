@@ -0,0 +1,226 @@
+"""
+Export of the submissions of a block to CSV or JSONL files.
+
+The submissions are read a batch at a time with keyset pagination over their
+ids, and turned into rows by a chain of generators, so the memory used by an
+export does not depend on the number of submissions.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+
+from django.db.models import Max
+from xblock.fields import DateTime
+
+from mindmap.blobs import get_answer_bodies
+from mindmap.edxapp_wrapper.student import student_module as StudentModule
+from mindmap.edxapp_wrapper.student import users_by_anonymous_ids
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FIELDS = (
+    "submission_id",
+    "student_id",
+    "username",
+    "timestamp",
+    "submission_status",
+    "raw_score",
+    "weighted_score",
+    "mindmap_student_body",
+)
+
+
+def count_submissions(course_id: str, item_id: str) -> int:
+    """
+    Return the number of submissions of a block.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    return Submission.objects.filter(student_item__course_id=course_id, student_item__item_id=item_id).count()
+
+
+def iter_submission_batches(course_id: str, item_id: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yield the submissions of a block in batches, ordered by id.
+
+    Each batch is fetched with a query starting after the last id of the
+    previous batch, which keeps the cost of every query constant.
+
+    Args:
+        course_id (str): The course of the block.
+        item_id (str): The item id of the block submissions.
+        batch_size (int, optional): The maximum number of submissions of each batch.
+
+    Yields:
+        list: The Submission objects of each batch.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    last_id = 0
+    while True:
+        batch = list(Submission.objects.select_related("student_item").filter(
+            student_item__course_id=course_id,
+            student_item__item_id=item_id,
+            id__gt=last_id,
+        ).order_by("id")[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def iter_export_rows(course_id: str, usage_id: str, batch_size: int = EXPORT_BATCH_SIZE, points: int = None):
+    """
+    Yield a row for every submission of a block.
+
+    The status and the scores of a learner are only set in the row of the
+    latest submission of the learner, the previous submissions were replaced.
+    The raw score is read from the state of the learner, or computed from the
+    weighted score when the state has none and the points of the block are given.
+
+    Args:
+        course_id (str): The course of the block.
+        usage_id (str): The usage id of the block, also the item id of its submissions.
+        batch_size (int, optional): The number of submissions loaded at a time.
+        points (int, optional): The maximum raw score of the block.
+
+    Yields:
+        dict: The values of `EXPORT_FIELDS` for each submission.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import ScoreSummary, Submission  # pylint: disable=import-outside-toplevel
+
+    for batch in iter_submission_batches(course_id, usage_id, batch_size):
+        student_item_ids = {submission.student_item_id for submission in batch}
+        latest_submission_ids = set(
+            Submission.objects.filter(student_item_id__in=student_item_ids).values(
+                "student_item_id",
+            ).annotate(latest_id=Max("id")).values_list("latest_id", flat=True)
+        )
+        latest_scores = {
+            summary.student_item_id: summary.latest
+            for summary in ScoreSummary.objects.select_related("latest").filter(
+                student_item_id__in=student_item_ids,
+            )
+        }
+        users = users_by_anonymous_ids(list({submission.student_item.student_id for submission in batch}))
+        student_modules = {
+            student_module.student_id: student_module
+            for student_module in StudentModule().objects.filter(  # pylint: disable=no-member
+                course_id=course_id,
+                module_state_key=usage_id,
+                student_id__in=[user.id for user in users.values()],
+            )
+        }
+
+        bodies = get_answer_bodies([submission.answer for submission in batch])
+
+        for submission, body in zip(batch, bodies):
+            user = users.get(submission.student_item.student_id)
+            row = {
+                "submission_id": str(submission.uuid),
+                "student_id": submission.student_item.student_id,
+                "username": user.username if user else None,
+                "timestamp": submission.created_at.strftime(DateTime.DATETIME_FORMAT),
+                "submission_status": None,
+                "raw_score": None,
+                "weighted_score": None,
+                "mindmap_student_body": body,
+            }
+            if submission.id in latest_submission_ids:
+                student_module = student_modules.get(user.id) if user else None
+                state = json.loads(student_module.state) if student_module else {}
+                score = latest_scores.get(submission.student_item_id)
+                row["submission_status"] = state.get("submission_status")
+                row["raw_score"] = state.get("raw_score")
+                # By convention, scores are hidden if "points possible" is set to 0.
+                if score and score.submission_id == submission.id and not score.is_hidden():
+                    row["weighted_score"] = score.points_earned
+                    if row["raw_score"] is None and points is not None:
+                        row["raw_score"] = round((score.points_earned * points) / score.points_possible)
+            yield row
+
+
+def write_csv(rows, stream) -> int:
+    """
+    Write the rows to a text stream as CSV, with a header.
+
+    Returns:
+        int: The number of rows written.
+    """
+    writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+    return count
+
+
+def write_jsonl(rows, stream) -> int:
+    """
+    Write the rows to a text stream as JSON lines, with the mind maps as objects.
+
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        if row["mindmap_student_body"] is not None:
+            row = dict(row, mindmap_student_body=json.loads(row["mindmap_student_body"]))
+        stream.write(json.dumps(row))
+        stream.write("\n")
+    return count
+
+
+WRITERS = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+}
+
+
+def track_progress(rows, callback, every: int = EXPORT_BATCH_SIZE):
+    """
+    Yield the rows, calling `callback` with the number of rows yielded every `every` rows.
+    """
+    for count, row in enumerate(rows, start=1):
+        yield row
+        if count % every == 0:
+            callback(count)
+
+
+def export_submissions(
+    stream,
+    course_id: str,
+    usage_id: str,
+    export_format: str,
+    *,
+    progress_callback=None,
+    points: int = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """
+    Write every submission of a block to a text stream.
+
+    Args:
+        stream (file): The text stream to write to.
+        course_id (str): The course of the block.
+        usage_id (str): The usage id of the block.
+        export_format (str): One of `EXPORT_FORMATS`.
+        progress_callback (callable, optional): Called with the number of
+            submissions written after each batch.
+        points (int, optional): The maximum raw score of the block, to compute
+            the raw scores missing from the learner states.
+        batch_size (int, optional): The number of submissions loaded at a time.
+
+    Returns:
+        int: The number of submissions written.
+    """
+    rows = iter_export_rows(course_id, usage_id, batch_size, points)
+    if progress_callback:
+        rows = track_progress(rows, progress_callback, batch_size)
+    return WRITERS[export_format](rows, stream)
@@ -0,0 +1,473 @@
+"""
+Batched loading of the data shown in the instructor grading screen, and
+batched writing of the grades entered in it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import CharField, Count, F, OuterRef, Subquery
+from django.db.models.functions import MD5
+from xblock.fields import DateTime
+
+from mindmap.blobs import LEGACY_ANSWER_KEY, get_answer_bodies, get_answer_size
+from mindmap.edxapp_wrapper.student import block_anonymous_user_ids
+from mindmap.edxapp_wrapper.student import student_module as StudentModule
+from mindmap.edxapp_wrapper.student import users_by_anonymous_ids
+from mindmap.utils import SubmissionStatus, chunked, utcnow
+
+log = logging.getLogger(__name__)
+
+# Maximum number of ids sent in a single `IN` clause.
+GRADING_BATCH_SIZE = 500
+
+GRADABLE_STATUSES = (
+    SubmissionStatus.COMPLETED.value,
+    SubmissionStatus.SUBMITTED.value,
+)
+
+GRADING_PAGE_SIZE = 25
+GRADING_MAX_PAGE_SIZE = 100
+
+# Sort keys accepted by the paginated grading API, a leading "-" reverses the order.
+GRADING_SORT_FIELDS = ("timestamp", "raw_score")
+
+# Maximum number of grades entered by a single bulk grading request.
+GRADING_MAX_BULK_ITEMS = GRADING_BATCH_SIZE
+
+
+def get_state_text(name: str, value) -> str:
+    """
+    Return the text of a field in the JSON of the student module states, to search the states for it.
+    """
+    # The states are written with the default separators of `json.dumps`.
+    return json.dumps({name: value})[1:-1]
+
+
+class GradingDataLoader:
+    """
+    Load the grading information of every learner of a block with bulk queries.
+
+    The submissions, scores, users and student modules of the block are
+    fetched with a fixed number of queries (one query per batch of
+    `batch_size` learners for users and student modules) and joined in memory.
+    """
+
+    def __init__(self, block, batch_size: int = GRADING_BATCH_SIZE, include_answers: bool = True):
+        self.block = block
+        self.batch_size = batch_size
+        self.include_answers = include_answers
+
+    def get_submissions(self):
+        """
+        Return the submissions of the block, annotated with the hash of their answer.
+
+        Returns:
+            QuerySet: The submissions, without their answer if the answers are not included.
+        """
+        # Lazy import: import here to avoid app not ready errors
+        from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+        # The answers reference the blob of their mind map, so identical mind
+        # maps have the same answer hash.
+        submissions = Submission.objects.select_related("student_item").filter(
+            student_item__course_id=self.block.block_course_id,
+            student_item__item_id=self.block.block_id,
+        ).annotate(
+            answer_hash=MD5("answer", output_field=CharField()),
+        )
+        if not self.include_answers:
+            # Only the size of the mind maps and the hash of the answers are
+            # sent, the mind maps are fetched on demand with `get_submission_answer`.
+            submissions = submissions.defer("answer").annotate(answer_size=get_answer_size())
+        return submissions
+
+    def get_latest_submissions(self) -> dict:
+        """
+        Return the most recent submission of each learner of the block.
+
+        Returns:
+            dict: Submission objects keyed by anonymous student id.
+        """
+        latest_submissions = {}
+        for submission in self.get_submissions().order_by("student_item_id", "-submitted_at", "-id"):
+            latest_submissions.setdefault(submission.student_item.student_id, submission)
+        return latest_submissions
+
+    def get_gradable_submissions(self, status: str = None, username: str = None):
+        """
+        Return the latest submission of each learner of the block whose submission can be graded.
+
+        The learners are filtered by the database, with the latest submission,
+        the visible score and the learners with a gradable submission status
+        read in subqueries.
+
+        Args:
+            status (str, optional): Only the learners with this submission status.
+            username (str, optional): Only the learners whose username starts with this prefix.
+
+        Returns:
+            QuerySet: The submissions annotated with the `weighted_score` of the learners.
+        """
+        # Lazy import: import here to avoid app not ready errors
+        from submissions.models import ScoreSummary, Submission  # pylint: disable=import-outside-toplevel
+
+        latest_submission = Submission.objects.filter(
+            student_item=OuterRef("student_item"),
+        ).order_by("-submitted_at", "-id").values("id")[:1]
+        # By convention, scores are hidden if "points possible" is set to 0.
+        visible_score = ScoreSummary.objects.filter(
+            student_item=OuterRef("student_item"),
+            latest__points_possible__gt=0,
+        ).values("latest__points_earned")[:1]
+        # The submission status is only stored in the JSON state of the student modules.
+        anonymous_user_ids = block_anonymous_user_ids(
+            self.block.course_id,
+            self.block.location,
+            states_containing=[
+                get_state_text("submission_status", gradable_status)
+                for gradable_status in ([status] if status else GRADABLE_STATUSES)
+            ],
+            username_prefix=username,
+        )
+        return self.get_submissions().filter(
+            id=Subquery(latest_submission),
+            student_item__student_id__in=anonymous_user_ids,
+        ).annotate(weighted_score=Subquery(visible_score))
+
+    def get_weighted_scores(self) -> dict:
+        """
+        Return the latest visible score of each learner of the block.
+
+        Returns:
+            dict: Points earned keyed by anonymous student id.
+        """
+        # Lazy import: import here to avoid app not ready errors
+        from submissions.models import ScoreSummary  # pylint: disable=import-outside-toplevel
+
+        summaries = ScoreSummary.objects.select_related("student_item", "latest").filter(
+            student_item__course_id=self.block.block_course_id,
+            student_item__item_id=self.block.block_id,
+        )
+        return {
+            summary.student_item.student_id: summary.latest.points_earned
+            for summary in summaries
+            # By convention, scores are hidden if "points possible" is set to 0.
+            if not summary.latest.is_hidden()
+        }
+
+    def get_student_modules(self, users) -> dict:
+        """
+        Return the student modules of the block for the given users.
+
+        Args:
+            users (list): The users to get the student modules for.
+
+        Returns:
+            dict: StudentModule objects keyed by user id.
+        """
+        # pylint: disable=no-member
+        student_modules = StudentModule().objects.filter(
+            course_id=self.block.course_id,
+            module_state_key=self.block.location,
+            student_id__in=[user.id for user in users],
+        )
+        return {student_module.student_id: student_module for student_module in student_modules}
+
+    def iter_learners(self, submissions: dict = None, weighted_scores: dict = None):
+        """
+        Join the submissions of the block with their users, modules and scores.
+
+        The learners without a student module have no submission status to
+        grade, they are left out as they are left out of the count of `get_page`.
+
+        Args:
+            submissions (dict, optional): The submissions keyed by anonymous
+                student id, the latest submission of every learner by default.
+            weighted_scores (dict, optional): The weighted scores keyed by
+                anonymous student id, the latest visible scores by default.
+
+        Yields:
+            tuple: The submission, user, student module state, student module
+            and weighted score of each learner with a submission.
+        """
+        if submissions is None:
+            submissions = self.get_latest_submissions()
+        if weighted_scores is None:
+            weighted_scores = self.get_weighted_scores()
+
+        for anonymous_ids in chunked(submissions, self.batch_size):
+            users = users_by_anonymous_ids(anonymous_ids)
+            student_modules = self.get_student_modules(users.values())
+            for anonymous_id in anonymous_ids:
+                user = users.get(anonymous_id)
+                student_module = student_modules.get(user.id) if user else None
+                if not student_module:
+                    log.warning("Submission of %s in %s without a student module", anonymous_id, self.block.location)
+                    continue
+                state = json.loads(student_module.state)
+                yield (
+                    submissions[anonymous_id],
+                    user,
+                    state,
+                    student_module,
+                    weighted_scores.get(anonymous_id),
+                )
+
+    def build_assignments(self, learners) -> list:
+        """
+        Return the rows of the learners whose submission can be graded.
+
+        Args:
+            learners (iterable): The learners, as yielded by `iter_learners`.
+
+        Returns:
+            list: The rows displayed on the grading screen, without `identical_submissions`.
+        """
+        assignments = []
+        answers = []
+        for submission, user, state, student_module, weighted_score in learners:
+            if state.get("submission_status") not in GRADABLE_STATUSES:
+                continue
+            raw_score = self.block.get_raw_score_from_weighted(weighted_score)
+            assignment = {
+                "module_id": student_module.id,
+                "student_id": submission.student_item.student_id,
+                "submission_id": str(submission.uuid),
+                "username": user.username,
+                "timestamp": submission.created_at.strftime(DateTime.DATETIME_FORMAT),
+                "raw_score": state.get("raw_score", raw_score),
+                "max_raw_score": self.block.points,
+                "weight": self.block.weight,
+                "weighted_score": weighted_score,
+                "submission_status": state.get("submission_status"),
+            }
+            assignment["answer_hash"] = submission.answer_hash
+            if self.include_answers:
+                answers.append(submission.answer)
+            else:
+                assignment["answer_size"] = submission.answer_size
+            assignments.append(assignment)
+
+        if self.include_answers:
+            for assignment, body in zip(assignments, get_answer_bodies(answers)):
+                assignment["answer_body"] = {LEGACY_ANSWER_KEY: body}
+        return assignments
+
+    def get_assignments(self) -> list:
+        """
+        Return the assignment information of every submitted learner.
+
+        The rows of identical mind maps share their `answer_hash`, and count
+        them in `identical_submissions`.
+
+        Returns:
+            list: The rows displayed on the grading screen.
+        """
+        assignments = self.build_assignments(self.iter_learners())
+        identical_submissions = Counter(assignment["answer_hash"] for assignment in assignments)
+        for assignment in assignments:
+            assignment["identical_submissions"] = identical_submissions[assignment["answer_hash"]]
+        return assignments
+
+    def get_page(
+        self,
+        offset: int = 0,
+        page_size: int = GRADING_PAGE_SIZE,
+        *,
+        status: str = None,
+        username: str = None,
+        sort: str = "-timestamp",
+        answer_hash: str = None,
+    ) -> dict:
+        """
+        Return a filtered and sorted page of assignments.
+
+        The assignments are filtered, sorted and sliced by the database, and
+        the rows are only built for the learners of the page.
+
+        Args:
+            offset (int): The number of assignments to skip.
+            page_size (int): The maximum number of assignments to return.
+            status (str, optional): Only return assignments with this submission status.
+            username (str, optional): Only return assignments whose username starts with this prefix.
+            sort (str): The field to sort by, prefixed with "-" for descending order.
+            answer_hash (str, optional): Only return assignments with this mind map.
+
+        Returns:
+            dict: The page of assignments along with the pagination information.
+        """
+        submissions = self.get_gradable_submissions(status, username)
+        if answer_hash:
+            submissions = submissions.filter(answer_hash=answer_hash)
+        # Rows without a value for the sort field are always listed last.
+        field = F("weighted_score" if sort.lstrip("-") == "raw_score" else "created_at")
+        order = field.desc(nulls_last=True) if sort.startswith("-") else field.asc(nulls_last=True)
+        submissions = submissions.order_by(order, "id")
+
+        count = submissions.count()
+        page = {submission.student_item.student_id: submission for submission in submissions[offset:offset + page_size]}
+        assignments = self.build_assignments(self.iter_learners(
+            page, {student_id: submission.weighted_score for student_id, submission in page.items()},
+        ))
+        identical_submissions = dict(self.get_gradable_submissions().filter(
+            answer_hash__in={assignment["answer_hash"] for assignment in assignments},
+        ).values("answer_hash").annotate(count=Count("id")).values_list("answer_hash", "count"))
+        for assignment in assignments:
+            assignment["identical_submissions"] = identical_submissions.get(assignment["answer_hash"], 1)
+
+        next_offset = offset + page_size
+        return {
+            "assignments": assignments,
+            "count": count,
+            "offset": offset,
+            "page_size": page_size,
+            "next_offset": next_offset if next_offset < count else None,
+        }
+
+
+def get_submission_answer(block, submission_id):
+    """
+    Return a submission of the block along with the hash of its answer.
+
+    Args:
+        block (MindMapXBlock): The block the submission belongs to.
+        submission_id (str): The uuid of the submission.
+
+    Returns:
+        Submission: The submission annotated with `answer_hash`, or None if it
+        does not exist or belongs to another block.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    return Submission.objects.select_related("student_item").annotate(
+        answer_hash=MD5("answer", output_field=CharField()),
+    ).filter(
+        uuid=submission_id,
+        student_item__course_id=block.block_course_id,
+        student_item__item_id=block.block_id,
+    ).first()
+
+
+def parse_grade_item(item, max_score: int) -> tuple:
+    """
+    Validate a grade sent to the bulk grading handler.
+
+    Args:
+        item (dict): The grade, with the `submission_id`, `module_id` and `grade` keys.
+        max_score (int): The maximum raw score of the block.
+
+    Returns:
+        tuple: The submission uuid, the student module id and the raw score.
+
+    Raises:
+        ValueError: If the grade is not valid.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Grades must be objects")
+    if not item.get("submission_id") or item.get("module_id") is None:
+        raise ValueError("Missing required parameters")
+    try:
+        submission_id = str(uuid.UUID(str(item["submission_id"])))
+        module_id = int(item["module_id"])
+        raw_score = int(item.get("grade", 0))
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid submission id, module id or grade") from exc
+    if raw_score < 0:
+        raise ValueError("Score cannot be negative")
+    if raw_score > max_score:
+        raise ValueError("Score cannot be greater than max score")
+    return submission_id, module_id, raw_score
+
+
+def enter_grades(block, items: list) -> list:
+    """
+    Enter the grades of many submissions of the block.
+
+    Every grade is validated first: the submission must belong to the block
+    and the student module to the learner of the submission. The valid grades
+    are then written in a single transaction, the scores with
+    `submissions.api.set_score` so the score signals are still sent, and the
+    student modules with a single bulk update.
+
+    Args:
+        block (MindMapXBlock): The block the submissions belong to.
+        items (list): The grades, as accepted by `parse_grade_item`.
+
+    Returns:
+        list: The result of each grade, in the order of the items.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.api import set_score  # pylint: disable=import-outside-toplevel
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    results = []
+    grades = {}
+    for item in items:
+        result = {"submission_id": item.get("submission_id") if isinstance(item, dict) else None, "success": True}
+        results.append(result)
+        try:
+            submission_id, module_id, raw_score = parse_grade_item(item, block.points)
+            if submission_id in grades:
+                raise ValueError("Duplicated submission")
+        except ValueError as exc:
+            result.update(success=False, error=str(exc))
+            continue
+        grades[submission_id] = (result, module_id, raw_score)
+
+    if not grades:
+        return results
+
+    with transaction.atomic():
+        submissions = {
+            str(submission.uuid): submission
+            for submission in Submission.objects.select_related("student_item").filter(
+                uuid__in=list(grades),
+                student_item__course_id=block.block_course_id,
+                student_item__item_id=block.block_id,
+            )
+        }
+        student_modules = {
+            student_module.id: student_module
+            for student_module in StudentModule().objects.filter(  # pylint: disable=no-member
+                pk__in=[module_id for _result, module_id, _raw_score in grades.values()],
+                course_id=block.course_id,
+                module_state_key=block.location,
+            )
+        }
+        users = users_by_anonymous_ids(
+            [submission.student_item.student_id for submission in submissions.values()]
+        )
+
+        updated_modules = []
+        now = utcnow()
+        for submission_id, (result, module_id, raw_score) in grades.items():
+            submission = submissions.get(submission_id)
+            student_module = student_modules.get(module_id)
+            user = users.get(submission.student_item.student_id) if submission else None
+            if not submission:
+                result.update(success=False, error="Submission not found")
+                continue
+            if not student_module or not user or student_module.student_id != user.id:
+                result.update(success=False, error="Student module not found for the submission")
+                continue
+
+            set_score(submission_id, round((raw_score / block.points) * block.weight), block.weight)
+            state = json.loads(student_module.state)
+            state["submission_status"] = SubmissionStatus.COMPLETED.value
+            state["raw_score"] = raw_score
+            student_module.state = json.dumps(state)
+            # bulk_update does not set the auto_now fields.
+            student_module.modified = now
+            updated_modules.append(student_module)
+
+        StudentModule().objects.bulk_update(  # pylint: disable=no-member
+            updated_modules, ["state", "modified"], batch_size=GRADING_BATCH_SIZE,
+        )
+    return results
@@ -0,0 +1,305 @@
+"""
+Chunked jobs run on many learners of a block, with a progress that can be polled.
+
+The jobs are started by `mindmap.tasks`, queued with Celery when it is
+installed, as in the Open edX platform, and run in the request otherwise. Their progress is stored in the Django cache, so it is shared
+by the workers and the LMS processes.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import logging
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from mindmap.analytics import invalidate_grading_summary
+from mindmap.edxapp_wrapper.student import student_module as StudentModule
+from mindmap.edxapp_wrapper.student import users_by_anonymous_ids
+from mindmap.export import export_submissions
+from mindmap.utils import SubmissionStatus, chunked, utcnow
+
+log = logging.getLogger(__name__)
+
+# Number of learners reset in each transaction of a job.
+JOB_BATCH_SIZE = 100
+# The progress of a job is kept for a day after its last update.
+JOB_PROGRESS_TIMEOUT = 60 * 60 * 24
+# Maximum number of errors listed in the progress of a job, the others are only counted.
+JOB_MAX_ERRORS = 100
+
+# Directory and path of the export files in the default storage. The files
+# contain usernames, they are deleted once their job progress has expired.
+EXPORT_DIR = "mindmap/exports"
+EXPORT_FILE_NAME = EXPORT_DIR + "/{job_id}.{export_format}"
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+def get_job_cache_key(job_id: str) -> str:
+    """
+    Return the cache key of the progress of a job.
+    """
+    return f"mindmap.job.{job_id}"
+
+
+def get_job_progress(job_id: str) -> dict:
+    """
+    Return the progress of a job.
+
+    Args:
+        job_id (str): The id of the job.
+
+    Returns:
+        dict: The progress of the job, or None if it does not exist or expired.
+    """
+    return cache.get(get_job_cache_key(job_id))
+
+
+def save_job_progress(progress: dict, **changes) -> dict:
+    """
+    Update and save the progress of a job.
+    """
+    progress.update(changes)
+    cache.set(get_job_cache_key(progress["job_id"]), progress, JOB_PROGRESS_TIMEOUT)
+    return progress
+
+
+def add_job_error(progress: dict, **error) -> None:
+    """
+    Count an error of a job, and list it in the progress unless `JOB_MAX_ERRORS` are already listed.
+    """
+    progress["error_count"] = progress.get("error_count", 0) + 1
+    if len(progress["errors"]) < JOB_MAX_ERRORS:
+        progress["errors"].append(error)
+
+
+def delete_expired_exports(max_age: int = JOB_PROGRESS_TIMEOUT) -> int:
+    """
+    Delete the export files older than the progress of their job, which can no longer be downloaded.
+
+    Args:
+        max_age (int, optional): The age in seconds from which the files are deleted.
+
+    Returns:
+        int: The number of files deleted.
+    """
+    try:
+        _directories, file_names = default_storage.listdir(EXPORT_DIR)
+    except FileNotFoundError:
+        return 0
+
+    expired = utcnow() - timedelta(seconds=max_age)
+    deleted = 0
+    for file_name in file_names:
+        path = f"{EXPORT_DIR}/{file_name}"
+        if default_storage.get_modified_time(path) < expired:
+            default_storage.delete(path)
+            deleted += 1
+    return deleted
+
+
+def get_block_student_ids(block) -> list:
+    """
+    Return the anonymous ids of the learners with a submission to the block.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import StudentItem  # pylint: disable=import-outside-toplevel
+
+    return list(StudentItem.objects.filter(
+        course_id=block.block_course_id,
+        item_id=block.block_id,
+        submission__isnull=False,
+    ).values_list("student_id", flat=True).distinct().order_by("student_id"))
+
+
+def create_job(block, total: int, **attributes) -> dict:
+    """
+    Save the initial progress of a new job of the block.
+
+    Args:
+        block (MindMapXBlock): The block the job runs on.
+        total (int): The number of items the job processes.
+        **attributes: Other attributes of the job.
+
+    Returns:
+        dict: The progress of the job.
+    """
+    return save_job_progress({
+        "job_id": uuid.uuid4().hex,
+        "usage_id": str(block.location),
+        "status": JOB_PENDING,
+        "total": total,
+        "processed": 0,
+        "errors": [],
+        "error_count": 0,
+        **attributes,
+    })
+
+
+def run_job(task, function, progress: dict, **kwargs) -> dict:
+    """
+    Queue a job with Celery if it is available, otherwise run it right away.
+
+    Args:
+        task (Task): The Celery task of the job, None without Celery.
+        function (callable): The function of the job.
+        progress (dict): The initial progress of the job.
+        **kwargs: The arguments of the job.
+
+    Returns:
+        dict: The progress of the job.
+    """
+    if task:
+        task.delay(job_id=progress["job_id"], **kwargs)
+        return progress
+    return function(job_id=progress["job_id"], **kwargs)
+
+
+def reset_grades(
+    job_id: str,
+    course_id: str,
+    usage_id: str,
+    *,
+    item_id: str,
+    student_ids: list,
+    reopen: bool = False,
+) -> dict:
+    """
+    Remove the grades of many learners of a block, a batch of learners at a time.
+
+    The scores of a batch are reset with `submissions.api.reset_score`, so the
+    score signals are still sent, and their student modules are updated with
+    a single bulk update in the same transaction.
+
+    Args:
+        job_id (str): The id of the job, to report its progress.
+        course_id (str): The course of the block.
+        usage_id (str): The usage id of the block.
+        item_id (str): The item id of the block submissions.
+        student_ids (list): The anonymous ids of the learners.
+        reopen (bool, optional): Whether the learners can submit again.
+
+    Returns:
+        dict: The progress of the job.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.api import reset_score  # pylint: disable=import-outside-toplevel
+
+    progress = get_job_progress(job_id) or {
+        "job_id": job_id,
+        "usage_id": usage_id,
+        "total": len(student_ids),
+        "processed": 0,
+        "errors": [],
+        "error_count": 0,
+    }
+    save_job_progress(progress, status=JOB_RUNNING)
+    status = SubmissionStatus.NOT_ATTEMPTED.value if reopen else SubmissionStatus.SUBMITTED.value
+
+    try:
+        for batch in chunked(student_ids, JOB_BATCH_SIZE):
+            with transaction.atomic():
+                users = users_by_anonymous_ids(batch)
+                student_modules = {
+                    student_module.student_id: student_module
+                    for student_module in StudentModule().objects.filter(  # pylint: disable=no-member
+                        course_id=course_id,
+                        module_state_key=usage_id,
+                        student_id__in=[user.id for user in users.values()],
+                    )
+                }
+
+                updated_modules = []
+                now = utcnow()
+                for student_id in batch:
+                    user = users.get(student_id)
+                    student_module = student_modules.get(user.id) if user else None
+                    if not student_module:
+                        add_job_error(progress, student_id=student_id, error="Student module not found")
+                        continue
+
+                    reset_score(student_id, course_id, item_id)
+                    state = json.loads(student_module.state)
+                    state["submission_status"] = status
+                    if reopen:
+                        state.pop("raw_score", None)
+                    student_module.state = json.dumps(state)
+                    # bulk_update does not set the auto_now fields.
+                    student_module.modified = now
+                    updated_modules.append(student_module)
+
+                StudentModule().objects.bulk_update(  # pylint: disable=no-member
+                    updated_modules, ["state", "modified"],
+                )
+            save_job_progress(progress, processed=progress["processed"] + len(batch))
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Error resetting the grades of %s [job: %s]", usage_id, job_id)
+        return save_job_progress(progress, status=JOB_FAILED)
+    finally:
+        invalidate_grading_summary(item_id)
+
+    return save_job_progress(progress, status=JOB_COMPLETED)
+
+
+def export_block_submissions(
+    job_id: str,
+    course_id: str,
+    usage_id: str,
+    export_format: str,
+    *,
+    points: int = None,
+) -> dict:
+    """
+    Export every submission of a block to a file of the default storage.
+
+    The file is written to a temporary file as the submissions are read, and
+    then saved to the storage, whose name is set as `file_name` in the progress.
+
+    Args:
+        job_id (str): The id of the job, to report its progress.
+        course_id (str): The course of the block.
+        usage_id (str): The usage id of the block.
+        export_format (str): One of `mindmap.export.EXPORT_FORMATS`.
+        points (int, optional): The maximum raw score of the block.
+
+    Returns:
+        dict: The progress of the job.
+    """
+    progress = get_job_progress(job_id) or {
+        "job_id": job_id, "usage_id": usage_id, "total": None, "processed": 0, "errors": [], "error_count": 0,
+    }
+    save_job_progress(progress, status=JOB_RUNNING)
+
+    try:
+        with tempfile.TemporaryFile() as export_file:
+            stream = io.TextIOWrapper(export_file, encoding="utf-8", newline="")
+            count = export_submissions(
+                stream,
+                course_id,
+                usage_id,
+                export_format,
+                progress_callback=lambda processed: save_job_progress(progress, processed=processed),
+                points=points,
+            )
+            stream.flush()
+            stream.detach()
+            export_file.seek(0)
+            file_name = default_storage.save(
+                EXPORT_FILE_NAME.format(job_id=job_id, export_format=export_format), File(export_file),
+            )
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Error exporting the submissions of %s [job: %s]", usage_id, job_id)
+        return save_job_progress(progress, status=JOB_FAILED)
+
+    return save_job_progress(progress, status=JOB_COMPLETED, processed=count, file_name=file_name)
@@ -0,0 +1,30 @@
+"""
+Delete the submission exports which can no longer be downloaded from the default storage.
+
+Example:
+    ./manage.py lms mindmap_delete_expired_exports --max-age 3600
+"""
+
+from django.core.management.base import BaseCommand
+
+from mindmap.jobs import JOB_PROGRESS_TIMEOUT, delete_expired_exports
+
+
+class Command(BaseCommand):
+    """
+    Delete the export files written by the `export_submissions` jobs once their progress has expired.
+    """
+
+    help = "Delete the submission exports of the Mind Map blocks older than the progress of their job."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=JOB_PROGRESS_TIMEOUT,
+            help="The age in seconds from which the exports are deleted.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = delete_expired_exports(options["max_age"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired exports"))
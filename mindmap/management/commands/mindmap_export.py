@@ -0,0 +1,35 @@
+"""
+Export the mind maps of every Mind Map block of a course to an archive.
+
+Example:
+    ./manage.py cms mindmap_export course-v1:edX+Demo+2024 demo.jsonl.gz --batch-size 2000
+"""
+
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from mindmap.archive import ARCHIVE_BATCH_SIZE, export_course
+
+
+class Command(BaseCommand):
+    """
+    Write the `mindmap_body` of the blocks and the learner mind maps of a course to an archive.
+    """
+
+    help = "Export the mind maps of every Mind Map block of a course, and of its learners, to a gzip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id", help="The course to export.")
+        parser.add_argument("output", help="The path of the archive.")
+        parser.add_argument(
+            "--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="The number of learner states read at a time.",
+        )
+
+    def handle(self, *args, **options):
+        def report_progress(count):
+            self.stdout.write(f"Read {count} learner states")
+
+        with gzip.open(options["output"], "wt", encoding="utf-8") as output:
+            count = export_course(output, options["course_id"], options["batch_size"], report_progress)
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} blocks and learner mind maps to {options['output']}"))
@@ -0,0 +1,48 @@
+"""
+Export every submission of a Mind Map block to a CSV or JSONL file.
+
+Example:
+    ./manage.py lms mindmap_export_submissions course-v1:edX+Demo+2024 \
+        block-v1:edX+Demo+2024+type@mindmap+block@1234 --format jsonl --output submissions.jsonl
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from mindmap.export import EXPORT_FORMATS, export_submissions
+
+
+class Command(BaseCommand):
+    """
+    Write the submissions of a block to a file, or to the standard output.
+    """
+
+    help = "Export every submission of a Mind Map block to a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id", help="The course of the block.")
+        parser.add_argument("usage_id", help="The usage id of the block.")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="The format of the file.")
+        parser.add_argument("--output", default="-", help="The path of the file, '-' for the standard output.")
+        parser.add_argument(
+            "--points",
+            type=int,
+            help="The maximum raw score of the block, to compute the raw scores missing from the learner states.",
+        )
+
+    def handle(self, *args, **options):
+        def report_progress(count):
+            self.stderr.write(f"Exported {count} submissions")
+
+        export_options = {"progress_callback": report_progress, "points": options["points"]}
+        if options["output"] == "-":
+            count = export_submissions(
+                sys.stdout, options["course_id"], options["usage_id"], options["format"], **export_options,
+            )
+        else:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                count = export_submissions(
+                    output, options["course_id"], options["usage_id"], options["format"], **export_options,
+                )
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} submissions of {options['usage_id']}"))
@@ -0,0 +1,47 @@
+"""
+Restore the mind maps of an archive written by `mindmap_export` into a course.
+
+Example:
+    ./manage.py cms mindmap_import course-v1:edX+Demo+2025 demo.jsonl.gz --batch-size 2000
+"""
+
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mindmap.archive import ARCHIVE_BATCH_SIZE, import_course
+
+
+class Command(BaseCommand):
+    """
+    Restore the `mindmap_body` of the blocks and the learner mind maps of a course from an archive.
+    """
+
+    help = "Restore the mind maps of an archive written by mindmap_export into the Mind Map blocks of a course."
+
+    def add_arguments(self, parser):
+        parser.add_argument("course_id", help="The course to restore the mind maps into.")
+        parser.add_argument("input", help="The path of the archive.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="The number of learner states written at a time.",
+        )
+        parser.add_argument("--user-id", type=int, help="The user saving the blocks to the modulestore.")
+
+    def handle(self, *args, **options):
+        def report_progress(count):
+            self.stdout.write(f"Restored {count} learner states")
+
+        try:
+            with gzip.open(options["input"], "rt", encoding="utf-8") as archive:
+                stats = import_course(
+                    archive, options["course_id"], options["batch_size"], report_progress, options["user_id"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not restore {options['input']}: {exc}") from exc
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {stats['blocks']} blocks and {stats['states']} learner states, "
+            f"skipped {stats['skipped']} lines of blocks missing from the course"
+        ))
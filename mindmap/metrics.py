@@ -0,0 +1,294 @@
+"""
+Instrumentation of the handlers and views of the block.
+
+The handlers and views decorated with `instrument` report, labelled with
+their name:
+
+- `mindmap_handler_duration_seconds`: their latency;
+- `mindmap_handler_request_bytes` and `mindmap_handler_response_bytes`: the
+  size of the request body and of the response or fragment content;
+- `mindmap_handler_queries`: the number of database queries on the tables of
+  the submissions API and on the student modules, labelled by `source`;
+- `mindmap_mind_map_nodes`: the number of nodes of the mind maps received.
+
+The observations are sent to the backend set in the `MINDMAP_METRICS_BACKEND`
+setting: `NullMetricsBackend` by default, which disables the
+instrumentation, `InMemoryMetricsBackend`, or `PrometheusMetricsBackend`
+when `prometheus_client` is installed. Another backend only has to
+implement `observe`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from mindmap.profiling import profile_call, should_profile
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+DEFAULT_METRICS_BACKEND = "mindmap.metrics.NullMetricsBackend"
+
+HANDLER_DURATION = "mindmap_handler_duration_seconds"
+HANDLER_REQUEST_BYTES = "mindmap_handler_request_bytes"
+HANDLER_RESPONSE_BYTES = "mindmap_handler_response_bytes"
+HANDLER_QUERIES = "mindmap_handler_queries"
+MIND_MAP_NODES = "mindmap_mind_map_nodes"
+
+SIZE_BUCKETS = tuple(4 ** exponent for exponent in range(4, 13))
+METRICS = {
+    HANDLER_DURATION: {
+        "description": "Latency of the Mind Map handlers and views.",
+        "labels": ("handler",),
+        "buckets": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    },
+    HANDLER_REQUEST_BYTES: {
+        "description": "Size of the request bodies of the Mind Map handlers.",
+        "labels": ("handler",),
+        "buckets": SIZE_BUCKETS,
+    },
+    HANDLER_RESPONSE_BYTES: {
+        "description": "Size of the responses of the Mind Map handlers and views.",
+        "labels": ("handler",),
+        "buckets": SIZE_BUCKETS,
+    },
+    HANDLER_QUERIES: {
+        "description": "Database queries of the Mind Map handlers and views.",
+        "labels": ("handler", "source"),
+        "buckets": (0, 1, 2, 5, 10, 20, 50, 100, 200),
+    },
+    MIND_MAP_NODES: {
+        "description": "Number of nodes of the mind maps received by the Mind Map handlers.",
+        "labels": ("handler",),
+        "buckets": (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+    },
+}
+
+# Tables whose queries are counted, by source label.
+QUERY_SOURCES = {
+    "submissions": "submissions_",
+    "student_module": "courseware_studentmodule",
+}
+
+# Name of the instrumented handler running, to label the observations made while it runs.
+current_handler = contextvars.ContextVar("mindmap_current_handler", default=None)
+
+
+class NullMetricsBackend:
+    """
+    A backend discarding the observations, which disables the instrumentation.
+    """
+
+    enabled = False
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Discard an observation.
+        """
+
+
+class InMemoryMetricsBackend:
+    """
+    A backend keeping the histograms in memory, for the tests and debugging.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.histograms = {}
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Add an observation to the histogram of the metric with these labels.
+        """
+        buckets = METRICS[name]["buckets"]
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.setdefault(key, {
+            "buckets": dict.fromkeys(buckets + (float("inf"),), 0),
+            "count": 0,
+            "sum": 0,
+            "values": [],
+        })
+        # The buckets are cumulative, as in Prometheus.
+        for bound in list(histogram["buckets"])[bisect.bisect_left(buckets, value):]:
+            histogram["buckets"][bound] += 1
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["values"].append(value)
+
+    def get_histogram(self, name: str, **labels) -> dict | None:
+        """
+        Return the histogram of a metric with these labels, None if nothing was observed.
+        """
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    def reset(self) -> None:
+        """
+        Drop every observation.
+        """
+        self.histograms.clear()
+
+
+class PrometheusMetricsBackend:
+    """
+    A backend recording the observations in `prometheus_client` histograms.
+
+    The histograms are registered in the default registry, so they are
+    exported with the other metrics of the process.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        if prometheus_client is None:
+            raise ImproperlyConfigured("PrometheusMetricsBackend requires the prometheus_client package")
+        self.histograms = {
+            name: prometheus_client.Histogram(
+                name, metric["description"], metric["labels"], buckets=metric["buckets"],
+            )
+            for name, metric in METRICS.items()
+        }
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Add an observation to the Prometheus histogram of the metric.
+        """
+        self.histograms[name].labels(**labels).observe(value)
+
+
+@functools.lru_cache(maxsize=None)
+def load_metrics_backend(path: str):
+    """
+    Return the instance of a backend class, created once per process.
+    """
+    return import_string(path)()
+
+
+def get_metrics_backend():
+    """
+    Return the backend set in the `MINDMAP_METRICS_BACKEND` setting.
+    """
+    return load_metrics_backend(getattr(settings, "MINDMAP_METRICS_BACKEND", DEFAULT_METRICS_BACKEND))
+
+
+class QueryCounter:
+    """
+    Count the database queries run on the tables of each source of `QUERY_SOURCES`.
+    """
+
+    def __init__(self):
+        self.counts = dict.fromkeys(QUERY_SOURCES, 0)
+
+    def __call__(self, execute, sql, *args):
+        # Django passes the params, many and context of the query after the SQL.
+        for source, table in QUERY_SOURCES.items():
+            if table in sql:
+                self.counts[source] += 1
+        return execute(sql, *args)
+
+    @contextlib.contextmanager
+    def count(self):
+        """
+        Count the queries run on every database connection in the block.
+        """
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+def get_content_size(result) -> int | None:
+    """
+    Return the size of the response of a handler or of the content of a view fragment.
+
+    Returns:
+        int: The size in bytes, None for a streamed response of unknown length.
+    """
+    content = getattr(result, "content", None)
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    content_length = getattr(result, "content_length", None)
+    return content_length if isinstance(content_length, int) else None
+
+
+def count_nodes(mind_map) -> int:
+    """
+    Return the number of nodes of a mind map in the `node_array` or `node_tree` format.
+    """
+    data = mind_map.get("data") if isinstance(mind_map, dict) else None
+    if isinstance(data, list):
+        return len(data)
+    count = 0
+    nodes = [data] if isinstance(data, dict) else []
+    while nodes:
+        node = nodes.pop()
+        count += 1
+        nodes.extend(child for child in node.get("children") or [] if isinstance(child, dict))
+    return count
+
+
+def observe_mind_map(mind_map) -> None:
+    """
+    Report the number of nodes of a mind map received by the running handler.
+    """
+    backend = get_metrics_backend()
+    handler = current_handler.get()
+    if backend.enabled and handler:
+        backend.observe(MIND_MAP_NODES, count_nodes(mind_map), handler=handler)
+
+
+def instrument(name: str):
+    """
+    Decorator reporting the latency, sizes and queries of a handler or a view.
+
+    It is applied on top of the `XBlock.handler` and `XBlock.json_handler`
+    decorators, so the sizes are the ones of the raw request and response.
+    The calls selected by `profiling.should_profile` are also profiled.
+
+    Args:
+        name (str): The name of the handler or view, used as label.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            if should_profile(self):
+                return profile_call(name, self, instrumented, self, *args, **kwargs)
+            return instrumented(self, *args, **kwargs)
+
+        def instrumented(self, *args, **kwargs):
+            backend = get_metrics_backend()
+            if not backend.enabled:
+                return function(self, *args, **kwargs)
+
+            body = getattr(args[0], "body", None) if args else None
+            if isinstance(body, bytes):
+                backend.observe(HANDLER_REQUEST_BYTES, len(body), handler=name)
+            queries = QueryCounter()
+            token = current_handler.set(name)
+            start = time.perf_counter()
+            try:
+                with queries.count():
+                    result = function(self, *args, **kwargs)
+            finally:
+                backend.observe(HANDLER_DURATION, time.perf_counter() - start, handler=name)
+                current_handler.reset(token)
+                for source, count in queries.counts.items():
+                    backend.observe(HANDLER_QUERIES, count, handler=name, source=source)
+
+            size = get_content_size(result)
+            if size is not None:
+                backend.observe(HANDLER_RESPONSE_BYTES, size, handler=name)
+            return result
+        return wrapper
+    return decorator
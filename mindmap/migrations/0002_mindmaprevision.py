@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mindmap", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MindMapRevision",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("usage_key", models.CharField(max_length=255)),
+                ("student_id", models.CharField(max_length=255)),
+                ("number", models.PositiveIntegerField()),
+                ("kind", models.CharField(choices=[("snapshot", "Snapshot"), ("delta", "Delta")], max_length=8)),
+                ("source", models.CharField(max_length=16)),
+                ("content", models.TextField()),
+                ("content_hash", models.CharField(max_length=64)),
+                ("size", models.PositiveIntegerField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("usage_key", "student_id", "number"), name="mindmap_revision_unique_number",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mindmap", "0002_mindmaprevision"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MindMapSharedMap",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("usage_key", models.CharField(max_length=255)),
+                ("group_id", models.CharField(max_length=255)),
+                ("content", models.TextField()),
+                ("version", models.PositiveIntegerField()),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("usage_key", "group_id"), name="mindmap_shared_map_unique_group"),
+                ],
+            },
+        ),
+    ]
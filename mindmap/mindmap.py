@@ -2,40 +2,97 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
-from enum import Enum
+import os
+import uuid
 
-from importlib.resources import files as importlib_files
-from django.core.exceptions import PermissionDenied
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied, ValidationError
+from django.core.files.storage import default_storage
 from django.utils import translation
+from django.utils.html import format_html
 from web_fragments.fragment import Fragment
+from webob import Response
 from xblock.completable import CompletableXBlockMixin
 from xblock.core import XBlock
 from xblock.exceptions import JsonHandlerError
-from xblock.fields import Boolean, DateTime, Dict, Integer, Scope, String
-from xblockutils.resources import ResourceLoader
-
-from mindmap.edxapp_wrapper.student import (
-    user_by_anonymous_id,
-    student_module as StudentModule,
+from xblock.fields import Boolean, Dict, Integer, Scope, String
+
+from mindmap.analytics import get_grading_summary, invalidate_grading_summary
+from mindmap.autosave import acquire_autosave_slot, get_autosave_settings
+from mindmap.blobs import canonical_json, get_answer_mind_map, get_content_hash, make_answer
+from mindmap.canonical import canonicalize_mind_map
+from mindmap.collaboration import (
+    SHARED_GROUP_TYPES,
+    SharedMapBusy,
+    SharedMapOutdated,
+    apply_shared_map_operations,
+    broadcast_shared_map_operations,
+    get_shared_map_settings,
+    read_shared_map,
 )
+from mindmap.edxapp_wrapper.course_groups import get_user_cohort_id, get_user_team_id
+from mindmap.edxapp_wrapper.student import student_module as StudentModule
+from mindmap.edxapp_wrapper.student import user_by_anonymous_id
 from mindmap.edxapp_wrapper.xmodule import get_extended_due_date
-from mindmap.utils import _, utcnow
+from mindmap.grading import (
+    GRADABLE_STATUSES,
+    GRADING_MAX_BULK_ITEMS,
+    GRADING_MAX_PAGE_SIZE,
+    GRADING_PAGE_SIZE,
+    GRADING_SORT_FIELDS,
+    GradingDataLoader,
+    enter_grades,
+    get_submission_answer,
+)
+from mindmap.export import EXPORT_FORMATS
+from mindmap.jobs import JOB_COMPLETED, get_job_progress
+from mindmap.metrics import instrument, observe_mind_map
+from mindmap.patching import MindMapPatchError, apply_operations
+from mindmap.pregrading import get_suggested_scores
+from mindmap.rendering import get_mind_map_svg
+from mindmap.revisions import REVISIONS_PAGE_SIZE, get_revision_mind_map, list_revisions, record_revision
+from mindmap.resources import (
+    JSMIND_BUNDLE,
+    JSMIND_DRAGGABLE_BUNDLE,
+    JSMIND_STYLE,
+    get_jsmind_cdn_url,
+    get_jsmind_path,
+    get_resource_hash,
+    get_statici18n_js_path,
+    load_resource,
+    render_django_template,
+)
+from mindmap.similarity import SIMILARITY_THRESHOLD, find_similar_assignments
+from mindmap.storage import COMPRESS_THRESHOLD, decode_mind_map, encode_mind_map, is_encoded
+from mindmap.tasks import start_export_submissions_job, start_reset_grades_job
+from mindmap.utils import SubmissionStatus, _, clear_request_cache, request_cached, utcnow
+from mindmap.validation import MindMapValidationError, check_size, get_limits, validate_mind_map
 
 log = logging.getLogger(__name__)
-loader = ResourceLoader(__name__)
 
 ITEM_TYPE = "mindmap"
 ATTR_KEY_ANONYMOUS_USER_ID = 'edx-platform.anonymous_user_id'
 ATTR_KEY_USER_ROLE = 'edx-platform.user_role'
 
 
-class SubmissionStatus(Enum):
-    """Submission status enum"""
-    NOT_ATTEMPTED = _("Not attempted")
-    SUBMITTED = _("Submitted")
-    COMPLETED = _("Completed")
+def check_request_size(handler):
+    """
+    Decorator returning a 400 response for request bodies over the mind map size limit.
+
+    It is applied on top of `XBlock.json_handler`, so the body is rejected
+    before it is parsed.
+    """
+    @functools.wraps(handler)
+    def wrapper(self, request, suffix=""):
+        try:
+            check_size(len(request.body), get_limits()["max_bytes"])
+        except MindMapValidationError as exc:
+            return JsonHandlerError(400, exc.to_dict()).get_response()
+        return handler(self, request, suffix)
+    return wrapper
 
 
 @XBlock.wants("user")
@@ -76,6 +133,23 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         scope=Scope.settings,
     )
 
+    shared_group = String(
+        help=_(
+            "Whether the learners of a cohort or team edit a mind map together. If it is "
+            "shared, the learners of the same group edit the same mind map concurrently and "
+            "see the edits of the others live. The learners who are not in a group edit "
+            "their own mind maps."
+        ),
+        display_name=_("Shared mind map"),
+        values=[
+            {"display_name": _("Not shared"), "value": ""},
+            {"display_name": _("Shared by cohort"), "value": "cohort"},
+            {"display_name": _("Shared by team"), "value": "team"},
+        ],
+        default="",
+        scope=Scope.settings,
+    )
+
     mindmap_body = Dict(
         help=_(
             "The mind map that will be shown to students if the"
@@ -109,6 +183,26 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         scope=Scope.user_state,
     )
 
+    mindmap_student_hash = String(
+        display_name=_("Mindmap student hash"),
+        help=_(
+            "The SHA-256 of the canonical JSON of the student mind map. It is used "
+            "to skip the saves of an unchanged mind map."
+        ),
+        default="",
+        scope=Scope.user_state,
+    )
+
+    mindmap_student_version = Integer(
+        display_name=_("Mindmap student version"),
+        help=_(
+            "The number of times the student mind map has been saved. It is used "
+            "to reject changes made to an outdated copy of the mind map."
+        ),
+        default=0,
+        scope=Scope.user_state,
+    )
+
     weight = Integer(
         display_name=_("Problem Weight"),
         help=_(
@@ -156,6 +250,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         """
         return str(self.course_id)
 
+    @request_cached
     def get_weighted_score(self, student_id=None):
         """
         Return weighted score from submissions.
@@ -175,6 +270,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         """
         return self.weight
 
+    @request_cached
     def get_current_user(self):
         """
         Get the current user.
@@ -200,7 +296,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
 
     def resource_string(self, path):
         """Handy helper for getting resources from our kit."""
-        return importlib_files(__package__).joinpath(path).read_text(encoding="utf-8")
+        return load_resource(path)
 
     def render_template(self, template_path, context=None) -> str:
         """
@@ -214,7 +310,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         Returns:
             str: The rendered template
         """
-        return loader.render_django_template(
+        return render_django_template(
             template_path, context, i18n_service=self.runtime.service(self, 'i18n')
         )
 
@@ -273,10 +369,12 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             "max_raw_score": self.points,
             "weight": self.weight,
             "mind_map": self.get_current_mind_map(),
+            "version": self.mindmap_student_version,
             "editable": context["editable"],
             "xblock_id": self.scope_ids.usage_id.block_id,
         }
 
+    @instrument("student_view")
     def student_view(self, _context=None) -> Fragment:
         """
         The primary view of the MindMapXBlock, shown to students when viewing courses.
@@ -297,37 +395,51 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
 
         if self.is_course_team:
             context["is_instructor"] = True
+            js_context["pregrading_enabled"] = self.pregrading_available()
+
+        group_id = self.get_shared_group_id() if js_context["editable"] else None
+        if group_id:
+            shared_map = read_shared_map(self.block_id, group_id, self.mindmap_body)
+            js_context.update({
+                "mind_map": shared_map["mind_map"],
+                "version": shared_map["version"],
+                "shared": get_shared_map_settings(self.block_id, group_id),
+            })
+        elif js_context["editable"] and self.autosave_enabled():
+            js_context["autosave"] = get_autosave_settings()
 
         frag = self.load_fragment("mindmap", context)
 
-        frag.add_javascript(self.resource_string("public/js/src/requiredModules.js"))
+        self.add_jsmind_resources(frag, js_context, with_draggable=js_context["editable"])
         frag.initialize_js('MindMapXBlock', json_args=js_context)
 
         return frag
 
+    @instrument("author_view")
     def author_view(self, _context=None) -> Fragment:
         """
         The primary view of the MindMapXBlock, shown to authors in Studio.
 
+        The mind map is rendered on the server as a static SVG preview, so
+        Studio does not load jsMind for every Mind Map component of a unit.
+
         Args:
             _context (dict, optional): Context for the template. Defaults to None.
 
         Returns:
             Fragment: The fragment to render
         """
-        user = self.get_current_user()
-        context = self.get_context()
-        js_context = self.get_js_context(user, context)
-        context["editable"] = False
-        js_context["editable"] = False
-
-        frag = self.load_fragment("mindmap", context)
-
-        frag.add_javascript(self.resource_string("public/js/src/requiredModules.js"))
-        frag.initialize_js('MindMapXBlock', json_args=js_context)
-
+        svg, _content_hash = get_mind_map_svg(self.get_current_mind_map())
+        frag = Fragment()
+        frag.add_content(self.render_template("public/html/mindmap_preview.html", {
+            "display_name": self.display_name,
+            "xblock_id": self.scope_ids.usage_id.block_id,
+            "svg": svg,
+        }))
+        self.add_css_resource(frag, "public/css/mindmap.css")
         return frag
 
+    @instrument("studio_view")
     def studio_view(self, context=None) -> Fragment:
         """
         The studio view of the MindMapXBlock, shown to instructors.
@@ -348,12 +460,15 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             "points_field": self.fields["points"],
             "weight": self.weight,
             "weight_field": self.fields["weight"],
+            "shared_group": self.shared_group,
+            "shared_group_field": self.fields["shared_group"],
         })
         js_context.update({
             "editable": True,
         })
         frag = self.load_fragment("mindmap_edit", context)
 
+        self.add_jsmind_resources(frag, js_context, with_draggable=True)
         frag.initialize_js('MindMapXBlock', json_args=js_context)
 
         return frag
@@ -364,8 +479,8 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         """
         frag = Fragment()
         frag.add_content(self.render_template(f"public/html/{file_name}.html", context))
-        frag.add_css(self.resource_string("public/css/mindmap.css"))
-        frag.add_css(self.resource_string("public/css/submissions.css"))
+        self.add_css_resource(frag, "public/css/mindmap.css")
+        self.add_css_resource(frag, "public/css/submissions.css")
 
         # Add i18n js
         statici18n_js_url = self._get_statici18n_js_url()
@@ -374,10 +489,108 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
                 self.runtime.local_resource_url(self, statici18n_js_url)
             )
 
-        frag.add_javascript(self.resource_string(f"public/js/src/{file_name}.js"))
+        self.add_javascript_resource(frag, f"public/js/src/{file_name}.js")
 
         return frag
 
+    @staticmethod
+    def serve_assets_as_urls() -> bool:
+        """
+        Return whether the JS and CSS assets are linked instead of inlined in the fragments.
+        """
+        return getattr(settings, "MINDMAP_SERVE_ASSETS_AS_URLS", False)
+
+    def get_resource_url(self, path) -> str:
+        """
+        Return the URL of a package resource, fingerprinted with the hash of its content.
+
+        Args:
+            path (str): The path of the resource relative to the package.
+
+        Returns:
+            str: The URL of the resource.
+        """
+        return f"{self.runtime.local_resource_url(self, path)}?v={get_resource_hash(path)}"
+
+    def add_css_resource(self, frag, path) -> None:
+        """
+        Add a CSS package resource to the fragment, inlined or linked.
+        """
+        if self.serve_assets_as_urls():
+            frag.add_css_url(self.get_resource_url(path))
+        else:
+            frag.add_css(self.resource_string(path))
+
+    def add_javascript_resource(self, frag, path) -> None:
+        """
+        Add a JS package resource to the fragment, inlined or linked.
+        """
+        if self.serve_assets_as_urls():
+            frag.add_javascript_url(self.get_resource_url(path))
+        else:
+            frag.add_javascript(self.resource_string(path))
+
+    @staticmethod
+    def jsmind_cdn_fallback() -> bool:
+        """
+        Return whether the jsMind files missing from the package are loaded from the CDN.
+        """
+        return getattr(settings, "MINDMAP_JSMIND_CDN_FALLBACK", True)
+
+    def get_jsmind_cdn_url(self, file_name) -> str:
+        """
+        Return the CDN URL of a jsMind file missing from the package, when the CDN fallback is enabled.
+
+        Raises:
+            ImproperlyConfigured: If the CDN fallback is disabled.
+        """
+        if not self.jsmind_cdn_fallback():
+            raise ImproperlyConfigured(
+                f"The jsMind file {file_name} is not vendored, run `make vendor_jsmind` "
+                "or enable MINDMAP_JSMIND_CDN_FALLBACK"
+            )
+        return get_jsmind_cdn_url(file_name)
+
+    def get_jsmind_url(self, file_name) -> str:
+        """
+        Return the URL of a jsMind file, served by the block from the vendored release.
+
+        Args:
+            file_name (str): The path of the file in the jsMind release, e.g. "es6/jsmind.js".
+
+        Returns:
+            str: The fingerprinted URL of the vendored file, or the CDN URL of the pinned release as a fallback.
+        """
+        path = get_jsmind_path(file_name)
+        return self.get_resource_url(path) if path else self.get_jsmind_cdn_url(file_name)
+
+    def add_jsmind_resources(self, frag, js_context, with_draggable=False) -> None:
+        """
+        Add the jsMind style and the shared jsMind loader to the fragment, with preload hints of the bundles.
+
+        The loader loads the bundles once per page, whatever the number of
+        Mind Map blocks of the unit; their URLs are passed in the `jsmind_urls`
+        key of the JS context.
+
+        Args:
+            frag (Fragment): The fragment of the view.
+            js_context (dict): The JS context of the view.
+            with_draggable (bool): Whether the draggable node plugin is loaded too.
+        """
+        style_path = get_jsmind_path(JSMIND_STYLE)
+        if style_path:
+            self.add_css_resource(frag, style_path)
+        else:
+            frag.add_css_url(self.get_jsmind_cdn_url(JSMIND_STYLE))
+
+        jsmind_urls = {"jsmind": self.get_jsmind_url(JSMIND_BUNDLE)}
+        if with_draggable:
+            jsmind_urls["draggable"] = self.get_jsmind_url(JSMIND_DRAGGABLE_BUNDLE)
+        for url in jsmind_urls.values():
+            frag.add_resource(format_html('<link rel="preload" href="{}" as="script">', url), "text/html", "head")
+        self.add_javascript_resource(frag, "public/js/src/jsmind_loader.js")
+        js_context["jsmind_urls"] = jsmind_urls
+
     def get_current_mind_map(self) -> dict:
         """
         Return the current mind map content.
@@ -387,9 +600,144 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             None: If the file does not exist.
         """
         if self.mindmap_student_body and not self.is_static:
-            return self.mindmap_student_body
+            return self.get_student_mind_map()
         return self.mindmap_body
 
+    @staticmethod
+    def compact_storage_enabled() -> bool:
+        """
+        Return whether the learner mind maps are saved with the compact encoding.
+        """
+        return getattr(settings, "MINDMAP_COMPACT_STORAGE", False)
+
+    @staticmethod
+    def autosave_enabled() -> bool:
+        """
+        Return whether the browser autosaves the learner mind maps.
+        """
+        return getattr(settings, "MINDMAP_AUTOSAVE", False)
+
+    @staticmethod
+    def revision_history_enabled() -> bool:
+        """
+        Return whether every saved learner mind map is recorded in their revision history.
+        """
+        return getattr(settings, "MINDMAP_REVISION_HISTORY", False)
+
+    @staticmethod
+    def pregrading_enabled() -> bool:
+        """
+        Return whether the submissions can be pre-graded against the reference mind map.
+        """
+        return getattr(settings, "MINDMAP_PREGRADING", False)
+
+    def pregrading_available(self) -> bool:
+        """
+        Return whether the submissions of the block are pre-graded.
+
+        The mind map of a static block is not a reference answer.
+        """
+        return self.pregrading_enabled() and not self.is_static
+
+    def get_student_mind_map(self) -> dict:
+        """
+        Return the mind map saved for the user, decoding it if needed.
+
+        When the compact encoding is enabled, a mind map saved before is
+        encoded again, so the state is migrated the next time it is saved.
+
+        Returns:
+            dict: The mind map saved for the user.
+        """
+        mind_map = decode_mind_map(self.mindmap_student_body)
+        if mind_map and self.compact_storage_enabled() and not is_encoded(self.mindmap_student_body):
+            self.set_student_mind_map(mind_map)
+        return mind_map
+
+    def set_student_mind_map(self, mind_map: dict, content_hash: str = None) -> None:
+        """
+        Save the mind map of the user, encoded when the compact encoding is enabled.
+
+        Args:
+            mind_map (dict): The mind map to save.
+            content_hash (str, optional): The hash of the mind map, computed if not given.
+        """
+        self.mindmap_student_hash = content_hash or get_content_hash(canonical_json(mind_map))
+        if self.compact_storage_enabled():
+            threshold = getattr(settings, "MINDMAP_COMPACT_STORAGE_COMPRESS_THRESHOLD", COMPRESS_THRESHOLD)
+            mind_map = encode_mind_map(mind_map, threshold)
+        self.mindmap_student_body = mind_map
+
+    def get_student_mind_map_hash(self) -> str:
+        """
+        Return the hash of the canonical JSON of the mind map saved for the user.
+
+        The hash of a mind map saved before the hashes were stored is computed.
+        """
+        if not self.mindmap_student_hash and self.mindmap_student_body:
+            return get_content_hash(canonical_json(decode_mind_map(self.mindmap_student_body)))
+        return self.mindmap_student_hash
+
+    def record_student_revision(self, mind_map: dict, source: str) -> None:
+        """
+        Record the mind map about to be saved for the user in their revision history, if it is enabled.
+
+        It is called before the mind map is saved, so the one saved before is
+        diffed against without being rebuilt from the history.
+
+        Args:
+            mind_map (dict): The canonical mind map about to be saved.
+            source (str): The handler saving the mind map.
+        """
+        if not self.revision_history_enabled():
+            return
+        record_revision(
+            self.block_id,
+            self.get_student_item_dict()["student_id"],
+            mind_map,
+            source,
+            previous_mind_map=decode_mind_map(self.mindmap_student_body) or None,
+        )
+
+    @request_cached
+    def get_shared_group_id(self) -> str | None:
+        """
+        Return the group of the user sharing the mind map of the block.
+
+        Returns:
+            str: The cohort or team of the user, e.g. "cohort-4", None if the
+            mind map is not shared or the user is not in a group.
+        """
+        if self.is_static or self.shared_group not in SHARED_GROUP_TYPES:
+            return None
+        user = user_by_anonymous_id(self.get_student_item_dict()["student_id"])
+        if user is None:
+            return None
+        get_group_id = get_user_cohort_id if self.shared_group == "cohort" else get_user_team_id
+        group_id = get_group_id(user, self.block_course_id)
+        return f"{self.shared_group}-{group_id}" if group_id is not None else None
+
+    def require_shared_group_id(self) -> str:
+        """
+        Return the group of the user sharing the mind map, raising a 404 JsonHandlerError if there is none.
+        """
+        group_id = self.get_shared_group_id()
+        if not group_id:
+            raise JsonHandlerError(404, "The mind map is not shared with a group of the user")
+        return group_id
+
+    def get_revision_student_id(self, data: dict) -> str:
+        """
+        Return the learner whose revision history is requested: any learner for the course team, else the user.
+        """
+        student_id = data.get("student_id")
+        if student_id:
+            require(self.is_course_team)
+            return str(student_id)
+        return self.get_student_item_dict()["student_id"]
+
+    @instrument("studio_submit")
+    @check_request_size
     @XBlock.json_handler
     def studio_submit(self, data, _suffix="") -> None:
         """
@@ -399,9 +747,15 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             data (dict): The necessary configuration data.
             _suffix (str, optional): Defaults to "".
         """
+        require_valid_mind_map(data.get("mind_map"))
         self.display_name = data.get("display_name")
         self.is_static = data.get("is_static")
-        self.mindmap_body = data.get("mind_map")
+        if "shared_group" in data:
+            shared_group = data["shared_group"] or ""
+            if shared_group and shared_group not in SHARED_GROUP_TYPES:
+                raise JsonHandlerError(400, f"Unsupported shared group: {shared_group}")
+            self.shared_group = shared_group
+        self.mindmap_body = canonicalize_mind_map(data.get("mind_map"))
         self.has_score = data.get("has_score")
         self.icon_class = "problem" if self.has_score else ITEM_TYPE # pylint: disable=attribute-defined-outside-init
 
@@ -412,23 +766,98 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             weight = data.get("weight", self.weight)
             self.points, self.weight = self.validate_score(points, weight)
 
+    @instrument("save_assignment")
+    @check_request_size
     @XBlock.json_handler
     def save_assignment(self, data, _suffix="") -> dict:
         """
         Save a mind map JSON structure into the block state for the user.
 
+        A mind map identical to the saved one is not written again. The
+        autosaves are limited to one per `MINDMAP_AUTOSAVE_MIN_INTERVAL`
+        seconds for each learner, the ones rejected in between are retried by
+        the browser.
+
         Args:
-            data (dict): The necessary data to upload the file
+            data (dict): The mind map, and whether it is autosaved.
             _suffix (str, optional): Defaults to "".
 
         Returns:
-            dict: A dictionary containing the handler result.
+            dict: A dictionary containing the handler result, whether the mind map was saved and its version.
         """
-        self.mindmap_student_body = data.get("mind_map")
+        require_valid_mind_map(data.get("mind_map"))
+        mind_map = canonicalize_mind_map(data.get("mind_map"))
+        content_hash = get_content_hash(canonical_json(mind_map))
+        if content_hash == self.get_student_mind_map_hash():
+            return {
+                "success": True,
+                "saved": False,
+                "version": self.mindmap_student_version,
+            }
+
+        if data.get("autosave"):
+            if not self.autosave_enabled():
+                raise JsonHandlerError(400, "The autosave is disabled")
+            if not acquire_autosave_slot(self.block_id, self.scope_ids.user_id):
+                raise JsonHandlerError(429, "The mind map was autosaved too recently")
+
+        self.record_student_revision(mind_map, "autosave" if data.get("autosave") else "save")
+        self.set_student_mind_map(mind_map, content_hash)
+        self.mindmap_student_version += 1
         return {
             "success": True,
+            "saved": True,
+            "version": self.mindmap_student_version,
         }
 
+    @instrument("patch_assignment")
+    @check_request_size
+    @XBlock.json_handler
+    def patch_assignment(self, data, _suffix="") -> dict:
+        """
+        Apply node-level operations to the mind map saved for the user.
+
+        The operations are applied on top of the version of the mind map the
+        browser loaded, changes made to an outdated version are rejected and
+        the browser falls back to `save_assignment`.
+
+        Args:
+            data (dict): The version of the mind map and the operations to apply.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the handler result and the new version.
+        """
+        if data.get("version") != self.mindmap_student_version:
+            raise JsonHandlerError(409, "The mind map has been modified since it was loaded")
+
+        try:
+            mind_map = apply_operations(self.get_current_mind_map(), data.get("operations", []))
+        except MindMapPatchError as exc:
+            raise JsonHandlerError(400, str(exc)) from exc
+        require_valid_mind_map(mind_map)
+        mind_map = canonicalize_mind_map(mind_map)
+        content = canonical_json(mind_map)
+        require_valid_size(content)
+        content_hash = get_content_hash(content)
+        if content_hash == self.get_student_mind_map_hash():
+            return {
+                "success": True,
+                "saved": False,
+                "version": self.mindmap_student_version,
+            }
+
+        self.record_student_revision(mind_map, "patch")
+        self.set_student_mind_map(mind_map, content_hash)
+        self.mindmap_student_version += 1
+        return {
+            "success": True,
+            "saved": True,
+            "version": self.mindmap_student_version,
+        }
+
+    @instrument("submit_assignment")
+    @check_request_size
     @XBlock.json_handler
     def submit_assignment(self, data, _suffix="") -> dict:
         """
@@ -447,12 +876,15 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
 
         require(self.submit_allowed())
 
-        self.mindmap_student_body = data.get("mind_map")
-        answer = {
-            "mindmap_student_body": json.dumps(self.mindmap_student_body),
-        }
+        require_valid_mind_map(data.get("mind_map"))
+        mind_map = canonicalize_mind_map(data.get("mind_map"))
+        self.record_student_revision(mind_map, "submit")
+        self.set_student_mind_map(mind_map)
+        self.mindmap_student_version += 1
         student_item_dict = self.get_student_item_dict()
-        create_submission(student_item_dict, answer)
+        create_submission(student_item_dict, make_answer(mind_map))
+        clear_request_cache(self)
+        invalidate_grading_summary(self.block_id)
         self.emit_completion(1)
 
         self.submission_status = SubmissionStatus.SUBMITTED.value
@@ -461,6 +893,126 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             "success": True,
         }
 
+    @instrument("get_revisions")
+    @XBlock.json_handler
+    def get_revisions(self, data, _suffix="") -> dict:
+        """
+        Return a page of the revision history of the user, or of a learner for the course team.
+
+        Args:
+            data (dict): The optional `student_id` of the learner, and the
+                number of the revision the page is `before`.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: The revisions, latest first, without their mind maps.
+        """
+        student_id = self.get_revision_student_id(data)
+        before = data.get("before")
+        if before is not None and (not isinstance(before, int) or isinstance(before, bool)):
+            raise JsonHandlerError(400, "Invalid revision number")
+
+        revisions = list_revisions(self.block_id, student_id, before=before)
+        return {
+            "revisions": [
+                {**revision, "created": revision["created"].isoformat()} for revision in revisions
+            ],
+            "has_more": len(revisions) == REVISIONS_PAGE_SIZE,
+        }
+
+    @instrument("get_revision")
+    @XBlock.json_handler
+    def get_revision(self, data, _suffix="") -> dict:
+        """
+        Return the mind map of a revision of the user, or of a learner for the course team.
+
+        Args:
+            data (dict): The `number` of the revision, and the optional `student_id` of the learner.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: The number of the revision and its mind map.
+        """
+        student_id = self.get_revision_student_id(data)
+        number = data.get("number")
+        if not isinstance(number, int) or isinstance(number, bool):
+            raise JsonHandlerError(400, "Invalid revision number")
+
+        mind_map = get_revision_mind_map(self.block_id, student_id, number)
+        if mind_map is None:
+            raise JsonHandlerError(404, "Revision not found")
+        return {
+            "number": number,
+            "mind_map": mind_map,
+        }
+
+    @instrument("get_shared_map")
+    @XBlock.json_handler
+    def get_shared_map(self, data, _suffix="") -> dict:
+        """
+        Return the mind map shared by the group of the user, or the batches of operations since a version.
+
+        The browsers without a WebSocket poll this handler for the edits of the group.
+
+        Args:
+            data (dict): The optional version of the shared mind map the browser has, `since`.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: The current version, and the batches since the given version or the whole mind map.
+        """
+        group_id = self.require_shared_group_id()
+        since = data.get("since")
+        if since is not None and (not isinstance(since, int) or isinstance(since, bool)):
+            raise JsonHandlerError(400, "Invalid version")
+
+        return read_shared_map(self.block_id, group_id, self.mindmap_body, since=since)
+
+    @instrument("apply_shared_operations")
+    @check_request_size
+    @XBlock.json_handler
+    def apply_shared_operations(self, data, _suffix="") -> dict:
+        """
+        Apply node-level operations to the mind map shared by the group of the user.
+
+        The operations made on an older version of the shared mind map are
+        applied on top of the edits of the group since, the ones which no
+        longer apply are dropped. The batch applied is broadcast to the group.
+
+        Args:
+            data (dict): The `version` the operations were made on, the
+                `operations` and the `client_id` of the browser.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: The batch applied, with its version and the operations applied.
+        """
+        group_id = self.require_shared_group_id()
+        version = data.get("version")
+        if not isinstance(version, int) or isinstance(version, bool):
+            raise JsonHandlerError(400, "Invalid version")
+
+        try:
+            batch = apply_shared_map_operations(
+                self.block_id,
+                group_id,
+                self.mindmap_body,
+                version,
+                data.get("operations", []),
+                client_id=str(data.get("client_id", "")),
+            )
+        except SharedMapOutdated as exc:
+            raise JsonHandlerError(409, "The shared mind map has changed too much since it was loaded") from exc
+        except SharedMapBusy as exc:
+            raise JsonHandlerError(503, "The shared mind map is busy, retry later") from exc
+        except MindMapPatchError as exc:
+            raise JsonHandlerError(400, str(exc)) from exc
+        except MindMapValidationError as exc:
+            raise JsonHandlerError(400, exc.to_dict()) from exc
+
+        broadcast_shared_map_operations(self.block_id, group_id, batch)
+        return batch
+
     def get_or_create_student_module(self, user):
         """
         Gets or creates a StudentModule for the given user for this block
@@ -487,6 +1039,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             )
         return student_module
 
+    @instrument("get_instructor_grading_data")
     @XBlock.json_handler
     def get_instructor_grading_data(self, _, _suffix="") -> dict:
         """Return student assignment information for display on the grading screen.
@@ -500,52 +1053,237 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         """
         require(self.is_course_team)
 
-        def get_student_data() -> dict:
-            """
-            Returns a dict of student assignment information along with
-            annotated file name, student id and module id, this
-            information will be used on grading screen
-            """
-            # Lazy import: import here to avoid app not ready errors
-            from submissions.models import StudentItem as SubmissionsStudent  # pylint: disable=import-outside-toplevel
-
-            students = SubmissionsStudent.objects.filter(
-                course_id=self.course_id, item_id=self.block_id
-            )
-            for student in students:
-                submission = self.get_submission(student.student_id)
-                if not submission:
-                    continue
-                user = user_by_anonymous_id(student.student_id)
-                student_module = self.get_or_create_student_module(user)
-                state = json.loads(student_module.state)
-                raw_score = self.get_raw_score(student.student_id)
-
-                if state.get("submission_status") in [
-                    SubmissionStatus.COMPLETED.value, SubmissionStatus.SUBMITTED.value
-                ]:
-                    yield {
-                        "module_id": student_module.id,
-                        "student_id": student.student_id,
-                        "submission_id": submission["uuid"],
-                        "answer_body": submission["answer"],
-                        "username": user.username,
-                        "timestamp": submission["created_at"].strftime(
-                            DateTime.DATETIME_FORMAT
-                        ),
-                        "raw_score": state.get("raw_score", raw_score),
-                        "max_raw_score": self.points,
-                        "weight": self.weight,
-                        "weighted_score": self.get_weighted_score(student.student_id),
-                        "submission_status": state.get("submission_status"),
-                    }
+        return {
+            "assignments": GradingDataLoader(self).get_assignments(),
+            "max_raw_score": self.points,
+            "weight": self.weight,
+            "display_name": self.display_name,
+        }
+
+    @instrument("get_grading_summary")
+    @XBlock.json_handler
+    def get_grading_summary(self, _, _suffix="") -> dict:
+        """Return the grading statistics of the block.
+
+        The statistics are computed with aggregate queries and cached until a
+        submission or a grade of the block changes.
+
+        Args:
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the learners by submission status,
+            the raw score statistics, the submissions by day and the average
+            size of the submitted mind maps.
+        """
+        require(self.is_course_team)
+
+        summary = get_grading_summary(self)
+        summary.update({
+            "max_raw_score": self.points,
+            "weight": self.weight,
+        })
+        return summary
+
+    @instrument("get_similar_submissions")
+    @XBlock.json_handler
+    def get_similar_submissions(self, data, _suffix="") -> dict:
+        """Return the clusters of near-identical submissions of the block.
+
+        The submissions are compared by the normalized topics and edges of
+        their mind maps, so copies with a changed layout, case or accents
+        are still found.
+
+        Args:
+            data (dict): The minimum estimated `threshold` of similarity, between 0 and 1.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the clusters of similar submissions.
+        """
+        require(self.is_course_team)
 
+        try:
+            threshold = float(data.get("threshold", SIMILARITY_THRESHOLD))
+        except (TypeError, ValueError) as exc:
+            raise JsonHandlerError(400, "Threshold must be a number") from exc
+        if not 0 < threshold <= 1:
+            raise JsonHandlerError(400, "Threshold out of range")
+
+        clusters = find_similar_assignments(GradingDataLoader(self).get_assignments(), threshold)
         return {
-            "assignments": list(get_student_data()),
+            "clusters": clusters,
+            "count": len(clusters),
+        }
+
+    @instrument("get_suggested_scores")
+    @XBlock.json_handler
+    def get_suggested_scores(self, data, _suffix="") -> dict:
+        """Return the raw scores suggested by comparing submissions with the reference mind map.
+
+        The scores are computed in a batch and cached for each submission, so
+        asking for the submission reviewed in the grading screen is instant
+        once the scores of the block were computed.
+
+        Args:
+            data (dict): The `submission_ids` to score, every latest submission by default.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the suggested scores keyed by submission id.
+        """
+        require(self.is_course_team)
+
+        if not self.pregrading_available():
+            raise JsonHandlerError(400, "Automatic pre-grading is not available for this block")
+
+        submission_ids = data.get("submission_ids")
+        if submission_ids is not None:
+            if not isinstance(submission_ids, list) or len(submission_ids) > GRADING_MAX_BULK_ITEMS:
+                raise JsonHandlerError(400, f"Submission ids must be a list of at most {GRADING_MAX_BULK_ITEMS} ids")
+            try:
+                submission_ids = [str(uuid.UUID(str(submission_id))) for submission_id in submission_ids]
+            except ValueError as exc:
+                raise JsonHandlerError(400, "Invalid submission id") from exc
+
+        try:
+            scores = get_suggested_scores(self, submission_ids)
+        except ValueError as exc:
+            raise JsonHandlerError(400, str(exc)) from exc
+        return {
+            "scores": scores,
+            "max_raw_score": self.points,
+        }
+
+    @instrument("get_instructor_grading_page")
+    @XBlock.json_handler
+    def get_instructor_grading_page(self, data, _suffix="") -> dict:
+        """Return a page of summarized student assignments for the grading screen.
+
+        The rows do not include the submitted mind maps, so the size of the
+        response depends on the page size instead of the number of learners.
+
+        Args:
+            data (dict): The pagination, filtering and sorting options:
+                - offset (int): The number of assignments to skip.
+                - page_size (int): The maximum number of assignments to return.
+                - status (str): Only return assignments with this submission status.
+                - username (str): Only return assignments whose username starts with this prefix.
+                - sort (str): "timestamp" or "raw_score", prefixed with "-" for descending order.
+                - answer_hash (str): Only return the assignments with this mind map.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing a page of student assignment information.
+        """
+        require(self.is_course_team)
+
+        try:
+            offset = int(data.get("offset", 0))
+            page_size = int(data.get("page_size", GRADING_PAGE_SIZE))
+        except (TypeError, ValueError) as exc:
+            raise JsonHandlerError(400, "Offset and page size must be integers") from exc
+        if offset < 0 or not 0 < page_size <= GRADING_MAX_PAGE_SIZE:
+            raise JsonHandlerError(400, "Offset or page size out of range")
+
+        status = data.get("status")
+        if status and status not in GRADABLE_STATUSES:
+            raise JsonHandlerError(400, "Invalid submission status")
+
+        sort = data.get("sort") or "-timestamp"
+        if not isinstance(sort, str) or sort.lstrip("-") not in GRADING_SORT_FIELDS:
+            raise JsonHandlerError(400, "Invalid sort field")
+
+        page = GradingDataLoader(self, include_answers=False).get_page(
+            offset=offset,
+            page_size=page_size,
+            status=status,
+            username=data.get("username"),
+            sort=sort,
+            answer_hash=data.get("answer_hash"),
+        )
+        page.update({
             "max_raw_score": self.points,
             "weight": self.weight,
             "display_name": self.display_name,
+        })
+        return page
+
+    @instrument("get_submission_mind_map")
+    @XBlock.handler
+    def get_submission_mind_map(self, request, _suffix="") -> Response:
+        """Return the mind map of a single submission for the grading screen.
+
+        The response carries the hash of the submission answer as ETag, so
+        browsers can revalidate it with If-None-Match.
+
+        Args:
+            request (Request): The request object, with the `submission_id` query parameter.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            Response: The submitted mind map.
+        """
+        require(self.is_course_team)
+
+        submission_id = request.GET.get("submission_id")
+        if not submission_id:
+            return Response(status=400)
+        try:
+            submission = get_submission_answer(self, submission_id)
+        except ValidationError:
+            return Response(status=400)
+        if not submission:
+            return Response(status=404)
+
+        response = Response(etag=submission.answer_hash, cache_control="private, no-cache")
+        if submission.answer_hash in request.if_none_match:
+            response.status = 304
+            return response
+
+        response.json_body = {
+            "submission_id": str(submission.uuid),
+            "mind_map": get_answer_mind_map(submission.answer),
         }
+        return response
+
+    @instrument("get_submission_preview")
+    @XBlock.handler
+    def get_submission_preview(self, request, _suffix="") -> Response:
+        """Return the SVG preview of a submitted mind map for the grading screen.
+
+        The previews are rendered on the server and cached by the hash of the
+        mind map, which is also their ETag.
+
+        Args:
+            request (Request): The request object, with the `submission_id` query parameter.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            Response: The SVG preview of the submitted mind map.
+        """
+        require(self.is_course_team)
+
+        submission_id = request.GET.get("submission_id")
+        if not submission_id:
+            return Response(status=400)
+        try:
+            submission = get_submission_answer(self, submission_id)
+        except ValidationError:
+            return Response(status=400)
+        if not submission:
+            return Response(status=404)
+
+        response = Response(etag=submission.answer_hash, cache_control="private, no-cache")
+        if submission.answer_hash in request.if_none_match:
+            response.status = 304
+            return response
+
+        svg, _content_hash = get_mind_map_svg(get_answer_mind_map(submission.answer))
+        response.content_type = "image/svg+xml"
+        response.charset = "utf-8"
+        response.text = svg
+        return response
 
     def get_student_module(self, module_id):
         """
@@ -575,6 +1313,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         module.state = json.dumps(state)
         module.save()
 
+    @instrument("enter_grade")
     @XBlock.json_handler
     def enter_grade(self, data, _suffix="") -> dict:
         """
@@ -593,13 +1332,15 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         require(self.is_course_team)
 
         raw_score = int(data.get("grade", 0))
-        uuid = data.get("submission_id")
-        if not uuid:
+        submission_uuid = data.get("submission_id")
+        if not submission_uuid:
             raise JsonHandlerError(400, "Missing required parameters")
         if raw_score > self.points:
             raise JsonHandlerError(400, "Score cannot be greater than max score")
 
-        set_score(uuid, round((raw_score / self.points) * self.weight), self.weight)
+        set_score(submission_uuid, round((raw_score / self.points) * self.weight), self.weight)
+        clear_request_cache(self)
+        invalidate_grading_summary(self.block_id)
 
         self.update_student_state(
             data.get("module_id"), SubmissionStatus.COMPLETED.value, raw_score=raw_score,
@@ -609,6 +1350,41 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             "success": True,
         }
 
+    @instrument("enter_grades")
+    @XBlock.json_handler
+    def enter_grades(self, data, _suffix="") -> dict:
+        """
+        Persist the scores of many students given by instructors.
+
+        The grades are validated one by one, and the valid ones are saved
+        together in a single transaction.
+
+        Args:
+            data (dict): The grades to enter, a list of
+                `{"submission_id": ..., "module_id": ..., "grade": ...}` under the `grades` key.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the result of each grade.
+        """
+        require(self.is_course_team)
+
+        grades = data.get("grades")
+        if not isinstance(grades, list) or not grades:
+            raise JsonHandlerError(400, "Missing required parameters")
+        if len(grades) > GRADING_MAX_BULK_ITEMS:
+            raise JsonHandlerError(400, f"Cannot enter more than {GRADING_MAX_BULK_ITEMS} grades at once")
+
+        results = enter_grades(self, grades)
+        clear_request_cache(self)
+        invalidate_grading_summary(self.block_id)
+
+        return {
+            "success": all(result["success"] for result in results),
+            "results": results,
+        }
+
+    @instrument("remove_grade")
     @XBlock.json_handler
     def remove_grade(self, data, _suffix="") -> dict:
         """
@@ -631,6 +1407,8 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             raise JsonHandlerError(400, "Missing required parameters")
 
         reset_score(student_id, self.block_course_id, self.block_id)
+        clear_request_cache(self)
+        invalidate_grading_summary(self.block_id)
 
         self.update_student_state(
             data.get("module_id"), SubmissionStatus.SUBMITTED.value
@@ -640,6 +1418,111 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             "success": True,
         }
 
+    @instrument("reset_grades")
+    @XBlock.json_handler
+    def reset_grades(self, data, _suffix="") -> dict:
+        """
+        Remove the grades of many students, optionally re-opening their submissions.
+
+        The grades are removed by a background job, a batch of students at a
+        time, and its progress is returned by `get_reset_grades_progress`.
+
+        Args:
+            data (dict): The students and the action:
+                - student_ids (list | str): The anonymous ids of the students, or "all".
+                - reopen (bool): Whether the students can submit again.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the progress of the job.
+        """
+        require(self.is_course_team)
+
+        student_ids = data.get("student_ids")
+        if student_ids != "all" and (
+            not isinstance(student_ids, list) or not student_ids
+            or not all(isinstance(student_id, str) for student_id in student_ids)
+        ):
+            raise JsonHandlerError(400, "Missing required parameters")
+
+        progress = start_reset_grades_job(self, student_ids, reopen=bool(data.get("reopen")))
+        clear_request_cache(self)
+        return progress
+
+    @instrument("get_reset_grades_progress")
+    @XBlock.json_handler
+    def get_reset_grades_progress(self, data, _suffix="") -> dict:
+        """
+        Return the progress of a job started by `reset_grades` or `export_submissions`.
+
+        Args:
+            data (dict): The `job_id` of the job.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the progress of the job.
+        """
+        require(self.is_course_team)
+
+        progress = get_job_progress(str(data.get("job_id")))
+        if not progress or progress["usage_id"] != str(self.location):
+            raise JsonHandlerError(404, "Job not found")
+        return progress
+
+    @instrument("export_submissions")
+    @XBlock.json_handler
+    def export_submissions(self, data, _suffix="") -> dict:
+        """
+        Export every submission of the block to a CSV or JSONL file.
+
+        The file is written by a background job, and can be downloaded with
+        `download_submissions_export` once `get_reset_grades_progress`
+        reports the job as completed.
+
+        Args:
+            data (dict): The `format` of the file, "csv" or "jsonl".
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            dict: A dictionary containing the progress of the job.
+        """
+        require(self.is_course_team)
+
+        export_format = data.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise JsonHandlerError(400, f"Unsupported export format: {export_format}")
+        return start_export_submissions_job(self, export_format)
+
+    @instrument("download_submissions_export")
+    @XBlock.handler
+    def download_submissions_export(self, request, _suffix="") -> Response:
+        """
+        Return the file written by a job started by `export_submissions`.
+
+        Args:
+            request (Request): The request object, with the `job_id` query parameter.
+            _suffix (str, optional): Defaults to "".
+
+        Returns:
+            Response: The exported file, streamed from the storage.
+        """
+        require(self.is_course_team)
+
+        progress = get_job_progress(str(request.GET.get("job_id")))
+        if (
+            not progress or progress["usage_id"] != str(self.location)
+            or progress["status"] != JOB_COMPLETED or not progress.get("file_name")
+        ):
+            return Response(status=404)
+
+        export_format = progress["export_format"]
+        return Response(
+            app_iter=iter_file(default_storage.open(progress["file_name"], "rb")),
+            content_type="text/csv" if export_format == "csv" else "application/x-ndjson",
+            charset="utf-8",
+            content_disposition=f'attachment; filename="{os.path.basename(progress["file_name"])}"',
+        )
+
     @staticmethod
     def validate_score(points: int, weight: int) -> None:
         """
@@ -694,12 +1577,24 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         Returns:
             int: The student's current score.
         """
-        weighted_score = self.get_weighted_score(student_id)
+        return self.get_raw_score_from_weighted(self.get_weighted_score(student_id))
+
+    def get_raw_score_from_weighted(self, weighted_score) -> int:
+        """
+        Convert a weighted score into a raw score.
+
+        Args:
+            weighted_score (int): The weighted score to convert.
+
+        Returns:
+            int: The raw score.
+        """
         if weighted_score:
             return round((weighted_score * self.points) / self.weight)
 
         return None
 
+    @request_cached
     def get_submission(self, student_id=None) -> dict:
         """
         Get student's most recent submission.
@@ -749,7 +1644,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         Returns:
             bool: True if due date has passed.
         """
-        due = get_extended_due_date(self)
+        due = self.get_due_date()
         try:
             graceperiod = self.graceperiod
         except AttributeError:
@@ -766,6 +1661,16 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
             return utcnow() > close_date
         return False
 
+    @request_cached
+    def get_due_date(self):
+        """
+        Return the due date of the block, including the extensions of the user.
+
+        Returns:
+            datetime.datetime: The due date, or None if the block has no due date.
+        """
+        return get_extended_due_date(self)
+
     # TO-DO: change this to create the scenarios you'd like to see in the
     # workbench while developing your XBlock.
     @staticmethod
@@ -793,12 +1698,7 @@ class MindMapXBlock(XBlock, CompletableXBlockMixin):
         locale_code = translation.get_language()
         if locale_code is None:
             return None
-        text_js = 'public/js/translations/{locale_code}/text.js'
-        lang_code = locale_code.split('-')[0]
-        for code in (translation.to_locale(locale_code), lang_code, 'en'):
-            if importlib_files(__package__).joinpath(text_js.format(locale_code=code)).exists():
-                return text_js.format(locale_code=code)
-        return None
+        return get_statici18n_js_path(locale_code)
 
 
 def require(assertion):
@@ -807,3 +1707,39 @@ def require(assertion):
     """
     if not assertion:
         raise PermissionDenied
+
+
+def iter_file(file):
+    """
+    Yield the chunks of a file of the storage, and close it at the end.
+    """
+    with file:
+        yield from file.chunks()
+
+
+def require_valid_mind_map(mind_map):
+    """
+    Raises a 400 JsonHandlerError describing the problem if the mind map is not valid.
+
+    The size of the mind map is not checked, the handlers receiving a whole
+    mind map check the size of the request body with `check_request_size`,
+    and the others the size of the canonical JSON with `require_valid_size`.
+    """
+    try:
+        validate_mind_map(mind_map, **{**get_limits(), "max_bytes": None})
+    except MindMapValidationError as exc:
+        raise JsonHandlerError(400, exc.to_dict()) from exc
+    observe_mind_map(mind_map)
+
+
+def require_valid_size(content):
+    """
+    Raises a 400 JsonHandlerError if the canonical JSON of a mind map exceeds the size limit.
+
+    The handlers serialize the mind map once, for its content hash, and check
+    the size of the same JSON.
+    """
+    try:
+        check_size(len(content.encode("utf-8")), get_limits()["max_bytes"])
+    except MindMapValidationError as exc:
+        raise JsonHandlerError(400, exc.to_dict()) from exc
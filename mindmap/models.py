@@ -0,0 +1,93 @@
+"""
+Database models of the Mind Map XBlock.
+"""
+
+from django.db import models
+
+
+class MindMapBlob(models.Model):
+    """
+    A submitted mind map, stored once for each content.
+
+    The submissions reference the blob of their mind map by the SHA-256 hex
+    digest of its canonical JSON, so identical mind maps are stored once.
+
+    .. no_pii:
+    """
+
+    content_hash = models.CharField(max_length=64, primary_key=True)
+    content = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = "mindmap"
+
+    def __str__(self):
+        return self.content_hash
+
+
+class MindMapRevision(models.Model):
+    """
+    A saved version of the mind map of a learner in a block, in an append-only log.
+
+    A revision stores either a full snapshot of the mind map, or the
+    node-level delta from the previous revision; see `mindmap.revisions`.
+
+    .. no_pii:
+    """
+
+    SNAPSHOT = "snapshot"
+    DELTA = "delta"
+    KINDS = ((SNAPSHOT, "Snapshot"), (DELTA, "Delta"))
+
+    usage_key = models.CharField(max_length=255)
+    # The anonymous user id of the learner, as in the submissions.
+    student_id = models.CharField(max_length=255)
+    number = models.PositiveIntegerField()
+    kind = models.CharField(max_length=8, choices=KINDS)
+    # The handler which saved the mind map: save, autosave, patch or submit.
+    source = models.CharField(max_length=16)
+    content = models.TextField()
+    # The hash and the size of the canonical JSON of the whole mind map.
+    content_hash = models.CharField(max_length=64)
+    size = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = "mindmap"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usage_key", "student_id", "number"], name="mindmap_revision_unique_number",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.usage_key} {self.student_id} #{self.number}"
+
+
+class MindMapSharedMap(models.Model):
+    """
+    The mind map shared by a group of learners in a block, as last compacted.
+
+    The shared mind maps are edited in the Django cache and written here
+    periodically; see `mindmap.collaboration`.
+
+    .. no_pii:
+    """
+
+    usage_key = models.CharField(max_length=255)
+    # The cohort or team sharing the mind map, e.g. "cohort-4" or "team-blue".
+    group_id = models.CharField(max_length=255)
+    content = models.TextField()
+    # The number of operation batches applied to the mind map.
+    version = models.PositiveIntegerField()
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = "mindmap"
+        constraints = [
+            models.UniqueConstraint(fields=["usage_key", "group_id"], name="mindmap_shared_map_unique_group"),
+        ]
+
+    def __str__(self):
+        return f"{self.usage_key} {self.group_id}"
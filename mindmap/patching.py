@@ -0,0 +1,171 @@
+"""
+Node-level operations applied to mind maps in the jsMind `node_array` format.
+
+The operations sent by the browser are:
+
+- ``{"op": "add", "node": {"id": ..., "parentid": ..., "topic": ...}, "index": 0}``
+- ``{"op": "update", "id": ..., "topic": ...}``
+- ``{"op": "move", "id": ..., "parentid": ..., "index": 0}``
+- ``{"op": "delete", "id": ...}``
+
+``index`` is optional and sets the position of the node among its siblings,
+the node is placed after its siblings when it is missing.
+"""
+
+from __future__ import annotations
+
+import copy
+
+# Operations supported, each one is applied by the NodeArray method of the same name.
+OPERATIONS = ("add", "update", "move", "delete")
+# Maximum number of operations of a request, each move or delete walks the whole mind map.
+MAX_OPERATIONS = 1000
+
+
+class MindMapPatchError(ValueError):
+    """
+    Raised when an operation cannot be applied to a mind map.
+    """
+
+
+def apply_operations(mind_map: dict, operations: list) -> dict:
+    """
+    Apply node-level operations to a mind map.
+
+    Args:
+        mind_map (dict): The mind map in the `node_array` format.
+        operations (list): The operations to apply, in order.
+
+    Returns:
+        dict: A new mind map with the operations applied.
+
+    Raises:
+        MindMapPatchError: If the mind map is not a `node_array`, there are
+            more than `MAX_OPERATIONS` operations or an operation is not valid
+            for the mind map.
+    """
+    if mind_map.get("format") != "node_array" or not isinstance(mind_map.get("data"), list):
+        raise MindMapPatchError("Only mind maps in the node_array format can be patched")
+    if not isinstance(operations, list):
+        raise MindMapPatchError("Operations must be a list")
+    if len(operations) > MAX_OPERATIONS:
+        raise MindMapPatchError(f"At most {MAX_OPERATIONS} operations can be applied at once")
+
+    patched = copy.deepcopy(mind_map)
+    nodes = NodeArray(patched["data"])
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise MindMapPatchError("Operations must be objects")
+        if operation.get("op") not in OPERATIONS:
+            raise MindMapPatchError(f"Unknown operation: {operation.get('op')}")
+        getattr(nodes, operation["op"])(operation)
+    return patched
+
+
+class NodeArray:
+    """
+    Index the nodes of a `node_array` mind map to apply operations in place.
+    """
+
+    def __init__(self, nodes: list):
+        self.nodes = nodes
+        self.nodes_by_id = {node.get("id"): node for node in nodes}
+
+    def get(self, node_id) -> dict:
+        """
+        Return the node with the given id.
+        """
+        try:
+            return self.nodes_by_id[node_id]
+        except (KeyError, TypeError) as exc:
+            raise MindMapPatchError(f"Node not found: {node_id}") from exc
+
+    def get_editable(self, node_id) -> dict:
+        """
+        Return the node with the given id, which cannot be the root.
+        """
+        node = self.get(node_id)
+        if node.get("isroot"):
+            raise MindMapPatchError("The root node cannot be moved or deleted")
+        return node
+
+    def subtree_ids(self, node_id) -> set:
+        """
+        Return the ids of the node and all of its descendants.
+        """
+        children = {}
+        for node in self.nodes:
+            children.setdefault(node.get("parentid"), []).append(node.get("id"))
+        ids = {node_id}
+        pending = [node_id]
+        while pending:
+            for child_id in children.get(pending.pop(), []):
+                if child_id not in ids:
+                    ids.add(child_id)
+                    pending.append(child_id)
+        return ids
+
+    def insert(self, node: dict, index) -> None:
+        """
+        Insert a node in the array at the given position among its siblings.
+        """
+        if index is not None and not isinstance(index, int):
+            raise MindMapPatchError("The index must be an integer")
+        siblings = [
+            position for position, sibling in enumerate(self.nodes)
+            if sibling.get("parentid") == node["parentid"]
+        ] if index is not None else []
+        if index is None or index >= len(siblings):
+            self.nodes.append(node)
+        else:
+            self.nodes.insert(siblings[max(index, 0)], node)
+        self.nodes_by_id[node["id"]] = node
+
+    def add(self, operation: dict) -> None:
+        """
+        Add a new node under an existing parent.
+        """
+        node = operation.get("node")
+        if not isinstance(node, dict) or "id" not in node or "parentid" not in node:
+            raise MindMapPatchError("Added nodes must have an id and a parentid")
+        if not isinstance(node["id"], str):
+            raise MindMapPatchError("Node ids must be strings")
+        if node["id"] in self.nodes_by_id:
+            raise MindMapPatchError(f"Duplicated node: {node['id']}")
+        self.get(node["parentid"])
+        node = {key: value for key, value in node.items() if key != "isroot"}
+        self.insert(node, operation.get("index"))
+
+    def update(self, operation: dict) -> None:
+        """
+        Update the topic of a node.
+        """
+        topic = operation.get("topic")
+        if not isinstance(topic, str):
+            raise MindMapPatchError("The topic must be a string")
+        self.get(operation.get("id"))["topic"] = topic
+
+    def move(self, operation: dict) -> None:
+        """
+        Move a node and its descendants under another parent.
+        """
+        node = self.get_editable(operation.get("id"))
+        parent_id = operation.get("parentid", node.get("parentid"))
+        self.get(parent_id)
+        if parent_id in self.subtree_ids(node["id"]):
+            raise MindMapPatchError("A node cannot be moved under itself")
+        self.nodes[:] = [existing for existing in self.nodes if existing is not node]
+        node["parentid"] = parent_id
+        if "direction" in operation:
+            node["direction"] = operation["direction"]
+        self.insert(node, operation.get("index"))
+
+    def delete(self, operation: dict) -> None:
+        """
+        Delete a node and its descendants.
+        """
+        node = self.get_editable(operation.get("id"))
+        removed_ids = self.subtree_ids(node["id"])
+        self.nodes[:] = [existing for existing in self.nodes if existing.get("id") not in removed_ids]
+        for node_id in removed_ids:
+            self.nodes_by_id.pop(node_id, None)
@@ -0,0 +1,264 @@
+"""
+Automatic pre-grading of the submissions against the reference mind map.
+
+When the mind map of a block is not static, the mind map set by the
+instructor is the reference answer. Each submission is compared with it on
+three criteria, weighted by `PREGRADING_WEIGHTS`:
+
+- topics: the share of the reference topics found in the submission, the
+  topics being matched after normalization, then fuzzily with a lower credit;
+- edges: the share of the reference parent-child edges found between the
+  matched topics of the submission;
+- depth: how well the matched topics of the submission cover every level
+  of the reference.
+
+The submissions of a block are scored in a batch against the same prepared
+reference, so the fuzzy matching of a topic is only computed once for every
+submission using it. The scores never change for a submission and a
+reference, so they are cached by submission uuid and reference hash.
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+from collections import Counter
+
+from django.core.cache import cache
+
+from mindmap.blobs import canonical_json, get_answer_bodies, get_content_hash
+from mindmap.grading import GradingDataLoader
+from mindmap.similarity import normalize_topic
+
+# Bumped when the scoring changes, so the scores cached before are not used.
+PREGRADING_VERSION = 1
+# The scores only depend on the submission and the reference, they are kept for a week.
+PREGRADING_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+PREGRADING_WEIGHTS = {
+    "topics": 0.5,
+    "edges": 0.3,
+    "depth": 0.2,
+}
+# Minimum similarity ratio of two topics to match fuzzily, their credit being the ratio.
+FUZZY_MATCH_THRESHOLD = 0.8
+
+
+def get_tree(mind_map: dict) -> list:
+    """
+    Return the normalized topic, parent topic and depth of the nodes of a mind map.
+
+    Only the nodes reachable from the root are returned, the root being at
+    depth 0 without parent topic.
+    """
+    if not isinstance(mind_map, dict):
+        return []
+    data = mind_map.get("data")
+    root = None
+    if mind_map.get("format") == "node_array" and isinstance(data, list):
+        nodes_by_parent = {}
+        for node in data:
+            if not isinstance(node, dict):
+                continue
+            if node.get("isroot") in (True, "true"):
+                root = node
+            else:
+                nodes_by_parent.setdefault(node.get("parentid"), []).append(node)
+
+        def get_children(node):
+            return nodes_by_parent.get(node.get("id"), [])
+    elif isinstance(data, dict):
+        root = data
+
+        def get_children(node):
+            return [child for child in node.get("children") or [] if isinstance(child, dict)]
+    if root is None:
+        return []
+
+    tree = []
+    # The visited ids ignore the cycles of malformed mind maps.
+    visited = {id(root)}
+    level = [(None, root)]
+    depth = 0
+    while level:
+        next_level = []
+        for parent_topic, node in level:
+            topic = normalize_topic(node.get("topic", ""))
+            tree.append((topic, parent_topic, depth))
+            for child in get_children(node):
+                if id(child) not in visited:
+                    visited.add(id(child))
+                    next_level.append((topic, child))
+        level = next_level
+        depth += 1
+    return tree
+
+
+class ReferenceMap:
+    """
+    The reference mind map of a block, prepared to score many submissions.
+    """
+
+    def __init__(self, mind_map: dict):
+        tree = get_tree(mind_map)
+        self.topics = {topic for topic, _parent_topic, _depth in tree}
+        self.edges = {(parent_topic, topic) for topic, parent_topic, _depth in tree if parent_topic is not None}
+        self.depths = {}
+        for topic, _parent_topic, depth in tree:
+            self.depths.setdefault(topic, depth)
+        self.levels = Counter(self.depths[topic] for topic in self.topics if self.depths[topic] > 0)
+        self.matches = {}
+
+    @property
+    def gradable(self) -> bool:
+        """
+        Whether the reference has any edge and any topic below the root to compare the submissions with.
+        """
+        return bool(self.edges and self.levels)
+
+    def match_topic(self, topic: str) -> tuple:
+        """
+        Return the reference topic matching a normalized topic, and its credit.
+
+        Returns:
+            tuple: The reference topic and the credit of the match, 1 for an
+            exact match; None and 0 if no reference topic matches.
+        """
+        if topic in self.topics:
+            return topic, 1.0
+        if topic not in self.matches:
+            best = (None, 0.0)
+            matcher = difflib.SequenceMatcher(b=topic, autojunk=False)
+            for reference_topic in self.topics:
+                matcher.set_seq1(reference_topic)
+                if matcher.real_quick_ratio() < FUZZY_MATCH_THRESHOLD or matcher.quick_ratio() < FUZZY_MATCH_THRESHOLD:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= FUZZY_MATCH_THRESHOLD and ratio > best[1]:
+                    best = (reference_topic, ratio)
+            self.matches[topic] = best
+        return self.matches[topic]
+
+    def score(self, mind_map: dict) -> dict:
+        """
+        Compare a mind map with the reference.
+
+        Returns:
+            dict: The `topics`, `edges` and `depth` scores between 0 and 1,
+            and their weighted `score`.
+        """
+        tree = get_tree(mind_map)
+        topic_credits = {}
+        matched = {}
+        for topic, _parent_topic, _depth in tree:
+            reference_topic, credit = self.match_topic(topic)
+            matched[topic] = reference_topic
+            if reference_topic is not None and credit > topic_credits.get(reference_topic, 0):
+                topic_credits[reference_topic] = credit
+
+        edges = {
+            (matched[parent_topic], matched[topic])
+            for topic, parent_topic, _depth in tree
+            if parent_topic is not None and matched[topic] is not None
+        }
+        levels = Counter(self.depths[topic] for topic in topic_credits if self.depths[topic] > 0)
+
+        scores = {
+            "topics": sum(topic_credits.values()) / len(self.topics),
+            "edges": len(edges & self.edges) / len(self.edges),
+            "depth": sum(
+                min(1, levels[depth] / count) for depth, count in self.levels.items()
+            ) / len(self.levels),
+        }
+        scores["score"] = sum(scores[name] * weight for name, weight in PREGRADING_WEIGHTS.items())
+        return {name: round(value, 4) for name, value in scores.items()}
+
+
+def get_score_cache_key(reference_hash: str, submission_id: str) -> str:
+    """
+    Return the cache key of the scores of a submission against a reference.
+    """
+    return f"mindmap.pregrading.{PREGRADING_VERSION}.{reference_hash}.{submission_id}"
+
+
+def load_submission_answers(block, submission_ids: list = None) -> dict:
+    """
+    Return the answers of submissions of the block.
+
+    Args:
+        block (MindMapXBlock): The block the submissions belong to.
+        submission_ids (list, optional): The uuids of the submissions, the
+            latest submission of every learner by default.
+
+    Returns:
+        dict: The answers keyed by submission uuid.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from submissions.models import Submission  # pylint: disable=import-outside-toplevel
+
+    if submission_ids is None:
+        submissions = GradingDataLoader(block).get_latest_submissions().values()
+    else:
+        submissions = Submission.objects.filter(
+            uuid__in=submission_ids,
+            student_item__course_id=block.block_course_id,
+            student_item__item_id=block.block_id,
+        ).only("uuid", "answer")
+    return {str(submission.uuid): submission.answer for submission in submissions}
+
+
+def get_suggested_scores(block, submission_ids: list = None) -> dict:
+    """
+    Return the suggested raw scores of submissions of the block.
+
+    The cached scores are returned without loading the submissions; the
+    others are scored in a batch against the reference mind map of the block.
+
+    Args:
+        block (MindMapXBlock): The block the submissions belong to.
+        submission_ids (list, optional): The uuids of the submissions, the
+            latest submission of every learner by default.
+
+    Returns:
+        dict: The scores of `ReferenceMap.score` and the suggested `raw_score`
+        out of the block points, keyed by submission uuid, without the
+        submissions not found.
+
+    Raises:
+        ValueError: If the reference mind map has no edges to compare with.
+    """
+    reference = ReferenceMap(block.mindmap_body)
+    if not reference.gradable:
+        raise ValueError("The reference mind map has no nodes besides the root")
+    reference_hash = get_content_hash(canonical_json(block.mindmap_body))
+
+    answers = None
+    if submission_ids is None:
+        answers = load_submission_answers(block)
+        submission_ids = list(answers)
+    cache_keys = {get_score_cache_key(reference_hash, submission_id): submission_id for submission_id in submission_ids}
+    scores = {cache_keys[key]: score for key, score in cache.get_many(list(cache_keys)).items()}
+
+    missing = [submission_id for submission_id in submission_ids if submission_id not in scores]
+    if missing:
+        if answers is None:
+            answers = load_submission_answers(block, missing)
+        missing = [submission_id for submission_id in missing if submission_id in answers]
+        bodies = get_answer_bodies([answers[submission_id] for submission_id in missing])
+        computed = {
+            submission_id: reference.score(json.loads(body) if body else {})
+            for submission_id, body in zip(missing, bodies)
+        }
+        cache.set_many(
+            {
+                get_score_cache_key(reference_hash, submission_id): score
+                for submission_id, score in computed.items()
+            },
+            PREGRADING_CACHE_TIMEOUT,
+        )
+        scores.update(computed)
+
+    return {
+        submission_id: {**score, "raw_score": round(score["score"] * block.points)}
+        for submission_id, score in scores.items()
+    }
@@ -0,0 +1,139 @@
+"""
+Sampling profiler of the handlers and views of the block.
+
+The calls of the handlers and views decorated with `metrics.instrument` are
+profiled for a fraction of the requests, `MINDMAP_PROFILING_SAMPLE_RATE`,
+and for every request of the courses of `MINDMAP_PROFILING_COURSES`. Each
+profiled call writes two files to `MINDMAP_PROFILING_DIR`:
+
+- `<name>.prof`: the cProfile stats, to read with `pstats` or snakeviz;
+- `<name>.json`: the handler, course, block and duration of the call, with
+  the SQL of its queries and their duration. The query parameters are left
+  out, they may contain learner data.
+
+The profiler is disabled by default, and only two settings are read per
+call then.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connections
+
+from mindmap.utils import utcnow
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PROFILING_DIR = os.path.join(tempfile.gettempdir(), "mindmap-profiles")
+
+# Whether a profiled call is running, the calls made by it are not profiled again.
+profiling = contextvars.ContextVar("mindmap_profiling", default=False)
+
+
+def should_profile(block) -> bool:
+    """
+    Return whether the call of a handler or view of the block is profiled.
+    """
+    sample_rate = getattr(settings, "MINDMAP_PROFILING_SAMPLE_RATE", 0)
+    courses = getattr(settings, "MINDMAP_PROFILING_COURSES", ())
+    if not sample_rate and not courses:
+        return False
+    if profiling.get():
+        return False
+    if courses and str(getattr(block, "course_id", None)) in courses:
+        return True
+    return random.random() < sample_rate
+
+
+class QueryLog:
+    """
+    Record the SQL and the duration of the database queries.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, *args):
+        # Django passes the params, many and context of the query after the SQL.
+        start = time.perf_counter()
+        try:
+            return execute(sql, *args)
+        finally:
+            self.queries.append({
+                "database": args[-1]["connection"].alias,
+                "sql": sql,
+                "duration": round(time.perf_counter() - start, 6),
+            })
+
+    @contextlib.contextmanager
+    def record(self):
+        """
+        Record the queries run on every database connection in the block.
+        """
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+def profile_call(name: str, block, function, *args, **kwargs):
+    """
+    Call a handler or view of the block with the profiler, and write its profile.
+
+    Args:
+        name (str): The name of the handler or view.
+        block (MindMapXBlock): The block of the handler or view.
+        function (callable): The handler or view.
+        *args: The arguments of the call, the block first.
+        **kwargs: The keyword arguments of the call.
+
+    Returns:
+        The result of the call.
+    """
+    profiler = cProfile.Profile()
+    query_log = QueryLog()
+    token = profiling.set(True)
+    start = time.perf_counter()
+    try:
+        with query_log.record():
+            return profiler.runcall(function, *args, **kwargs)
+    finally:
+        duration = time.perf_counter() - start
+        profiling.reset(token)
+        write_profile(name, block, profiler, query_log.queries, duration)
+
+
+def write_profile(name: str, block, profiler, queries: list, duration: float) -> None:
+    """
+    Write the cProfile stats and the queries of a profiled call to the profiling directory.
+
+    The errors are logged, so a profiled request does not fail because of the profiler.
+    """
+    directory = getattr(settings, "MINDMAP_PROFILING_DIR", None) or DEFAULT_PROFILING_DIR
+    now = utcnow()
+    base_name = os.path.join(directory, f"{now:%Y%m%dT%H%M%S}-{name}-{uuid.uuid4().hex[:8]}")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(f"{base_name}.prof")
+        with open(f"{base_name}.json", "w", encoding="utf-8") as log_file:
+            json.dump({
+                "handler": name,
+                "course_id": str(getattr(block, "course_id", None)),
+                "usage_id": str(getattr(getattr(block, "scope_ids", None), "usage_id", None)),
+                "timestamp": now.isoformat(),
+                "duration": round(duration, 6),
+                "queries": queries,
+            }, log_file, indent=2)
+    except OSError:
+        log.exception("Error writing the profile of %s to %s", name, directory)
@@ -0,0 +1,89 @@
+/*
+Shared loader of jsMind, used by every Mind Map block of the page.
+
+The jsMind bundles are loaded once per page, whatever the number of Mind Map
+blocks of the unit, from the URLs given by the block: the bundles served by
+the XBlock when they are vendored, the pinned release on the CDN otherwise.
+
+The bundles are UMD modules: when RequireJS is defined, as in the CMS, they
+must be loaded with it, otherwise they only register an anonymous module.
+Check the doc here: https://requirejs.org/
+and the RequireJS namespace of Open edX:
+https://github.com/openedx/edx-platform/blob/7e23feeb33861c0de3572364cd103c3929bb0588/common/static/js/RequireJS-namespace.js#L3
+*/
+(function () {
+  if (window.MindMapJsMindLoader) {
+    return;
+  }
+
+  // Promises of jsMind, by loaded bundles.
+  const loads = {};
+
+  function isAMD() {
+    return typeof define === "function" && define.amd && typeof require === "function";
+  }
+
+  function requireModule(name, url) {
+    const deferred = $.Deferred();
+    const paths = {};
+    // RequireJS adds the extension to the paths, unless they have a query string.
+    paths[name] = url.replace(/\.js$/, "");
+    require.config({ paths: paths });
+    require([name], deferred.resolve, deferred.reject);
+    return deferred.promise();
+  }
+
+  function loadScript(url) {
+    // A script tag, which is cached and uses the preload hint of the fragment.
+    return $.ajax({ url: url, dataType: "script", cache: true, crossDomain: true });
+  }
+
+  function loadJsMind(urls) {
+    if (isAMD()) {
+      return requireModule("jsmind", urls.jsmind);
+    }
+    return loadScript(urls.jsmind).then(function () {
+      return window.jsMind;
+    });
+  }
+
+  function loadDraggablePlugin(urls, jsMind) {
+    // The plugin depends on the "jsmind" module, or on the jsMind global.
+    const loaded = isAMD() ? requireModule("jsmind.draggable-node", urls.draggable) : loadScript(urls.draggable);
+    return loaded.then(function () {
+      return jsMind;
+    });
+  }
+
+  function cache(key, load) {
+    if (!loads[key]) {
+      loads[key] = load().fail(function () {
+        // Allow a later block to retry.
+        delete loads[key];
+      });
+    }
+    return loads[key];
+  }
+
+  window.MindMapJsMindLoader = {
+    /**
+     * Load jsMind, and its draggable node plugin if its URL is given.
+     *
+     * @param {Object} urls The `jsmind` and optional `draggable` bundle URLs.
+     * @returns {Promise} A promise of the jsMind class.
+     */
+    load: function (urls) {
+      const jsMindLoaded = cache("jsmind", function () {
+        return loadJsMind(urls);
+      });
+      if (!urls.draggable) {
+        return jsMindLoaded;
+      }
+      return cache("draggable", function () {
+        return jsMindLoaded.then(function (jsMind) {
+          return loadDraggablePlugin(urls, jsMind);
+        });
+      });
+    },
+  };
+})();
@@ -1,10 +1,20 @@
 // TODO: add notifications
 function MindMapXBlock(runtime, element, context) {
   const saveMindMapURL = runtime.handlerUrl(element, "save_assignment");
+  const patchMindMapURL = runtime.handlerUrl(element, "patch_assignment");
   const submitMindMapURL = runtime.handlerUrl(element, "submit_assignment");
-  const getGradingDataURL = runtime.handlerUrl(element, "get_instructor_grading_data");
+  const getGradingPageURL = runtime.handlerUrl(element, "get_instructor_grading_page");
+  const getSubmissionMindMapURL = runtime.handlerUrl(element, "get_submission_mind_map");
+  const getSubmissionPreviewURL = runtime.handlerUrl(element, "get_submission_preview");
   const enterGradeURL = runtime.handlerUrl(element, "enter_grade");
   const removeGradeURL = runtime.handlerUrl(element, "remove_grade");
+  const resetGradesURL = runtime.handlerUrl(element, "reset_grades");
+  const getResetGradesProgressURL = runtime.handlerUrl(element, "get_reset_grades_progress");
+  const exportSubmissionsURL = runtime.handlerUrl(element, "export_submissions");
+  const downloadSubmissionsExportURL = runtime.handlerUrl(element, "download_submissions_export");
+  const getSuggestedScoresURL = runtime.handlerUrl(element, "get_suggested_scores");
+  const getSharedMapURL = runtime.handlerUrl(element, "get_shared_map");
+  const applySharedOperationsURL = runtime.handlerUrl(element, "apply_shared_operations");
   const maxPointsAllowed = context.max_raw_score;
   const problemWeight = context.weight;
 
@@ -45,12 +55,32 @@ function MindMapXBlock(runtime, element, context) {
 
     const currentMindMap = new jsMind(options);
     currentMindMap.show(mind);
+    let savedMindMap = currentMindMap.get_data("node_array");
+    let savedVersion = context.version;
+
+    let sharedEditing = null;
+    if (context.shared) {
+      sharedEditing = setUpSharedEditing(jsMind, currentMindMap, context);
+    }
 
     $(element)
       .find(`#save_button_${block_id}`)
       .click(function () {
-        handleMindMap(runtime, element, currentMindMap, saveMindMapURL);
+        if (sharedEditing) {
+          // The shared mind map is saved as it is edited, send the last edits now.
+          sharedEditing.sync();
+          return;
+        }
+        patchMindMap(currentMindMap, savedMindMap, savedVersion);
+      });
+
+    if (context.autosave && !context.shared) {
+      setUpAutosave(jsMind, currentMindMap, context.autosave, function (mindMapData, version) {
+        // The next explicit save patches the autosaved mind map.
+        savedMindMap = mindMapData;
+        savedVersion = version;
       });
+    }
 
     $(element)
       .find(`#submit_button_${block_id}`)
@@ -67,253 +97,451 @@ function MindMapXBlock(runtime, element, context) {
     $(element)
       .find(`#get_grade_submissions_button_${block_id}`)
       .click(function () {
-        $.post(getGradingDataURL, JSON.stringify({}))
-          .done(function (response) {
-            const { assignments } = response;
-            const xBlockContainerPosition = $(element).position();
-            const xBlockContainerHeight = $(element).height();
-            const modalHeight = `${xBlockContainerHeight + 35}px`;
-            $(element)
-              .find(".modal-submissions")
-              .addClass("modal_opened")
-              .css({ height: modalHeight, top: xBlockContainerPosition.top });
-
-            showDataTable();
-
-            function showDataTable(newAssignments) {
-              const dataTableHeaderColumns = [
-                gettext("Username"),
-                gettext("Uploaded"),
-                gettext("Submission Status"),
-                gettext("Raw score"),
-                gettext("Weighted score"),
-                gettext("Actions"),
-              ];
-
-              const dataTableHeaderColumnsHTML = dataTableHeaderColumns.reduce(
-                (prevColumn, currentColumn) => `${prevColumn}<th>${currentColumn}</th>`,
-                ""
-              );
-              const dataTableHTML = `
-                <table id="dataTable_${block_id}">
-                  <thead>
-                    <tr>
-                      ${dataTableHeaderColumnsHTML}
-                    </tr>
-                  </thead>
-                  <tbody>
-                    <!-- Data rows will be added here using DataTables -->
-                  </tbody>
-                </table>
-              `;
-
-              const modalTitleSubmissions = gettext("Mindmap submissions");
-              const reviewButtonText = gettext("Review");
-              const dataTableSearchText = gettext("Search");
-              const dataTableEntriesText = gettext("Showing _START_ to _END_ of _TOTAL_ entries");
-              const dataTableEmptyText = gettext("No data available in table");
-              const dataTableInfoEmptyText = gettext("Showing 0 to 0 of 0 entries");
-              const dataTableZeroRecordsText = gettext("No matching records found");
-              const dataTableInfoFilteredText = gettext("(filtered from _MAX_ total entries)");
-              $(element).find(".modal__data").html(dataTableHTML);
-              $(element).find(".modal_title").html(modalTitleSubmissions);
-
-              const dataTable = $(`#dataTable_${block_id}`).DataTable({
-                data: newAssignments || assignments,
-                scrollY: "50vh",
-                dom: "Bfrtip",
-                bPaginate: false,
-                destroy: true,
-                columns: [
-                  { data: "username" },
-                  { data: "timestamp" },
-                  {
-                    data: "submission_status",
-                    render: (data) => {
-                      return gettext(data);
-                    },
-                  },
-                  {
-                    data: "raw_score",
-                    render: (data) => {
-                      if (data === null) {
-                        return "";
-                      }
-                      return `${data}/${maxPointsAllowed}`;
-                    },
-                  },
-                  {
-                    data: "weighted_score",
-                    render: (data) => {
-                      if (data === null) {
-                        return "";
-                      }
-                      return `${data}/${problemWeight}`;
-                    },
-                  },
-                  {
-                    data: null,
-                    render: () => {
-                      return `<button class="review_button button-link" type="button">${reviewButtonText}</button>`;
-                    },
-                  },
-                ],
-                language: {
-                  info: dataTableEntriesText,
-                  search: dataTableSearchText,
-                  emptyTable: dataTableEmptyText,
-                  infoEmpty: dataTableInfoEmptyText,
-                  zeroRecords: dataTableZeroRecordsText,
-                  infoFiltered: dataTableInfoFilteredText,
+        const xBlockContainerPosition = $(element).position();
+        const xBlockContainerHeight = $(element).height();
+        const modalHeight = `${xBlockContainerHeight + 35}px`;
+        $(element)
+          .find(".modal-submissions")
+          .addClass("modal_opened")
+          .css({ height: modalHeight, top: xBlockContainerPosition.top });
+
+        showDataTable();
+
+        function showDataTable() {
+          const dataTableHeaderColumns = [
+            gettext("Username"),
+            gettext("Uploaded"),
+            gettext("Submission Status"),
+            gettext("Raw score"),
+            gettext("Weighted score"),
+            gettext("Preview"),
+            gettext("Actions"),
+          ];
+
+          const dataTableHeaderColumnsHTML = dataTableHeaderColumns.reduce(
+            (prevColumn, currentColumn) => `${prevColumn}<th>${currentColumn}</th>`,
+            ""
+          );
+          const dataTableHTML = `
+            <table id="dataTable_${block_id}">
+              <thead>
+                <tr>
+                  ${dataTableHeaderColumnsHTML}
+                </tr>
+              </thead>
+              <tbody>
+                <!-- Data rows will be added here using DataTables -->
+              </tbody>
+            </table>
+          `;
+
+          const modalTitleSubmissions = gettext("Mindmap submissions");
+          const reviewButtonText = gettext("Review");
+          const dataTableSearchText = gettext("Search");
+          const dataTableEntriesText = gettext("Showing _START_ to _END_ of _TOTAL_ entries");
+          const dataTableEmptyText = gettext("No data available in table");
+          const dataTableInfoEmptyText = gettext("Showing 0 to 0 of 0 entries");
+          const dataTableZeroRecordsText = gettext("No matching records found");
+          const dataTableInfoFilteredText = gettext("(filtered from _MAX_ total entries)");
+          $(element).find(".modal__data").html(dataTableHTML);
+          $(element).find(".modal_title").html(modalTitleSubmissions);
+
+          const dataTable = $(`#dataTable_${block_id}`).DataTable({
+            serverSide: true,
+            ajax: loadGradingPage,
+            order: [[1, "desc"]],
+            pageLength: 25,
+            scrollY: "50vh",
+            dom: "Bfrtip",
+            destroy: true,
+            columns: [
+              { data: "username", orderable: false },
+              { data: "timestamp" },
+              {
+                data: "submission_status",
+                orderable: false,
+                render: (data) => {
+                  return gettext(data);
                 },
-              });
+              },
+              {
+                data: "raw_score",
+                render: (data) => {
+                  if (data === null) {
+                    return "";
+                  }
+                  return `${data}/${maxPointsAllowed}`;
+                },
+              },
+              {
+                data: "weighted_score",
+                orderable: false,
+                render: (data) => {
+                  if (data === null) {
+                    return "";
+                  }
+                  return `${data}/${problemWeight}`;
+                },
+              },
+              {
+                data: "submission_id",
+                orderable: false,
+                render: (data, _type, row) => {
+                  // The previews are rendered on the server, so the table does not boot jsMind per row.
+                  const preview = `<img class="submission_preview" loading="lazy" alt="" src="${getSubmissionPreviewURL}?submission_id=${encodeURIComponent(data)}">`;
+                  if (row.identical_submissions < 2) {
+                    return preview;
+                  }
+                  const identicalText = answerHashFilter
+                    ? gettext("Show all submissions")
+                    : gettext("_COUNT_ identical").replace("_COUNT_", row.identical_submissions);
+                  return `${preview}<button class="identical_submissions_button button-link" type="button">${identicalText}</button>`;
+                },
+              },
+              {
+                data: null,
+                orderable: false,
+                render: () => {
+                  return `<button class="review_button button-link" type="button">${reviewButtonText}</button>`;
+                },
+              },
+            ],
+            language: {
+              info: dataTableEntriesText,
+              search: dataTableSearchText,
+              emptyTable: dataTableEmptyText,
+              infoEmpty: dataTableInfoEmptyText,
+              zeroRecords: dataTableZeroRecordsText,
+              infoFiltered: dataTableInfoFilteredText,
+            },
+          });
 
-              handleRowDataTableClick(dataTable);
+          handleRowDataTableClick(dataTable);
+          handleIdenticalSubmissionsClick(dataTable);
+          showResetGradesButtons(dataTable);
+          handleExportSubmissionsClick();
+          if (context.pregrading_enabled) {
+            // Every submission is scored in a single batch, the reviews then
+            // read the suggested grades from here or from the server cache.
+            loadSuggestedScores(null);
+          }
+        }
+
+        function showResetGradesButtons(dataTable) {
+          const removeAllGradesText = gettext("Remove all grades");
+          const reopenAllText = gettext("Re-open all submissions");
+          const confirmText = gettext("This will apply to every learner of this component. Continue?");
+          const exportCSVText = gettext("Export submissions (CSV)");
+          const exportJSONLText = gettext("Export submissions (JSONL)");
+          $(element).find(".modal__footer").html(`
+            <button type="button" class="button-link reset-grades-button" data-reopen="false">${removeAllGradesText}</button>
+            <button type="button" class="button-link reset-grades-button" data-reopen="true">${reopenAllText}</button>
+            <span class="reset-grades-progress"></span>
+            <button type="button" class="button-link export-submissions-button" data-format="csv">${exportCSVText}</button>
+            <button type="button" class="button-link export-submissions-button" data-format="jsonl">${exportJSONLText}</button>
+            <span class="export-submissions-progress"></span>
+          `);
+
+          $(element)
+            .find(".reset-grades-button")
+            .click(function () {
+              if (!window.confirm(confirmText)) {
+                return;
+              }
+              const data = { student_ids: "all", reopen: $(this).attr("data-reopen") === "true" };
+              $(element).find(".reset-grades-button").attr("disabled", "disabled");
+              $.post(resetGradesURL, JSON.stringify(data))
+                .done(function (progress) {
+                  pollResetGradesProgress(dataTable, progress);
+                })
+                .fail(function () {
+                  $(element).find(".reset-grades-button").removeAttr("disabled");
+                  console.log("Error resetting the grades");
+                });
+            });
+        }
+
+        function handleExportSubmissionsClick() {
+          $(element)
+            .find(".export-submissions-button")
+            .click(function () {
+              $(element).find(".export-submissions-button").attr("disabled", "disabled");
+              $.post(exportSubmissionsURL, JSON.stringify({ format: $(this).attr("data-format") }))
+                .done(pollExportSubmissionsProgress)
+                .fail(function () {
+                  $(element).find(".export-submissions-button").removeAttr("disabled");
+                  console.log("Error exporting the submissions");
+                });
+            });
+        }
+
+        function pollExportSubmissionsProgress(progress) {
+          // The file is written by a background job, it is downloaded once
+          // the job completes.
+          const progressText = gettext("Exported _PROCESSED_ of _TOTAL_ submissions");
+          $(element)
+            .find(".export-submissions-progress")
+            .html(progressText.replace("_PROCESSED_", progress.processed).replace("_TOTAL_", progress.total));
+
+          if (progress.status === "completed" || progress.status === "failed") {
+            $(element).find(".export-submissions-button").removeAttr("disabled");
+            if (progress.status === "completed") {
+              window.location.href = `${downloadSubmissionsExportURL}?job_id=${progress.job_id}`;
             }
-
-            function handleRowDataTableClick(dataTable) {
-              $(element)
-                .find(`#dataTable_${block_id}`)
-                .on("click", ".review_button", function (e) {
-                  e.preventDefault();
-                  const target = $(e.target);
-                  const link = target;
-                  const rowReview = link.closest("tr");
-                  const submissionData = dataTable.row(rowReview).data();
-                  const answerMindMap = submissionData.answer_body.mindmap_student_body;
-                  const answerMindMapFormat = JSON.parse(answerMindMap);
-                  const submitGradeButtonText = gettext("Submit");
-                  const removeGradeButtonText = gettext("Remove grade");
-                  const loadingButtonText = gettext("Loading...");
-                  const reviewGoBackButtonText = gettext("Back");
-                  const gradeLabelText = gettext("Grade");
-
-                  const mindMapReviewContainer = `
-                    <div class="review_mindmap_container">
-                      <button class="button-link back-review">&larr;&nbsp; ${reviewGoBackButtonText}</button>
-                      <div id="review-mindmap"></div>
-                      <div class="grade-assessment">
-                        <form id="grade-assessment-form">
-                          <div class="grade-assessment_form-control">
-                            <label for="grade">${gradeLabelText}</label>
-                            <input type="number" name="grade" required class="inputs-styles" id="grade_value" />
-                            <span class="error-message" id="error-grade"></span>
-                          </div>
-                          <div class="grade-assessment_form-buttons">
-                            <button type="submit" class="grade-assessment__button-submit" data-type="add_grade">${submitGradeButtonText}</button>
-                            <button type="submit" class="grade-assessment__button-submit" data-type="remove_grade">${removeGradeButtonText}</button>
-                          </div>
-                        </form>
+            return;
+          }
+          setTimeout(function () {
+            $.post(getResetGradesProgressURL, JSON.stringify({ job_id: progress.job_id }))
+              .done(pollExportSubmissionsProgress)
+              .fail(function () {
+                $(element).find(".export-submissions-button").removeAttr("disabled");
+                console.log("Error getting the progress of the export");
+              });
+          }, 2000);
+        }
+
+        function pollResetGradesProgress(dataTable, progress) {
+          // The grades are reset by a background job, its progress is polled
+          // until it finishes and the table is then reloaded.
+          const progressText = gettext("Processed _PROCESSED_ of _TOTAL_ learners");
+          $(element)
+            .find(".reset-grades-progress")
+            .html(progressText.replace("_PROCESSED_", progress.processed).replace("_TOTAL_", progress.total));
+
+          if (progress.status === "completed" || progress.status === "failed") {
+            $(element).find(".reset-grades-button").removeAttr("disabled");
+            dataTable.ajax.reload();
+            return;
+          }
+          setTimeout(function () {
+            $.post(getResetGradesProgressURL, JSON.stringify({ job_id: progress.job_id }))
+              .done(function (response) {
+                pollResetGradesProgress(dataTable, response);
+              })
+              .fail(function () {
+                $(element).find(".reset-grades-button").removeAttr("disabled");
+                console.log("Error getting the progress of the grades reset");
+              });
+          }, 2000);
+        }
+
+        // Grades suggested by the comparison with the reference mind map, keyed by submission id.
+        const suggestedScores = {};
+
+        function loadSuggestedScores(submissionIds, callback) {
+          const data = submissionIds ? { submission_ids: submissionIds } : {};
+          $.post(getSuggestedScoresURL, JSON.stringify(data))
+            .done(function (response) {
+              Object.assign(suggestedScores, response.scores);
+              if (callback) {
+                callback();
+              }
+            })
+            .fail(function () {
+              console.log("Error getting the suggested grades");
+            });
+        }
+
+        function showSuggestedScore(submissionId) {
+          const suggestedScore = suggestedScores[submissionId];
+          if (!suggestedScore) {
+            return;
+          }
+          const suggestedGradeText = gettext("Suggested grade: _SCORE_").replace("_SCORE_", suggestedScore.raw_score);
+          $(element).find("#suggested-grade").html(`${suggestedGradeText}/${maxPointsAllowed}`);
+          $(element).find("#grade_value").attr("placeholder", suggestedScore.raw_score);
+        }
+
+        // Hash of the mind map whose identical submissions are listed, if any.
+        let answerHashFilter = null;
+
+        function handleIdenticalSubmissionsClick(dataTable) {
+          $(element)
+            .find(`#dataTable_${block_id}`)
+            .on("click", ".identical_submissions_button", function (e) {
+              e.preventDefault();
+              const submissionData = dataTable.row($(e.target).closest("tr")).data();
+              answerHashFilter = answerHashFilter ? null : submissionData.answer_hash;
+              dataTable.ajax.reload();
+            });
+        }
+
+        function loadGradingPage(request, callback) {
+          // The server sorts, filters and paginates the submissions, so only
+          // the visible page is transferred.
+          const [{ column, dir }] = request.order;
+          const sortField = request.columns[column].data;
+          const data = {
+            offset: request.start,
+            page_size: request.length,
+            username: request.search.value,
+            sort: dir === "desc" ? `-${sortField}` : sortField,
+            answer_hash: answerHashFilter,
+          };
+          $.post(getGradingPageURL, JSON.stringify(data))
+            .done(function (response) {
+              callback({
+                draw: request.draw,
+                recordsTotal: response.count,
+                recordsFiltered: response.count,
+                data: response.assignments,
+              });
+            })
+            .fail(function () {
+              console.log("Error listing Mindmap submissions");
+            });
+        }
+
+        function handleRowDataTableClick(dataTable) {
+          $(element)
+            .find(`#dataTable_${block_id}`)
+            .on("click", ".review_button", function (e) {
+              e.preventDefault();
+              const target = $(e.target);
+              const link = target;
+              const rowReview = link.closest("tr");
+              const submissionData = dataTable.row(rowReview).data();
+              const submitGradeButtonText = gettext("Submit");
+              const removeGradeButtonText = gettext("Remove grade");
+              const loadingButtonText = gettext("Loading...");
+              const reviewGoBackButtonText = gettext("Back");
+              const gradeLabelText = gettext("Grade");
+
+              const mindMapReviewContainer = `
+                <div class="review_mindmap_container">
+                  <button class="button-link back-review">&larr;&nbsp; ${reviewGoBackButtonText}</button>
+                  <div id="review-mindmap"></div>
+                  <div class="grade-assessment">
+                    <form id="grade-assessment-form">
+                      <div class="grade-assessment_form-control">
+                        <label for="grade">${gradeLabelText}</label>
+                        <input type="number" name="grade" required class="inputs-styles" id="grade_value" />
+                        <span class="suggested-grade" id="suggested-grade"></span>
+                        <span class="error-message" id="error-grade"></span>
                       </div>
-                    </div>`;
-
-                  const modalTitle = gettext("Reviewing Mindmap for student: ") + submissionData.username;
-                  $(element).find(".modal__data").html(mindMapReviewContainer);
-                  $(element).find(".modal_title").html(modalTitle);
-                  const [mindMapReviewContent] = $(element).find("#review-mindmap");
-                  const reviewMindMapOptions = {
-                    container: mindMapReviewContent,
-                    editable: false,
-                    theme: "asphalt",
-                  };
+                      <div class="grade-assessment_form-buttons">
+                        <button type="submit" class="grade-assessment__button-submit" data-type="add_grade">${submitGradeButtonText}</button>
+                        <button type="submit" class="grade-assessment__button-submit" data-type="remove_grade">${removeGradeButtonText}</button>
+                      </div>
+                    </form>
+                  </div>
+                </div>`;
+
+              const modalTitle = gettext("Reviewing Mindmap for student: ") + submissionData.username;
+              $(element).find(".modal__data").html(mindMapReviewContainer);
+              $(element).find(".modal__footer").empty();
+              $(element).find(".modal_title").html(modalTitle);
+              const [mindMapReviewContent] = $(element).find("#review-mindmap");
+              const reviewMindMapOptions = {
+                container: mindMapReviewContent,
+                editable: false,
+                theme: "asphalt",
+              };
+
+              const currentMindMapReview = new jsMind(reviewMindMapOptions);
+              // The mind map is only fetched when the submission is reviewed,
+              // the browser revalidates it with the ETag of the submission.
+              $.get(getSubmissionMindMapURL, { submission_id: submissionData.submission_id })
+                .done(function (response) {
+                  currentMindMapReview.show(response.mind_map);
+                })
+                .fail(function () {
+                  console.log("Error loading the Mindmap submission");
+                });
 
-                  const currentMindMapReview = new jsMind(reviewMindMapOptions);
-                  currentMindMapReview.show(answerMindMapFormat);
-
-                  $(element)
-                    .find(".back-review")
-                    .click(function () {
-                      $.post(getGradingDataURL, JSON.stringify({}))
-                        .done(function (response) {
-                          const { assignments } = response;
-                          showDataTable(assignments);
-                        })
-                        .fail(function () {
-                          console.log("Error listing Mindmap submissions");
-                        });
-                    });
-
-                  $(".grade-assessment__button-submit").on("click", function () {
-                    // Get the custom data-type attribute of the clicked button
-                    const typeAction = $(this).attr("data-type");
-                    $("#grade-assessment-form").attr("data-type", typeAction);
-                    if (typeAction === "remove_grade") {
-                      $("#grade_value").removeAttr("required");
-                      $("#grade_value").attr("type", "text");
-                    } else {
-                      $("#grade_value").attr("required");
-                      $("#grade_value").attr("type", "number");
-                    }
+              if (context.pregrading_enabled) {
+                if (submissionData.submission_id in suggestedScores) {
+                  showSuggestedScore(submissionData.submission_id);
+                } else {
+                  loadSuggestedScores([submissionData.submission_id], function () {
+                    showSuggestedScore(submissionData.submission_id);
                   });
+                }
+              }
 
-                  $("#grade-assessment-form").on("submit", function (e) {
-                    e.preventDefault();
-                    const typeAction = $(this).attr("data-type");
-                    const grade = $("#grade_value").val();
-                    const { submission_id, student_id, module_id } = submissionData;
-                    const invalidGradeMessage = gettext("Invalid grade must be a number");
-                    const maxGradeMessage = gettext("Please enter a lower grade, maximum grade allowed is:");
-                    const gradeParsed = parseInt(grade, 10);
-
-                    if (gradeParsed > maxPointsAllowed) {
-                      $("#error-grade").html(`${maxGradeMessage} ${maxPointsAllowed}`);
-                      return;
-                    }
-
-                    const onlyNumberRegex = /^[0-9]*$/g;
-
-                    if (!onlyNumberRegex.test(grade)) {
-                      $("#error-grade").html(invalidGradeMessage);
-                      return;
-                    }
-
-                    $("#error-grade").html("");
-
-                    let data;
-                    let apiUrl;
-
-                    if (typeAction === "add_grade") {
-                      apiUrl = enterGradeURL;
-                      data = {
-                        grade: grade,
-                        submission_id: submission_id,
-                        module_id: module_id,
-                      };
-                    }
-
-                    if (typeAction === "remove_grade") {
-                      apiUrl = removeGradeURL;
-                      data = {
-                        student_id: student_id,
-                        module_id: module_id,
-                      };
-                    }
-
-                    $(".grade-assessment__button-submit").attr("disabled", "disabled");
-                    $(".grade-assessment__button-submit").html(
-                      `<i class="fa fa-spinner fa-spin"></i>${loadingButtonText}`
-                    );
-                    $.post(apiUrl, JSON.stringify(data))
-                      .done(function (response) {
-                        console.log(response);
-                      })
-                      .fail(function (error) {
-                        console.log(error);
-                      })
-                      .always(function () {
-                        $(".grade-assessment__button-submit").removeAttr("disabled");
-                        const submitGradeButton = $('.grade-assessment__button-submit[data-type="add_grade"]');
-                        const removeGradeButton = $('.grade-assessment__button-submit[data-type="remove_grade"]');
-                        submitGradeButton.html(submitGradeButtonText);
-                        removeGradeButton.html(removeGradeButtonText);
-                      });
-                  });
+              $(element)
+                .find(".back-review")
+                .click(function () {
+                  showDataTable();
                 });
-            }
-          })
-          .fail(function () {
-            console.log("Error submitting mind map");
-          });
+
+              $(".grade-assessment__button-submit").on("click", function () {
+                // Get the custom data-type attribute of the clicked button
+                const typeAction = $(this).attr("data-type");
+                $("#grade-assessment-form").attr("data-type", typeAction);
+                if (typeAction === "remove_grade") {
+                  $("#grade_value").removeAttr("required");
+                  $("#grade_value").attr("type", "text");
+                } else {
+                  $("#grade_value").attr("required");
+                  $("#grade_value").attr("type", "number");
+                }
+              });
+
+              $("#grade-assessment-form").on("submit", function (e) {
+                e.preventDefault();
+                const typeAction = $(this).attr("data-type");
+                const grade = $("#grade_value").val();
+                const { submission_id, student_id, module_id } = submissionData;
+                const invalidGradeMessage = gettext("Invalid grade must be a number");
+                const maxGradeMessage = gettext("Please enter a lower grade, maximum grade allowed is:");
+                const gradeParsed = parseInt(grade, 10);
+
+                if (gradeParsed > maxPointsAllowed) {
+                  $("#error-grade").html(`${maxGradeMessage} ${maxPointsAllowed}`);
+                  return;
+                }
+
+                const onlyNumberRegex = /^[0-9]*$/g;
+
+                if (!onlyNumberRegex.test(grade)) {
+                  $("#error-grade").html(invalidGradeMessage);
+                  return;
+                }
+
+                $("#error-grade").html("");
+
+                let data;
+                let apiUrl;
+
+                if (typeAction === "add_grade") {
+                  apiUrl = enterGradeURL;
+                  data = {
+                    grade: grade,
+                    submission_id: submission_id,
+                    module_id: module_id,
+                  };
+                }
+
+                if (typeAction === "remove_grade") {
+                  apiUrl = removeGradeURL;
+                  data = {
+                    student_id: student_id,
+                    module_id: module_id,
+                  };
+                }
+
+                $(".grade-assessment__button-submit").attr("disabled", "disabled");
+                $(".grade-assessment__button-submit").html(
+                  `<i class="fa fa-spinner fa-spin"></i>${loadingButtonText}`
+                );
+                $.post(apiUrl, JSON.stringify(data))
+                  .done(function (response) {
+                    console.log(response);
+                  })
+                  .fail(function (error) {
+                    console.log(error);
+                  })
+                  .always(function () {
+                    $(".grade-assessment__button-submit").removeAttr("disabled");
+                    const submitGradeButton = $('.grade-assessment__button-submit[data-type="add_grade"]');
+                    const removeGradeButton = $('.grade-assessment__button-submit[data-type="remove_grade"]');
+                    submitGradeButton.html(submitGradeButtonText);
+                    removeGradeButton.html(removeGradeButtonText);
+                  });
+              });
+            });
+        }
       });
 
     $(element)
@@ -353,6 +581,382 @@ function MindMapXBlock(runtime, element, context) {
       });
   }
 
+  function getChildren(nodes) {
+    const children = new Map();
+    nodes.forEach((node) => {
+      if (!children.has(node.parentid)) {
+        children.set(node.parentid, []);
+      }
+      children.get(node.parentid).push(node.id);
+    });
+    return children;
+  }
+
+  function diffMindMaps(previous, current) {
+    // Node-level operations turning the previous node_array into the current one,
+    // they are applied in order by the patch_assignment handler.
+    const previousNodes = new Map(previous.data.map((node) => [node.id, node]));
+    const currentNodes = new Map(current.data.map((node) => [node.id, node]));
+    const currentChildren = getChildren(current.data);
+    // Children of each node as the server sees them while the operations are applied.
+    const children = getChildren(previous.data);
+    const parents = new Map(previous.data.map((node) => [node.id, node.parentid]));
+    const rootId = previous.data.find((node) => node.isroot).id;
+    const place = (id, parentid, index) => {
+      if (parents.has(id)) {
+        const siblings = children.get(parents.get(id));
+        siblings.splice(siblings.indexOf(id), 1);
+      }
+      if (!children.has(parentid)) {
+        children.set(parentid, []);
+      }
+      const siblings = children.get(parentid);
+      siblings.splice(index === undefined ? siblings.length : index, 0, id);
+      parents.set(id, parentid);
+    };
+    const operations = [];
+
+    // Deleting a node deletes its descendants as well, so the nodes moved out of
+    // a deleted node are moved to the root first and placed afterwards.
+    previous.data.forEach((node) => {
+      if (!node.isroot && currentNodes.has(node.id) && !currentNodes.has(node.parentid)) {
+        operations.push({ op: "move", id: node.id, parentid: rootId });
+        place(node.id, rootId);
+      }
+    });
+    previous.data.forEach((node) => {
+      if (!currentNodes.has(node.id) && currentNodes.has(node.parentid)) {
+        operations.push({ op: "delete", id: node.id });
+        const siblings = children.get(node.parentid);
+        siblings.splice(siblings.indexOf(node.id), 1);
+        parents.delete(node.id);
+      }
+    });
+
+    // The current nodes are visited in order, so the siblings before each node
+    // are already in place and its index among them is final.
+    current.data.forEach((node) => {
+      const previousNode = previousNodes.get(node.id);
+      const index = node.isroot ? 0 : currentChildren.get(node.parentid).indexOf(node.id);
+      if (!previousNode) {
+        operations.push({ op: "add", node: node, index: index });
+        place(node.id, node.parentid, index);
+        return;
+      }
+      if (previousNode.topic !== node.topic) {
+        operations.push({ op: "update", id: node.id, topic: node.topic });
+      }
+      if (!node.isroot && (parents.get(node.id) !== node.parentid || children.get(node.parentid).indexOf(node.id) !== index)) {
+        operations.push({ op: "move", id: node.id, parentid: node.parentid, direction: node.direction, index: index });
+        place(node.id, node.parentid, index);
+      }
+    });
+
+    return operations;
+  }
+
+  function patchMindMap(mindMap, savedMindMap, version) {
+    const mindMapData = mindMap.get_data("node_array");
+    const data = { version: version, operations: diffMindMaps(savedMindMap, mindMapData) };
+
+    $.post(patchMindMapURL, JSON.stringify(data))
+      .done(function () {
+        window.location.reload(false);
+      })
+      .fail(function () {
+        // The mind map changed since it was loaded or cannot be patched, save it whole.
+        handleMindMap(runtime, element, mindMap, saveMindMapURL);
+      });
+  }
+
+  function setUpAutosave(jsMind, mindMap, settings, onSaved) {
+    // The mind map is saved once the learner stops editing it for `delay` seconds,
+    // one request at a time and only when it changed. The server accepts an
+    // autosave every `min_interval` seconds, the rejected ones are retried then.
+    let lastSavedJSON = JSON.stringify(mindMap.get_data("node_array"));
+    let timer = null;
+    let saving = false;
+    let retryDelay = null;
+
+    function schedule(delay) {
+      clearTimeout(timer);
+      timer = setTimeout(autosave, delay * 1000);
+    }
+
+    function autosave() {
+      if (saving) {
+        retryDelay = settings.delay;
+        return;
+      }
+      const mindMapData = mindMap.get_data("node_array");
+      const mindMapJSON = JSON.stringify(mindMapData);
+      if (mindMapJSON === lastSavedJSON) {
+        return;
+      }
+      saving = true;
+      $.post(saveMindMapURL, JSON.stringify({ mind_map: mindMapData, autosave: true }))
+        .done(function (response) {
+          lastSavedJSON = mindMapJSON;
+          onSaved(mindMapData, response.version);
+        })
+        .fail(function (xhr) {
+          if (xhr.status === 429) {
+            retryDelay = settings.min_interval;
+          } else {
+            console.error("Error autosaving mind map");
+          }
+        })
+        .always(function () {
+          saving = false;
+          if (retryDelay !== null) {
+            schedule(retryDelay);
+            retryDelay = null;
+          }
+        });
+    }
+
+    mindMap.add_event_listener(function (type) {
+      if (type === jsMind.event_type.edit) {
+        schedule(settings.delay);
+      }
+    });
+  }
+
+  function applyOperations(mindMapData, operations) {
+    // Apply the operations of a batch to a node_array in place, as the
+    // patching module of the server, to keep the synced copy up to date.
+    const nodes = mindMapData.data;
+    const nodesById = new Map(nodes.map((node) => [node.id, node]));
+    const insert = (node, index) => {
+      const siblings = [];
+      nodes.forEach((sibling, position) => {
+        if (sibling.parentid === node.parentid) {
+          siblings.push(position);
+        }
+      });
+      if (index === undefined || index === null || index >= siblings.length) {
+        nodes.push(node);
+      } else {
+        nodes.splice(siblings[Math.max(index, 0)], 0, node);
+      }
+      nodesById.set(node.id, node);
+    };
+    const remove = (ids) => {
+      const kept = nodes.filter((node) => !ids.has(node.id));
+      nodes.splice(0, nodes.length, ...kept);
+    };
+
+    operations.forEach((operation) => {
+      if (operation.op === "add") {
+        const node = Object.assign({}, operation.node);
+        delete node.isroot;
+        insert(node, operation.index);
+      } else if (operation.op === "update") {
+        nodesById.get(operation.id).topic = operation.topic;
+      } else if (operation.op === "move") {
+        const node = nodesById.get(operation.id);
+        remove(new Set([node.id]));
+        node.parentid = operation.parentid === undefined ? node.parentid : operation.parentid;
+        if (operation.direction !== undefined) {
+          node.direction = operation.direction;
+        }
+        insert(node, operation.index);
+      } else if (operation.op === "delete") {
+        const children = getChildren(nodes);
+        const ids = new Set([operation.id]);
+        const pendingIds = [operation.id];
+        while (pendingIds.length) {
+          (children.get(pendingIds.pop()) || []).forEach((childId) => {
+            ids.add(childId);
+            pendingIds.push(childId);
+          });
+        }
+        remove(ids);
+        ids.forEach((id) => nodesById.delete(id));
+      }
+    });
+  }
+
+  function applyOperationsToView(jsMind, mindMap, operations) {
+    // Apply the operations of the other learners to the jsMind view, which may
+    // hold local edits not sent yet. The operations on nodes the learner
+    // deleted meanwhile are skipped, the deletion is sent with the next batch.
+    const getDirection = (direction) => {
+      if (direction === "left") {
+        return jsMind.direction.left;
+      }
+      return direction === "right" ? jsMind.direction.right : undefined;
+    };
+    const getNodeBefore = (parent, index, id) => {
+      const siblings = parent.children.filter((child) => child.id !== id);
+      return index === undefined || index === null || index >= siblings.length ? null : siblings[Math.max(index, 0)];
+    };
+
+    operations.forEach((operation) => {
+      if (operation.op === "add") {
+        const node = operation.node;
+        const parent = mindMap.get_node(node.parentid);
+        if (!parent || mindMap.get_node(node.id)) {
+          return;
+        }
+        const before = getNodeBefore(parent, operation.index, node.id);
+        if (before) {
+          mindMap.insert_node_before(before, node.id, node.topic, null, getDirection(node.direction));
+        } else {
+          mindMap.add_node(parent, node.id, node.topic, null, getDirection(node.direction));
+        }
+      } else if (operation.op === "update") {
+        if (mindMap.get_node(operation.id)) {
+          mindMap.update_node(operation.id, operation.topic);
+        }
+      } else if (operation.op === "move") {
+        const node = mindMap.get_node(operation.id);
+        const parent = node && mindMap.get_node(operation.parentid === undefined ? node.parent.id : operation.parentid);
+        if (!node || !parent) {
+          return;
+        }
+        const before = getNodeBefore(parent, operation.index, node.id);
+        mindMap.move_node(node.id, before ? before.id : "_last_", parent.id, getDirection(operation.direction));
+      } else if (operation.op === "delete") {
+        if (mindMap.get_node(operation.id)) {
+          mindMap.remove_node(operation.id);
+        }
+      }
+    });
+  }
+
+  function setUpSharedEditing(jsMind, mindMap, context) {
+    // The edits of the learner are sent as node-level operations on the version
+    // of the shared mind map they were made on, one batch at a time. The batches
+    // applied by the group, including the ones of this browser, are received from
+    // the WebSocket or by polling, and applied in version order to the synced copy
+    // of the shared mind map and to the view.
+    const settings = context.shared;
+    const syncDelay = 300;
+    let synced = mindMap.get_data("node_array");
+    let version = context.version;
+    // The version of the last batch sent, the next one is made once it is received.
+    let awaitedVersion = version;
+    const received = new Map();
+    let sending = false;
+    let timer = null;
+    let socket = null;
+
+    function showSynced() {
+      const mind = JSON.parse(JSON.stringify(synced));
+      mind.meta = Object.assign({}, mind.meta, { author: context.author });
+      mindMap.show(mind);
+    }
+
+    function reset(response) {
+      synced = response.mind_map;
+      version = response.version;
+      awaitedVersion = version;
+      received.clear();
+      showSynced();
+    }
+
+    function receive(batch) {
+      if (batch.version > version) {
+        received.set(batch.version, batch);
+      }
+      while (received.has(version + 1)) {
+        const next = received.get(version + 1);
+        received.delete(version + 1);
+        applyOperations(synced, next.operations);
+        version = next.version;
+        if (next.client_id !== settings.client_id) {
+          try {
+            applyOperationsToView(jsMind, mindMap, next.operations);
+          } catch (error) {
+            showSynced();
+          }
+        } else if (next.dropped) {
+          // Some edits conflicted with the ones of the group, show the shared mind map as it is.
+          showSynced();
+        }
+      }
+    }
+
+    function poll() {
+      return $.post(getSharedMapURL, JSON.stringify({ since: version }))
+        .done(function (response) {
+          if (response.mind_map) {
+            reset(response);
+          } else {
+            response.batches.forEach(receive);
+          }
+        });
+    }
+
+    function schedule(delay) {
+      clearTimeout(timer);
+      timer = setTimeout(sync, delay);
+    }
+
+    function sync() {
+      if (sending || version < awaitedVersion) {
+        schedule(syncDelay);
+        return;
+      }
+      const operations = diffMindMaps(synced, mindMap.get_data("node_array"));
+      if (!operations.length) {
+        return;
+      }
+      sending = true;
+      const data = { version: version, operations: operations, client_id: settings.client_id };
+      $.post(applySharedOperationsURL, JSON.stringify(data))
+        .done(function (batch) {
+          awaitedVersion = batch.version;
+          receive(batch);
+          if (version < awaitedVersion) {
+            // Batches of the group were applied before this one, fetch them.
+            poll();
+          }
+        })
+        .fail(function (xhr) {
+          if (xhr.status === 409) {
+            $.post(getSharedMapURL, JSON.stringify({})).done(reset);
+          } else if (xhr.status === 503) {
+            schedule(settings.poll_interval * 1000);
+          } else {
+            console.error("Error saving the shared mind map");
+          }
+        })
+        .always(function () {
+          sending = false;
+        });
+    }
+
+    function connect() {
+      socket = new WebSocket(settings.websocket_url);
+      socket.onopen = poll;
+      socket.onmessage = function (event) {
+        receive(JSON.parse(event.data));
+      };
+      socket.onclose = function () {
+        setTimeout(connect, settings.poll_interval * 1000);
+      };
+    }
+
+    if (settings.websocket_url && "WebSocket" in window) {
+      connect();
+    }
+    setInterval(function () {
+      if (!socket || socket.readyState !== WebSocket.OPEN) {
+        poll();
+      }
+    }, settings.poll_interval * 1000);
+
+    mindMap.add_event_listener(function (type) {
+      if (type === jsMind.event_type.edit) {
+        schedule(syncDelay);
+      }
+    });
+
+    return { sync: sync };
+  }
+
   function handleMindMap(_, _, mindMap, handlerUrl) {
     const mindMapData = mindMap.get_data("node_array");
     const jsonMindMapData = mindMapData;
@@ -368,11 +972,11 @@ function MindMapXBlock(runtime, element, context) {
   }
 
 
-  if (typeof require === "function") {
-    require(["jsMind"], function (jsMind) {
+  window.MindMapJsMindLoader.load(context.jsmind_urls)
+    .done(function (jsMind) {
       showMindMap(jsMind, context);
+    })
+    .fail(function () {
+      console.error("Error loading jsMind.");
     });
-  } else {
-    showMindMap(window.jsMind, context);
-  }
 }
@@ -14,6 +14,7 @@ function MindMapXBlock(runtime, element, context) {
         weight: Number($(element).find("input[name=mindmap_weight]").val()),
         points: Number($(element).find("input[name=mindmap_points]").val()),
         is_static: Number($(element).find("select[name=mindmap_is_static]").val()),
+        shared_group: $(element).find("select[name=mindmap_shared_group]").val(),
         mind_map: currentMindMap.get_data("node_array"),
       };
       $.post(handlerUrl, JSON.stringify(data))
@@ -46,59 +47,11 @@ function MindMapXBlock(runtime, element, context) {
     currentMindMap.show(mind);
   }
 
-  if (typeof require === "function") {
-    require(["jsMind"], function (jsMind) {
-      window.jsMind = jsMind;
-
-      if (window.isJsMindDraggablePluginLoaded) {
-        showMindMap(jsMind, context);
-      } else {
-        loadJsMindDraggablePlugin(function () {
-          showMindMap(jsMind, context);
-        });
-      }
-    });
-  } else {
-    loadJSMind(function () {
-      showMindMap(window.jsMind, context);
-    }, context.editable);
-  }
-}
-
-function loadJSMind(callback, isEditable = false) {
-  if (window.jsMind) {
-    callback();
-  } else {
-    // Load jsMind dynamically using $.getScript
-    $.getScript("https://unpkg.com/jsmind@0.6.4/es6/jsmind.js")
-      .done(function () {
-        // Assign jsMind to the window object after it's loaded
-        window.jsMind = jsMind;
-        // Load jsMind.draggable-node dynamically using $.getScript
-        if (!window.isJsMindDraggablePluginLoaded && isEditable) {
-          loadJsMindDraggablePlugin(callback);
-        } else {
-          callback();
-        }
-      })
-      .fail(function () {
-        console.error("Error loading jsMind.");
-      });
-  }
-}
-
-function loadJsMindDraggablePlugin(callback) {
-  $.getScript("https://unpkg.com/jsmind@0.6.4/es6/jsmind.draggable-node.js")
-    .done(function () {
-      if (window.jsMind) {
-        // Both jsMind and jsMind.draggable are now loaded and available
-        window.isJsMindDraggablePluginLoaded = true;
-        callback();
-      } else {
-        console.error("Error loading jsMind or jsMind.draggable.");
-      }
+  window.MindMapJsMindLoader.load(context.jsmind_urls)
+    .done(function (jsMind) {
+      showMindMap(jsMind, context);
     })
     .fail(function () {
-      console.error("Error loading jsMind.draggable-node.");
+      console.error("Error loading jsMind.");
     });
 }
@@ -0,0 +1,295 @@
+"""
+Server-side rendering of mind maps to static SVG previews.
+
+The grading screen and Studio show the mind maps as thumbnails, which would
+otherwise require booting jsMind for each of them. The layout follows the
+jsMind one: the root in the middle, its children split between the left and
+the right side, and every subtree stacked vertically next to its parent.
+The text is not measured with a font, its width is approximated from the
+width class of each character.
+
+The rendered SVGs are cached by the hash of the mind map content, so the
+same mind map is only laid out once whichever block or learner it belongs to.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from html import escape
+
+from django.core.cache import cache
+
+from mindmap.blobs import canonical_json, get_content_hash
+
+# Bumped when the output changes, so the previews cached before are not used.
+RENDER_VERSION = 1
+# The previews only depend on the mind map content, they are kept for a week.
+RENDER_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+FONT_SIZE = 14
+NODE_HEIGHT = 30
+NODE_PADDING = 10
+HORIZONTAL_GAP = 30
+VERTICAL_GAP = 10
+MARGIN = 20
+MAX_LABEL_LENGTH = 40
+
+ROOT_COLORS = ("#428bca", "#fff")
+NODE_COLORS = ("#eee", "#333")
+EDGE_COLOR = "#555"
+
+# Width of the characters relative to the font size.
+NARROW_CHARACTERS = frozenset("fijlrtI!|.,:;'\"()[]{} ")
+WIDE_CHARACTERS = frozenset("mwMW@%")
+
+COLOR_PATTERN = re.compile(r"^(#[0-9a-fA-F]{3,8}|[a-zA-Z]{3,20})$")
+
+
+def get_mind_map_svg(mind_map: dict) -> tuple:
+    """
+    Return the SVG preview of a mind map, rendered once for each content.
+
+    Args:
+        mind_map (dict): The mind map in the `node_array` or `node_tree` format.
+
+    Returns:
+        tuple: The SVG document and the hash of the mind map content.
+    """
+    content_hash = get_content_hash(canonical_json(mind_map))
+    cache_key = f"mindmap.svg.{RENDER_VERSION}.{content_hash}"
+    svg = cache.get(cache_key)
+    if svg is None:
+        svg = render_svg(mind_map)
+        cache.set(cache_key, svg, RENDER_CACHE_TIMEOUT)
+    return svg, content_hash
+
+
+def measure_text(text: str) -> float:
+    """
+    Return an approximation of the width in pixels of a text in the preview font.
+    """
+    width = 0.0
+    for character in text:
+        if unicodedata.east_asian_width(character) in ("W", "F"):
+            width += 1.0
+        elif character in NARROW_CHARACTERS:
+            width += 0.3
+        elif character in WIDE_CHARACTERS or character.isupper():
+            width += 0.7
+        else:
+            width += 0.55
+    return width * FONT_SIZE
+
+
+def get_label(topic) -> str:
+    """
+    Return the text shown for a node, on a single line and truncated.
+    """
+    label = " ".join(str(topic).split())
+    if len(label) > MAX_LABEL_LENGTH:
+        label = label[:MAX_LABEL_LENGTH - 1] + "…"
+    return label
+
+
+def get_color(node: dict, key: str, default: str) -> str:
+    """
+    Return a color set on a node by jsMind, or the default one if it is not a plain color.
+    """
+    color = node.get(key)
+    if isinstance(color, str) and COLOR_PATTERN.match(color):
+        return color
+    return default
+
+
+def get_nodes(mind_map: dict) -> tuple:
+    """
+    Return the root id and the nodes of a mind map with their children.
+
+    The descendants of the collapsed nodes are left out, as in jsMind.
+
+    Returns:
+        tuple: The id of the root, the nodes keyed by id and the ids of the
+        children of every node. The root is None for an empty mind map.
+    """
+    data = mind_map.get("data") if isinstance(mind_map, dict) else None
+    nodes = {}
+    children = {}
+    root_id = None
+    if (mind_map or {}).get("format") == "node_array" and isinstance(data, list):
+        for node in data:
+            if not isinstance(node, dict) or not isinstance(node.get("id"), str):
+                continue
+            nodes[node["id"]] = node
+            if node.get("isroot") in (True, "true"):
+                root_id = node["id"]
+            elif isinstance(node.get("parentid"), str):
+                children.setdefault(node["parentid"], []).append(node["id"])
+    elif isinstance(data, dict) and isinstance(data.get("id"), str):
+        root_id = data["id"]
+        level = [data]
+        while level:
+            next_level = []
+            for node in level:
+                nodes[node["id"]] = node
+                node_children = [
+                    child for child in node.get("children") or []
+                    if isinstance(child, dict) and isinstance(child.get("id"), str)
+                ]
+                children[node["id"]] = [child["id"] for child in node_children]
+                next_level.extend(node_children)
+            level = next_level
+    if root_id not in nodes:
+        return None, {}, {}
+
+    for node_id, node in nodes.items():
+        if node.get("expanded") in (False, "false") and node_id != root_id:
+            children.pop(node_id, None)
+    return root_id, nodes, children
+
+
+def split_root_children(root_id, nodes: dict, children: dict) -> tuple:
+    """
+    Split the children of the root between the right and the left side.
+
+    The children with a `direction` keep it, the others go to the side with
+    fewer children, the right one first.
+
+    Returns:
+        tuple: The ids of the children of the right and of the left side.
+    """
+    right, left = [], []
+    for child_id in children.get(root_id, []):
+        direction = nodes[child_id].get("direction")
+        if direction in ("left", -1, "-1"):
+            left.append(child_id)
+        elif direction in ("right", 1, "1"):
+            right.append(child_id)
+        elif len(left) < len(right):
+            left.append(child_id)
+        else:
+            right.append(child_id)
+    return right, left
+
+
+def layout(mind_map: dict) -> tuple:
+    """
+    Compute the position of every visible node of a mind map.
+
+    Returns:
+        tuple: The boxes of the nodes, as dicts with the node, its label,
+        its center `x` and `y`, its `width` and its `parent` box, in the
+        order they are drawn; empty for an empty mind map.
+    """
+    root_id, nodes, children = get_nodes(mind_map)
+    if root_id is None:
+        return []
+
+    widths = {}
+    for node_id, node in nodes.items():
+        widths[node_id] = measure_text(get_label(node.get("topic", ""))) + 2 * NODE_PADDING
+
+    # Height of the subtree of every node reachable from the root, children
+    # first; the visited set ignores the cycles of malformed mind maps.
+    order = []
+    visited = {root_id}
+    stack = [root_id]
+    while stack:
+        node_id = stack.pop()
+        order.append(node_id)
+        for child_id in children.get(node_id, []):
+            if child_id in nodes and child_id not in visited:
+                visited.add(child_id)
+                stack.append(child_id)
+    children = {
+        node_id: [child_id for child_id in children.get(node_id, []) if child_id in visited]
+        for node_id in order
+    }
+    heights = {}
+    for node_id in reversed(order):
+        child_heights = [heights[child_id] for child_id in children[node_id]]
+        heights[node_id] = max(NODE_HEIGHT, sum(child_heights) + VERTICAL_GAP * (len(child_heights) - 1))
+
+    root = {
+        "node": nodes[root_id],
+        "label": get_label(nodes[root_id].get("topic", "")),
+        "x": 0.0,
+        "y": 0.0,
+        "width": widths[root_id],
+        "parent": None,
+        "root": True,
+    }
+    boxes = [root]
+    for side, side_children in zip((1, -1), split_root_children(root_id, nodes, children)):
+        stack = [(root, side_children)]
+        while stack:
+            parent, child_ids = stack.pop()
+            top = parent["y"] - (
+                sum(heights[child_id] for child_id in child_ids) + VERTICAL_GAP * (len(child_ids) - 1)
+            ) / 2
+            for child_id in child_ids:
+                box = {
+                    "node": nodes[child_id],
+                    "label": get_label(nodes[child_id].get("topic", "")),
+                    "x": parent["x"] + side * (parent["width"] / 2 + HORIZONTAL_GAP + widths[child_id] / 2),
+                    "y": top + heights[child_id] / 2,
+                    "width": widths[child_id],
+                    "parent": parent,
+                    "root": False,
+                    "side": side,
+                }
+                boxes.append(box)
+                stack.append((box, children[child_id]))
+                top += heights[child_id] + VERTICAL_GAP
+    return boxes
+
+
+def render_svg(mind_map: dict) -> str:
+    """
+    Render a mind map to an SVG document.
+
+    Args:
+        mind_map (dict): The mind map in the `node_array` or `node_tree` format.
+
+    Returns:
+        str: The SVG document, scaled to the size of the mind map.
+    """
+    boxes = layout(mind_map)
+    if not boxes:
+        return '<svg xmlns="http://www.w3.org/2000/svg" width="0" height="0" viewBox="0 0 0 0"></svg>'
+
+    min_x = min(box["x"] - box["width"] / 2 for box in boxes) - MARGIN
+    max_x = max(box["x"] + box["width"] / 2 for box in boxes) + MARGIN
+    min_y = min(box["y"] for box in boxes) - NODE_HEIGHT / 2 - MARGIN
+    max_y = max(box["y"] for box in boxes) + NODE_HEIGHT / 2 + MARGIN
+    width, height = max_x - min_x, max_y - min_y
+
+    edges = []
+    shapes = []
+    for box in boxes:
+        parent = box["parent"]
+        if parent:
+            start_x = parent["x"] + box["side"] * parent["width"] / 2
+            end_x = box["x"] - box["side"] * box["width"] / 2
+            middle_x = (start_x + end_x) / 2
+            edges.append(
+                f'<path d="M{start_x:.1f} {parent["y"]:.1f}C{middle_x:.1f} {parent["y"]:.1f} '
+                f'{middle_x:.1f} {box["y"]:.1f} {end_x:.1f} {box["y"]:.1f}"/>'
+            )
+        background, foreground = ROOT_COLORS if box["root"] else NODE_COLORS
+        shapes.append(
+            f'<g><rect x="{box["x"] - box["width"] / 2:.1f}" y="{box["y"] - NODE_HEIGHT / 2:.1f}" '
+            f'width="{box["width"]:.1f}" height="{NODE_HEIGHT}" rx="5" '
+            f'fill="{get_color(box["node"], "background-color", background)}"/>'
+            f'<text x="{box["x"]:.1f}" y="{box["y"]:.1f}" '
+            f'fill="{get_color(box["node"], "foreground-color", foreground)}">{escape(box["label"])}</text></g>'
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="{min_x:.1f} {min_y:.1f} {width:.1f} {height:.1f}" '
+        f'font-family="sans-serif" font-size="{FONT_SIZE}" text-anchor="middle" dominant-baseline="central">'
+        f'<g fill="none" stroke="{EDGE_COLOR}" stroke-width="2">{"".join(edges)}</g>'
+        f'{"".join(shapes)}'
+        "</svg>"
+    )
@@ -0,0 +1,182 @@
+"""
+Process-wide caches for the static resources of the Mind Map XBlock.
+
+The package resources never change while the process is running, so the
+assets, the parsed templates and the translation file resolved for each
+locale are loaded once and shared by every block instance.
+"""
+
+import functools
+import hashlib
+from importlib.resources import files as importlib_files
+
+from django.template import Context, Engine, Template
+from django.template.backends.django import get_installed_libraries
+from django.utils import translation
+
+RESOURCE_CACHE_SIZE = 32
+LOCALE_CACHE_SIZE = 64
+
+STATICI18N_JS_PATH = "public/js/translations/{locale_code}/text.js"
+
+# Pinned jsMind release, vendored by `make vendor_jsmind` in JSMIND_VENDOR_PATH.
+# The files missing from the package are loaded from the CDN, unless MINDMAP_JSMIND_CDN_FALLBACK is disabled.
+JSMIND_VERSION = "0.7.1"
+JSMIND_VENDOR_PATH = "public/vendor/jsmind/{file_name}"
+JSMIND_CDN_URL = "https://unpkg.com/jsmind@{version}/{file_name}"
+# Files of the jsMind release, by path in the release.
+JSMIND_BUNDLE = "es6/jsmind.js"
+JSMIND_DRAGGABLE_BUNDLE = "es6/jsmind.draggable-node.js"
+JSMIND_STYLE = "style/jsmind.css"
+
+
+@functools.lru_cache(maxsize=RESOURCE_CACHE_SIZE)
+def load_resource(path: str) -> str:
+    """
+    Return the content of a package resource.
+
+    Args:
+        path (str): The path of the resource relative to the package.
+
+    Returns:
+        str: The content of the resource.
+    """
+    return importlib_files(__package__).joinpath(path).read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=RESOURCE_CACHE_SIZE)
+def resource_exists(path: str) -> bool:
+    """
+    Return whether a package resource exists.
+
+    Args:
+        path (str): The path of the resource relative to the package.
+
+    Returns:
+        bool: True if the resource exists.
+    """
+    return importlib_files(__package__).joinpath(path).is_file()
+
+
+@functools.lru_cache(maxsize=RESOURCE_CACHE_SIZE)
+def get_resource_hash(path: str) -> str:
+    """
+    Return a short hash of the content of a package resource.
+
+    The hash is used to fingerprint the URLs of the assets, so they can be
+    cached by browsers and CDNs until their content changes.
+
+    Args:
+        path (str): The path of the resource relative to the package.
+
+    Returns:
+        str: The first 12 characters of the SHA-256 hex digest of the resource.
+    """
+    return hashlib.sha256(load_resource(path).encode("utf-8")).hexdigest()[:12]
+
+
+@functools.lru_cache(maxsize=1)
+def get_template_engine() -> Engine:
+    """
+    Return the Django template engine used to render the block templates.
+
+    Returns:
+        Engine: The template engine with the XBlock i18n template tags.
+    """
+    libraries = get_installed_libraries()
+    libraries.update({
+        "i18n": "xblock.utils.templatetags.i18n",
+    })
+    return Engine(libraries=libraries)
+
+
+@functools.lru_cache(maxsize=RESOURCE_CACHE_SIZE)
+def load_django_template(path: str) -> Template:
+    """
+    Return the parsed Django template of a package resource.
+
+    The translations are applied when the template is rendered, so the
+    parsed template can be shared across languages.
+
+    Args:
+        path (str): The path of the template relative to the package.
+
+    Returns:
+        Template: The parsed template.
+    """
+    return Template(load_resource(path), engine=get_template_engine())
+
+
+def render_django_template(path: str, context: dict = None, i18n_service=None) -> str:
+    """
+    Render a Django template of the package with the given context.
+
+    Args:
+        path (str): The path of the template relative to the package.
+        context (dict, optional): The context to render in the template.
+        i18n_service (object, optional): The i18n service used to translate the template.
+
+    Returns:
+        str: The rendered template.
+    """
+    context = context or {}
+    context["_i18n_service"] = i18n_service
+    return load_django_template(path).render(Context(context))
+
+
+@functools.lru_cache(maxsize=LOCALE_CACHE_SIZE)
+def get_statici18n_js_path(locale_code: str) -> str:
+    """
+    Return the Javascript translation file for the given language, if any.
+    Defaults to English if available.
+
+    Args:
+        locale_code (str): The language code, e.g. "es-419".
+
+    Returns:
+        str: The path of the translation file relative to the package.
+        None: If there is no translation file for the language.
+    """
+    lang_code = locale_code.split("-")[0]
+    for code in (translation.to_locale(locale_code), lang_code, "en"):
+        path = STATICI18N_JS_PATH.format(locale_code=code)
+        if importlib_files(__package__).joinpath(path).exists():
+            return path
+    return None
+
+
+def get_jsmind_path(file_name: str) -> str:
+    """
+    Return the path of a vendored jsMind file, None if it was not vendored.
+
+    Args:
+        file_name (str): The path of the file in the release, e.g. "es6/jsmind.js".
+
+    Returns:
+        str: The path of the file relative to the package.
+        None: If the file is not in the package.
+    """
+    path = JSMIND_VENDOR_PATH.format(file_name=file_name)
+    return path if resource_exists(path) else None
+
+
+def get_jsmind_cdn_url(file_name: str) -> str:
+    """
+    Return the CDN URL of a jsMind file of the pinned release.
+    """
+    return JSMIND_CDN_URL.format(version=JSMIND_VERSION, file_name=file_name)
+
+
+def clear_resource_caches() -> None:
+    """
+    Empty the caches of this module.
+    """
+    for cached_function in (
+        load_resource,
+        resource_exists,
+        get_resource_hash,
+        get_template_engine,
+        load_django_template,
+        get_statici18n_js_path,
+    ):
+        cached_function.cache_clear()
@@ -0,0 +1,249 @@
+"""
+Append-only revision history of the learner mind maps.
+
+Every save of a learner mind map appends a revision to the log of the
+learner in the block, when `MINDMAP_REVISION_HISTORY` is enabled. To keep
+the log small, a revision stores the node-level delta from the previous
+revision: the nodes added, changed and removed, keyed by id, and the
+changes of the order of the nodes as `difflib` opcodes. A full snapshot is
+stored instead:
+
+- for every `MINDMAP_REVISION_SNAPSHOT_INTERVAL`-th revision, so a revision
+  is rebuilt from its snapshot with fewer deltas than the interval, read in
+  a single query;
+- for the mind maps which are not in the `node_array` format;
+- when the delta would not be smaller than the mind map.
+
+Only the latest `MINDMAP_REVISION_MAX_COUNT` revisions of a learner are
+kept, from the snapshot they are rebuilt from: the older ones are deleted
+when a snapshot is stored.
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
+
+from mindmap.blobs import canonical_json, get_content_hash
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = 20
+MAX_REVISIONS = 200
+REVISIONS_PAGE_SIZE = 100
+
+# Fields of the revisions listed, without their content.
+REVISION_FIELDS = ("number", "kind", "source", "content_hash", "size", "created")
+
+
+def get_snapshot_interval() -> int:
+    """
+    Return the number of revisions between two snapshots.
+    """
+    return max(getattr(settings, "MINDMAP_REVISION_SNAPSHOT_INTERVAL", SNAPSHOT_INTERVAL), 1)
+
+
+def is_snapshot_due(number: int) -> bool:
+    """
+    Return whether the revision with this number is stored as a snapshot.
+    """
+    return (number - 1) % get_snapshot_interval() == 0
+
+
+def get_revisions(usage_key: str, student_id: str):
+    """
+    Return the revisions of a learner in a block.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapRevision  # pylint: disable=import-outside-toplevel
+
+    return MindMapRevision.objects.filter(usage_key=usage_key, student_id=student_id)
+
+
+def get_node_ids(mind_map: dict) -> list | None:
+    """
+    Return the ids of the nodes of a mind map in the `node_array` format, None for another format.
+    """
+    nodes = mind_map.get("data")
+    if mind_map.get("format") != "node_array" or not isinstance(nodes, list):
+        return None
+    return [node.get("id") for node in nodes]
+
+
+def make_delta(previous: dict, current: dict) -> dict | None:
+    """
+    Return the node-level delta between two mind maps in the `node_array` format.
+
+    Args:
+        previous (dict): The mind map of the previous revision.
+        current (dict): The mind map saved.
+
+    Returns:
+        dict: The other keys of the mind map as `map`, the added and changed
+        nodes by id, with None for the removed ones, as `nodes`, and the
+        opcodes turning the previous order of the node ids into the current
+        one as `order`. None if a mind map is not in the `node_array` format.
+    """
+    previous_ids = get_node_ids(previous)
+    current_ids = get_node_ids(current)
+    if previous_ids is None or current_ids is None:
+        return None
+
+    previous_nodes = dict(zip(previous_ids, previous["data"]))
+    current_nodes = dict(zip(current_ids, current["data"]))
+    nodes = {node_id: node for node_id, node in current_nodes.items() if previous_nodes.get(node_id) != node}
+    nodes.update({node_id: None for node_id in previous_nodes if node_id not in current_nodes})
+    order = []
+    if previous_ids != current_ids:
+        matcher = difflib.SequenceMatcher(None, previous_ids, current_ids, autojunk=False)
+        order = [
+            [start, end, current_ids[first:last]]
+            for tag, start, end, first, last in matcher.get_opcodes() if tag != "equal"
+        ]
+    return {
+        "map": {key: value for key, value in current.items() if key != "data"},
+        "nodes": nodes,
+        "order": order,
+    }
+
+
+def apply_delta(mind_map: dict, delta: dict) -> dict:
+    """
+    Return the mind map of a revision from the mind map of the previous one and its delta.
+    """
+    node_ids = get_node_ids(mind_map)
+    nodes = dict(zip(node_ids, mind_map["data"]))
+    nodes.update(delta["nodes"])
+    # The opcodes are applied from the end, so their positions are not shifted.
+    for start, end, ids in reversed(delta["order"]):
+        node_ids[start:end] = ids
+    return {**delta["map"], "data": [nodes[node_id] for node_id in node_ids]}
+
+
+def record_revision(usage_key: str, student_id: str, mind_map: dict, source: str, previous_mind_map=None):
+    """
+    Append the mind map saved by a learner to their revision log, unless it is the latest revision.
+
+    Args:
+        usage_key (str): The usage key of the block.
+        student_id (str): The anonymous user id of the learner.
+        mind_map (dict): The mind map saved.
+        source (str): The handler which saved the mind map.
+        previous_mind_map (dict, optional): The mind map saved before, used
+            as the previous revision if it is the same, to avoid rebuilding it.
+
+    Returns:
+        int: The number of the revision, None if no revision was added.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapRevision  # pylint: disable=import-outside-toplevel
+
+    content = canonical_json(mind_map)
+    content_hash = get_content_hash(content)
+    revisions = get_revisions(usage_key, student_id)
+    last = revisions.only("number", "content_hash").order_by("-number").first()
+    if last and last.content_hash == content_hash:
+        return None
+
+    number = last.number + 1 if last else 1
+    kind, stored = MindMapRevision.SNAPSHOT, content
+    if last and not is_snapshot_due(number):
+        previous = previous_mind_map
+        if previous is None or get_content_hash(canonical_json(previous)) != last.content_hash:
+            previous = get_revision_mind_map(usage_key, student_id, last.number)
+        delta = make_delta(previous, mind_map) if previous is not None else None
+        delta_content = canonical_json(delta) if delta is not None else None
+        if delta_content is not None and len(delta_content) < len(content):
+            kind, stored = MindMapRevision.DELTA, delta_content
+
+    try:
+        with transaction.atomic():
+            MindMapRevision.objects.create(
+                usage_key=usage_key,
+                student_id=student_id,
+                number=number,
+                kind=kind,
+                source=source,
+                content=stored,
+                content_hash=content_hash,
+                size=len(content),
+            )
+    except IntegrityError:
+        # A concurrent save recorded this revision number, the next save is diffed against it.
+        log.warning("Revision %s of %s in %s was recorded concurrently", number, student_id, usage_key)
+        return None
+
+    if is_snapshot_due(number):
+        prune_revisions(usage_key, student_id, number)
+    return number
+
+
+def prune_revisions(usage_key: str, student_id: str, latest: int) -> None:
+    """
+    Delete the revisions of a learner older than the retention, from the snapshot the kept ones start from.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapRevision  # pylint: disable=import-outside-toplevel
+
+    max_revisions = getattr(settings, "MINDMAP_REVISION_MAX_COUNT", MAX_REVISIONS)
+    if not max_revisions or latest <= max_revisions:
+        return
+    revisions = get_revisions(usage_key, student_id)
+    first_kept = revisions.filter(
+        kind=MindMapRevision.SNAPSHOT,
+        number__lte=latest - max_revisions + 1,
+    ).order_by("-number").values_list("number", flat=True).first()
+    if first_kept:
+        revisions.filter(number__lt=first_kept).delete()
+
+
+def get_revision_mind_map(usage_key: str, student_id: str, number: int) -> dict | None:
+    """
+    Rebuild the mind map of a revision from its snapshot and the following deltas, with a single query.
+
+    Returns:
+        dict: The mind map of the revision, None if the revision does not exist.
+    """
+    # Lazy import: import here to avoid app not ready errors
+    from mindmap.models import MindMapRevision  # pylint: disable=import-outside-toplevel
+
+    revisions = get_revisions(usage_key, student_id)
+    snapshot_number = revisions.filter(
+        kind=MindMapRevision.SNAPSHOT,
+        number__lte=number,
+    ).order_by("-number").values("number")[:1]
+    chain = list(revisions.filter(
+        number__lte=number,
+        number__gte=Subquery(snapshot_number),
+    ).order_by("number").values_list("number", "content"))
+    if not chain or chain[-1][0] != number:
+        return None
+
+    mind_map = json.loads(chain[0][1])
+    for _number, content in chain[1:]:
+        mind_map = apply_delta(mind_map, json.loads(content))
+    return mind_map
+
+
+def list_revisions(usage_key: str, student_id: str, before: int = None, limit: int = REVISIONS_PAGE_SIZE) -> list:
+    """
+    Return the revisions of a learner in a block, latest first, without their content.
+
+    Args:
+        usage_key (str): The usage key of the block.
+        student_id (str): The anonymous user id of the learner.
+        before (int, optional): Only return the revisions before this number, to read the next page.
+        limit (int, optional): The maximum number of revisions returned.
+
+    Returns:
+        list: The `number`, `kind`, `source`, `content_hash`, `size` and `created` of the revisions.
+    """
+    revisions = get_revisions(usage_key, student_id)
+    if before is not None:
+        revisions = revisions.filter(number__lt=before)
+    return list(revisions.order_by("-number").values(*REVISION_FIELDS)[:limit])
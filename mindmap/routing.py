@@ -0,0 +1,11 @@
+"""
+WebSocket routes of the Mind Map XBlock, to add to the ASGI application of the LMS.
+"""
+
+from django.urls import re_path
+
+from mindmap.consumers import MindMapSharedMapConsumer
+
+websocket_urlpatterns = [
+    re_path(r"^ws/mindmap/shared/$", MindMapSharedMapConsumer.as_asgi()),
+]
@@ -9,3 +9,27 @@ def plugin_settings(settings):
     """
     settings.MINDMAP_XMODULE_BACKEND = 'mindmap.edxapp_wrapper.backends.xmodule_p_v1'
     settings.MINDMAP_STUDENT_MODULE_BACKEND = 'mindmap.edxapp_wrapper.backends.student_p_v1'
+    settings.MINDMAP_COURSE_GROUPS_BACKEND = 'mindmap.edxapp_wrapper.backends.course_groups_p_v1'
+    settings.MINDMAP_SERVE_ASSETS_AS_URLS = False
+    settings.MINDMAP_JSMIND_CDN_FALLBACK = True
+    settings.MINDMAP_COMPACT_STORAGE = False
+    settings.MINDMAP_COMPACT_STORAGE_COMPRESS_THRESHOLD = 4096
+    settings.MINDMAP_MAX_NODES = 10000
+    settings.MINDMAP_MAX_DEPTH = 100
+    settings.MINDMAP_MAX_TOPIC_LENGTH = 1000
+    settings.MINDMAP_MAX_BYTES = 2 * 1024 * 1024
+    settings.MINDMAP_PREGRADING = False
+    settings.MINDMAP_AUTOSAVE = False
+    settings.MINDMAP_AUTOSAVE_DELAY = 3
+    settings.MINDMAP_AUTOSAVE_MIN_INTERVAL = 15
+    settings.MINDMAP_REVISION_HISTORY = False
+    settings.MINDMAP_REVISION_SNAPSHOT_INTERVAL = 20
+    settings.MINDMAP_REVISION_MAX_COUNT = 200
+    settings.MINDMAP_SHARED_COMPACTION_OPERATIONS = 50
+    settings.MINDMAP_SHARED_COMPACTION_INTERVAL = 30
+    settings.MINDMAP_SHARED_POLL_INTERVAL = 5
+    settings.MINDMAP_SHARED_WEBSOCKET_URL = None
+    settings.MINDMAP_METRICS_BACKEND = 'mindmap.metrics.NullMetricsBackend'
+    settings.MINDMAP_PROFILING_SAMPLE_RATE = 0
+    settings.MINDMAP_PROFILING_COURSES = []
+    settings.MINDMAP_PROFILING_DIR = None
@@ -15,3 +15,99 @@ def plugin_settings(settings):
         "MINDMAP_STUDENT_MODULE_BACKEND",
         settings.MINDMAP_STUDENT_MODULE_BACKEND
     )
+    settings.MINDMAP_COURSE_GROUPS_BACKEND = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_COURSE_GROUPS_BACKEND",
+        settings.MINDMAP_COURSE_GROUPS_BACKEND
+    )
+    settings.MINDMAP_SERVE_ASSETS_AS_URLS = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_SERVE_ASSETS_AS_URLS",
+        settings.MINDMAP_SERVE_ASSETS_AS_URLS
+    )
+    settings.MINDMAP_JSMIND_CDN_FALLBACK = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_JSMIND_CDN_FALLBACK",
+        settings.MINDMAP_JSMIND_CDN_FALLBACK
+    )
+    settings.MINDMAP_COMPACT_STORAGE = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_COMPACT_STORAGE",
+        settings.MINDMAP_COMPACT_STORAGE
+    )
+    settings.MINDMAP_COMPACT_STORAGE_COMPRESS_THRESHOLD = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_COMPACT_STORAGE_COMPRESS_THRESHOLD",
+        settings.MINDMAP_COMPACT_STORAGE_COMPRESS_THRESHOLD
+    )
+    settings.MINDMAP_MAX_NODES = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_MAX_NODES",
+        settings.MINDMAP_MAX_NODES
+    )
+    settings.MINDMAP_MAX_DEPTH = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_MAX_DEPTH",
+        settings.MINDMAP_MAX_DEPTH
+    )
+    settings.MINDMAP_MAX_TOPIC_LENGTH = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_MAX_TOPIC_LENGTH",
+        settings.MINDMAP_MAX_TOPIC_LENGTH
+    )
+    settings.MINDMAP_MAX_BYTES = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_MAX_BYTES",
+        settings.MINDMAP_MAX_BYTES
+    )
+    settings.MINDMAP_PREGRADING = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_PREGRADING",
+        settings.MINDMAP_PREGRADING
+    )
+    settings.MINDMAP_AUTOSAVE = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_AUTOSAVE",
+        settings.MINDMAP_AUTOSAVE
+    )
+    settings.MINDMAP_AUTOSAVE_DELAY = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_AUTOSAVE_DELAY",
+        settings.MINDMAP_AUTOSAVE_DELAY
+    )
+    settings.MINDMAP_AUTOSAVE_MIN_INTERVAL = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_AUTOSAVE_MIN_INTERVAL",
+        settings.MINDMAP_AUTOSAVE_MIN_INTERVAL
+    )
+    settings.MINDMAP_REVISION_HISTORY = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_REVISION_HISTORY",
+        settings.MINDMAP_REVISION_HISTORY
+    )
+    settings.MINDMAP_REVISION_SNAPSHOT_INTERVAL = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_REVISION_SNAPSHOT_INTERVAL",
+        settings.MINDMAP_REVISION_SNAPSHOT_INTERVAL
+    )
+    settings.MINDMAP_REVISION_MAX_COUNT = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_REVISION_MAX_COUNT",
+        settings.MINDMAP_REVISION_MAX_COUNT
+    )
+    settings.MINDMAP_SHARED_COMPACTION_OPERATIONS = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_SHARED_COMPACTION_OPERATIONS",
+        settings.MINDMAP_SHARED_COMPACTION_OPERATIONS
+    )
+    settings.MINDMAP_SHARED_COMPACTION_INTERVAL = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_SHARED_COMPACTION_INTERVAL",
+        settings.MINDMAP_SHARED_COMPACTION_INTERVAL
+    )
+    settings.MINDMAP_SHARED_POLL_INTERVAL = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_SHARED_POLL_INTERVAL",
+        settings.MINDMAP_SHARED_POLL_INTERVAL
+    )
+    settings.MINDMAP_SHARED_WEBSOCKET_URL = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_SHARED_WEBSOCKET_URL",
+        settings.MINDMAP_SHARED_WEBSOCKET_URL
+    )
+    settings.MINDMAP_METRICS_BACKEND = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_METRICS_BACKEND",
+        settings.MINDMAP_METRICS_BACKEND
+    )
+    settings.MINDMAP_PROFILING_SAMPLE_RATE = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_PROFILING_SAMPLE_RATE",
+        settings.MINDMAP_PROFILING_SAMPLE_RATE
+    )
+    settings.MINDMAP_PROFILING_COURSES = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_PROFILING_COURSES",
+        settings.MINDMAP_PROFILING_COURSES
+    )
+    settings.MINDMAP_PROFILING_DIR = getattr(settings, "ENV_TOKENS", {}).get(
+        "MINDMAP_PROFILING_DIR",
+        settings.MINDMAP_PROFILING_DIR
+    )
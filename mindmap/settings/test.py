@@ -28,6 +28,7 @@ INSTALLED_APPS = (
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "mindmap",
+    "submissions",
 )
 
 
@@ -59,6 +60,36 @@ STATICI18N_PACKAGES = (
 STATICI18N_ROOT = 'mindmap/public/js'
 STATICI18N_OUTPUT_DIR = 'translations'
 
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
 # Mind Map plugin settings
 MINDMAP_XMODULE_BACKEND = 'mindmap.edxapp_wrapper.backends.xmodule_p_v1'
 MINDMAP_STUDENT_MODULE_BACKEND = 'mindmap.edxapp_wrapper.backends.student_p_v1'
+MINDMAP_COURSE_GROUPS_BACKEND = 'mindmap.edxapp_wrapper.backends.course_groups_p_v1'
+MINDMAP_SERVE_ASSETS_AS_URLS = False
+MINDMAP_JSMIND_CDN_FALLBACK = True
+MINDMAP_COMPACT_STORAGE = False
+MINDMAP_COMPACT_STORAGE_COMPRESS_THRESHOLD = 4096
+MINDMAP_MAX_NODES = 10000
+MINDMAP_MAX_DEPTH = 100
+MINDMAP_MAX_TOPIC_LENGTH = 1000
+MINDMAP_MAX_BYTES = 2 * 1024 * 1024
+MINDMAP_PREGRADING = False
+MINDMAP_AUTOSAVE = False
+MINDMAP_AUTOSAVE_DELAY = 3
+MINDMAP_AUTOSAVE_MIN_INTERVAL = 15
+MINDMAP_REVISION_HISTORY = False
+MINDMAP_REVISION_SNAPSHOT_INTERVAL = 20
+MINDMAP_REVISION_MAX_COUNT = 200
+MINDMAP_SHARED_COMPACTION_OPERATIONS = 50
+MINDMAP_SHARED_COMPACTION_INTERVAL = 30
+MINDMAP_SHARED_POLL_INTERVAL = 5
+MINDMAP_SHARED_WEBSOCKET_URL = None
+MINDMAP_METRICS_BACKEND = 'mindmap.metrics.NullMetricsBackend'
+MINDMAP_PROFILING_SAMPLE_RATE = 0
+MINDMAP_PROFILING_COURSES = []
+MINDMAP_PROFILING_DIR = None
@@ -0,0 +1,265 @@
+"""
+Detection of near-identical mind maps among the submissions of a block.
+
+Each mind map is reduced to a set of features: its normalized node topics
+and its parent-child edges between topics, so the node ids and the layout do
+not matter. The Jaccard similarity of the feature sets is estimated with
+MinHash signatures, and locality-sensitive hashing (LSH) over bands of the
+signatures only compares the mind maps that share a band. Building the
+clusters is then linear in the number of submissions instead of quadratic.
+
+The signatures use one permutation hashing: every feature is hashed once
+and kept in one of the bins of the signature when it is the smallest of the
+bin, and the empty bins are filled from the next non-empty one.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import unicodedata
+
+from django.core.cache import cache
+
+# Number of bins of the signatures, and of bands of bins hashed together by the LSH.
+SIGNATURE_SIZE = 64
+LSH_BANDS = 16
+# Minimum estimated similarity of the mind maps of a cluster.
+SIMILARITY_THRESHOLD = 0.6
+# Signatures only depend on the mind map content, they are kept for a week.
+SIGNATURE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+HASH_RANGE = 1 << 64
+TOPIC_CACHE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=TOPIC_CACHE_SIZE)
+def normalize_topic(topic) -> str:
+    """
+    Return a topic without case, accents or whitespace differences.
+
+    The same topics come up in most submissions of a block, so the
+    normalized topics are cached.
+    """
+    text = str(topic)
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(character for character in text if not unicodedata.combining(character))
+    return " ".join(text.casefold().split())
+
+
+def iter_edges(mind_map: dict):
+    """
+    Yield the topic of the parent and the topic of every node of a mind map.
+
+    Yields:
+        tuple: The parent topic, None for the root, and the node topic.
+    """
+    if not isinstance(mind_map, dict):
+        return
+    data = mind_map.get("data")
+    if mind_map.get("format") == "node_array" and isinstance(data, list):
+        nodes = [node for node in data if isinstance(node, dict)]
+        topics = {node.get("id"): node.get("topic", "") for node in nodes}
+        for node in nodes:
+            yield topics.get(node.get("parentid")), node.get("topic", "")
+    elif isinstance(data, dict):
+        level = [(None, data)]
+        while level:
+            next_level = []
+            for parent_topic, node in level:
+                yield parent_topic, node.get("topic", "")
+                next_level.extend(
+                    (node.get("topic", ""), child) for child in node.get("children") or [] if isinstance(child, dict)
+                )
+            level = next_level
+
+
+def get_features(mind_map: dict) -> set:
+    """
+    Return the normalized topics and parent-child edges of a mind map.
+    """
+    features = set()
+    for parent_topic, topic in iter_edges(mind_map):
+        topic = normalize_topic(topic)
+        features.add(f"t:{topic}")
+        if parent_topic is not None:
+            features.add(f"e:{normalize_topic(parent_topic)}\x00{topic}")
+    return features
+
+
+def get_signature(features: set, size: int = SIGNATURE_SIZE) -> tuple | None:
+    """
+    Return the MinHash signature of a set of features.
+
+    Args:
+        features (set): The features of a mind map.
+        size (int, optional): The number of bins of the signature.
+
+    Returns:
+        tuple: The minimum hash of each bin, None if there are no features.
+    """
+    if not features:
+        return None
+    bins = [None] * size
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        index, value = value % size, value // size
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+
+    # Fill the empty bins from the next non-empty bin, shifted by the
+    # distance so the filled bins of two signatures only match if they are
+    # filled from the same bin.
+    signature = []
+    for index in range(size):
+        distance = 0
+        while bins[(index + distance) % size] is None:
+            distance += 1
+        signature.append(bins[(index + distance) % size] + distance * (HASH_RANGE // size))
+    return tuple(signature)
+
+
+def estimate_similarity(signature: tuple, other: tuple) -> float:
+    """
+    Return the estimated Jaccard similarity of the features of two signatures.
+    """
+    return sum(value == other_value for value, other_value in zip(signature, other)) / len(signature)
+
+
+def get_body_signature(body: str, cache_key: str = None) -> tuple | None:
+    """
+    Return the signature of a mind map serialized as JSON, cached by the given key if any.
+
+    Args:
+        body (str): The JSON of the mind map.
+        cache_key (str, optional): A key identifying the content of the mind map.
+
+    Returns:
+        tuple: The signature, None for a mind map without nodes.
+    """
+    if cache_key:
+        cache_key = f"mindmap.signature.{SIGNATURE_SIZE}.{cache_key}"
+        signature = cache.get(cache_key)
+        if signature is not None:
+            return tuple(signature) or None
+    signature = get_signature(get_features(json.loads(body)))
+    if cache_key:
+        cache.set(cache_key, signature or (), SIGNATURE_CACHE_TIMEOUT)
+    return signature
+
+
+class SimilarityIndex:
+    """
+    Group the signatures of many mind maps into clusters of similar ones.
+
+    The signatures are split into `bands` bands, and two mind maps are
+    candidates when all the bins of one of their bands are equal. A
+    candidate joins the cluster of the first mind map of the band when their
+    estimated similarity reaches the threshold. With 16 bands of 4 bins, mind
+    maps with a similarity of 0.6 share a band with a probability of 0.88,
+    and of 0.99 from a similarity of 0.75.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.keys = []
+        self.signatures = []
+        self.buckets = {}
+
+    def add(self, key, signature: tuple) -> None:
+        """
+        Add the signature of a mind map identified by `key`.
+        """
+        if signature is None:
+            return
+        position = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(signature)
+        rows = len(signature) // self.bands
+        for band in range(self.bands):
+            self.buckets.setdefault((band, signature[band * rows:(band + 1) * rows]), []).append(position)
+
+    def get_clusters(self) -> list:
+        """
+        Return the clusters of similar mind maps.
+
+        Returns:
+            list: The clusters of at least two mind maps, largest first, as
+            dicts with the `keys` of the mind maps and the lowest estimated
+            `similarity` of a mind map to the first one of the cluster.
+        """
+        parents = list(range(len(self.keys)))
+
+        def find(position):
+            while parents[position] != position:
+                parents[position] = parents[parents[position]]
+                position = parents[position]
+            return position
+
+        for positions in self.buckets.values():
+            first = positions[0]
+            for position in positions[1:]:
+                if find(position) != find(first) and estimate_similarity(
+                    self.signatures[first], self.signatures[position],
+                ) >= self.threshold:
+                    parents[find(position)] = find(first)
+
+        clusters = {}
+        for position in range(len(self.keys)):
+            clusters.setdefault(find(position), []).append(position)
+
+        result = []
+        for positions in clusters.values():
+            if len(positions) < 2:
+                continue
+            first = self.signatures[positions[0]]
+            result.append({
+                "keys": [self.keys[position] for position in positions],
+                "similarity": min(
+                    estimate_similarity(first, self.signatures[position]) for position in positions[1:]
+                ),
+            })
+        result.sort(key=lambda cluster: len(cluster["keys"]), reverse=True)
+        return result
+
+
+def find_similar_assignments(assignments: list, threshold: float = SIMILARITY_THRESHOLD) -> list:
+    """
+    Return the clusters of similar submissions among the grading assignments.
+
+    Args:
+        assignments (list): The rows of `GradingDataLoader.get_assignments`,
+            with the answer bodies.
+        threshold (float, optional): The minimum estimated similarity.
+
+    Returns:
+        list: The clusters, with the `submissions` of each cluster.
+    """
+    index = SimilarityIndex(threshold)
+    assignments_by_id = {}
+    for assignment in assignments:
+        body = assignment["answer_body"].get("mindmap_student_body")
+        if not body:
+            continue
+        assignments_by_id[assignment["submission_id"]] = assignment
+        index.add(
+            assignment["submission_id"],
+            get_body_signature(body, assignment.get("answer_hash")),
+        )
+
+    return [
+        {
+            "similarity": cluster["similarity"],
+            "submissions": [
+                {
+                    key: assignments_by_id[submission_id][key]
+                    for key in ("submission_id", "student_id", "username", "submission_status")
+                }
+                for submission_id in cluster["keys"]
+            ],
+        }
+        for cluster in index.get_clusters()
+    ]
@@ -0,0 +1,153 @@
+"""
+Compact encoding of the mind maps saved in the learner state.
+
+The learner mind map is stored in the StudentModule state, which is read and
+rewritten whole on every access, so large maps make every read of the row
+expensive. The compact encoding stores a `node_array` mind map by columns:
+
+- ``keys``: The node keys, interned once instead of repeated in every node.
+- ``columns``: One list of values per key. Keys missing from some nodes are
+  stored as ``{"index": [...], "values": [...]}`` with the nodes that have them.
+- ``parents``: The position of the parent of each node, used instead of the
+  ``parentid`` column when every parent can be resolved.
+
+Payloads larger than a threshold are also compressed with zlib. Mind maps in
+other formats are only compressed. Values that are not encoded are returned
+unchanged by `decode_mind_map`, so the states saved before the encoding was
+enabled can still be read.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+
+ENCODING = "mindmap.compact.v1"
+COMPRESSION = "zlib"
+COMPRESS_THRESHOLD = 4096
+
+
+def is_encoded(stored: dict) -> bool:
+    """
+    Return whether a stored mind map uses the compact encoding.
+    """
+    return isinstance(stored, dict) and stored.get("encoding") == ENCODING
+
+
+def encode_mind_map(mind_map: dict, compress_threshold: int = COMPRESS_THRESHOLD) -> dict:
+    """
+    Encode a mind map to be stored in the learner state.
+
+    Args:
+        mind_map (dict): The mind map, usually in the `node_array` format.
+        compress_threshold (int, optional): The size in bytes of the encoded
+            payload from which it is compressed. Defaults to 4096.
+
+    Returns:
+        dict: The encoded mind map.
+    """
+    if not mind_map or is_encoded(mind_map):
+        return mind_map
+
+    encoded = {"encoding": ENCODING}
+    nodes = mind_map.get("data")
+    if mind_map.get("format") == "node_array" and isinstance(nodes, list) and all(
+        isinstance(node, dict) for node in nodes
+    ):
+        encoded["mind_map"] = {key: value for key, value in mind_map.items() if key != "data"}
+        encoded.update(encode_nodes(nodes))
+    else:
+        encoded["mind_map"] = mind_map
+
+    payload = json.dumps(encoded, separators=(",", ":"))
+    if len(payload) < compress_threshold:
+        return encoded
+    return {
+        "encoding": ENCODING,
+        "compression": COMPRESSION,
+        "payload": base64.b64encode(zlib.compress(payload.encode("utf-8"))).decode("ascii"),
+    }
+
+
+def decode_mind_map(stored: dict) -> dict:
+    """
+    Decode a mind map stored in the learner state.
+
+    Args:
+        stored (dict): The stored mind map, encoded or not.
+
+    Returns:
+        dict: The mind map as it was saved.
+    """
+    if not is_encoded(stored):
+        return stored
+
+    if stored.get("compression") == COMPRESSION:
+        stored = json.loads(zlib.decompress(base64.b64decode(stored["payload"])))
+
+    mind_map = dict(stored["mind_map"])
+    if "keys" in stored:
+        mind_map["data"] = decode_nodes(stored)
+    return mind_map
+
+
+def encode_nodes(nodes: list) -> dict:
+    """
+    Encode the nodes of a `node_array` mind map by columns.
+
+    Args:
+        nodes (list): The nodes of the mind map.
+
+    Returns:
+        dict: The ``keys``, ``columns`` and, when the parents can be resolved,
+        ``parents`` of the encoded nodes.
+    """
+    positions = {}
+    for position, node in enumerate(nodes):
+        positions.setdefault(node.get("id"), position)
+    parents = None
+    if len(positions) == len(nodes) and all(
+        node.get("parentid") in positions for node in nodes if "parentid" in node
+    ):
+        parents = [positions[node["parentid"]] if "parentid" in node else -1 for node in nodes]
+
+    keys = list(dict.fromkeys(
+        key for node in nodes for key in node if not (parents is not None and key == "parentid")
+    ))
+    columns = []
+    for key in keys:
+        index = [position for position, node in enumerate(nodes) if key in node]
+        values = [nodes[position][key] for position in index]
+        columns.append(values if len(index) == len(nodes) else {"index": index, "values": values})
+
+    encoded = {"keys": keys, "columns": columns, "size": len(nodes)}
+    if parents is not None:
+        encoded["parents"] = parents
+    return encoded
+
+
+def decode_nodes(encoded: dict) -> list:
+    """
+    Decode the nodes of a `node_array` mind map encoded by `encode_nodes`.
+
+    Args:
+        encoded (dict): The encoded nodes.
+
+    Returns:
+        list: The nodes of the mind map.
+    """
+    nodes = [{} for _ in range(encoded["size"])]
+    for key, column in zip(encoded["keys"], encoded["columns"]):
+        if isinstance(column, dict):
+            for position, value in zip(column["index"], column["values"]):
+                nodes[position][key] = value
+        else:
+            for node, value in zip(nodes, column):
+                node[key] = value
+
+    # The parent ids are resolved once every node has its id.
+    for node, parent in zip(nodes, encoded.get("parents", ())):
+        if parent >= 0:
+            node["parentid"] = nodes[parent]["id"]
+    return nodes
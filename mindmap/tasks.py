@@ -0,0 +1,83 @@
+"""
+Celery tasks of the Mind Map jobs, and the functions starting the jobs.
+
+The Open edX workers only register the tasks of the `tasks` module of the
+installed apps, with `autodiscover_tasks`, so the tasks running the jobs of
+`mindmap.jobs` are declared here, along with the functions queuing them.
+"""
+
+from mindmap.export import count_submissions
+from mindmap.jobs import (
+    create_job,
+    delete_expired_exports,
+    export_block_submissions,
+    get_block_student_ids,
+    reset_grades,
+    run_job,
+)
+
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+if shared_task:
+    reset_grades_task = shared_task(name="mindmap.jobs.reset_grades")(reset_grades)
+    export_submissions_task = shared_task(name="mindmap.jobs.export_block_submissions")(export_block_submissions)
+else:
+    reset_grades_task = export_submissions_task = None
+
+
+def start_reset_grades_job(block, student_ids: list, reopen: bool = False) -> dict:
+    """
+    Start a job removing the grades of many learners of the block.
+
+    Args:
+        block (MindMapXBlock): The block to reset.
+        student_ids (list): The anonymous ids of the learners, or "all" for
+            every learner with a submission.
+        reopen (bool, optional): Whether the learners can submit again,
+            otherwise their submission can be graded again.
+
+    Returns:
+        dict: The progress of the job.
+    """
+    if student_ids == "all":
+        student_ids = get_block_student_ids(block)
+    student_ids = list(dict.fromkeys(student_ids))
+
+    return run_job(
+        reset_grades_task,
+        reset_grades,
+        create_job(block, len(student_ids)),
+        course_id=block.block_course_id,
+        usage_id=str(block.location),
+        item_id=block.block_id,
+        student_ids=student_ids,
+        reopen=reopen,
+    )
+
+
+def start_export_submissions_job(block, export_format: str) -> dict:
+    """
+    Start a job exporting every submission of the block to a file.
+
+    The export files of the jobs whose progress has expired are deleted first.
+
+    Args:
+        block (MindMapXBlock): The block to export.
+        export_format (str): One of `mindmap.export.EXPORT_FORMATS`.
+
+    Returns:
+        dict: The progress of the job.
+    """
+    delete_expired_exports()
+    return run_job(
+        export_submissions_task,
+        export_block_submissions,
+        create_job(block, count_submissions(block.block_course_id, block.block_id), export_format=export_format),
+        course_id=block.block_course_id,
+        usage_id=block.block_id,
+        export_format=export_format,
+        points=block.points,
+    )
@@ -0,0 +1,155 @@
+"""
+Tests for the aggregated grading statistics of a block.
+"""
+import json
+from unittest.mock import Mock, patch
+
+import ddt
+from django.core.cache import cache
+from django.test import TestCase
+from submissions import api as submissions_api
+
+from mindmap import analytics
+from mindmap.blobs import canonical_json, make_answer
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+
+
+@ddt.ddt
+class TestGradingSummary(TestCase):
+    """
+    Test suite for the grading summary of a block.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up a block whose submissions are created by the tests.
+        """
+        cache.clear()
+        self.block = Mock(
+            course_id=COURSE_ID, block_course_id=COURSE_ID, block_id=ITEM_ID, location=ITEM_ID, points=100, weight=10,
+        )
+        student_module_patcher = patch("mindmap.analytics.StudentModule")
+        self.student_module_mock = student_module_patcher.start()
+        self.addCleanup(student_module_patcher.stop)
+        self.aggregate_mock = self.student_module_mock.return_value.objects.filter.return_value.aggregate
+        self.aggregate_mock.return_value = {"total": 6, "SUBMITTED": 2, "COMPLETED": 3}
+
+    def create_submission(self, index: int, answer: dict, weighted_score: int = None) -> dict:
+        """
+        Create a submission of a learner, scored if a weighted score is given.
+        """
+        student_item = {
+            "student_id": f"anonymous-{index}",
+            "course_id": COURSE_ID,
+            "item_id": ITEM_ID,
+            "item_type": "mindmap",
+        }
+        submission = submissions_api.create_submission(student_item, answer)
+        if weighted_score is not None:
+            submissions_api.set_score(submission["uuid"], weighted_score, self.block.weight)
+        return submission
+
+    def test_count_statuses(self):
+        """
+        Check the learners are counted by status with a single aggregate query.
+        """
+        statuses = analytics.count_statuses(self.block)
+
+        self.assertEqual({"Not attempted": 1, "Submitted": 2, "Completed": 3}, statuses)
+        self.student_module_mock.return_value.objects.filter.assert_called_once_with(
+            course_id=COURSE_ID, module_state_key=ITEM_ID,
+        )
+        self.assertEqual({"total", "SUBMITTED", "COMPLETED"}, set(self.aggregate_mock.call_args.kwargs))
+
+    def test_get_score_statistics(self):
+        """
+        Check the raw scores are summarized from the latest visible score of each learner.
+
+        Expected result:
+            - The hidden scores of the removed grades are left out.
+            - The maximum score is in the last bin of the histogram.
+        """
+        for index, weighted_score in enumerate((2, 5, 5, 10)):
+            self.create_submission(index, {"mindmap_student_body": "{}"}, weighted_score)
+        self.create_submission(4, {"mindmap_student_body": "{}"}, 8)
+        submissions_api.reset_score("anonymous-4", COURSE_ID, ITEM_ID)
+        self.create_submission(5, {"mindmap_student_body": "{}"})
+
+        with self.assertNumQueries(1):
+            statistics = analytics.get_score_statistics(self.block)
+
+        self.assertEqual(4, statistics["count"])
+        self.assertEqual(55, statistics["mean"])
+        self.assertEqual(50, statistics["median"])
+        self.assertEqual(
+            [0, 0, 1, 0, 0, 2, 0, 0, 0, 1], [histogram_bin["count"] for histogram_bin in statistics["histogram"]],
+        )
+        self.assertEqual({"start": 90, "end": 100, "count": 1}, statistics["histogram"][-1])
+
+    def test_get_score_statistics_without_grades(self):
+        """
+        Check the statistics of a block without grades.
+        """
+        statistics = analytics.get_score_statistics(self.block)
+
+        self.assertEqual({"count": 0, "mean": None, "median": None}, {
+            key: statistics[key] for key in ("count", "mean", "median")
+        })
+
+    @ddt.data(
+        ([(10, 1)], 10),
+        ([(10, 1), (20, 1)], 15),
+        ([(10, 2), (20, 1)], 10),
+        ([(10, 1), (20, 2), (40, 1)], 20),
+        ([(10, 2), (20, 2)], 15),
+    )
+    @ddt.unpack
+    def test_get_median(self, distribution: list, expected_median: float):
+        """
+        Check the median of a distribution of values with their counts.
+        """
+        self.assertEqual(
+            expected_median, analytics.get_median(distribution, sum(count for _value, count in distribution)),
+        )
+
+    def test_count_submissions_by_day(self):
+        """
+        Check the submissions are counted by day.
+        """
+        self.create_submission(0, {"mindmap_student_body": "{}"})
+        submission = self.create_submission(1, {"mindmap_student_body": "{}"})
+
+        self.assertEqual(
+            [{"date": submission["submitted_at"].date().isoformat(), "count": 2}],
+            analytics.count_submissions_by_day(self.block),
+        )
+
+    def test_get_average_map_size(self):
+        """
+        Check the size of the mind maps stored as blobs and embedded in the answers.
+        """
+        mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Root" * 50}]}
+        self.create_submission(0, make_answer(mind_map))
+        legacy_answer = {"mindmap_student_body": json.dumps({"data": []})}
+        self.create_submission(1, legacy_answer)
+
+        with self.assertNumQueries(1):
+            average = analytics.get_average_map_size(self.block)
+
+        self.assertEqual((len(canonical_json(mind_map)) + len(json.dumps(legacy_answer))) / 2, average)
+
+    def test_get_grading_summary_cached(self):
+        """
+        Check the summary is cached until it is invalidated.
+        """
+        summary = analytics.get_grading_summary(self.block)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(summary, analytics.get_grading_summary(self.block))
+        analytics.invalidate_grading_summary(ITEM_ID)
+        self.create_submission(0, {"mindmap_student_body": "{}"})
+
+        self.assertEqual(1, analytics.get_grading_summary(self.block)["submissions_by_day"][0]["count"])
+        self.assertEqual(2, self.aggregate_mock.call_count)
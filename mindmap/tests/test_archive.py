@@ -0,0 +1,233 @@
+"""
+Tests for the archives of the mind maps of a course.
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest.mock import MagicMock, Mock, patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from mindmap import archive
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+RERUN_COURSE_ID = "course-v1:edX+MindMap+2024"
+
+
+def make_block(course_id: str, block_id: str, mindmap_body: dict) -> Mock:
+    """
+    Return a mind map block of a course.
+    """
+    usage_id = f"block-v1:{course_id[len('course-v1:'):]}+type@mindmap+block@{block_id}"
+    return Mock(location=Mock(block_id=block_id, __str__=lambda _self: usage_id), mindmap_body=mindmap_body)
+
+
+class FakeStudentModule:
+    """
+    The student modules of the tests, with the subset of the queryset API used by the archives.
+    """
+
+    rows = []
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    class objects:  # pylint: disable=invalid-name
+        """
+        The manager of the student modules.
+        """
+
+        bulk_update = MagicMock()
+        bulk_create = MagicMock()
+
+        @staticmethod
+        def filter(course_id, module_state_key__in, student_id__in=None, id__gt=0):
+            """
+            Return the student modules matching the filters, sorted by id.
+            """
+            rows = sorted(
+                (
+                    row for row in FakeStudentModule.rows
+                    if row.course_id == course_id and row.module_state_key in module_state_key__in
+                    and (student_id__in is None or row.student_id in student_id__in) and row.id > id__gt
+                ),
+                key=lambda row: row.id,
+            )
+            queryset = MagicMock()
+            queryset.__iter__.side_effect = lambda: iter(rows)
+            queryset.only.return_value.order_by.return_value.__getitem__.side_effect = rows.__getitem__
+            return queryset
+
+
+class TestCourseArchive(TestCase):
+    """
+    Test suite for the export and import of the mind maps of a course.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with two blocks and their learner states.
+        """
+        self.blocks = {
+            COURSE_ID: [
+                make_block(COURSE_ID, "first", {"data": "first"}),
+                make_block(COURSE_ID, "second", {"data": "second"}),
+            ],
+            RERUN_COURSE_ID: [
+                make_block(RERUN_COURSE_ID, "first", {}),
+                make_block(RERUN_COURSE_ID, "second", {}),
+            ],
+        }
+        get_course_blocks_patcher = patch(
+            "mindmap.archive.get_course_blocks", side_effect=lambda course_id, _category: self.blocks[course_id],
+        )
+        get_course_blocks_patcher.start()
+        self.addCleanup(get_course_blocks_patcher.stop)
+        update_block_patcher = patch("mindmap.archive.update_block")
+        self.update_block = update_block_patcher.start()
+        self.addCleanup(update_block_patcher.stop)
+        student_module_patcher = patch("mindmap.archive.StudentModule", return_value=FakeStudentModule)
+        student_module_patcher.start()
+        self.addCleanup(student_module_patcher.stop)
+        FakeStudentModule.objects.bulk_update.reset_mock()
+        FakeStudentModule.objects.bulk_create.reset_mock()
+
+        first_usage_id, second_usage_id = (str(block.location) for block in self.blocks[COURSE_ID])
+        FakeStudentModule.rows = [
+            FakeStudentModule(
+                id=index, student_id=index, course_id=COURSE_ID, module_state_key=usage_id,
+                state=json.dumps({
+                    "mindmap_student_body": {"data": f"learner-{index}"},
+                    "mindmap_student_hash": f"hash-{index}",
+                    "submission_status": "x",
+                }),
+            )
+            for index, usage_id in enumerate([first_usage_id, second_usage_id, first_usage_id], start=1)
+        ]
+        # Learners without a mind map are not archived.
+        FakeStudentModule.rows.append(FakeStudentModule(
+            id=4, student_id=4, course_id=COURSE_ID, module_state_key=second_usage_id, state="{}",
+        ))
+        FakeStudentModule.objects.bulk_create.side_effect = FakeStudentModule.rows.extend
+
+    def export(self, batch_size: int = 2, progress_callback=None) -> str:
+        """
+        Return the archive of the course.
+        """
+        stream = io.StringIO()
+        archive.export_course(stream, COURSE_ID, batch_size, progress_callback)
+        return stream.getvalue()
+
+    def test_export_course(self):
+        """
+        Check the archive has the header, the blocks and the learner mind maps.
+        """
+        progress_callback = Mock()
+
+        lines = [json.loads(line) for line in self.export(progress_callback=progress_callback).splitlines()]
+
+        self.assertEqual({"version": archive.ARCHIVE_VERSION, "course_id": COURSE_ID}, lines[0])
+        self.assertEqual(
+            [
+                {"type": "block", "block_id": "first", "mindmap_body": {"data": "first"}},
+                {"type": "block", "block_id": "second", "mindmap_body": {"data": "second"}},
+                {"type": "state", "block_id": "first", "student_id": 1, "mindmap_student_body": {"data": "learner-1"}},
+                {"type": "state", "block_id": "second", "student_id": 2, "mindmap_student_body": {"data": "learner-2"}},
+                {"type": "state", "block_id": "first", "student_id": 3, "mindmap_student_body": {"data": "learner-3"}},
+            ],
+            lines[1:],
+        )
+        self.assertEqual([((2,),), ((4,),)], progress_callback.call_args_list)
+
+    def test_import_course_rerun(self):
+        """
+        Check an archive is restored into the matching blocks of a rerun, creating the student modules.
+        """
+        content = self.export()
+        progress_callback = Mock()
+
+        stats = archive.import_course(io.StringIO(content), RERUN_COURSE_ID, 2, progress_callback)
+
+        self.assertEqual({"blocks": 2, "states": 3, "skipped": 0}, stats)
+        self.assertEqual([{"data": "first"}, {"data": "second"}], [
+            block.mindmap_body for block in self.blocks[RERUN_COURSE_ID]
+        ])
+        self.assertEqual(2, self.update_block.call_count)
+        self.assertEqual(2, FakeStudentModule.objects.bulk_create.call_count)
+        created = [row for row in FakeStudentModule.rows if row.course_id == RERUN_COURSE_ID]
+        self.assertEqual(
+            [
+                (1, {"mindmap_student_body": {"data": "learner-1"}}),
+                (2, {"mindmap_student_body": {"data": "learner-2"}}),
+            ],
+            [(row.student_id, json.loads(row.state)) for row in created[:2]],
+        )
+        self.assertEqual([((2,),), ((3,),)], progress_callback.call_args_list)
+
+    def test_import_course_existing_states(self):
+        """
+        Check the learner mind maps are merged into the existing student modules.
+
+        Expected result:
+            - The hashes of the previous mind maps are dropped.
+        """
+        content = self.export().replace("learner-1", "restored-1")
+        self.blocks[COURSE_ID].pop()
+
+        stats = archive.import_course(io.StringIO(content), COURSE_ID)
+
+        self.assertEqual({"blocks": 1, "states": 2, "skipped": 2}, stats)
+        (updated_modules, fields), _kwargs = FakeStudentModule.objects.bulk_update.call_args
+        self.assertEqual(["state", "modified"], fields)
+        self.assertEqual(
+            {"mindmap_student_body": {"data": "restored-1"}, "submission_status": "x"},
+            json.loads(updated_modules[0].state),
+        )
+        FakeStudentModule.objects.bulk_create.assert_called_once_with([])
+
+    def test_import_not_an_archive(self):
+        """
+        Check an archive without a supported header is rejected.
+        """
+        with self.assertRaises(archive.ArchiveError):
+            archive.import_course(io.StringIO('{"version": 0}\n'), COURSE_ID)
+
+    def test_import_unknown_line(self):
+        """
+        Check an archive with an unknown line is rejected.
+        """
+        content = '{"version": 1}\n{"type": "other", "block_id": "first"}\n'
+
+        with self.assertRaises(archive.ArchiveError):
+            archive.import_course(io.StringIO(content), COURSE_ID)
+
+    def test_commands(self):
+        """
+        Check the management commands write and restore a gzip archive.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "course.jsonl.gz")
+            stdout = io.StringIO()
+
+            call_command("mindmap_export", COURSE_ID, path, "--batch-size", "3", stdout=stdout)
+            with gzip.open(path, "rt", encoding="utf-8") as archive_file:
+                self.assertEqual(6, len(archive_file.read().splitlines()))
+            call_command("mindmap_import", RERUN_COURSE_ID, path, "--user-id", "7", stdout=stdout)
+
+        self.assertIn("Read 3 learner states", stdout.getvalue())
+        self.assertIn("Restored 2 blocks and 3 learner states", stdout.getvalue())
+        self.update_block.assert_called_with(self.blocks[RERUN_COURSE_ID][1], 7)
+
+    def test_import_command_invalid_archive(self):
+        """
+        Check the import command fails on a file that is not an archive.
+        """
+        with tempfile.NamedTemporaryFile(suffix=".gz") as invalid_file:
+            invalid_file.write(b"not gzip")
+            invalid_file.flush()
+
+            with self.assertRaises(CommandError):
+                call_command("mindmap_import", COURSE_ID, invalid_file.name, stdout=io.StringIO())
@@ -0,0 +1,44 @@
+"""
+Tests for the rate limiting of the autosaves.
+"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from mindmap import autosave
+
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+
+
+class TestAutosave(TestCase):
+    """
+    Test suite for the autosave slots of the learners.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty cache.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_acquire_autosave_slot(self):
+        """
+        Check a learner takes one autosave slot per interval in a block.
+
+        Expected result:
+            - The second autosave of a learner is rejected.
+            - The other learners and blocks have their own slots.
+        """
+        self.assertTrue(autosave.acquire_autosave_slot(ITEM_ID, 1))
+        self.assertFalse(autosave.acquire_autosave_slot(ITEM_ID, 1))
+        self.assertTrue(autosave.acquire_autosave_slot(ITEM_ID, 2))
+        self.assertTrue(autosave.acquire_autosave_slot(f"{ITEM_ID}-other", 1))
+
+    @override_settings(MINDMAP_AUTOSAVE_MIN_INTERVAL=0)
+    def test_acquire_autosave_slot_without_limit(self):
+        """
+        Check the autosaves are not limited without a minimum interval.
+        """
+        self.assertTrue(autosave.acquire_autosave_slot(ITEM_ID, 1))
+        self.assertTrue(autosave.acquire_autosave_slot(ITEM_ID, 1))
+        self.assertIsNone(cache.get(autosave.get_autosave_cache_key(ITEM_ID, 1)))
@@ -0,0 +1,100 @@
+"""
+Tests for the content-addressed storage of the submitted mind maps.
+"""
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from mindmap import blobs
+from mindmap.models import MindMapBlob
+
+
+class TestMindMapBlobs(TestCase):
+    """
+    Test suite for storing and loading the submitted mind maps as blobs.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty cache.
+        """
+        cache.clear()
+        self.mind_map = {"format": "node_array", "data": [{"topic": "Root", "isroot": True, "id": "root"}]}
+
+    def test_store_identical_mind_maps_once(self):
+        """
+        Check identical mind maps are stored once, whatever the order of their keys.
+        """
+        reordered = {"data": [{"id": "root", "isroot": True, "topic": "Root"}], "format": "node_array"}
+
+        first = blobs.make_answer(self.mind_map)
+        second = blobs.make_answer(reordered)
+        cache.clear()
+        third = blobs.make_answer(self.mind_map)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+        self.assertEqual(1, MindMapBlob.objects.count())
+        blob = MindMapBlob.objects.get()
+        self.assertEqual(blobs.get_content_hash(blob.content), first[blobs.BLOB_ANSWER_KEY])
+        self.assertEqual(self.mind_map, json.loads(blob.content))
+
+    def test_store_cached_mind_map_not_in_database(self):
+        """
+        Check a mind map is stored in the database even when its blob is in the cache.
+
+        Expected result:
+            - The blob is stored, e.g. after the transaction storing it first was rolled back.
+        """
+        content = blobs.canonical_json(self.mind_map)
+        cache.set(blobs.get_blob_cache_key(blobs.get_content_hash(content)), content)
+
+        content_hash = blobs.store_mind_map(self.mind_map)
+
+        self.assertEqual(content, MindMapBlob.objects.get(content_hash=content_hash).content)
+
+    def test_store_mind_map_cached_on_commit(self):
+        """
+        Check a stored mind map is only cached once its transaction is committed.
+        """
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            content_hash = blobs.store_mind_map(self.mind_map)
+            self.assertIsNone(cache.get(blobs.get_blob_cache_key(content_hash)))
+
+        self.assertEqual(1, len(callbacks))
+        self.assertEqual(
+            blobs.canonical_json(self.mind_map), cache.get(blobs.get_blob_cache_key(content_hash)),
+        )
+
+    def test_get_answer_bodies(self):
+        """
+        Check the mind maps of blob and legacy answers are loaded with a single query.
+        """
+        answers = [
+            blobs.make_answer(self.mind_map),
+            {"mindmap_student_body": json.dumps({"legacy": True})},
+            blobs.make_answer({"other": True}),
+            {blobs.BLOB_ANSWER_KEY: "missing"},
+            "not an answer",
+        ]
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            bodies = blobs.get_answer_bodies(answers)
+        with self.assertNumQueries(0):
+            cached_bodies = blobs.get_answer_bodies(answers[:3])
+
+        self.assertEqual(
+            [blobs.canonical_json(self.mind_map), '{"legacy": true}', '{"other":true}', None, None],
+            bodies,
+        )
+        self.assertEqual(bodies[:3], cached_bodies)
+
+    def test_get_answer_mind_map(self):
+        """
+        Check the mind map of an answer is returned as a dictionary.
+        """
+        self.assertEqual(self.mind_map, blobs.get_answer_mind_map(blobs.make_answer(self.mind_map)))
+        self.assertEqual({"id": 1}, blobs.get_answer_mind_map({"mindmap_student_body": '{"id": 1}'}))
+        self.assertIsNone(blobs.get_answer_mind_map({}))
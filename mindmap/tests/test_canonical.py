@@ -0,0 +1,147 @@
+"""
+Tests for the canonical form of the mind maps.
+"""
+import json
+import sys
+
+import ddt
+from django.core.cache import cache
+from django.test import TestCase
+
+from mindmap.canonical import canonicalize_mind_map
+from mindmap.rendering import get_mind_map_svg
+from mindmap.validation import validate_mind_map
+
+# A mind map as exported by jsMind in the student view.
+NODE_ARRAY_MIND_MAP = {
+    "meta": {"name": "jsMind", "author": "Test Student", "version": "0.7.1"},
+    "format": "node_array",
+    "data": [
+        {"id": "root", "topic": "Root", "expanded": True, "isroot": True},
+        {"id": "a", "topic": "  Left   child ", "expanded": True, "parentid": "root", "direction": "left"},
+        {"id": "b", "topic": "Right child", "expanded": False, "parentid": "root", "direction": "right"},
+        {"id": "c", "topic": "Grandchild", "expanded": True, "parentid": "a", "direction": "left"},
+        {"id": "d", "topic": "Hidden", "expanded": True, "parentid": "b", "direction": "right"},
+        {"id": "e", "topic": "Colored", "expanded": True, "parentid": "a", "direction": "left",
+         "background-color": "#f00"},
+    ],
+}
+NODE_TREE_MIND_MAP = {
+    "meta": {"name": "jsMind", "author": "Test Student", "version": "0.7.1"},
+    "format": "node_tree",
+    "data": {
+        "id": "root",
+        "topic": "Root",
+        "expanded": True,
+        "children": [
+            {
+                "id": "a",
+                "topic": "Left\tchild",
+                "direction": "left",
+                "expanded": True,
+                "children": [{"id": "c", "topic": "Grandchild", "direction": "left", "expanded": True}],
+            },
+            {"id": "b", "topic": "Right child", "direction": "right", "expanded": True, "children": []},
+        ],
+    },
+}
+
+
+@ddt.ddt
+class TestCanonicalMindMap(TestCase):
+    """
+    Test suite for the canonical form of the mind maps.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty cache of previews.
+        """
+        cache.clear()
+
+    def test_node_array(self):
+        """
+        Check the canonical form of a mind map in the `node_array` format.
+
+        Expected result:
+            - The author, the expanded flags and the directions below the root children are left out.
+            - The collapsed flags and the other attributes are kept.
+            - The whitespace of the topics is normalized.
+        """
+        canonical = canonicalize_mind_map(NODE_ARRAY_MIND_MAP)
+
+        self.assertEqual({
+            "data": [
+                {"id": "root", "isroot": True, "topic": "Root"},
+                {"direction": "left", "id": "a", "parentid": "root", "topic": "Left child"},
+                {"direction": "right", "expanded": False, "id": "b", "parentid": "root", "topic": "Right child"},
+                {"id": "c", "parentid": "a", "topic": "Grandchild"},
+                {"id": "d", "parentid": "b", "topic": "Hidden"},
+                {"background-color": "#f00", "id": "e", "parentid": "a", "topic": "Colored"},
+            ],
+            "format": "node_array",
+            "meta": {"name": "jsMind", "version": "0.7.1"},
+        }, canonical)
+        self.assertEqual("  Left   child ", NODE_ARRAY_MIND_MAP["data"][1]["topic"])
+
+    def test_node_tree(self):
+        """
+        Check the canonical form of a mind map in the `node_tree` format.
+        """
+        canonical = canonicalize_mind_map(NODE_TREE_MIND_MAP)
+
+        self.assertEqual({
+            "id": "root",
+            "topic": "Root",
+            "children": [
+                {"id": "a", "topic": "Left child", "direction": "left", "children": [
+                    {"id": "c", "topic": "Grandchild"},
+                ]},
+                {"id": "b", "topic": "Right child", "direction": "right", "children": []},
+            ],
+        }, canonical["data"])
+
+    @ddt.data(NODE_ARRAY_MIND_MAP, NODE_TREE_MIND_MAP)
+    def test_keys_sorted_and_interned(self, mind_map: dict):
+        """
+        Check the keys of the canonical mind maps are sorted and interned.
+        """
+        canonical = canonicalize_mind_map(json.loads(json.dumps(mind_map)))
+
+        self.assertEqual(sorted(canonical), list(canonical))
+        nodes = canonical["data"] if isinstance(canonical["data"], list) else [canonical["data"]]
+        for node in nodes:
+            self.assertEqual(sorted(node), list(node))
+            self.assertTrue(all(key is sys.intern(key) for key in node))
+
+    @ddt.data(NODE_ARRAY_MIND_MAP, NODE_TREE_MIND_MAP)
+    def test_round_trip(self, mind_map: dict):
+        """
+        Check a canonical mind map is still valid and rendered as the mind map it comes from.
+
+        Expected result:
+            - The canonical form of the canonical mind map is itself.
+            - The canonical mind map is smaller.
+        """
+        normalized_topics = json.loads(json.dumps(mind_map).replace("  Left   child ", "Left child").replace(
+            "Left\\tchild", "Left child",
+        ))
+        canonical = canonicalize_mind_map(mind_map)
+
+        validate_mind_map(canonical)
+        self.assertEqual(get_mind_map_svg(normalized_topics)[0], get_mind_map_svg(canonical)[0])
+        self.assertEqual(canonical, canonicalize_mind_map(canonical))
+        self.assertLess(len(json.dumps(canonical)), len(json.dumps(mind_map)))
+
+    def test_identical_content_same_form(self):
+        """
+        Check the exports of the same mind map by different learners have the same canonical form.
+        """
+        other_export = json.loads(json.dumps(NODE_ARRAY_MIND_MAP))
+        other_export["meta"]["author"] = "Other Student"
+        other_export["data"][1]["topic"] = "Left child"
+        other_export["data"][3]["direction"] = "right"
+
+        self.assertEqual(
+            json.dumps(canonicalize_mind_map(NODE_ARRAY_MIND_MAP)), json.dumps(canonicalize_mind_map(other_export)),
+        )
@@ -0,0 +1,393 @@
+"""
+Tests for the mind maps shared by the learners of a group.
+"""
+import json
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from channels.routing import URLRouter
+from django.core.cache import cache
+from django.core.signing import BadSignature
+from django.test import TestCase, override_settings
+
+from mindmap import collaboration
+from mindmap.models import MindMapSharedMap
+from mindmap.patching import MindMapPatchError
+from mindmap.routing import websocket_urlpatterns
+from mindmap.validation import MindMapValidationError
+
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+GROUP_ID = "cohort-1"
+INITIAL_MIND_MAP = {
+    "format": "node_array",
+    "data": [
+        {"id": "root", "isroot": True, "topic": "Root", "expanded": True},
+        {"id": "a", "parentid": "root", "topic": "A"},
+        {"id": "b", "parentid": "root", "topic": "B"},
+    ],
+}
+
+
+class TestCollaboration(TestCase):
+    """
+    Test suite for the concurrent edits of the shared mind maps.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty cache.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def apply(self, version: int, operations: list, client_id: str = "browser-1") -> dict:
+        """
+        Apply a batch of operations to the test shared mind map.
+        """
+        return collaboration.apply_shared_map_operations(
+            ITEM_ID, GROUP_ID, INITIAL_MIND_MAP, version, operations, client_id=client_id,
+        )
+
+    def get_topics(self) -> dict:
+        """
+        Return the topics of the nodes of the test shared mind map by id.
+        """
+        state = collaboration.load_shared_map(ITEM_ID, GROUP_ID, INITIAL_MIND_MAP)
+        return {node["id"]: node["topic"] for node in state["mind_map"]["data"]}
+
+    def test_rebase_operations(self):
+        """
+        Check the operations which no longer apply to the shared mind map are dropped.
+
+        Expected result:
+            - The operations on a deleted node are dropped, the others applied in order.
+            - The shared mind map is not changed.
+        """
+        mind_map, applied = collaboration.rebase_operations(INITIAL_MIND_MAP, [
+            {"op": "delete", "id": "a"},
+            {"op": "update", "id": "a", "topic": "Edited"},
+            {"op": "add", "node": {"id": "c", "parentid": "a", "topic": "C"}},
+            {"op": "move", "id": "root", "parentid": "b"},
+            {"op": "update", "id": "b", "topic": "Edited"},
+        ])
+
+        self.assertEqual([{"op": "delete", "id": "a"}, {"op": "update", "id": "b", "topic": "Edited"}], applied)
+        self.assertEqual(["root", "b"], [node["id"] for node in mind_map["data"]])
+        self.assertEqual("B", INITIAL_MIND_MAP["data"][2]["topic"])
+
+    def test_rebase_malformed_operations(self):
+        """
+        Check malformed operations and mind maps which cannot be shared are rejected.
+        """
+        for mind_map, operations in (
+            (INITIAL_MIND_MAP, [{"op": "rename"}]),
+            (INITIAL_MIND_MAP, ["delete"]),
+            (INITIAL_MIND_MAP, {"op": "delete"}),
+            ({"format": "node_tree", "data": {"id": "root", "topic": "Root"}}, []),
+        ):
+            with self.assertRaises(MindMapPatchError):
+                collaboration.rebase_operations(mind_map, operations)
+
+    def test_concurrent_batches(self):
+        """
+        Check the batches made on the same version by two browsers are both applied.
+
+        Expected result:
+            - The batches get consecutive versions, in the order they are received.
+            - The edit of a node deleted by the first batch is dropped from the second.
+        """
+        first = self.apply(0, [{"op": "delete", "id": "a"}, {"op": "update", "id": "b", "topic": "First"}])
+        second = self.apply(0, [
+            {"op": "update", "id": "a", "topic": "Second"},
+            {"op": "update", "id": "b", "topic": "Second"},
+            {"op": "add", "node": {"id": "c", "parentid": "root", "topic": "C"}},
+        ], client_id="browser-2")
+
+        self.assertEqual({
+            "version": 1,
+            "client_id": "browser-1",
+            "operations": [{"op": "delete", "id": "a"}, {"op": "update", "id": "b", "topic": "First"}],
+            "dropped": 0,
+        }, first)
+        self.assertEqual(2, second["version"])
+        self.assertEqual(1, second["dropped"])
+        self.assertEqual({"root": "Root", "b": "Second", "c": "C"}, self.get_topics())
+
+    def test_outdated_version(self):
+        """
+        Check the batches made on a version whose following batches are not kept are rejected.
+        """
+        with patch("mindmap.collaboration.OPERATIONS_LOG_SIZE", 2):
+            for version in range(3):
+                self.apply(version, [{"op": "update", "id": "a", "topic": f"Topic {version}"}])
+
+            self.apply(1, [{"op": "update", "id": "b", "topic": "Edited"}])
+            with self.assertRaises(collaboration.SharedMapOutdated):
+                self.apply(1, [])
+            with self.assertRaises(collaboration.SharedMapOutdated):
+                self.apply(10, [])
+
+    @override_settings(MINDMAP_MAX_NODES=3)
+    def test_invalid_shared_map(self):
+        """
+        Check a batch making the shared mind map invalid is rejected.
+        """
+        with self.assertRaises(MindMapValidationError):
+            self.apply(0, [{"op": "add", "node": {"id": "c", "parentid": "root", "topic": "C"}}])
+
+        self.assertEqual(0, collaboration.load_shared_map(ITEM_ID, GROUP_ID, INITIAL_MIND_MAP)["version"])
+
+    @override_settings(MINDMAP_SHARED_COMPACTION_OPERATIONS=2, MINDMAP_SHARED_COMPACTION_INTERVAL=3600)
+    def test_compaction(self):
+        """
+        Check the shared mind map is written to the database periodically, not on every batch.
+
+        Expected result:
+            - The mind map is written after 2 batches.
+            - The mind map is read from its last compaction once it leaves the cache.
+        """
+        self.apply(0, [{"op": "update", "id": "a", "topic": "First"}])
+        self.assertFalse(MindMapSharedMap.objects.exists())
+
+        self.apply(1, [{"op": "update", "id": "a", "topic": "Second"}])
+        self.apply(2, [{"op": "update", "id": "a", "topic": "Third"}])
+        shared_map = MindMapSharedMap.objects.get(usage_key=ITEM_ID, group_id=GROUP_ID)
+        self.assertEqual(2, shared_map.version)
+
+        cache.clear()
+        state = collaboration.load_shared_map(ITEM_ID, GROUP_ID, INITIAL_MIND_MAP)
+        self.assertEqual(2, state["version"])
+        self.assertEqual("Second", state["mind_map"]["data"][1]["topic"])
+        self.assertNotIn("expanded", state["mind_map"]["data"][0])
+
+    @override_settings(MINDMAP_SHARED_COMPACTION_OPERATIONS=100, MINDMAP_SHARED_COMPACTION_INTERVAL=0)
+    def test_compaction_interval(self):
+        """
+        Check the shared mind map is written when the compaction interval has passed.
+        """
+        self.apply(0, [{"op": "update", "id": "a", "topic": "First"}])
+
+        self.assertEqual(1, MindMapSharedMap.objects.get(usage_key=ITEM_ID, group_id=GROUP_ID).version)
+
+    def test_compact_shared_map(self):
+        """
+        Check the batches not compacted yet are written on demand.
+        """
+        self.assertFalse(collaboration.compact_shared_map(ITEM_ID, GROUP_ID))
+        self.apply(0, [{"op": "update", "id": "a", "topic": "First"}])
+
+        self.assertTrue(collaboration.compact_shared_map(ITEM_ID, GROUP_ID))
+        self.assertFalse(collaboration.compact_shared_map(ITEM_ID, GROUP_ID))
+        self.assertEqual(1, MindMapSharedMap.objects.get(usage_key=ITEM_ID, group_id=GROUP_ID).version)
+
+    def test_shared_map_connections(self):
+        """
+        Check the browsers connected to a group are counted until the last one leaves.
+        """
+        self.assertEqual(1, collaboration.add_shared_map_connection(ITEM_ID, GROUP_ID))
+        self.assertEqual(2, collaboration.add_shared_map_connection(ITEM_ID, GROUP_ID))
+        self.assertEqual(1, collaboration.add_shared_map_connection(ITEM_ID, "cohort-2"))
+
+        self.assertEqual(1, collaboration.remove_shared_map_connection(ITEM_ID, GROUP_ID))
+        self.assertEqual(0, collaboration.remove_shared_map_connection(ITEM_ID, GROUP_ID))
+        self.assertEqual(0, collaboration.remove_shared_map_connection(ITEM_ID, GROUP_ID))
+        self.assertEqual(1, collaboration.add_shared_map_connection(ITEM_ID, GROUP_ID))
+
+    def test_read_shared_map(self):
+        """
+        Check the browsers get the batches since their version, or the whole mind map.
+        """
+        self.apply(0, [{"op": "update", "id": "a", "topic": "First"}])
+        self.apply(1, [{"op": "update", "id": "a", "topic": "Second"}])
+
+        since_one = collaboration.read_shared_map(ITEM_ID, GROUP_ID, INITIAL_MIND_MAP, since=1)
+        whole = collaboration.read_shared_map(ITEM_ID, GROUP_ID, INITIAL_MIND_MAP)
+
+        self.assertEqual(2, since_one["version"])
+        self.assertEqual([2], [batch["version"] for batch in since_one["batches"]])
+        self.assertEqual({"version": 2, "batches": []}, collaboration.read_shared_map(
+            ITEM_ID, GROUP_ID, INITIAL_MIND_MAP, since=2,
+        ))
+        self.assertEqual("Second", whole["mind_map"]["data"][1]["topic"])
+        self.assertNotIn("batches", whole)
+
+    @override_settings(MINDMAP_SHARED_COMPACTION_INTERVAL=0)
+    def test_read_shared_map_compacts(self):
+        """
+        Check the edits pending compaction are written when the shared mind map is read.
+        """
+        with override_settings(MINDMAP_SHARED_COMPACTION_INTERVAL=3600):
+            self.apply(0, [{"op": "update", "id": "a", "topic": "First"}])
+
+        collaboration.read_shared_map(ITEM_ID, GROUP_ID, INITIAL_MIND_MAP)
+
+        self.assertTrue(MindMapSharedMap.objects.filter(usage_key=ITEM_ID, group_id=GROUP_ID).exists())
+
+    @patch("mindmap.collaboration.LOCK_WAIT", 0)
+    @patch("mindmap.collaboration.LOCK_ATTEMPTS", 2)
+    def test_shared_map_busy(self):
+        """
+        Check a batch is rejected when the shared mind map stays locked.
+        """
+        cache.add(f"{collaboration.get_shared_map_name(ITEM_ID, GROUP_ID)}.lock", True)
+
+        with self.assertRaises(collaboration.SharedMapBusy):
+            self.apply(0, [])
+
+    def test_shared_map_name(self):
+        """
+        Check the names of the shared mind maps are valid Channels group names, distinct for each group.
+        """
+        name = collaboration.get_shared_map_name(ITEM_ID, GROUP_ID)
+
+        self.assertRegex(name, r"^[a-z0-9.]{1,99}$")
+        self.assertNotEqual(name, collaboration.get_shared_map_name(ITEM_ID, "cohort-2"))
+
+    def test_token(self):
+        """
+        Check the WebSocket tokens identify the shared mind map and cannot be forged.
+        """
+        token = collaboration.make_shared_map_token(ITEM_ID, GROUP_ID)
+
+        self.assertEqual({"usage_key": ITEM_ID, "group_id": GROUP_ID}, collaboration.read_shared_map_token(token))
+        with self.assertRaises(BadSignature):
+            collaboration.read_shared_map_token(token.replace(":", "x:", 1))
+
+    @override_settings(MINDMAP_SHARED_POLL_INTERVAL=2, MINDMAP_SHARED_WEBSOCKET_URL="wss://lms/ws/mindmap/shared/")
+    def test_shared_map_settings(self):
+        """
+        Check the browsers get a client id, the poll interval and the WebSocket URL with the token of their group.
+        """
+        settings = collaboration.get_shared_map_settings(ITEM_ID, GROUP_ID)
+        url = urlparse(settings["websocket_url"])
+
+        self.assertEqual(2, settings["poll_interval"])
+        self.assertEqual("/ws/mindmap/shared/", url.path)
+        self.assertEqual(
+            {"usage_key": ITEM_ID, "group_id": GROUP_ID},
+            collaboration.read_shared_map_token(parse_qs(url.query)["token"][0]),
+        )
+        self.assertNotEqual(
+            settings["client_id"], collaboration.get_shared_map_settings(ITEM_ID, GROUP_ID)["client_id"],
+        )
+
+    def test_shared_map_settings_without_websocket(self):
+        """
+        Check the browsers poll the edits when no WebSocket is served.
+        """
+        self.assertIsNone(collaboration.get_shared_map_settings(ITEM_ID, GROUP_ID)["websocket_url"])
+
+    @patch("mindmap.collaboration.get_channel_layer", None)
+    def test_broadcast_without_channels(self):
+        """
+        Check nothing is broadcast when Django Channels is not installed.
+        """
+        collaboration.broadcast_shared_map_operations(ITEM_ID, GROUP_ID, {"version": 1})
+
+
+@override_settings(MINDMAP_SHARED_COMPACTION_INTERVAL=3600)
+class TestSharedMapConsumer(TestCase):
+    """
+    Test suite for the WebSocket consumer of the shared mind maps, with the in-memory channel layer.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty cache.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.application = URLRouter(websocket_urlpatterns)
+
+    def make_communicator(self, token: str) -> ApplicationCommunicator:
+        """
+        Return a WebSocket client of the consumer with a token.
+        """
+        return ApplicationCommunicator(self.application, {
+            "type": "websocket",
+            "path": "/ws/mindmap/shared/",
+            "query_string": f"token={token}".encode(),
+            "headers": [],
+            "subprotocols": [],
+        })
+
+    async def connect(self, communicator: ApplicationCommunicator) -> dict:
+        """
+        Open the WebSocket of a client and return the answer of the consumer.
+        """
+        await communicator.send_input({"type": "websocket.connect"})
+        return await communicator.receive_output()
+
+    def test_broadcast(self):
+        """
+        Check the browsers of a group receive the batches applied to its shared mind map.
+
+        Expected result:
+            - The browsers of the group receive the batch, not the ones of another group.
+            - The shared mind map is compacted when the last browser of the group disconnects.
+        """
+        token = collaboration.make_shared_map_token(ITEM_ID, GROUP_ID)
+        other_token = collaboration.make_shared_map_token(ITEM_ID, "cohort-2")
+
+        async def run():
+            communicator = self.make_communicator(token)
+            other_communicator = self.make_communicator(other_token)
+            self.assertEqual("websocket.accept", (await self.connect(communicator))["type"])
+            self.assertEqual("websocket.accept", (await self.connect(other_communicator))["type"])
+
+            batch = await sync_to_async(collaboration.apply_shared_map_operations)(
+                ITEM_ID, GROUP_ID, INITIAL_MIND_MAP, 0, [{"op": "update", "id": "a", "topic": "Live"}],
+            )
+            await sync_to_async(collaboration.broadcast_shared_map_operations)(ITEM_ID, GROUP_ID, batch)
+
+            self.assertEqual(batch, json.loads((await communicator.receive_output())["text"]))
+            self.assertTrue(await other_communicator.receive_nothing())
+            await communicator.send_input({"type": "websocket.receive", "text": json.dumps({"op": "ignored"})})
+            self.assertTrue(await communicator.receive_nothing())
+            for client in (communicator, other_communicator):
+                await client.send_input({"type": "websocket.disconnect", "code": 1000})
+                await client.wait()
+
+        async_to_sync(run)()
+
+        shared_map = MindMapSharedMap.objects.get(usage_key=ITEM_ID, group_id=GROUP_ID)
+        self.assertEqual(1, shared_map.version)
+        self.assertEqual("Live", json.loads(shared_map.content)["data"][1]["topic"])
+
+    def test_compact_on_last_disconnect(self):
+        """
+        Check the shared mind map is compacted only when the last browser of its group disconnects.
+        """
+        token = collaboration.make_shared_map_token(ITEM_ID, GROUP_ID)
+
+        async def run():
+            first, last = self.make_communicator(token), self.make_communicator(token)
+            await self.connect(first)
+            await self.connect(last)
+            await sync_to_async(collaboration.apply_shared_map_operations)(
+                ITEM_ID, GROUP_ID, INITIAL_MIND_MAP, 0, [{"op": "update", "id": "a", "topic": "Live"}],
+            )
+
+            await first.send_input({"type": "websocket.disconnect", "code": 1000})
+            await first.wait()
+            compacted = await sync_to_async(MindMapSharedMap.objects.filter(usage_key=ITEM_ID).exists)()
+            await last.send_input({"type": "websocket.disconnect", "code": 1000})
+            await last.wait()
+            return compacted
+
+        self.assertFalse(async_to_sync(run)())
+        self.assertEqual(1, MindMapSharedMap.objects.get(usage_key=ITEM_ID, group_id=GROUP_ID).version)
+
+    def test_invalid_token(self):
+        """
+        Check the connections without a valid token are closed.
+        """
+        async def run():
+            communicator = self.make_communicator("forged")
+            self.assertEqual({"type": "websocket.close", "code": 4403}, await self.connect(communicator))
+            await communicator.send_input({"type": "websocket.disconnect", "code": 4403})
+            await communicator.wait()
+
+        async_to_sync(run)()
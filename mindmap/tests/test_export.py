@@ -0,0 +1,317 @@
+"""
+Tests for the export of the submissions of a block.
+"""
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+from unittest.mock import Mock, call, patch
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from submissions import api as submissions_api
+
+from mindmap import export, jobs, tasks
+from mindmap.blobs import make_answer
+from mindmap.mindmap import MindMapXBlock
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+
+
+class ExportTestMixin:
+    """
+    Learners with submissions to a block, along with their users and student modules.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with three learners, the first one with two submissions.
+        """
+        self.users = {}
+        self.student_modules = {}
+        users_patcher = patch(
+            "mindmap.export.users_by_anonymous_ids",
+            side_effect=lambda anonymous_ids: {
+                anonymous_id: self.users[anonymous_id]
+                for anonymous_id in anonymous_ids
+                if anonymous_id in self.users
+            },
+        )
+        users_patcher.start()
+        self.addCleanup(users_patcher.stop)
+        student_module_patcher = patch("mindmap.export.StudentModule")
+        student_module_objects = student_module_patcher.start().return_value.objects
+        self.addCleanup(student_module_patcher.stop)
+        student_module_objects.filter.side_effect = lambda student_id__in, **_kwargs: [
+            self.student_modules[user_id] for user_id in student_id__in if user_id in self.student_modules
+        ]
+
+        self.create_submission(1, {"data": "first"})
+        self.create_submission(1, {"data": "second"}, score=8, status="Completed", raw_score=80)
+        self.create_submission(2, {"data": "third"}, status="Submitted")
+        self.create_submission(3, {"data": "fourth"}, score=5, status="Completed", raw_score=50)
+
+    def create_submission(self, index: int, mind_map: dict, *, score=None, status=None, raw_score=None) -> None:
+        """
+        Create a submission of a learner, with its user and student module.
+        """
+        anonymous_id = f"anonymous-{index}"
+        submission = submissions_api.create_submission(
+            {"student_id": anonymous_id, "course_id": COURSE_ID, "item_id": ITEM_ID, "item_type": "mindmap"},
+            {"mindmap_student_body": json.dumps(mind_map)},
+        )
+        if score is not None:
+            submissions_api.set_score(submission["uuid"], score, 10)
+        self.users[anonymous_id] = Mock(id=index, username=f"student-{index}")
+        state = {"submission_status": status, "raw_score": raw_score}
+        self.student_modules[index] = Mock(student_id=index, state=json.dumps(state))
+
+
+class TestExportSubmissions(ExportTestMixin, TestCase):
+    """
+    Test suite for the export of the submissions to files.
+    """
+
+    def test_iter_submission_batches(self):
+        """
+        Check the submissions are loaded in batches of increasing ids.
+        """
+        batches = list(export.iter_submission_batches(COURSE_ID, ITEM_ID, batch_size=3))
+
+        self.assertEqual([3, 1], [len(batch) for batch in batches])
+        ids = [submission.id for batch in batches for submission in batch]
+        self.assertEqual(sorted(ids), ids)
+
+    def test_iter_export_rows(self):
+        """
+        Check the status and scores are only set on the latest submission of each learner.
+        """
+        rows = list(export.iter_export_rows(COURSE_ID, ITEM_ID, batch_size=2))
+
+        self.assertEqual(
+            [
+                ("student-1", '{"data": "first"}', None, None, None),
+                ("student-1", '{"data": "second"}', "Completed", 80, 8),
+                ("student-2", '{"data": "third"}', "Submitted", None, None),
+                ("student-3", '{"data": "fourth"}', "Completed", 50, 5),
+            ],
+            [
+                (
+                    row["username"], row["mindmap_student_body"], row["submission_status"],
+                    row["raw_score"], row["weighted_score"],
+                )
+                for row in rows
+            ],
+        )
+        self.assertEqual(list(export.EXPORT_FIELDS), list(rows[0]))
+
+    def test_iter_export_rows_raw_score_from_weighted_score(self):
+        """
+        Check the raw score is computed from the weighted score when the learner state has none.
+
+        Expected result:
+            - The raw score is computed with the points of the block, and left empty without them.
+        """
+        self.student_modules[3].state = json.dumps({"submission_status": "Completed"})
+
+        self.assertEqual(50, list(export.iter_export_rows(COURSE_ID, ITEM_ID, points=100))[-1]["raw_score"])
+        self.assertIsNone(list(export.iter_export_rows(COURSE_ID, ITEM_ID))[-1]["raw_score"])
+
+    def test_export_csv(self):
+        """
+        Check the submissions are written as CSV with a header.
+        """
+        stream = io.StringIO()
+        progress_callback = Mock()
+
+        count = export.export_submissions(
+            stream, COURSE_ID, ITEM_ID, "csv", progress_callback=progress_callback, batch_size=2,
+        )
+
+        rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+        self.assertEqual(4, count)
+        self.assertEqual(["student-1", "student-1", "student-2", "student-3"], [row["username"] for row in rows])
+        self.assertEqual('{"data": "second"}', rows[1]["mindmap_student_body"])
+        self.assertEqual("8", rows[1]["weighted_score"])
+        self.assertEqual([call(2), call(4)], progress_callback.call_args_list)
+
+    def test_export_jsonl(self):
+        """
+        Check the submissions are written as JSON lines with the mind maps as objects.
+        """
+        stream = io.StringIO()
+
+        count = export.export_submissions(stream, COURSE_ID, ITEM_ID, "jsonl")
+
+        rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(4, count)
+        self.assertEqual({"data": "fourth"}, rows[3]["mindmap_student_body"])
+        self.assertEqual(5, rows[3]["weighted_score"])
+
+    def test_export_queries(self):
+        """
+        Check the number of queries only depends on the number of batches.
+        """
+        stream = io.StringIO()
+
+        # For each batch: the submissions, the latest ids and the scores, plus
+        # the last query returning no submissions.
+        with self.assertNumQueries(3 * 2 + 1):
+            export.write_csv(export.iter_export_rows(COURSE_ID, ITEM_ID, batch_size=2), stream)
+
+    def test_export_blob_answers(self):
+        """
+        Check the mind maps of the submissions referencing a blob are exported.
+        """
+        submissions_api.create_submission(
+            {"student_id": "anonymous-2", "course_id": COURSE_ID, "item_id": ITEM_ID, "item_type": "mindmap"},
+            make_answer({"data": "fifth"}),
+        )
+
+        rows = list(export.iter_export_rows(COURSE_ID, ITEM_ID))
+
+        self.assertEqual('{"data":"fifth"}', rows[-1]["mindmap_student_body"])
+
+    def test_export_no_submissions(self):
+        """
+        Check an export of a block without submissions only has the header.
+        """
+        stream = io.StringIO()
+
+        count = export.export_submissions(stream, COURSE_ID, "another-block", "csv")
+
+        self.assertEqual(0, count)
+        self.assertEqual(",".join(export.EXPORT_FIELDS) + "\r\n", stream.getvalue())
+
+
+class TestExportSubmissionsJob(ExportTestMixin, TestCase):
+    """
+    Test suite for the job exporting the submissions to the default storage.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with a block and a temporary storage.
+        """
+        super().setUp()
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.xblock = MindMapXBlock(
+            runtime=Mock(), field_data=Mock(), scope_ids=Mock(usage_id=ITEM_ID),
+        )
+        self.xblock.course_id = COURSE_ID
+        self.xblock.location = ITEM_ID
+        self.xblock.points = 100
+
+    def test_export_job(self):
+        """
+        Check the job writes the export to the storage and reports its progress.
+        """
+        progress = tasks.start_export_submissions_job(self.xblock, "jsonl")
+
+        self.assertEqual(jobs.JOB_COMPLETED, progress["status"])
+        self.assertEqual(4, progress["total"])
+        self.assertEqual(4, progress["processed"])
+        self.assertEqual(f"mindmap/exports/{progress['job_id']}.jsonl", progress["file_name"])
+        self.assertEqual(progress, jobs.get_job_progress(progress["job_id"]))
+        with default_storage.open(progress["file_name"], "rb") as export_file:
+            self.assertEqual(4, len(export_file.read().splitlines()))
+
+    @patch("mindmap.jobs.export_submissions", side_effect=Exception("Unexpected error"))
+    def test_export_job_failed(self, _export_submissions: Mock):
+        """
+        Check the job is reported as failed if the export raises an exception.
+        """
+        progress = tasks.start_export_submissions_job(self.xblock, "csv")
+
+        self.assertEqual(jobs.JOB_FAILED, progress["status"])
+        self.assertNotIn("file_name", progress)
+
+    def test_delete_expired_exports(self):
+        """
+        Check the export files older than their job progress are deleted when an export starts.
+
+        Expected result:
+            - The expired export is deleted, the new one is kept.
+        """
+        expired = default_storage.save(
+            jobs.EXPORT_FILE_NAME.format(job_id="expired", export_format="csv"), io.StringIO(""),
+        )
+        modified = datetime.datetime.now(tz=datetime.timezone.utc).timestamp() - jobs.JOB_PROGRESS_TIMEOUT - 1
+        os.utime(default_storage.path(expired), (modified, modified))
+
+        progress = tasks.start_export_submissions_job(self.xblock, "csv")
+
+        self.assertFalse(default_storage.exists(expired))
+        self.assertTrue(default_storage.exists(progress["file_name"]))
+        self.assertEqual(0, jobs.delete_expired_exports())
+
+    def test_delete_expired_exports_command(self):
+        """
+        Check the command deletes the exports older than the given age.
+        """
+        tasks.start_export_submissions_job(self.xblock, "csv")
+        stdout = io.StringIO()
+
+        call_command("mindmap_delete_expired_exports", "--max-age", "-1", stdout=stdout)
+
+        self.assertEqual(([], []), default_storage.listdir(jobs.EXPORT_DIR))
+        self.assertIn("Deleted 1 expired exports", stdout.getvalue())
+
+    def test_delete_expired_exports_without_exports(self):
+        """
+        Check there is nothing to delete before the first export.
+        """
+        self.assertEqual(0, jobs.delete_expired_exports())
+
+    @patch("mindmap.tasks.export_submissions_task")
+    def test_export_job_queued(self, export_submissions_task: Mock):
+        """
+        Check the job is queued when Celery is available.
+        """
+        progress = tasks.start_export_submissions_job(self.xblock, "csv")
+
+        self.assertEqual(jobs.JOB_PENDING, progress["status"])
+        export_submissions_task.delay.assert_called_once_with(
+            job_id=progress["job_id"], course_id=COURSE_ID, usage_id=ITEM_ID, export_format="csv", points=100,
+        )
+
+
+class TestExportSubmissionsCommand(ExportTestMixin, TestCase):
+    """
+    Test suite for the mindmap_export_submissions management command.
+    """
+
+    def test_export_to_file(self):
+        """
+        Check the command writes the export to the given file.
+        """
+        with tempfile.NamedTemporaryFile(suffix=".csv") as output:
+            call_command(
+                "mindmap_export_submissions", COURSE_ID, ITEM_ID, "--output", output.name, stderr=io.StringIO(),
+            )
+
+            with open(output.name, encoding="utf-8") as export_file:
+                rows = list(csv.DictReader(export_file))
+        self.assertEqual(4, len(rows))
+
+    def test_export_to_stdout(self):
+        """
+        Check the command writes the export to the standard output by default.
+        """
+        stderr = io.StringIO()
+
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            call_command("mindmap_export_submissions", COURSE_ID, ITEM_ID, "--format", "jsonl", stderr=stderr)
+
+        self.assertEqual(4, len(stdout.getvalue().splitlines()))
+        self.assertIn("Exported 4 submissions", stderr.getvalue())
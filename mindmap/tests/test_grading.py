@@ -0,0 +1,521 @@
+"""
+Tests for the batched grading data loader and grade writes.
+"""
+import hashlib
+import json
+from unittest.mock import Mock, patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from submissions import api as submissions_api
+from xblock.fields import DateTime
+
+from mindmap.blobs import canonical_json, make_answer
+from mindmap.grading import GradingDataLoader, enter_grades, get_submission_answer
+from mindmap.mindmap import MindMapXBlock
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+
+
+class GradingTestMixin(TestCase):
+    """
+    Mixin to create submissions, users and student modules for a block.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite.
+        """
+        self.xblock = MindMapXBlock(
+            runtime=Mock(), field_data=Mock(), scope_ids=Mock(usage_id=ITEM_ID),
+        )
+        self.xblock.course_id = COURSE_ID
+        self.xblock.location = ITEM_ID
+        self.xblock.points = 100
+        self.xblock.weight = 10
+        self.users = {}
+        self.student_modules = {}
+
+        users_patcher = patch(
+            "mindmap.grading.users_by_anonymous_ids",
+            side_effect=lambda anonymous_ids: {
+                anonymous_id: self.users[anonymous_id]
+                for anonymous_id in anonymous_ids
+                if anonymous_id in self.users
+            },
+        )
+        self.users_by_anonymous_ids_mock = users_patcher.start()
+        self.addCleanup(users_patcher.stop)
+
+        anonymous_user_ids_patcher = patch(
+            "mindmap.grading.block_anonymous_user_ids",
+            side_effect=lambda _course_id, _usage_key, states_containing=(), username_prefix=None: [
+                anonymous_id for anonymous_id, user in self.users.items()
+                if user.id in self.student_modules
+                and any(text in self.student_modules[user.id].state for text in states_containing)
+                and user.username.lower().startswith((username_prefix or "").lower())
+            ],
+        )
+        self.block_anonymous_user_ids_mock = anonymous_user_ids_patcher.start()
+        self.addCleanup(anonymous_user_ids_patcher.stop)
+
+        student_module_patcher = patch("mindmap.grading.StudentModule")
+        self.student_module_mock = student_module_patcher.start()
+        self.addCleanup(student_module_patcher.stop)
+        self.student_module_mock.return_value.objects.filter.side_effect = (
+            lambda student_id__in=None, pk__in=None, **_kwargs: [
+                student_module for user_id, student_module in self.student_modules.items()
+                if (student_id__in is None or user_id in student_id__in)
+                and (pk__in is None or student_module.id in pk__in)
+            ]
+        )
+
+    def create_learner(self, index: int, state: dict, weighted_score: int = None) -> dict:
+        """
+        Create a learner with a submission, a user and a student module.
+        """
+        anonymous_id = f"anonymous-{index}"
+        student_item = {
+            "student_id": anonymous_id,
+            "course_id": COURSE_ID,
+            "item_id": ITEM_ID,
+            "item_type": "mindmap",
+        }
+        submission = submissions_api.create_submission(
+            student_item, {"mindmap_student_body": json.dumps({"id": index})},
+        )
+        if weighted_score is not None:
+            submissions_api.set_score(submission["uuid"], weighted_score, self.xblock.weight)
+        self.users[anonymous_id] = Mock(id=index, username=f"learner-{index}")
+        self.student_modules[index] = Mock(id=1000 + index, student_id=index, state=json.dumps(state))
+        return submission
+
+
+class TestGradingDataLoader(GradingTestMixin):
+    """
+    Test suite for the GradingDataLoader.
+    """
+
+    def test_get_assignments(self):
+        """
+        Check the assignments built from the bulk queries.
+
+        Expected result:
+            - Only submitted or graded learners are returned.
+            - Scores are taken from the state or computed from the weighted score.
+        """
+        submitted = self.create_learner(1, {"submission_status": "Submitted"})
+        graded = self.create_learner(2, {"submission_status": "Completed", "raw_score": 75}, weighted_score=8)
+        self.create_learner(3, {"submission_status": "Not attempted"})
+        self.create_learner(4, {"submission_status": "Completed"}, weighted_score=5)
+
+        assignments = GradingDataLoader(self.xblock).get_assignments()
+
+        self.assertEqual(["learner-1", "learner-2", "learner-4"], [row["username"] for row in assignments])
+        self.assertDictEqual(
+            {
+                "module_id": 1001,
+                "student_id": "anonymous-1",
+                "submission_id": submitted["uuid"],
+                "answer_body": {"mindmap_student_body": json.dumps({"id": 1})},
+                "answer_hash": hashlib.md5(
+                    json.dumps({"mindmap_student_body": json.dumps({"id": 1})}).encode(),
+                ).hexdigest(),
+                "identical_submissions": 1,
+                "username": "learner-1",
+                "timestamp": submitted["created_at"].strftime(DateTime.DATETIME_FORMAT),
+                "raw_score": None,
+                "max_raw_score": 100,
+                "weight": 10,
+                "weighted_score": None,
+                "submission_status": "Submitted",
+            },
+            assignments[0],
+        )
+        self.assertEqual(graded["uuid"], assignments[1]["submission_id"])
+        self.assertEqual((75, 8), (assignments[1]["raw_score"], assignments[1]["weighted_score"]))
+        self.assertEqual((50, 5), (assignments[2]["raw_score"], assignments[2]["weighted_score"]))
+
+    def test_get_assignments_blob_answers(self):
+        """
+        Check the mind maps of the answers referencing a blob.
+
+        Expected result:
+            - The blobs are loaded, and identical mind maps share their hash.
+        """
+        for index in range(1, 4):
+            self.create_learner(index, {"submission_status": "Submitted"})
+        for index, mind_map in ((1, {"id": "same"}), (2, {"id": "same"}), (3, {"id": "other"})):
+            submissions_api.create_submission(
+                {
+                    "student_id": f"anonymous-{index}",
+                    "course_id": COURSE_ID,
+                    "item_id": ITEM_ID,
+                    "item_type": "mindmap",
+                },
+                make_answer(mind_map),
+            )
+
+        assignments = GradingDataLoader(self.xblock).get_assignments()
+
+        self.assertEqual(
+            [{"mindmap_student_body": '{"id":"same"}'}] * 2 + [{"mindmap_student_body": '{"id":"other"}'}],
+            [row["answer_body"] for row in assignments],
+        )
+        self.assertEqual([2, 2, 1], [row["identical_submissions"] for row in assignments])
+        self.assertEqual(assignments[0]["answer_hash"], assignments[1]["answer_hash"])
+        self.assertNotEqual(assignments[0]["answer_hash"], assignments[2]["answer_hash"])
+
+    def test_reset_score_is_hidden(self):
+        """
+        Check that a reset score is not reported.
+
+        Expected result:
+            - The weighted score of a learner whose score was reset is None.
+        """
+        self.create_learner(1, {"submission_status": "Submitted"}, weighted_score=5)
+        submissions_api.reset_score("anonymous-1", COURSE_ID, ITEM_ID)
+
+        assignments = GradingDataLoader(self.xblock).get_assignments()
+
+        self.assertIsNone(assignments[0]["weighted_score"])
+
+    def test_query_count_is_constant(self):
+        """
+        Check that the number of queries does not grow with the number of learners.
+
+        Expected result:
+            - Loading 3 and 30 learners takes the same number of queries.
+            - Users and student modules are fetched once per batch.
+        """
+        query_counts = []
+        for start, count in ((0, 3), (3, 27)):
+            for index in range(start, start + count):
+                self.create_learner(index, {"submission_status": "Completed"}, weighted_score=index % 10)
+            self.users_by_anonymous_ids_mock.reset_mock()
+            self.student_module_mock.return_value.objects.filter.reset_mock()
+
+            with CaptureQueriesContext(connection) as queries:
+                assignments = GradingDataLoader(self.xblock).get_assignments()
+
+            query_counts.append(len(queries))
+            self.assertEqual(start + count, len(assignments))
+            self.users_by_anonymous_ids_mock.assert_called_once()
+            self.student_module_mock.return_value.objects.filter.assert_called_once()
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_batches(self):
+        """
+        Check that users and student modules are fetched in batches.
+
+        Expected result:
+            - One lookup is made per batch of learners.
+        """
+        for index in range(5):
+            self.create_learner(index, {"submission_status": "Submitted"})
+
+        assignments = GradingDataLoader(self.xblock, batch_size=2).get_assignments()
+
+        self.assertEqual(5, len(assignments))
+        self.assertEqual(3, self.users_by_anonymous_ids_mock.call_count)
+        self.assertEqual(3, self.student_module_mock.return_value.objects.filter.call_count)
+
+
+class TestGradingDataLoaderPage(GradingTestMixin):
+    """
+    Test suite for the paginated grading data.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite.
+        """
+        super().setUp()
+        self.create_learner(1, {"submission_status": "Submitted"})
+        self.create_learner(2, {"submission_status": "Completed"}, weighted_score=9)
+        self.create_learner(3, {"submission_status": "Completed"}, weighted_score=4)
+        self.create_learner(4, {"submission_status": "Submitted"})
+        self.users["anonymous-4"].username = "other-4"
+        self.loader = GradingDataLoader(self.xblock, include_answers=False)
+
+    def test_summary_rows(self):
+        """
+        Check that the submitted mind maps are not included in the summary rows.
+
+        Expected result:
+            - The rows do not contain the answer body but its size and hash.
+        """
+        answer = json.dumps({"mindmap_student_body": json.dumps({"id": 1})})
+
+        page = self.loader.get_page(sort="timestamp")
+
+        self.assertEqual(4, page["count"])
+        self.assertTrue(all("answer_body" not in row for row in page["assignments"]))
+        self.assertEqual(len(answer), page["assignments"][0]["answer_size"])
+        self.assertEqual(hashlib.md5(answer.encode()).hexdigest(), page["assignments"][0]["answer_hash"])
+
+    def test_summary_rows_blob_answers(self):
+        """
+        Check the size of the mind maps stored as blobs in the summary rows.
+
+        Expected result:
+            - The size is the one of the mind map, not of the answer referencing its blob.
+        """
+        mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Root " * 20}]}
+        submissions_api.create_submission(
+            {"student_id": "anonymous-1", "course_id": COURSE_ID, "item_id": ITEM_ID, "item_type": "mindmap"},
+            make_answer(mind_map),
+        )
+
+        page = self.loader.get_page(username="learner-1")
+
+        self.assertEqual(["learner-1"], [row["username"] for row in page["assignments"]])
+        self.assertEqual(len(canonical_json(mind_map)), page["assignments"][0]["answer_size"])
+
+    def test_pagination(self):
+        """
+        Check the offset and page size of the paginated grading data.
+
+        Expected result:
+            - Only the requested slice is returned along with the next offset.
+        """
+        first_page = self.loader.get_page(offset=0, page_size=3, sort="timestamp")
+        last_page = self.loader.get_page(offset=3, page_size=3, sort="timestamp")
+
+        self.assertEqual(
+            ["learner-1", "learner-2", "learner-3"],
+            [row["username"] for row in first_page["assignments"]],
+        )
+        self.assertEqual(3, first_page["next_offset"])
+        self.assertEqual(["other-4"], [row["username"] for row in last_page["assignments"]])
+        self.assertIsNone(last_page["next_offset"])
+
+    def test_pagination_without_student_module(self):
+        """
+        Check the learners with a submission but without a student module.
+
+        Expected result:
+            - They are left out of the rows and of the count, so the pages are full.
+        """
+        for index in range(5, 8):
+            self.create_learner(index, {"submission_status": "Submitted"})
+            del self.student_modules[index]
+
+        with self.assertLogs("mindmap.grading", level="WARNING"):
+            assignments = self.loader.get_assignments()
+        page = self.loader.get_page(page_size=3, sort="timestamp")
+
+        self.assertEqual(4, len(assignments))
+        self.assertEqual(4, page["count"])
+        self.assertEqual(["learner-1", "learner-2", "learner-3"], [row["username"] for row in page["assignments"]])
+        self.assertEqual(3, page["next_offset"])
+
+    def test_rows_built_for_page(self):
+        """
+        Check only the learners of the page are loaded.
+
+        Expected result:
+            - The users and student modules of the page are fetched, the count covers every learner.
+            - The identical submissions are counted among every learner.
+        """
+        for index in range(5, 12):
+            self.create_learner(index, {"submission_status": "Submitted"})
+        submissions_api.create_submission(
+            {"student_id": "anonymous-5", "course_id": COURSE_ID, "item_id": ITEM_ID, "item_type": "mindmap"},
+            {"mindmap_student_body": json.dumps({"id": 1})},
+        )
+        self.users_by_anonymous_ids_mock.reset_mock()
+
+        page = self.loader.get_page(page_size=3, sort="timestamp")
+
+        self.assertEqual(11, page["count"])
+        self.assertEqual(3, page["next_offset"])
+        self.assertEqual(["learner-1", "learner-2", "learner-3"], [row["username"] for row in page["assignments"]])
+        self.assertEqual(
+            ["anonymous-1", "anonymous-2", "anonymous-3"], list(self.users_by_anonymous_ids_mock.call_args.args[0]),
+        )
+        self.assertEqual([2, 1, 1], [row["identical_submissions"] for row in page["assignments"]])
+
+    def test_filters(self):
+        """
+        Check the status and username filters of the paginated grading data.
+
+        Expected result:
+            - Only the matching rows are returned and counted.
+        """
+        page = self.loader.get_page(status="Submitted", username="LEARNER")
+        answer_hash = hashlib.md5(json.dumps({"mindmap_student_body": json.dumps({"id": 2})}).encode()).hexdigest()
+        identical_page = self.loader.get_page(answer_hash=answer_hash)
+
+        self.assertEqual(1, page["count"])
+        self.assertEqual("learner-1", page["assignments"][0]["username"])
+        self.assertEqual(["learner-2"], [row["username"] for row in identical_page["assignments"]])
+
+    def test_sort_by_score(self):
+        """
+        Check sorting the paginated grading data by score.
+
+        Expected result:
+            - Scored rows are sorted and rows without a score are listed last.
+        """
+        ascending = self.loader.get_page(sort="raw_score")
+        descending = self.loader.get_page(sort="-raw_score")
+
+        self.assertEqual([40, 90, None, None], [row["raw_score"] for row in ascending["assignments"]])
+        self.assertEqual([90, 40, None, None], [row["raw_score"] for row in descending["assignments"]])
+
+
+class TestGetSubmissionAnswer(GradingTestMixin):
+    """
+    Test suite for the lazy loading of a submission answer.
+    """
+
+    def test_get_submission_answer(self):
+        """
+        Check getting the answer of a submission of the block.
+
+        Expected result:
+            - The submission is returned with the hash of its answer.
+        """
+        submission = self.create_learner(1, {"submission_status": "Submitted"})
+        answer = json.dumps({"mindmap_student_body": json.dumps({"id": 1})})
+
+        result = get_submission_answer(self.xblock, submission["uuid"])
+
+        self.assertEqual({"mindmap_student_body": json.dumps({"id": 1})}, result.answer)
+        self.assertEqual(hashlib.md5(answer.encode()).hexdigest(), result.answer_hash)
+
+    def test_get_submission_answer_other_block(self):
+        """
+        Check getting the answer of a submission of another block.
+
+        Expected result:
+            - None is returned.
+        """
+        submission = submissions_api.create_submission(
+            {"student_id": "anonymous-1", "course_id": COURSE_ID, "item_id": "other", "item_type": "mindmap"},
+            {"mindmap_student_body": "{}"},
+        )
+
+        self.assertIsNone(get_submission_answer(self.xblock, submission["uuid"]))
+
+
+class TestEnterGrades(GradingTestMixin):
+    """
+    Test suite for the bulk grade writes.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite.
+        """
+        super().setUp()
+        self.submissions = [
+            self.create_learner(index, {"submission_status": "Submitted"}) for index in range(1, 4)
+        ]
+        self.student_module_objects = self.student_module_mock.return_value.objects
+
+    def get_score(self, index: int) -> dict:
+        """
+        Return the score of a learner created in the set up.
+        """
+        return submissions_api.get_score({
+            "student_id": f"anonymous-{index}",
+            "course_id": COURSE_ID,
+            "item_id": ITEM_ID,
+            "item_type": "mindmap",
+        })
+
+    def test_enter_grades(self):
+        """
+        Check entering the grades of several submissions.
+
+        Expected result:
+            - The scores are saved and the student modules updated in bulk.
+        """
+        items = [
+            {"submission_id": self.submissions[0]["uuid"], "module_id": 1001, "grade": 50},
+            {"submission_id": self.submissions[1]["uuid"], "module_id": 1002, "grade": "100"},
+        ]
+
+        results = enter_grades(self.xblock, items)
+
+        self.assertEqual(
+            [
+                {"submission_id": self.submissions[0]["uuid"], "success": True},
+                {"submission_id": self.submissions[1]["uuid"], "success": True},
+            ],
+            results,
+        )
+        self.assertEqual(5, self.get_score(1)["points_earned"])
+        self.assertEqual(10, self.get_score(2)["points_earned"])
+        updated_modules = self.student_module_objects.bulk_update.call_args.args[0]
+        self.assertEqual([1001, 1002], [module.id for module in updated_modules])
+        self.assertEqual(
+            {"submission_status": "Completed", "raw_score": 50}, json.loads(updated_modules[0].state),
+        )
+        self.student_module_objects.bulk_update.assert_called_once()
+
+    def test_enter_grades_errors(self):
+        """
+        Check entering invalid grades along with valid ones.
+
+        Expected result:
+            - Each invalid grade is reported and only the valid ones are saved.
+        """
+        other_submission = submissions_api.create_submission(
+            {"student_id": "anonymous-1", "course_id": COURSE_ID, "item_id": "other", "item_type": "mindmap"},
+            {"mindmap_student_body": "{}"},
+        )
+        items = [
+            {"submission_id": self.submissions[0]["uuid"], "module_id": 1001, "grade": 101},
+            {"submission_id": self.submissions[0]["uuid"], "module_id": 1001, "grade": -1},
+            {"submission_id": "not-a-uuid", "module_id": 1001, "grade": 1},
+            {"module_id": 1001, "grade": 1},
+            "grade",
+            {"submission_id": other_submission["uuid"], "module_id": 1001, "grade": 1},
+            {"submission_id": self.submissions[1]["uuid"], "module_id": 1001, "grade": 1},
+            {"submission_id": self.submissions[2]["uuid"], "module_id": 1003, "grade": 30},
+            {"submission_id": self.submissions[2]["uuid"], "module_id": 1003, "grade": 40},
+        ]
+
+        results = enter_grades(self.xblock, items)
+
+        self.assertEqual(
+            [
+                "Score cannot be greater than max score",
+                "Score cannot be negative",
+                "Invalid submission id, module id or grade",
+                "Missing required parameters",
+                "Grades must be objects",
+                "Submission not found",
+                "Student module not found for the submission",
+                None,
+                "Duplicated submission",
+            ],
+            [result.get("error") for result in results],
+        )
+        self.assertIsNone(self.get_score(2))
+        self.assertEqual(3, self.get_score(3)["points_earned"])
+        updated_modules = self.student_module_objects.bulk_update.call_args.args[0]
+        self.assertEqual([1003], [module.id for module in updated_modules])
+
+    def test_enter_grades_queries(self):
+        """
+        Check the number of queries made to validate the grades.
+
+        Expected result:
+            - The submissions, student modules and users are loaded once for all the grades.
+        """
+        items = [
+            {"submission_id": submission["uuid"], "module_id": 1000 + index, "grade": 10}
+            for index, submission in enumerate(self.submissions, start=1)
+        ]
+
+        enter_grades(self.xblock, items)
+
+        self.student_module_objects.filter.assert_called_once()
+        self.users_by_anonymous_ids_mock.assert_called_once()
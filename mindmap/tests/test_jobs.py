@@ -0,0 +1,168 @@
+"""
+Tests for the chunked jobs run on many learners of a block.
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from submissions import api as submissions_api
+
+from mindmap import jobs, tasks
+from mindmap.analytics import get_summary_cache_key
+from mindmap.mindmap import MindMapXBlock
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+
+
+class TestResetGradesJob(TestCase):
+    """
+    Test suite for the job removing the grades of many learners.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with graded learners.
+        """
+        cache.clear()
+        self.xblock = MindMapXBlock(
+            runtime=Mock(), field_data=Mock(), scope_ids=Mock(usage_id=ITEM_ID),
+        )
+        self.xblock.course_id = COURSE_ID
+        self.xblock.location = ITEM_ID
+        self.users = {}
+        self.student_modules = {}
+
+        users_patcher = patch(
+            "mindmap.jobs.users_by_anonymous_ids",
+            side_effect=lambda anonymous_ids: {
+                anonymous_id: self.users[anonymous_id]
+                for anonymous_id in anonymous_ids
+                if anonymous_id in self.users
+            },
+        )
+        users_patcher.start()
+        self.addCleanup(users_patcher.stop)
+        student_module_patcher = patch("mindmap.jobs.StudentModule")
+        self.student_module_objects = student_module_patcher.start().return_value.objects
+        self.addCleanup(student_module_patcher.stop)
+        self.student_module_objects.filter.side_effect = lambda student_id__in, **_kwargs: [
+            self.student_modules[user_id] for user_id in student_id__in if user_id in self.student_modules
+        ]
+
+        for index in range(1, 4):
+            self.create_graded_learner(index)
+
+    def create_graded_learner(self, index: int) -> None:
+        """
+        Create a learner with a graded submission, a user and a student module.
+        """
+        anonymous_id = f"anonymous-{index}"
+        submission = submissions_api.create_submission(
+            {"student_id": anonymous_id, "course_id": COURSE_ID, "item_id": ITEM_ID, "item_type": "mindmap"},
+            {"mindmap_student_body": "{}"},
+        )
+        submissions_api.set_score(submission["uuid"], 8, 10)
+        self.users[anonymous_id] = Mock(id=index)
+        self.student_modules[index] = Mock(
+            id=1000 + index, student_id=index, state=json.dumps({"submission_status": "Completed", "raw_score": 80}),
+        )
+
+    def get_score(self, index: int) -> dict:
+        """
+        Return the score of a learner created in the set up.
+        """
+        return submissions_api.get_score({
+            "student_id": f"anonymous-{index}", "course_id": COURSE_ID, "item_id": ITEM_ID, "item_type": "mindmap",
+        })
+
+    @patch("mindmap.jobs.JOB_BATCH_SIZE", 2)
+    def test_reset_all(self):
+        """
+        Check removing the grades of every learner of the block.
+
+        Expected result:
+            - The scores are reset and the student modules updated a batch at a time.
+            - The progress of the job is saved.
+            - The grading summary of the block is invalidated.
+        """
+        cache.set(get_summary_cache_key(ITEM_ID), {"statuses": {}})
+
+        progress = tasks.start_reset_grades_job(self.xblock, "all")
+
+        self.assertEqual(
+            {"status": "completed", "total": 3, "processed": 3, "errors": [], "error_count": 0, "usage_id": ITEM_ID},
+            {key: value for key, value in progress.items() if key != "job_id"},
+        )
+        self.assertEqual(progress, jobs.get_job_progress(progress["job_id"]))
+        self.assertEqual([None, None, None], [self.get_score(index) for index in range(1, 4)])
+        self.assertEqual(2, self.student_module_objects.bulk_update.call_count)
+        self.assertEqual(
+            {"submission_status": "Submitted", "raw_score": 80}, json.loads(self.student_modules[3].state),
+        )
+        self.assertIsNone(cache.get(get_summary_cache_key(ITEM_ID)))
+
+    def test_reopen(self):
+        """
+        Check re-opening the submissions of some learners.
+
+        Expected result:
+            - The learners can submit again and the other learners are not changed.
+            - The learners without a student module are reported.
+        """
+        progress = tasks.start_reset_grades_job(
+            self.xblock, ["anonymous-1", "anonymous-1", "anonymous-9"], reopen=True,
+        )
+
+        self.assertEqual("completed", progress["status"])
+        self.assertEqual(2, progress["total"])
+        self.assertEqual([{"student_id": "anonymous-9", "error": "Student module not found"}], progress["errors"])
+        self.assertEqual(1, progress["error_count"])
+        self.assertEqual({"submission_status": "Not attempted"}, json.loads(self.student_modules[1].state))
+        self.assertIsNone(self.get_score(1))
+        self.assertEqual(8, self.get_score(2)["points_earned"])
+
+    @patch("mindmap.tasks.reset_grades_task")
+    def test_queue_job(self, reset_grades_task_mock: Mock):
+        """
+        Check starting a job when Celery is available.
+
+        Expected result:
+            - The job is queued and its pending progress is returned.
+        """
+        progress = tasks.start_reset_grades_job(self.xblock, ["anonymous-1"])
+
+        self.assertEqual("pending", progress["status"])
+        reset_grades_task_mock.delay.assert_called_once_with(
+            job_id=progress["job_id"],
+            course_id=COURSE_ID,
+            usage_id=ITEM_ID,
+            item_id=self.xblock.block_id,
+            student_ids=["anonymous-1"],
+            reopen=False,
+        )
+
+    def test_failed_job(self):
+        """
+        Check a job that fails while resetting the grades.
+
+        Expected result:
+            - The job is marked as failed and the batch is rolled back.
+        """
+        self.student_module_objects.bulk_update.side_effect = Exception("Database error")
+
+        progress = tasks.start_reset_grades_job(self.xblock, "all")
+
+        self.assertEqual(("failed", 0), (progress["status"], progress["processed"]))
+        self.assertEqual(8, self.get_score(1)["points_earned"])
+
+    @patch("mindmap.jobs.JOB_MAX_ERRORS", 1)
+    def test_errors_capped(self):
+        """
+        Check only the first errors of a job are listed in its progress, and every error is counted.
+        """
+        progress = tasks.start_reset_grades_job(self.xblock, ["anonymous-8", "anonymous-9"])
+
+        self.assertEqual([{"student_id": "anonymous-8", "error": "Student module not found"}], progress["errors"])
+        self.assertEqual(2, progress["error_count"])
@@ -0,0 +1,187 @@
+"""
+Tests for the instrumentation of the handlers and views.
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from submissions.models import Submission
+from web_fragments.fragment import Fragment
+from webob import Request, Response
+
+from mindmap import metrics
+from mindmap.mindmap import MindMapXBlock
+
+IN_MEMORY_BACKEND = "mindmap.metrics.InMemoryMetricsBackend"
+
+
+class FakeBlock:
+    """
+    A block with instrumented handlers and views.
+    """
+
+    @metrics.instrument("handler")
+    def handler(self, request, suffix=""):  # pylint: disable=unused-argument
+        """
+        Run a query on the submissions and return a JSON response.
+        """
+        Submission.objects.count()
+        metrics.observe_mind_map({"format": "node_tree", "data": {"id": "root", "children": [{"id": "child"}]}})
+        return Response(json_body={"count": 0})
+
+    @metrics.instrument("view")
+    def view(self, context=None):  # pylint: disable=unused-argument
+        """
+        Return a fragment.
+        """
+        return Fragment("<div>Mind Map</div>")
+
+    @metrics.instrument("failing")
+    def failing(self, request, suffix=""):
+        """
+        Raise an error.
+        """
+        raise ValueError("Failing handler")
+
+
+@override_settings(MINDMAP_METRICS_BACKEND=IN_MEMORY_BACKEND)
+class TestMetrics(TestCase):
+    """
+    Test suite for the metrics of the handlers and views.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty in-memory backend.
+        """
+        self.backend = metrics.get_metrics_backend()
+        self.backend.reset()
+        self.addCleanup(self.backend.reset)
+
+    def test_instrument_handler(self):
+        """
+        Check the latency, sizes, queries and mind map nodes of a handler are observed.
+        """
+        request = Request.blank("/", method="POST", body=b'{"mind_map": {}}')
+
+        response = FakeBlock().handler(request)
+
+        self.assertEqual(1, self.backend.get_histogram(metrics.HANDLER_DURATION, handler="handler")["count"])
+        self.assertEqual([16], self.backend.get_histogram(metrics.HANDLER_REQUEST_BYTES, handler="handler")["values"])
+        self.assertEqual(
+            [response.content_length],
+            self.backend.get_histogram(metrics.HANDLER_RESPONSE_BYTES, handler="handler")["values"],
+        )
+        self.assertEqual(
+            [1],
+            self.backend.get_histogram(metrics.HANDLER_QUERIES, handler="handler", source="submissions")["values"],
+        )
+        self.assertEqual(
+            [0],
+            self.backend.get_histogram(metrics.HANDLER_QUERIES, handler="handler", source="student_module")["values"],
+        )
+        self.assertEqual([2], self.backend.get_histogram(metrics.MIND_MAP_NODES, handler="handler")["values"])
+        self.assertIsNone(metrics.current_handler.get())
+
+    def test_instrument_view(self):
+        """
+        Check the size of the fragment of a view is observed, without request size.
+        """
+        FakeBlock().view({"context": True})
+
+        self.assertEqual([19], self.backend.get_histogram(metrics.HANDLER_RESPONSE_BYTES, handler="view")["values"])
+        self.assertIsNone(self.backend.get_histogram(metrics.HANDLER_REQUEST_BYTES, handler="view"))
+
+    def test_instrument_failing_handler(self):
+        """
+        Check the latency of a failing handler is still observed.
+        """
+        with self.assertRaises(ValueError):
+            FakeBlock().failing(Request.blank("/"))
+
+        self.assertEqual(1, self.backend.get_histogram(metrics.HANDLER_DURATION, handler="failing")["count"])
+        self.assertIsNone(self.backend.get_histogram(metrics.HANDLER_RESPONSE_BYTES, handler="failing"))
+
+    def test_instrument_block_handler(self):
+        """
+        Check the handlers of the block are instrumented on top of the XBlock decorators.
+        """
+        xblock = MindMapXBlock(runtime=Mock(), field_data=Mock(), scope_ids=Mock())
+        xblock.get_current_user = Mock()
+        xblock.get_current_user.return_value.opt_attrs = {"edx-platform.user_is_staff": True}
+        mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Root"}]}
+        body = json.dumps({"mind_map": mind_map, "display_name": "Mind Map", "points": 10, "weight": 1}).encode()
+
+        response = xblock.studio_submit(Mock(body=body, method="POST"))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [len(body)], self.backend.get_histogram(metrics.HANDLER_REQUEST_BYTES, handler="studio_submit")["values"],
+        )
+        self.assertEqual([1], self.backend.get_histogram(metrics.MIND_MAP_NODES, handler="studio_submit")["values"])
+
+    def test_in_memory_buckets(self):
+        """
+        Check the buckets of the in-memory histograms are cumulative.
+        """
+        self.backend.observe(metrics.MIND_MAP_NODES, 3, handler="test")
+        self.backend.observe(metrics.MIND_MAP_NODES, 10, handler="test")
+        self.backend.observe(metrics.MIND_MAP_NODES, 20000, handler="test")
+
+        histogram = self.backend.get_histogram(metrics.MIND_MAP_NODES, handler="test")
+
+        self.assertEqual(3, histogram["count"])
+        self.assertEqual(20013, histogram["sum"])
+        self.assertEqual(0, histogram["buckets"][1])
+        self.assertEqual(1, histogram["buckets"][5])
+        self.assertEqual(2, histogram["buckets"][10])
+        self.assertEqual(2, histogram["buckets"][10000])
+        self.assertEqual(3, histogram["buckets"][float("inf")])
+
+    def test_count_nodes(self):
+        """
+        Check the nodes of both mind map formats are counted.
+        """
+        self.assertEqual(2, metrics.count_nodes({"format": "node_array", "data": [{}, {}]}))
+        self.assertEqual(3, metrics.count_nodes({"data": {"children": [{"children": [{}]}, "broken"]}}))
+        self.assertEqual(0, metrics.count_nodes(None))
+
+
+class TestMetricsBackends(TestCase):
+    """
+    Test suite for the metrics backends.
+    """
+
+    @patch("mindmap.metrics.NullMetricsBackend.observe")
+    def test_null_backend_by_default(self, observe_mock: Mock):
+        """
+        Check the handlers are not instrumented with the default backend.
+        """
+        FakeBlock().handler(Request.blank("/"))
+
+        self.assertIsInstance(metrics.get_metrics_backend(), metrics.NullMetricsBackend)
+        observe_mock.assert_not_called()
+
+    @patch("mindmap.metrics.prometheus_client")
+    def test_prometheus_backend(self, prometheus_client_mock: Mock):
+        """
+        Check the observations are recorded in Prometheus histograms.
+        """
+        backend = metrics.PrometheusMetricsBackend()
+
+        backend.observe(metrics.HANDLER_QUERIES, 2, handler="test", source="submissions")
+
+        self.assertEqual(len(metrics.METRICS), prometheus_client_mock.Histogram.call_count)
+        prometheus_client_mock.Histogram.return_value.labels.assert_called_once_with(
+            handler="test", source="submissions",
+        )
+        prometheus_client_mock.Histogram.return_value.labels.return_value.observe.assert_called_once_with(2)
+
+    @patch("mindmap.metrics.prometheus_client", None)
+    def test_prometheus_backend_not_installed(self):
+        """
+        Check the Prometheus backend requires prometheus_client.
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            metrics.PrometheusMetricsBackend()
@@ -2,15 +2,38 @@
 Tests for the LimeSurveyXBlock definition class.
 """
 import datetime
+import hashlib
 import json
+import shutil
+import tempfile
 from http import HTTPStatus
+from importlib.resources import files as importlib_files
+from pathlib import Path
 from unittest import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import ddt
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.test import override_settings
+from web_fragments.fragment import Fragment
+from webob import Request
 from xblock.fields import DateTime
 
+from mindmap.blobs import canonical_json, get_content_hash
+from mindmap.collaboration import SharedMapBusy, SharedMapOutdated
 from mindmap.mindmap import MindMapXBlock
+from mindmap.patching import MindMapPatchError
+from mindmap.resources import (
+    JSMIND_BUNDLE,
+    JSMIND_DRAGGABLE_BUNDLE,
+    JSMIND_STYLE,
+    JSMIND_VENDOR_PATH,
+    clear_resource_caches,
+    get_jsmind_cdn_url,
+)
+from mindmap.storage import encode_mind_map, is_encoded
+from mindmap.validation import MindMapValidationError
 
 
 class MindMapXBlockTestMixin(TestCase):
@@ -26,7 +49,7 @@ class MindMapXBlockTestMixin(TestCase):
             runtime=Mock(), field_data=Mock(), scope_ids=Mock(),
         )
         self.editable_mind_map = True
-        self.mind_map = {"data": [{ "id": "root", "isroot": True, "topic": "Root" }]}
+        self.mind_map = {"format": "node_array", "data": [{ "id": "root", "isroot": True, "topic": "Root" }]}
         self.student = Mock(student_id="test-student-id", full_name="Test Student")
         self.anonymous_user_id = "test-anonymous-user-id"
         self.xblock.get_current_mind_map = Mock()
@@ -44,8 +67,22 @@ class MindMapXBlockTestMixin(TestCase):
         self.xblock.has_score = True
         self.xblock.raw_score = 50
         self.xblock.submission_status = "Not attempted"
+        self.xblock.mindmap_student_version = 0
+        self.xblock.mindmap_student_hash = ""
+        self.xblock.mindmap_student_body = {}
+        self.xblock.shared_group = ""
         self.xblock.course_id = "test-course-id"
 
+    @staticmethod
+    def get_jsmind_urls(with_draggable=False) -> dict:
+        """
+        Return the URLs of the jsMind bundles of the pinned release, as they are not vendored in the tests.
+        """
+        jsmind_urls = {"jsmind": get_jsmind_cdn_url(JSMIND_BUNDLE)}
+        if with_draggable:
+            jsmind_urls["draggable"] = get_jsmind_cdn_url(JSMIND_DRAGGABLE_BUNDLE)
+        return jsmind_urls
+
 
 class TestMindMapXBlock(MindMapXBlockTestMixin):
     """
@@ -87,12 +124,14 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
         expected_js_context = {
             "author": self.student.full_name,
             "mind_map": self.mind_map,
+            "version": 0,
             "editable": self.editable_mind_map,
             "xblock_id": self.xblock.scope_ids.usage_id.block_id,
             "max_raw_score": self.xblock.points,
             "weight": self.xblock.weight,
             "weighted_score": self.xblock.get_weighted_score(),
             "raw_score": self.xblock.raw_score,
+            "jsmind_urls": self.get_jsmind_urls(with_draggable=self.editable_mind_map),
         }
 
         self.xblock.student_view()
@@ -136,12 +175,14 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
         expected_js_context = {
             "author": self.student.full_name,
             "mind_map": None,
+            "version": 0,
             "editable": self.editable_mind_map,
             "xblock_id": self.xblock.scope_ids.usage_id.block_id,
             "max_raw_score": self.xblock.points,
             "weight": self.xblock.weight,
             "weighted_score": self.xblock.get_weighted_score(),
             "raw_score": self.xblock.raw_score,
+            "jsmind_urls": self.get_jsmind_urls(with_draggable=self.editable_mind_map),
         }
 
         self.xblock.student_view()
@@ -153,6 +194,58 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
             'MindMapXBlock', json_args=expected_js_context
         )
 
+    @initialize_js_mock
+    @override_settings(MINDMAP_AUTOSAVE=True, MINDMAP_AUTOSAVE_DELAY=2, MINDMAP_AUTOSAVE_MIN_INTERVAL=10)
+    def test_student_view_autosave(self, initialize_js_mock: Mock):
+        """
+        Check the autosave settings are passed to the browser when the autosave is enabled.
+        """
+        self.xblock.is_static = False
+        self.xblock.get_current_user.return_value.opt_attrs = {}
+        self.xblock.get_current_mind_map.return_value = self.mind_map
+
+        self.xblock.student_view()
+
+        self.assertEqual(
+            {"delay": 2, "min_interval": 10}, initialize_js_mock.call_args.kwargs["json_args"]["autosave"],
+        )
+
+    @initialize_js_mock
+    @override_settings(MINDMAP_AUTOSAVE=True)
+    @patch("mindmap.mindmap.get_shared_map_settings")
+    @patch("mindmap.mindmap.read_shared_map")
+    @patch("mindmap.mindmap.get_user_cohort_id", Mock(return_value=4))
+    @patch("mindmap.mindmap.user_by_anonymous_id", Mock())
+    def test_student_view_shared_mind_map(
+        self, read_shared_map_mock: Mock, get_shared_map_settings_mock: Mock, initialize_js_mock: Mock,
+    ):
+        """
+        Check the mind map shared by the cohort of the learner is passed to the browser.
+
+        Expected result:
+            - The shared mind map and its version replace the mind map of the learner.
+            - The edits are synced with the group instead of autosaved.
+        """
+        self.xblock.is_static = False
+        self.xblock.shared_group = "cohort"
+        self.xblock.mindmap_body = self.mind_map
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.anonymous_user_id": self.anonymous_user_id,
+        }
+        self.xblock.get_current_mind_map.return_value = self.mind_map
+        shared_mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Shared"}]}
+        read_shared_map_mock.return_value = {"version": 3, "mind_map": shared_mind_map}
+        get_shared_map_settings_mock.return_value = {"client_id": "test-client", "poll_interval": 5}
+
+        self.xblock.student_view()
+
+        json_args = initialize_js_mock.call_args.kwargs["json_args"]
+        self.assertEqual(shared_mind_map, json_args["mind_map"])
+        self.assertEqual(3, json_args["version"])
+        self.assertEqual({"client_id": "test-client", "poll_interval": 5}, json_args["shared"])
+        self.assertNotIn("autosave", json_args)
+        read_shared_map_mock.assert_called_once_with(self.xblock.block_id, "cohort-4", self.mind_map)
+
     def test_static_mind_map_in_student_view(self):
         """
         Check student view is rendered correctly with a static mind map.
@@ -241,6 +334,7 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
             "points": 100,
             "weight": 10,
             "has_score": True,
+            "shared_group": "",
         }
         expected_context = {
             "display_name": self.xblock.display_name,
@@ -254,6 +348,8 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
             "points_field": self.xblock.fields["points"],
             "weight": 10,
             "weight_field": self.xblock.fields["weight"],
+            "shared_group": "",
+            "shared_group_field": self.xblock.fields["shared_group"],
             "has_score": True,
             "has_score_field": self.xblock.fields["has_score"],
             "submission_status": self.xblock.submission_status,
@@ -268,41 +364,30 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
             "public/html/mindmap_edit.html", expected_context,
         )
 
-    def test_author_view(self):
+    @patch("mindmap.mindmap.get_mind_map_svg")
+    @initialize_js_mock
+    def test_author_view(self, initialize_js_mock: Mock, get_mind_map_svg_mock: Mock):
         """
         Check author view is rendered correctly.
 
         Expected result:
-            - The studio view is set up for the render.
+            - The mind map is rendered as a static SVG preview, without jsMind.
         """
-        self.xblock.is_static = False
-        self.xblock.get_current_user.return_value.opt_attrs = {
-            "edx-platform.user_is_staff": True,
-        }
-        self.xblock.is_course_staff = True
         self.xblock.get_current_mind_map.return_value = self.mind_map
-        expected_context = {
-            "display_name": self.xblock.display_name,
-            "in_student_view": False,
-            "editable": False,
-            "xblock_id": self.xblock.scope_ids.usage_id.block_id,
-            "is_static": self.xblock.is_static,
-            "is_static_field": self.xblock.fields["is_static"],
-            "can_submit_assignment": True,
-            "raw_score": 50,
-            "max_raw_score": self.xblock.points,
-            "has_score": True,
-            "has_score_field": self.xblock.fields["has_score"],
-            "submission_status": self.xblock.submission_status,
-            "weight": self.xblock.weight,
-            "weighted_score": self.xblock.get_weighted_score(),
-        }
+        get_mind_map_svg_mock.return_value = ("<svg></svg>", "test-hash")
 
         self.xblock.author_view()
 
+        get_mind_map_svg_mock.assert_called_once_with(self.mind_map)
         self.xblock.render_template.assert_called_once_with(
-            "public/html/mindmap.html", expected_context,
+            "public/html/mindmap_preview.html",
+            {
+                "display_name": self.xblock.display_name,
+                "xblock_id": self.xblock.scope_ids.usage_id.block_id,
+                "svg": "<svg></svg>",
+            },
         )
+        initialize_js_mock.assert_not_called()
 
     @initialize_js_mock
     def test_student_not_allowed_submission(self, initialize_js_mock: Mock):
@@ -345,12 +430,14 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
         expected_js_context = {
             "author": self.student.full_name,
             "mind_map": self.mind_map,
+            "version": 0,
             "editable": False,
             "xblock_id": block_id,
             "max_raw_score": self.xblock.points,
             "weight": self.xblock.weight,
             "weighted_score": self.xblock.get_weighted_score(),
             "raw_score": self.xblock.raw_score,
+            "jsmind_urls": self.get_jsmind_urls(with_draggable=False),
         }
 
         self.xblock.student_view()
@@ -362,6 +449,238 @@ class TestMindMapXBlock(MindMapXBlockTestMixin):
             'MindMapXBlock', json_args=expected_js_context
         )
 
+
+class TestMindMapXBlockAssets(MindMapXBlockTestMixin):
+    """
+    Test suite for the assets added to the MindMapXBlock fragments.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite.
+        """
+        super().setUp()
+        self.xblock.resource_string.side_effect = lambda path: f"content of {path}"
+        self.xblock.runtime.local_resource_url.side_effect = lambda _block, path: f"/resource/{path}"
+
+    def test_assets_inlined_by_default(self):
+        """
+        Check the assets of the fragment when the assets are not served as URLs.
+
+        Expected result:
+            - The JS and CSS are inlined in the fragment.
+        """
+        frag = self.xblock.load_fragment("mindmap", {})
+
+        self.assertIn("content of public/css/mindmap.css", [resource.data for resource in frag.resources])
+        self.assertFalse([resource for resource in frag.resources if "?v=" in resource.data])
+
+    @override_settings(MINDMAP_JSMIND_CDN_FALLBACK=False)
+    def test_jsmind_without_cdn_fallback(self):
+        """
+        Check the views fail when jsMind is not vendored and the CDN fallback is disabled.
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            self.xblock.add_jsmind_resources(Fragment(), {})
+
+    @override_settings(MINDMAP_SERVE_ASSETS_AS_URLS=True, MINDMAP_JSMIND_CDN_FALLBACK=False)
+    @patch("mindmap.mindmap.get_resource_hash", return_value="0123456789ab")
+    def test_assets_served_as_urls(self, _):
+        """
+        Check the assets of the fragment when the assets are served as URLs.
+
+        Expected result:
+            - The JS and CSS are linked with fingerprinted URLs.
+        """
+        frag = self.xblock.load_fragment("mindmap", {})
+
+        self.assertEqual(
+            {
+                ("text/css", "/resource/public/css/mindmap.css?v=0123456789ab"),
+                ("text/css", "/resource/public/css/submissions.css?v=0123456789ab"),
+                ("application/javascript", "/resource/public/js/src/mindmap.js?v=0123456789ab"),
+            },
+            {
+                (resource.mimetype, resource.data)
+                for resource in frag.resources
+                if resource.kind == "url" and "?v=" in resource.data
+            },
+        )
+        self.xblock.resource_string.assert_not_called()
+
+    def test_jsmind_from_cdn(self):
+        """
+        Check the jsMind resources when jsMind is not vendored and the CDN fallback is enabled.
+
+        Expected result:
+            - The bundles of the pinned release are preloaded from the CDN and passed to the loader.
+            - The shared loader is added to the fragment.
+        """
+        frag = Fragment()
+        js_context = {}
+
+        self.xblock.add_jsmind_resources(frag, js_context, with_draggable=True)
+
+        self.assertEqual(self.get_jsmind_urls(with_draggable=True), js_context["jsmind_urls"])
+        self.assertIn(
+            f'<link rel="preload" href="{js_context["jsmind_urls"]["draggable"]}" as="script">',
+            [resource.data for resource in frag.resources if resource.mimetype == "text/html"],
+        )
+        self.assertIn(("url", "https://unpkg.com/jsmind@0.7.1/style/jsmind.css"), [
+            (resource.kind, resource.data) for resource in frag.resources if resource.mimetype == "text/css"
+        ])
+        self.assertIn("content of public/js/src/jsmind_loader.js", [resource.data for resource in frag.resources])
+
+    @override_settings(MINDMAP_SERVE_ASSETS_AS_URLS=True, MINDMAP_JSMIND_CDN_FALLBACK=False)
+    def test_jsmind_vendored_files(self):
+        """
+        Check the jsMind files vendored in the package are served without the CDN fallback.
+
+        Expected result:
+            - The vendored files are linked with URLs fingerprinted with their content.
+        """
+        loader_path = "public/js/src/jsmind_loader.js"
+        with tempfile.TemporaryDirectory() as package_dir:
+            Path(package_dir, loader_path).parent.mkdir(parents=True)
+            shutil.copyfile(str(importlib_files("mindmap").joinpath(loader_path)), Path(package_dir, loader_path))
+            hashes = {}
+            for file_name in (JSMIND_BUNDLE, JSMIND_DRAGGABLE_BUNDLE, JSMIND_STYLE):
+                path = Path(package_dir, JSMIND_VENDOR_PATH.format(file_name=file_name))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(f"/* jsMind {file_name} */", encoding="utf-8")
+                hashes[file_name] = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+            clear_resource_caches()
+            self.addCleanup(clear_resource_caches)
+            frag = Fragment()
+            js_context = {}
+
+            with patch("mindmap.resources.importlib_files", return_value=Path(package_dir)):
+                self.xblock.add_jsmind_resources(frag, js_context, with_draggable=True)
+
+        self.assertEqual(
+            {
+                "jsmind": f"/resource/public/vendor/jsmind/es6/jsmind.js?v={hashes[JSMIND_BUNDLE]}",
+                "draggable": (
+                    "/resource/public/vendor/jsmind/es6/jsmind.draggable-node.js"
+                    f"?v={hashes[JSMIND_DRAGGABLE_BUNDLE]}"
+                ),
+            },
+            js_context["jsmind_urls"],
+        )
+        self.assertIn(
+            ("text/css", f"/resource/public/vendor/jsmind/style/jsmind.css?v={hashes[JSMIND_STYLE]}"),
+            [(resource.mimetype, resource.data) for resource in frag.resources if resource.kind == "url"],
+        )
+        self.assertFalse([resource for resource in frag.resources if "unpkg.com" in resource.data])
+
+    @override_settings(MINDMAP_SERVE_ASSETS_AS_URLS=True)
+    @patch("mindmap.mindmap.get_resource_hash", return_value="0123456789ab")
+    @patch("mindmap.mindmap.get_jsmind_path", side_effect=lambda file_name: f"public/vendor/jsmind/{file_name}")
+    def test_jsmind_vendored(self, *_):
+        """
+        Check the jsMind resources when jsMind is vendored.
+
+        Expected result:
+            - The bundles are served by the block with fingerprinted URLs, and preloaded.
+        """
+        frag = Fragment()
+        js_context = {}
+
+        self.xblock.add_jsmind_resources(frag, js_context)
+
+        self.assertEqual(
+            {"jsmind": "/resource/public/vendor/jsmind/es6/jsmind.js?v=0123456789ab"}, js_context["jsmind_urls"],
+        )
+        self.assertEqual(
+            ['<link rel="preload" href="/resource/public/vendor/jsmind/es6/jsmind.js?v=0123456789ab" as="script">'],
+            [resource.data for resource in frag.resources if resource.mimetype == "text/html"],
+        )
+        self.assertIn("/resource/public/vendor/jsmind/style/jsmind.css?v=0123456789ab", [
+            resource.data for resource in frag.resources
+        ])
+
+
+class TestMindMapXBlockRequestCache(MindMapXBlockTestMixin):
+    """
+    Test suite for the memoization of backend lookups during a request.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with the real lookup methods of the block.
+        """
+        super().setUp()
+        for method in ("get_weighted_score", "get_current_user", "submit_allowed", "past_due"):
+            delattr(self.xblock, method)
+        self.xblock.runtime.service.return_value.get_current_user.return_value = Mock(
+            full_name="Test Student",
+            opt_attrs={
+                "edx-platform.user_role": "student",
+                "edx-platform.anonymous_user_id": self.anonymous_user_id,
+            },
+        )
+        self.xblock.is_static = False
+        self.xblock.raw_score = None
+        self.xblock.get_current_mind_map.return_value = self.mind_map
+
+    @patch("mindmap.mindmap.Fragment.initialize_js")
+    @patch("mindmap.mindmap.get_extended_due_date", return_value=None)
+    @patch("submissions.api.get_score", return_value={"points_earned": 5})
+    def test_student_view_lookups(self, get_score_mock: Mock, get_extended_due_date_mock: Mock, _):
+        """
+        Check the backend lookups made while rendering the student view.
+
+        Expected result:
+            - The score, user and due date are resolved once per render.
+        """
+        self.xblock.student_view()
+
+        get_score_mock.assert_called_once()
+        get_extended_due_date_mock.assert_called_once_with(self.xblock)
+        self.xblock.runtime.service.return_value.get_current_user.assert_called_once()
+
+    @patch("submissions.api.get_submissions", return_value=[{"uuid": "test-submission-id"}])
+    def test_get_submission_lookups(self, get_submissions_mock: Mock):
+        """
+        Check the submission lookups made during a request.
+
+        Expected result:
+            - The submission of each student is fetched once.
+        """
+        self.xblock.get_submission()
+        self.xblock.get_submission()
+        self.xblock.get_submission("other-student-id")
+
+        self.assertEqual(2, get_submissions_mock.call_count)
+
+    @patch("mindmap.mindmap.MindMapXBlock.get_student_module")
+    @patch("submissions.api.set_score")
+    @patch("submissions.api.get_score")
+    def test_enter_grade_invalidates_cache(self, get_score_mock: Mock, *_):
+        """
+        Check that the memoized score is dropped after entering a grade.
+
+        Expected result:
+            - The score is fetched again after entering a grade.
+        """
+        self.xblock.runtime.service.return_value.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        self.xblock.get_student_module.return_value = Mock(state="{}")
+        get_score_mock.return_value = None
+        request = Mock(
+            body=json.dumps({"grade": 50, "submission_id": "test-submission-id"}).encode("utf-8"),
+            method="POST",
+        )
+
+        self.assertIsNone(self.xblock.get_weighted_score())
+        get_score_mock.return_value = {"points_earned": 5}
+        response = self.xblock.enter_grade(request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual(5, self.xblock.get_weighted_score())
+
+
 @ddt.ddt
 class TestMindMapXBlockHandlers(MindMapXBlockTestMixin):
     """
@@ -419,7 +738,7 @@ class TestMindMapXBlockHandlers(MindMapXBlockTestMixin):
         """
         data = {
             "display_name": "Test Mind Map",
-            "mindmap_body": self.mind_map,
+            "mind_map": self.mind_map,
             "is_static": True,
             "has_score": True,
         }
@@ -442,176 +761,1229 @@ class TestMindMapXBlockHandlers(MindMapXBlockTestMixin):
 
         self.assertEqual(HTTPStatus.OK, response.status_code)
         self.assertEqual(self.data["mind_map"], self.xblock.mindmap_student_body)
+        self.assertEqual({"success": True, "saved": True, "version": 1}, json.loads(response.body))
+        self.assertEqual(get_content_hash(canonical_json(self.mind_map)), self.xblock.mindmap_student_hash)
 
-    @patch("submissions.api.create_submission")
-    def test_submit_assignment(self, create_submission_mock: Mock):
+    @ddt.data(True, False)
+    def test_save_assignment_unchanged(self, hash_stored: bool):
         """
-        Check submit assignment handler.
+        Check save assignment JSON handler with the mind map already saved.
 
         Expected result:
-            - The student view is rendered with the appropriate values.
+            - The mind map is not saved again and its version is kept.
+            - The hash of a mind map saved before the hashes were stored is computed.
         """
-        expected_student_item_dict = {
-            "item_id": self.xblock.block_id,
-            "item_type": "mindmap",
-            "student_id": self.xblock.get_current_user().opt_attrs.get(),
-            "course_id": self.xblock.block_course_id,
-        }
-        expected_answer = {
-            "mindmap_student_body": json.dumps(self.data["mind_map"]),
-        }
+        self.xblock.mindmap_student_body = {"format": "node_array", "data": self.mind_map["data"]}
+        if hash_stored:
+            self.xblock.mindmap_student_hash = get_content_hash(canonical_json(self.mind_map))
+        self.xblock.set_student_mind_map = Mock()
+        self.request.body = json.dumps({"mind_map": self.mind_map, "autosave": True}).encode("utf-8")
 
-        response = self.xblock.submit_assignment(self.request)
+        response = self.xblock.save_assignment(self.request)
 
-        self.assertEqual(HTTPStatus.OK, response.status_code)
-        create_submission_mock.assert_called_once_with(
-            expected_student_item_dict,
-            expected_answer,
-        )
+        self.assertEqual({"success": True, "saved": False, "version": 0}, json.loads(response.body))
+        self.xblock.set_student_mind_map.assert_not_called()
 
-    @patch("mindmap.mindmap.MindMapXBlock.get_student_module")
-    @patch("submissions.api.set_score")
-    def test_enter_grade(self, set_score_mock: Mock, get_student_module_mock: Mock):
+    @override_settings(MINDMAP_AUTOSAVE=True, MINDMAP_AUTOSAVE_MIN_INTERVAL=15)
+    def test_save_assignment_autosave_throttled(self):
         """
-        Check enter grade handler.
+        Check the autosaves of a learner are limited, and not the explicit saves.
 
         Expected result:
-            - The student view is rendered with the appropriate values.
+            - The first autosave is saved, the next one is rejected with 429.
+            - An explicit save is saved.
         """
-        self.request.body = json.dumps(
-            {
-                "grade": self.raw_grade,
-                "submission_id": self.submission_id
-            }
-        ).encode("utf-8")
-        self.xblock.get_current_user.return_value.opt_attrs = {
-            "edx-platform.user_is_staff": True,
-        }
-        get_student_module_mock.return_value = Mock(state='{"test-state": "mindmap"}')
+        cache.clear()
+        self.addCleanup(cache.clear)
+        mind_maps = [
+            {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": topic}]}
+            for topic in ("First", "Second", "Third")
+        ]
 
-        response = self.xblock.enter_grade(self.request)
+        responses = [
+            self.xblock.save_assignment(Mock(method="POST", body=json.dumps({
+                "mind_map": mind_map, "autosave": autosave,
+            }).encode("utf-8")))
+            for mind_map, autosave in zip(mind_maps, (True, True, False))
+        ]
 
-        self.assertEqual(HTTPStatus.OK, response.status_code)
-        set_score_mock.assert_called_once_with(
-            self.submission_id,
-            self.weighted_grade,
-            self.xblock.weight,
+        self.assertEqual(
+            [HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.OK],
+            [response.status_code for response in responses],
         )
+        self.assertEqual("Third", self.xblock.mindmap_student_body["data"][0]["topic"])
+        self.assertEqual(2, self.xblock.mindmap_student_version)
 
-    @patch("mindmap.mindmap.MindMapXBlock.get_student_module")
-    @patch("submissions.api.reset_score")
-    def test_remove_grade(self, reset_score_mock: Mock, get_student_module_mock: Mock):
+    @ddt.data("studio_submit", "save_assignment", "submit_assignment")
+    @patch("mindmap.mindmap.make_answer", return_value={"mindmap_blob": "test-hash"})
+    @patch("submissions.api.create_submission")
+    def test_mind_map_canonicalized(self, handler_name: str, _create_submission_mock: Mock, make_answer_mock: Mock):
         """
-        Check remove grade handler.
+        Check the handlers save and submit the canonical form of the mind map.
 
         Expected result:
-            - The student view is rendered with the appropriate values.
+            - The presentation attributes are left out.
         """
-        self.request.body = json.dumps({"student_id": self.student_id}).encode("utf-8")
-        self.xblock.get_current_user.return_value.opt_attrs = {
-            "edx-platform.user_is_staff": True,
+        self.data["mind_map"] = {
+            "meta": {"author": "Test Student", "name": "jsMind"},
+            "format": "node_array",
+            "data": [{"id": "root", "isroot": True, "topic": " Root ", "expanded": True}],
+        }
+        self.request.body = json.dumps(self.data).encode("utf-8")
+        expected_mind_map = {
+            "data": [{"id": "root", "isroot": True, "topic": "Root"}],
+            "format": "node_array",
+            "meta": {"name": "jsMind"},
         }
-        get_student_module_mock.return_value = Mock(state='{"test-state": "mindmap"}')
 
-        response = self.xblock.remove_grade(self.request)
+        response = getattr(self.xblock, handler_name)(self.request)
 
         self.assertEqual(HTTPStatus.OK, response.status_code)
-        reset_score_mock.assert_called_once_with(
-            self.student_id,
-            self.xblock.block_course_id,
-            self.xblock.block_id,
-        )
+        if handler_name == "studio_submit":
+            self.assertEqual(expected_mind_map, self.xblock.mindmap_body)
+        else:
+            self.assertEqual(expected_mind_map, self.xblock.mindmap_student_body)
+        if handler_name == "submit_assignment":
+            make_answer_mock.assert_called_once_with(expected_mind_map)
+
+    def test_save_assignment_autosave_disabled(self):
+        """
+        Check save assignment JSON handler rejects the autosaves when they are disabled.
+        """
+        self.request.body = json.dumps({"mind_map": self.mind_map, "autosave": True}).encode("utf-8")
 
-    @patch("mindmap.mindmap.MindMapXBlock.get_or_create_student_module")
-    @patch("mindmap.mindmap.user_by_anonymous_id")
-    @patch("submissions.models.StudentItem")
-    def test_get_instructor_grading_data(
-        self,
-        student_item_mock: Mock,
-        user_by_anonymous_id_mock: Mock,
-        get_or_create_student_module_mock: Mock,
-    ):
+        response = self.xblock.save_assignment(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual({}, self.xblock.mindmap_student_body)
+
+    @ddt.data("studio_submit", "save_assignment", "submit_assignment")
+    @patch("submissions.api.create_submission")
+    def test_invalid_mind_map(self, handler_name: str, create_submission_mock: Mock):
         """
-        Check get instructor grading data handler.
+        Check the handlers that save a mind map with an invalid one.
 
         Expected result:
-            - The student view is rendered with the appropriate values.
+            - The handler returns 400 with the validation error.
+            - The mind map is not saved.
         """
-        student_item_mock.objects.filter.return_value = [
-            Mock(
-                grade=self.xblock.raw_score,
-                student_id=self.student.student_id,
-            ),
-        ]
-        current_datetime = datetime.datetime.now()
-        module_id = 1
-        self.xblock.get_submission = Mock(return_value={
-            "uuid": "test-submission-id",
-            "answer": {
-                "mindmap_student_body": json.dumps(self.data["mind_map"]),
-            },
-            "created_at": current_datetime,
-        })
-        self.xblock.get_current_user.return_value.opt_attrs = {
-            "edx-platform.user_is_staff": True,
-        }
-        user_by_anonymous_id_mock.return_value = Mock(username=self.student.student_id)
-        self.xblock.submission_status = "Submitted"
-        expected_result = {
-            "assignments": [
-                {
-                    "module_id": module_id,
-                    "student_id": self.student.student_id,
-                    "submission_id": "test-submission-id",
-                    "answer_body": {
-                        "mindmap_student_body": json.dumps(self.data["mind_map"])
-                    },
-                    "username": self.student.student_id,
-                    "timestamp": current_datetime.strftime(DateTime.DATETIME_FORMAT),
-                    "raw_score": self.xblock.raw_score,
-                    "max_raw_score": self.xblock.points,
-                    "weight": self.xblock.weight,
-                    "weighted_score": self.xblock.get_weighted_score(),
-                    "submission_status": self.xblock.submission_status,
-
-                },
-            ],
-            "display_name": self.xblock.display_name,
-            "max_raw_score": self.xblock.points,
-            "weight": self.xblock.weight,
-        }
-        get_or_create_student_module_mock.return_value = Mock(
-            state='{"submission_status": "Submitted"}', id=module_id,
-        )
-
-        response = self.xblock.get_instructor_grading_data(self.request)
-
-        self.assertEqual(HTTPStatus.OK, response.status_code)
-        self.assertDictEqual(expected_result, response.json)  # pylint: disable=no-member
+        self.xblock.mindmap_body = {}
+        self.xblock.mindmap_student_body = {}
+        self.data["mind_map"] = {"format": "node_array", "data": [{"id": "root", "topic": "Root"}]}
+        self.request.body = json.dumps(self.data).encode("utf-8")
 
+        response = getattr(self.xblock, handler_name)(self.request)
 
-class TestMindMapUtilities(TestCase):
-    """
-    Test suite for the MindMapXBlock utilities methods.
-    """
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            {"error": {"code": "missing_root", "message": "The mind map must have a root node"}},
+            json.loads(response.body),
+        )
+        self.assertEqual(({}, {}), (self.xblock.mindmap_body, self.xblock.mindmap_student_body))
+        create_submission_mock.assert_not_called()
 
-    def setUp(self) -> None:
+    @override_settings(MINDMAP_MAX_TOPIC_LENGTH=3)
+    def test_save_assignment_over_limit(self):
         """
-        Set up the test suite.
+        Check save assignment JSON handler with a mind map over the configured limits.
+
+        Expected result:
+            - The handler returns 400 with the exceeded limit.
         """
-        self.xblock = MindMapXBlock(
-            runtime=Mock(), field_data=Mock(), scope_ids=Mock()
-        )
+        response = self.xblock.save_assignment(self.request)
 
-    def test_get_current_mind_map_file_does_not_exist(self):
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual("topic_too_long", json.loads(response.body)["error"]["code"])
+
+    @override_settings(MINDMAP_MAX_BYTES=300)
+    def test_patch_assignment_too_large(self):
         """
-        Check getting the current mind map when the file does not exist.
+        Check patch assignment JSON handler when the patched mind map exceeds the size limit.
 
         Expected result:
-            - None is returned.
+            - The handler returns 400 and the mind map is not saved.
         """
+        self.xblock.get_current_mind_map.return_value = self.mind_map
         self.xblock.mindmap_student_body = {}
-        self.xblock.is_static = False
+        self.request.body = json.dumps({
+            "version": 0,
+            "operations": [{"op": "update", "id": "root", "topic": "Root" * 100}],
+        }).encode("utf-8")
+
+        response = self.xblock.patch_assignment(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual("too_large", json.loads(response.body)["error"]["code"])
+        self.assertEqual({}, self.xblock.mindmap_student_body)
+
+    @override_settings(MINDMAP_MAX_BYTES=10)
+    def test_save_assignment_request_too_large(self):
+        """
+        Check save assignment JSON handler with a request body over the size limit.
+
+        Expected result:
+            - The handler returns 400 and the mind map is not saved.
+        """
+        self.xblock.mindmap_student_body = {}
+
+        response = self.xblock.save_assignment(self.request)
+
+        self.assertTrue(self.xblock.save_assignment._is_xblock_handler)  # pylint: disable=protected-access
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual("too_large", json.loads(response.body)["error"]["code"])
+        self.assertEqual({}, self.xblock.mindmap_student_body)
+
+    @override_settings(MINDMAP_MAX_BYTES=10)
+    def test_patch_assignment_request_too_large(self):
+        """
+        Check patch assignment JSON handler with a request body over the size limit.
+
+        Expected result:
+            - The handler returns 400 before applying the operations.
+        """
+        self.request.body = json.dumps({"version": 0, "operations": []}).encode("utf-8")
+
+        response = self.xblock.patch_assignment(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual("too_large", json.loads(response.body)["error"]["code"])
+        self.xblock.get_current_mind_map.assert_not_called()
+
+    @override_settings(MINDMAP_COMPACT_STORAGE=True)
+    @patch("mindmap.mindmap.make_answer", return_value={"mindmap_blob": "test-hash"})
+    @patch("submissions.api.create_submission")
+    def test_submit_assignment_compact_storage(self, create_submission_mock: Mock, make_answer_mock: Mock):
+        """
+        Check submitting an assignment with the compact encoding enabled.
+
+        Expected result:
+            - The mind map is saved encoded and submitted as sent.
+        """
+        response = self.xblock.submit_assignment(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertTrue(is_encoded(self.xblock.mindmap_student_body))
+        make_answer_mock.assert_called_once_with(self.data["mind_map"])
+        self.assertEqual({"mindmap_blob": "test-hash"}, create_submission_mock.call_args.args[1])
+
+    def test_patch_assignment(self):
+        """
+        Check patch assignment JSON handler.
+
+        Expected result:
+            - The operations are applied to the current mind map.
+            - The version of the mind map is increased.
+        """
+        self.xblock.get_current_mind_map.return_value = {"format": "node_array", **self.mind_map}
+        self.request.body = json.dumps({
+            "version": 0,
+            "operations": [{"op": "update", "id": "root", "topic": "New root"}],
+        }).encode("utf-8")
+
+        response = self.xblock.patch_assignment(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual({"success": True, "saved": True, "version": 1}, json.loads(response.body))
+        self.assertEqual("New root", self.xblock.mindmap_student_body["data"][0]["topic"])
+
+    def test_patch_assignment_unchanged(self):
+        """
+        Check patch assignment JSON handler when the operations do not change the mind map.
+
+        Expected result:
+            - The mind map is not saved again and its version is kept.
+        """
+        self.xblock.get_current_mind_map.return_value = {"format": "node_array", **self.mind_map}
+        self.xblock.mindmap_student_hash = get_content_hash(canonical_json(self.mind_map))
+        self.request.body = json.dumps({"version": 0, "operations": []}).encode("utf-8")
+
+        response = self.xblock.patch_assignment(self.request)
+
+        self.assertEqual({"success": True, "saved": False, "version": 0}, json.loads(response.body))
+        self.assertEqual({}, self.xblock.mindmap_student_body)
+
+    @ddt.data(
+        ({"version": 3, "operations": []}, HTTPStatus.CONFLICT),
+        ({"version": 0, "operations": [{"op": "delete", "id": "root"}]}, HTTPStatus.BAD_REQUEST),
+        (
+            {"version": 0, "operations": [{"op": "add", "node": {"id": "a", "parentid": "root"}}]},
+            HTTPStatus.BAD_REQUEST,
+        ),
+        (
+            {"version": 0, "operations": [{"op": "update", "id": "root", "topic": "Root" * 1000}]},
+            HTTPStatus.BAD_REQUEST,
+        ),
+        (
+            {"version": 0, "operations": [{"op": "add", "node": {"id": ["a"], "parentid": "root"}}]},
+            HTTPStatus.BAD_REQUEST,
+        ),
+        (
+            {"version": 0, "operations": [{"op": "update", "id": "root", "topic": "Root"}] * 1001},
+            HTTPStatus.BAD_REQUEST,
+        ),
+    )
+    @ddt.unpack
+    def test_patch_assignment_rejected(self, data: dict, status_code: int):
+        """
+        Check patch assignment JSON handler with an outdated version or invalid operations.
+
+        Expected result:
+            - The handler returns an error and the mind map is not saved.
+        """
+        self.xblock.get_current_mind_map.return_value = {"format": "node_array", **self.mind_map}
+        self.xblock.mindmap_student_body = {}
+        self.request.body = json.dumps(data).encode("utf-8")
+
+        response = self.xblock.patch_assignment(self.request)
+
+        self.assertEqual(status_code, response.status_code)
+        self.assertEqual({}, self.xblock.mindmap_student_body)
+        self.assertEqual(0, self.xblock.mindmap_student_version)
+
+    @override_settings(MINDMAP_REVISION_HISTORY=True)
+    @patch("mindmap.mindmap.record_revision")
+    def test_save_assignment_records_revision(self, record_revision_mock: Mock):
+        """
+        Check the saved mind maps are recorded in the revision history of the learner.
+
+        Expected result:
+            - The mind map is recorded with the one saved before, and not recorded again when unchanged.
+        """
+        previous_mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Old"}]}
+        self.xblock.mindmap_student_body = previous_mind_map
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.anonymous_user_id": self.anonymous_user_id,
+        }
+
+        self.xblock.save_assignment(self.request)
+        self.xblock.save_assignment(self.request)
+
+        record_revision_mock.assert_called_once_with(
+            self.xblock.block_id,
+            self.anonymous_user_id,
+            self.mind_map,
+            "save",
+            previous_mind_map=previous_mind_map,
+        )
+
+    @patch("mindmap.mindmap.record_revision")
+    def test_save_assignment_revision_history_disabled(self, record_revision_mock: Mock):
+        """
+        Check no revision is recorded when the revision history is disabled.
+        """
+        self.xblock.save_assignment(self.request)
+
+        record_revision_mock.assert_not_called()
+
+    @ddt.data(
+        ({}, "test-anonymous-user-id", False),
+        ({"before": 5}, "test-anonymous-user-id", False),
+        ({"student_id": "other-student-id"}, "other-student-id", True),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.list_revisions")
+    def test_get_revisions(self, data: dict, student_id: str, is_staff: bool, list_revisions_mock: Mock):
+        """
+        Check get revisions handler.
+
+        Expected result:
+            - The revisions of the user, or of a learner for the course team, are listed.
+        """
+        created = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        list_revisions_mock.return_value = [{"number": 1, "kind": "snapshot", "created": created}]
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.anonymous_user_id": self.anonymous_user_id,
+            "edx-platform.user_is_staff": is_staff,
+        }
+        self.request.body = json.dumps(data).encode("utf-8")
+
+        response = self.xblock.get_revisions(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual({
+            "revisions": [{"number": 1, "kind": "snapshot", "created": created.isoformat()}],
+            "has_more": False,
+        }, json.loads(response.body))
+        list_revisions_mock.assert_called_once_with(self.xblock.block_id, student_id, before=data.get("before"))
+
+    @patch("mindmap.mindmap.list_revisions")
+    def test_get_revisions_rejected(self, list_revisions_mock: Mock):
+        """
+        Check get revisions handler with another learner for a learner, or an invalid page.
+
+        Expected result:
+            - A learner cannot list the revisions of another learner.
+            - The handler returns 400 for an invalid page.
+        """
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.anonymous_user_id": self.anonymous_user_id,
+        }
+        self.request.body = json.dumps({"student_id": "other-student-id"}).encode("utf-8")
+
+        with self.assertRaises(PermissionDenied):
+            self.xblock.get_revisions(self.request)
+
+        self.request.body = json.dumps({"before": "5"}).encode("utf-8")
+
+        response = self.xblock.get_revisions(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        list_revisions_mock.assert_not_called()
+
+    @ddt.data(
+        ({"number": 2}, None, HTTPStatus.NOT_FOUND),
+        ({"number": "2"}, None, HTTPStatus.BAD_REQUEST),
+        ({"number": 2}, {"format": "node_array", "data": []}, HTTPStatus.OK),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.get_revision_mind_map")
+    def test_get_revision(
+        self, data: dict, mind_map: dict, status_code: int, get_revision_mind_map_mock: Mock,
+    ):
+        """
+        Check get revision handler.
+
+        Expected result:
+            - The mind map of the revision is returned, 404 if it does not exist.
+        """
+        get_revision_mind_map_mock.return_value = mind_map
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.anonymous_user_id": self.anonymous_user_id,
+        }
+        self.request.body = json.dumps(data).encode("utf-8")
+
+        response = self.xblock.get_revision(self.request)
+
+        self.assertEqual(status_code, response.status_code)
+        if status_code == HTTPStatus.OK:
+            self.assertEqual({"number": 2, "mind_map": mind_map}, json.loads(response.body))
+            get_revision_mind_map_mock.assert_called_once_with(self.xblock.block_id, self.anonymous_user_id, 2)
+
+    def test_studio_submit_shared_group(self):
+        """
+        Check studio submit handler with the group sharing the mind map.
+
+        Expected result:
+            - The mind map is shared with the cohorts, an unknown group is rejected.
+        """
+        self.request.body = json.dumps({**self.data, "shared_group": "cohort"}).encode("utf-8")
+
+        self.xblock.studio_submit(self.request)
+
+        self.assertEqual("cohort", self.xblock.shared_group)
+
+        self.request.body = json.dumps({**self.data, "shared_group": "course"}).encode("utf-8")
+
+        response = self.xblock.studio_submit(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        self.assertEqual("cohort", self.xblock.shared_group)
+
+    @ddt.data(
+        {"shared_group": "cohort", "group_id": 4, "expected": "cohort-4"},
+        {"shared_group": "team", "group_id": "team-a", "expected": "team-team-a"},
+        {"shared_group": "cohort", "group_id": None, "expected": None},
+        {"shared_group": "", "group_id": 4, "expected": None},
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.get_user_team_id")
+    @patch("mindmap.mindmap.get_user_cohort_id")
+    @patch("mindmap.mindmap.user_by_anonymous_id")
+    def test_get_shared_group_id(
+        self, user_by_anonymous_id_mock: Mock, get_user_cohort_id_mock: Mock, get_user_team_id_mock: Mock,
+        *, shared_group: str, group_id, expected: str,
+    ):
+        """
+        Check the group of the user sharing the mind map is its cohort or its team.
+        """
+        self.xblock.is_static = False
+        self.xblock.shared_group = shared_group
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.anonymous_user_id": self.anonymous_user_id,
+        }
+        get_user_cohort_id_mock.return_value = group_id
+        get_user_team_id_mock.return_value = group_id
+
+        self.assertEqual(expected, self.xblock.get_shared_group_id())
+        if shared_group:
+            user_by_anonymous_id_mock.assert_called_once_with(self.anonymous_user_id)
+
+    @ddt.data(
+        ({}, None, HTTPStatus.OK),
+        ({"since": 2}, 2, HTTPStatus.OK),
+        ({"since": "2"}, None, HTTPStatus.BAD_REQUEST),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.read_shared_map")
+    def test_get_shared_map(self, data: dict, since: int, status_code: int, read_shared_map_mock: Mock):
+        """
+        Check get shared map handler.
+
+        Expected result:
+            - The batches since the version of the browser, or the whole mind map, are returned.
+        """
+        read_shared_map_mock.return_value = {"version": 3, "batches": []}
+        self.xblock.get_shared_group_id = Mock(return_value="cohort-4")
+        self.xblock.mindmap_body = self.mind_map
+        self.request.body = json.dumps(data).encode("utf-8")
+
+        response = self.xblock.get_shared_map(self.request)
+
+        self.assertEqual(status_code, response.status_code)
+        if status_code == HTTPStatus.OK:
+            self.assertEqual({"version": 3, "batches": []}, json.loads(response.body))
+            read_shared_map_mock.assert_called_once_with(
+                self.xblock.block_id, "cohort-4", self.mind_map, since=since,
+            )
+
+    @ddt.data("get_shared_map", "apply_shared_operations")
+    def test_shared_map_without_group(self, handler_name: str):
+        """
+        Check the shared map handlers return 404 when the user has no group sharing the mind map.
+        """
+        self.xblock.get_shared_group_id = Mock(return_value=None)
+        self.request.body = json.dumps({"version": 0, "operations": []}).encode("utf-8")
+
+        response = getattr(self.xblock, handler_name)(self.request)
+
+        self.assertEqual(HTTPStatus.NOT_FOUND, response.status_code)
+
+    @patch("mindmap.mindmap.broadcast_shared_map_operations")
+    @patch("mindmap.mindmap.apply_shared_map_operations")
+    def test_apply_shared_operations(self, apply_shared_map_operations_mock: Mock, broadcast_mock: Mock):
+        """
+        Check apply shared operations handler.
+
+        Expected result:
+            - The operations are applied to the shared mind map and the batch is broadcast to the group.
+        """
+        operations = [{"op": "update", "id": "root", "topic": "Edited"}]
+        batch = {"version": 4, "client_id": "test-client", "operations": operations, "dropped": 0}
+        apply_shared_map_operations_mock.return_value = batch
+        self.xblock.get_shared_group_id = Mock(return_value="cohort-4")
+        self.xblock.mindmap_body = self.mind_map
+        self.request.body = json.dumps({
+            "version": 3, "operations": operations, "client_id": "test-client",
+        }).encode("utf-8")
+
+        response = self.xblock.apply_shared_operations(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual(batch, json.loads(response.body))
+        apply_shared_map_operations_mock.assert_called_once_with(
+            self.xblock.block_id, "cohort-4", self.mind_map, 3, operations, client_id="test-client",
+        )
+        broadcast_mock.assert_called_once_with(self.xblock.block_id, "cohort-4", batch)
+
+    @ddt.data(
+        {"data": {"version": "3"}, "error": None, "status_code": HTTPStatus.BAD_REQUEST},
+        {"data": {"version": 3}, "error": SharedMapOutdated, "status_code": HTTPStatus.CONFLICT},
+        {"data": {"version": 3}, "error": SharedMapBusy, "status_code": HTTPStatus.SERVICE_UNAVAILABLE},
+        {
+            "data": {"version": 3},
+            "error": MindMapPatchError("Unknown operation"),
+            "status_code": HTTPStatus.BAD_REQUEST,
+        },
+        {
+            "data": {"version": 3},
+            "error": MindMapValidationError("too_many_nodes", "Too many nodes"),
+            "status_code": HTTPStatus.BAD_REQUEST,
+        },
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.broadcast_shared_map_operations")
+    @patch("mindmap.mindmap.apply_shared_map_operations")
+    def test_apply_shared_operations_rejected(
+        self, apply_shared_map_operations_mock: Mock, broadcast_mock: Mock, *, data: dict, error, status_code: int,
+    ):
+        """
+        Check apply shared operations handler with an invalid batch, or a shared mind map which cannot take it.
+
+        Expected result:
+            - The handler returns the error and nothing is broadcast.
+        """
+        apply_shared_map_operations_mock.side_effect = error
+        self.xblock.get_shared_group_id = Mock(return_value="cohort-4")
+        self.xblock.mindmap_body = self.mind_map
+        self.request.body = json.dumps({**data, "operations": []}).encode("utf-8")
+
+        response = self.xblock.apply_shared_operations(self.request)
+
+        self.assertEqual(status_code, response.status_code)
+        broadcast_mock.assert_not_called()
+
+    @patch("mindmap.mindmap.invalidate_grading_summary")
+    @patch("mindmap.mindmap.make_answer", return_value={"mindmap_blob": "test-hash"})
+    @patch("submissions.api.create_submission")
+    def test_submit_assignment(
+        self, create_submission_mock: Mock, make_answer_mock: Mock, invalidate_grading_summary_mock: Mock,
+    ):
+        """
+        Check submit assignment handler.
+
+        Expected result:
+            - The mind map is stored as a blob referenced by the submission.
+            - The grading summary of the block is invalidated.
+        """
+        expected_student_item_dict = {
+            "item_id": self.xblock.block_id,
+            "item_type": "mindmap",
+            "student_id": self.xblock.get_current_user().opt_attrs.get(),
+            "course_id": self.xblock.block_course_id,
+        }
+        response = self.xblock.submit_assignment(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        make_answer_mock.assert_called_once_with(self.data["mind_map"])
+        create_submission_mock.assert_called_once_with(
+            expected_student_item_dict,
+            {"mindmap_blob": "test-hash"},
+        )
+        invalidate_grading_summary_mock.assert_called_once_with(self.xblock.block_id)
+
+    @patch("mindmap.mindmap.invalidate_grading_summary")
+    @patch("mindmap.mindmap.MindMapXBlock.get_student_module")
+    @patch("submissions.api.set_score")
+    def test_enter_grade(
+        self, set_score_mock: Mock, get_student_module_mock: Mock, invalidate_grading_summary_mock: Mock,
+    ):
+        """
+        Check enter grade handler.
+
+        Expected result:
+            - The student view is rendered with the appropriate values.
+            - The grading summary of the block is invalidated.
+        """
+        self.request.body = json.dumps(
+            {
+                "grade": self.raw_grade,
+                "submission_id": self.submission_id
+            }
+        ).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        get_student_module_mock.return_value = Mock(state='{"test-state": "mindmap"}')
+
+        response = self.xblock.enter_grade(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        set_score_mock.assert_called_once_with(
+            self.submission_id,
+            self.weighted_grade,
+            self.xblock.weight,
+        )
+        invalidate_grading_summary_mock.assert_called_once_with(self.xblock.block_id)
+
+    @patch("mindmap.mindmap.enter_grades")
+    def test_enter_grades(self, enter_grades_mock: Mock):
+        """
+        Check bulk enter grades handler.
+
+        Expected result:
+            - The grades are entered and the result of each one is returned.
+        """
+        grades = [{"submission_id": self.submission_id, "module_id": 1, "grade": self.raw_grade}]
+        self.request.body = json.dumps({"grades": grades}).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        enter_grades_mock.return_value = [
+            {"submission_id": self.submission_id, "success": False, "error": "Submission not found"},
+        ]
+
+        response = self.xblock.enter_grades(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual({"success": False, "results": enter_grades_mock.return_value}, json.loads(response.body))
+        enter_grades_mock.assert_called_once_with(self.xblock, grades)
+
+    @ddt.data({}, {"grades": []}, {"grades": {"submission_id": "id"}}, {"grades": [{}] * 501})
+    @patch("mindmap.mindmap.enter_grades")
+    def test_enter_grades_bad_request(self, data: dict, enter_grades_mock: Mock):
+        """
+        Check bulk enter grades handler without grades or with too many grades.
+
+        Expected result:
+            - The handler returns 400 and no grade is entered.
+        """
+        self.request.body = json.dumps(data).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.enter_grades(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        enter_grades_mock.assert_not_called()
+
+    @patch("mindmap.mindmap.start_reset_grades_job")
+    def test_reset_grades(self, start_reset_grades_job_mock: Mock):
+        """
+        Check reset grades handler.
+
+        Expected result:
+            - The job is started and its progress returned.
+        """
+        self.request.body = json.dumps({"student_ids": "all", "reopen": True}).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        start_reset_grades_job_mock.return_value = {"job_id": "test-job-id", "status": "pending"}
+
+        response = self.xblock.reset_grades(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual(start_reset_grades_job_mock.return_value, json.loads(response.body))
+        start_reset_grades_job_mock.assert_called_once_with(self.xblock, "all", reopen=True)
+
+    @ddt.data({}, {"student_ids": []}, {"student_ids": "some"}, {"student_ids": [1]})
+    @patch("mindmap.mindmap.start_reset_grades_job")
+    def test_reset_grades_bad_request(self, data: dict, start_reset_grades_job_mock: Mock):
+        """
+        Check reset grades handler without valid students.
+
+        Expected result:
+            - The handler returns 400 and the job is not started.
+        """
+        self.request.body = json.dumps(data).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.reset_grades(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        start_reset_grades_job_mock.assert_not_called()
+
+    @ddt.data(
+        ({"job_id": "test-job-id", "usage_id": "test-location", "status": "running"}, HTTPStatus.OK),
+        ({"job_id": "test-job-id", "usage_id": "other-location", "status": "running"}, HTTPStatus.NOT_FOUND),
+        (None, HTTPStatus.NOT_FOUND),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.get_job_progress")
+    def test_get_reset_grades_progress(self, progress: dict, status_code: int, get_job_progress_mock: Mock):
+        """
+        Check reset grades progress handler.
+
+        Expected result:
+            - The progress of the jobs of the block is returned, other jobs are not found.
+        """
+        self.xblock.location = "test-location"
+        self.request.body = json.dumps({"job_id": "test-job-id"}).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        get_job_progress_mock.return_value = progress
+
+        response = self.xblock.get_reset_grades_progress(self.request)
+
+        self.assertEqual(status_code, response.status_code)
+        if status_code == HTTPStatus.OK:
+            self.assertEqual(progress, json.loads(response.body))
+        get_job_progress_mock.assert_called_once_with("test-job-id")
+
+    @ddt.data(({}, "csv"), ({"format": "jsonl"}, "jsonl"))
+    @ddt.unpack
+    @patch("mindmap.mindmap.start_export_submissions_job")
+    def test_export_submissions(self, data: dict, export_format: str, start_export_submissions_job_mock: Mock):
+        """
+        Check export submissions handler.
+
+        Expected result:
+            - The job is started with the requested format, CSV by default.
+        """
+        self.request.body = json.dumps(data).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        start_export_submissions_job_mock.return_value = {"job_id": "test-job-id", "status": "pending"}
+
+        response = self.xblock.export_submissions(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual(start_export_submissions_job_mock.return_value, json.loads(response.body))
+        start_export_submissions_job_mock.assert_called_once_with(self.xblock, export_format)
+
+    @patch("mindmap.mindmap.start_export_submissions_job")
+    def test_export_submissions_bad_format(self, start_export_submissions_job_mock: Mock):
+        """
+        Check export submissions handler with an unsupported format.
+
+        Expected result:
+            - The handler returns 400 and the job is not started.
+        """
+        self.request.body = json.dumps({"format": "xlsx"}).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.export_submissions(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        start_export_submissions_job_mock.assert_not_called()
+
+    @patch("mindmap.mindmap.default_storage")
+    @patch("mindmap.mindmap.get_job_progress")
+    def test_download_submissions_export(self, get_job_progress_mock: Mock, default_storage_mock: Mock):
+        """
+        Check download submissions export handler.
+
+        Expected result:
+            - The file of the job is streamed as an attachment.
+        """
+        self.xblock.location = "test-location"
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        get_job_progress_mock.return_value = {
+            "job_id": "test-job-id",
+            "usage_id": "test-location",
+            "status": "completed",
+            "export_format": "csv",
+            "file_name": "mindmap/exports/test-job-id.csv",
+        }
+        default_storage_mock.open.return_value = MagicMock()
+        default_storage_mock.open.return_value.chunks.return_value = [b"a,b\r\n", b"1,2\r\n"]
+
+        response = self.xblock.download_submissions_export(Request.blank("/?job_id=test-job-id"))
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual(b"a,b\r\n1,2\r\n", response.body)
+        self.assertEqual("text/csv", response.content_type)
+        self.assertEqual('attachment; filename="test-job-id.csv"', response.headers["Content-Disposition"])
+        default_storage_mock.open.assert_called_once_with("mindmap/exports/test-job-id.csv", "rb")
+
+    @ddt.data(
+        None,
+        {"job_id": "test-job-id", "usage_id": "other-location", "status": "completed", "file_name": "test.csv"},
+        {"job_id": "test-job-id", "usage_id": "test-location", "status": "running"},
+        {"job_id": "test-job-id", "usage_id": "test-location", "status": "completed"},
+    )
+    @patch("mindmap.mindmap.get_job_progress")
+    def test_download_submissions_export_not_found(self, progress: dict, get_job_progress_mock: Mock):
+        """
+        Check download submissions export handler without a completed export of the block.
+
+        Expected result:
+            - The handler returns 404.
+        """
+        self.xblock.location = "test-location"
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        get_job_progress_mock.return_value = progress
+
+        response = self.xblock.download_submissions_export(Request.blank("/?job_id=test-job-id"))
+
+        self.assertEqual(HTTPStatus.NOT_FOUND, response.status_code)
+
+    @patch("mindmap.mindmap.invalidate_grading_summary")
+    @patch("mindmap.mindmap.MindMapXBlock.get_student_module")
+    @patch("submissions.api.reset_score")
+    def test_remove_grade(
+        self, reset_score_mock: Mock, get_student_module_mock: Mock, invalidate_grading_summary_mock: Mock,
+    ):
+        """
+        Check remove grade handler.
+
+        Expected result:
+            - The student view is rendered with the appropriate values.
+            - The grading summary of the block is invalidated.
+        """
+        self.request.body = json.dumps({"student_id": self.student_id}).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        get_student_module_mock.return_value = Mock(state='{"test-state": "mindmap"}')
+
+        response = self.xblock.remove_grade(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        reset_score_mock.assert_called_once_with(
+            self.student_id,
+            self.xblock.block_course_id,
+            self.xblock.block_id,
+        )
+        invalidate_grading_summary_mock.assert_called_once_with(self.xblock.block_id)
+
+    @patch("mindmap.mindmap.get_grading_summary")
+    def test_get_grading_summary(self, get_grading_summary_mock: Mock):
+        """
+        Check get grading summary handler.
+
+        Expected result:
+            - The summary of the block is returned with its scoring settings.
+        """
+        get_grading_summary_mock.return_value = {"statuses": {"Submitted": 1}}
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_grading_summary(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertDictEqual(
+            {"statuses": {"Submitted": 1}, "max_raw_score": self.xblock.points, "weight": self.xblock.weight},
+            json.loads(response.body),
+        )
+        get_grading_summary_mock.assert_called_once_with(self.xblock)
+
+    @patch("mindmap.mindmap.GradingDataLoader")
+    def test_get_instructor_grading_data(self, grading_data_loader_mock: Mock):
+        """
+        Check get instructor grading data handler.
+
+        Expected result:
+            - The assignments are loaded with the batched grading data loader.
+        """
+        current_datetime = datetime.datetime.now()
+        assignment = {
+            "module_id": 1,
+            "student_id": self.student.student_id,
+            "submission_id": "test-submission-id",
+            "answer_body": {
+                "mindmap_student_body": json.dumps(self.data["mind_map"])
+            },
+            "username": self.student.student_id,
+            "timestamp": current_datetime.strftime(DateTime.DATETIME_FORMAT),
+            "raw_score": self.xblock.raw_score,
+            "max_raw_score": self.xblock.points,
+            "weight": self.xblock.weight,
+            "weighted_score": self.xblock.get_weighted_score(),
+            "submission_status": "Submitted",
+        }
+        grading_data_loader_mock.return_value.get_assignments.return_value = [assignment]
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        expected_result = {
+            "assignments": [assignment],
+            "display_name": self.xblock.display_name,
+            "max_raw_score": self.xblock.points,
+            "weight": self.xblock.weight,
+        }
+
+        response = self.xblock.get_instructor_grading_data(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertDictEqual(expected_result, json.loads(response.body))
+        grading_data_loader_mock.assert_called_once_with(self.xblock)
+
+    @patch("mindmap.mindmap.find_similar_assignments")
+    @patch("mindmap.mindmap.GradingDataLoader")
+    def test_get_similar_submissions(self, grading_data_loader_mock: Mock, find_similar_assignments_mock: Mock):
+        """
+        Check get similar submissions handler.
+
+        Expected result:
+            - The assignments with their mind maps are clustered with the given threshold.
+        """
+        self.request.body = json.dumps({"threshold": 0.8}).encode("utf-8")
+        clusters = [{"similarity": 0.9, "submissions": [{"submission_id": "1"}, {"submission_id": "2"}]}]
+        find_similar_assignments_mock.return_value = clusters
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_similar_submissions(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertDictEqual({"clusters": clusters, "count": 1}, json.loads(response.body))
+        grading_data_loader_mock.assert_called_once_with(self.xblock)
+        find_similar_assignments_mock.assert_called_once_with(
+            grading_data_loader_mock.return_value.get_assignments.return_value, 0.8,
+        )
+
+    @ddt.data("high", 0, 1.5)
+    def test_get_similar_submissions_bad_request(self, threshold):
+        """
+        Check get similar submissions handler with an invalid threshold.
+
+        Expected result:
+            - The handler returns 400 status code.
+        """
+        self.request.body = json.dumps({"threshold": threshold}).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_similar_submissions(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+
+    @override_settings(MINDMAP_PREGRADING=True)
+    @patch("mindmap.mindmap.get_suggested_scores")
+    def test_get_suggested_scores(self, get_suggested_scores_mock: Mock):
+        """
+        Check get suggested scores handler.
+
+        Expected result:
+            - The requested submissions are scored against the reference mind map.
+        """
+        submission_id = "6c0d5a43-70f0-4d4e-8a5a-3b5d4b1f2a9e"
+        self.request.body = json.dumps({"submission_ids": [submission_id.upper()]}).encode("utf-8")
+        scores = {submission_id: {"topics": 1, "edges": 1, "depth": 1, "score": 1, "raw_score": 100}}
+        get_suggested_scores_mock.return_value = scores
+        self.xblock.is_static = False
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_suggested_scores(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertDictEqual(
+            {"scores": scores, "max_raw_score": self.xblock.points}, json.loads(response.body),
+        )
+        get_suggested_scores_mock.assert_called_once_with(self.xblock, [submission_id])
+
+    @ddt.data(
+        ({}, True, False),
+        ({}, False, True),
+        ({"submission_ids": "all"}, False, False),
+        ({"submission_ids": ["not-an-id"]}, False, False),
+        ({"submission_ids": [None] * 501}, False, False),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.get_suggested_scores")
+    def test_get_suggested_scores_bad_request(
+        self, data: dict, is_static: bool, pregrading_disabled: bool, get_suggested_scores_mock: Mock,
+    ):
+        """
+        Check get suggested scores handler when pre-grading is not available or with invalid ids.
+
+        Expected result:
+            - The handler returns 400 status code.
+        """
+        self.request.body = json.dumps(data).encode("utf-8")
+        self.xblock.is_static = is_static
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        with override_settings(MINDMAP_PREGRADING=not pregrading_disabled):
+            response = self.xblock.get_suggested_scores(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        get_suggested_scores_mock.assert_not_called()
+
+    @override_settings(MINDMAP_PREGRADING=True)
+    @patch("mindmap.mindmap.get_suggested_scores")
+    def test_get_suggested_scores_without_reference(self, get_suggested_scores_mock: Mock):
+        """
+        Check get suggested scores handler when the reference mind map has no nodes.
+
+        Expected result:
+            - The handler returns 400 status code.
+        """
+        self.request.body = json.dumps({}).encode("utf-8")
+        get_suggested_scores_mock.side_effect = ValueError("The reference mind map has no nodes besides the root")
+        self.xblock.is_static = False
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_suggested_scores(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+        get_suggested_scores_mock.assert_called_once_with(self.xblock, None)
+
+    @patch("mindmap.mindmap.GradingDataLoader")
+    def test_get_instructor_grading_page(self, grading_data_loader_mock: Mock):
+        """
+        Check get instructor grading page handler.
+
+        Expected result:
+            - The page is loaded without the submitted mind maps.
+        """
+        self.request.body = json.dumps({
+            "offset": 25, "page_size": 50, "status": "Completed", "username": "le", "sort": "raw_score",
+            "answer_hash": "test-hash",
+        }).encode("utf-8")
+        grading_data_loader_mock.return_value.get_page.return_value = {"assignments": [], "count": 0}
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_instructor_grading_page(self.request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual(self.xblock.points, json.loads(response.body)["max_raw_score"])
+        grading_data_loader_mock.assert_called_once_with(self.xblock, include_answers=False)
+        grading_data_loader_mock.return_value.get_page.assert_called_once_with(
+            offset=25, page_size=50, status="Completed", username="le", sort="raw_score", answer_hash="test-hash",
+        )
+
+    @ddt.data(
+        {"offset": "first"},
+        {"offset": -1},
+        {"page_size": 0},
+        {"page_size": 1000},
+        {"status": "Not attempted"},
+        {"sort": "username"},
+        {"sort": ["raw_score"]},
+    )
+    def test_get_instructor_grading_page_bad_request(self, options: dict):
+        """
+        Check get instructor grading page handler with invalid options.
+
+        Expected result:
+            - The handler returns 400 status code.
+        """
+        self.request.body = json.dumps(options).encode("utf-8")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_instructor_grading_page(self.request)
+
+        self.assertEqual(HTTPStatus.BAD_REQUEST, response.status_code)
+
+    @patch("mindmap.mindmap.get_submission_answer")
+    def test_get_submission_mind_map(self, get_submission_answer_mock: Mock):
+        """
+        Check get submission mind map handler.
+
+        Expected result:
+            - The mind map is returned with the hash of the answer as ETag.
+        """
+        get_submission_answer_mock.return_value = Mock(
+            uuid=self.submission_id,
+            answer={"mindmap_student_body": json.dumps(self.mind_map)},
+            answer_hash="test-hash",
+        )
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        request = Request.blank(f"/?submission_id={self.submission_id}")
+
+        response = self.xblock.get_submission_mind_map(request)
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual('"test-hash"', response.headers["ETag"])
+        self.assertEqual(
+            {"submission_id": self.submission_id, "mind_map": self.mind_map}, json.loads(response.body),
+        )
+        get_submission_answer_mock.assert_called_once_with(self.xblock, self.submission_id)
+
+    @patch("mindmap.mindmap.get_submission_answer")
+    def test_get_submission_mind_map_not_modified(self, get_submission_answer_mock: Mock):
+        """
+        Check get submission mind map handler when the browser has the mind map.
+
+        Expected result:
+            - The handler returns 304 status code without a body.
+        """
+        get_submission_answer_mock.return_value = Mock(answer_hash="test-hash")
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+        request = Request.blank(
+            f"/?submission_id={self.submission_id}", headers={"If-None-Match": '"test-hash"'},
+        )
+
+        response = self.xblock.get_submission_mind_map(request)
+
+        self.assertEqual(HTTPStatus.NOT_MODIFIED, response.status_code)
+        self.assertEqual(b"", response.body)
+
+    @ddt.data(
+        ("/", None, HTTPStatus.BAD_REQUEST),
+        ("/?submission_id=unknown", None, HTTPStatus.NOT_FOUND),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.get_submission_answer")
+    def test_get_submission_mind_map_errors(
+        self, url: str, submission, status_code: int, get_submission_answer_mock: Mock,
+    ):
+        """
+        Check get submission mind map handler with a missing or unknown submission.
+
+        Expected result:
+            - The handler returns the error status code.
+        """
+        get_submission_answer_mock.return_value = submission
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_submission_mind_map(Request.blank(url))
+
+        self.assertEqual(status_code, response.status_code)
+
+    @patch("mindmap.mindmap.get_submission_answer")
+    def test_get_submission_preview(self, get_submission_answer_mock: Mock):
+        """
+        Check get submission preview handler.
+
+        Expected result:
+            - The submitted mind map is returned as an SVG with the hash of the answer as ETag.
+        """
+        get_submission_answer_mock.return_value = Mock(
+            answer={"mindmap_student_body": json.dumps(self.mind_map)}, answer_hash="test-hash",
+        )
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_submission_preview(Request.blank(f"/?submission_id={self.submission_id}"))
+
+        self.assertEqual(HTTPStatus.OK, response.status_code)
+        self.assertEqual("image/svg+xml", response.content_type)
+        self.assertEqual('"test-hash"', response.headers["ETag"])
+        self.assertIn(">Root</text>", response.text)
+
+    @ddt.data(
+        ("/", None, HTTPStatus.BAD_REQUEST),
+        ("/?submission_id=unknown", None, HTTPStatus.NOT_FOUND),
+        ("/?submission_id=known", Mock(answer_hash="test-hash"), HTTPStatus.NOT_MODIFIED),
+    )
+    @ddt.unpack
+    @patch("mindmap.mindmap.get_submission_answer")
+    def test_get_submission_preview_without_content(
+        self, url: str, submission, status_code: int, get_submission_answer_mock: Mock,
+    ):
+        """
+        Check get submission preview handler with a missing, unknown or cached submission.
+
+        Expected result:
+            - The handler returns the status code without a preview.
+        """
+        get_submission_answer_mock.return_value = submission
+        self.xblock.get_current_user.return_value.opt_attrs = {
+            "edx-platform.user_is_staff": True,
+        }
+
+        response = self.xblock.get_submission_preview(Request.blank(url, headers={"If-None-Match": '"test-hash"'}))
+
+        self.assertEqual(status_code, response.status_code)
+        self.assertEqual(b"", response.body)
+
+
+class TestMindMapUtilities(TestCase):
+    """
+    Test suite for the MindMapXBlock utilities methods.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite.
+        """
+        self.xblock = MindMapXBlock(
+            runtime=Mock(), field_data=Mock(), scope_ids=Mock()
+        )
+
+    def test_get_current_mind_map_file_does_not_exist(self):
+        """
+        Check getting the current mind map when the file does not exist.
+
+        Expected result:
+            - None is returned.
+        """
+        self.xblock.mindmap_student_body = {}
+        self.xblock.is_static = False
         self.xblock.mindmap_body = {
             "data": [{ "id": "root", "isroot": True, "topic": "Root" }]
         }
@@ -635,3 +2007,38 @@ class TestMindMapUtilities(TestCase):
         result = self.xblock.get_current_mind_map()
 
         self.assertEqual(result, self.xblock.mindmap_student_body)
+
+    @override_settings(MINDMAP_COMPACT_STORAGE=True)
+    def test_get_current_mind_map_migrates_storage(self):
+        """
+        Check reading a mind map saved before the compact encoding was enabled.
+
+        Expected result:
+            - The mind map is returned and saved again with the compact encoding.
+        """
+        mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Root"}]}
+        self.xblock.mindmap_student_body = mind_map
+        self.xblock.is_static = False
+
+        result = self.xblock.get_current_mind_map()
+
+        self.assertEqual(mind_map, result)
+        self.assertTrue(is_encoded(self.xblock.mindmap_student_body))
+        self.assertEqual(mind_map, self.xblock.get_current_mind_map())
+
+    @override_settings(MINDMAP_COMPACT_STORAGE=False)
+    def test_get_current_mind_map_compact_storage_disabled(self):
+        """
+        Check reading an encoded mind map after disabling the compact encoding.
+
+        Expected result:
+            - The mind map is decoded and left encoded in the state.
+        """
+        mind_map = {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Root"}]}
+        self.xblock.mindmap_student_body = encode_mind_map(mind_map)
+        self.xblock.is_static = False
+
+        result = self.xblock.get_current_mind_map()
+
+        self.assertEqual(mind_map, result)
+        self.assertTrue(is_encoded(self.xblock.mindmap_student_body))
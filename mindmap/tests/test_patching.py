@@ -0,0 +1,126 @@
+"""
+Tests for the node-level operations applied to mind maps.
+"""
+from unittest import TestCase
+
+import ddt
+
+from mindmap.patching import MAX_OPERATIONS, MindMapPatchError, apply_operations
+
+
+@ddt.ddt
+class TestApplyOperations(TestCase):
+    """
+    Test suite for apply_operations.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite.
+        """
+        self.mind_map = {
+            "meta": {"name": "Mind Map", "version": "0.1"},
+            "format": "node_array",
+            "data": [
+                {"id": "root", "isroot": True, "topic": "Root"},
+                {"id": "a", "parentid": "root", "topic": "A", "direction": "right"},
+                {"id": "a1", "parentid": "a", "topic": "A1"},
+                {"id": "b", "parentid": "root", "topic": "B", "direction": "left"},
+            ],
+        }
+
+    def ids(self, mind_map: dict) -> list:
+        """
+        Return the node ids of a mind map in order.
+        """
+        return [node["id"] for node in mind_map["data"]]
+
+    def test_add(self):
+        """
+        Check adding nodes.
+
+        Expected result:
+            - The nodes are added after their siblings or at the given index.
+        """
+        result = apply_operations(self.mind_map, [
+            {"op": "add", "node": {"id": "c", "parentid": "root", "topic": "C"}},
+            {"op": "add", "node": {"id": "a0", "parentid": "a", "topic": "A0"}, "index": 0},
+        ])
+
+        self.assertEqual(["root", "a", "a0", "a1", "b", "c"], self.ids(result))
+        self.assertEqual(4, len(self.mind_map["data"]))
+
+    def test_update(self):
+        """
+        Check updating the topic of a node.
+
+        Expected result:
+            - Only the topic of the node changes.
+        """
+        result = apply_operations(self.mind_map, [{"op": "update", "id": "a1", "topic": "New topic"}])
+
+        self.assertEqual({"id": "a1", "parentid": "a", "topic": "New topic"}, result["data"][2])
+
+    def test_move(self):
+        """
+        Check moving a node with its children.
+
+        Expected result:
+            - The node is placed under the new parent and keeps its children.
+        """
+        result = apply_operations(self.mind_map, [
+            {"op": "move", "id": "a", "parentid": "b", "direction": "left"},
+            {"op": "move", "id": "a1", "parentid": "b", "index": 0},
+        ])
+
+        self.assertEqual(["root", "b", "a1", "a"], self.ids(result))
+        self.assertEqual(("b", "left"), (result["data"][3]["parentid"], result["data"][3]["direction"]))
+
+    def test_delete(self):
+        """
+        Check deleting a node.
+
+        Expected result:
+            - The node and its descendants are removed.
+        """
+        result = apply_operations(self.mind_map, [{"op": "delete", "id": "a"}])
+
+        self.assertEqual(["root", "b"], self.ids(result))
+
+    @ddt.data(
+        [{"op": "rename", "id": "a"}],
+        [{"op": "add", "node": {"id": "a", "parentid": "root"}}],
+        [{"op": "add", "node": {"id": "c", "parentid": "missing"}}],
+        [{"op": "add", "node": {"id": "c"}}],
+        [{"op": "add", "node": {"id": ["c"], "parentid": "root"}}],
+        [{"op": "add", "node": {"id": {"c": 1}, "parentid": "root"}}],
+        [{"op": "add", "node": {"id": "c", "parentid": "root"}, "index": "first"}],
+        [{"op": "update", "id": "a", "topic": None}],
+        [{"op": "update", "id": "missing", "topic": "Topic"}],
+        [{"op": "move", "id": "a", "parentid": "a1"}],
+        [{"op": "move", "id": "root", "parentid": "a"}],
+        [{"op": "delete", "id": "root"}],
+        [{"op": "delete", "id": "a"}, {"op": "update", "id": "a1", "topic": "Topic"}],
+        [{"op": "update", "id": "a", "topic": "Topic"}] * (MAX_OPERATIONS + 1),
+        ["delete"],
+        {"op": "delete", "id": "a"},
+    )
+    def test_invalid_operations(self, operations):
+        """
+        Check applying invalid operations.
+
+        Expected result:
+            - MindMapPatchError is raised.
+        """
+        with self.assertRaises(MindMapPatchError):
+            apply_operations(self.mind_map, operations)
+
+    def test_node_tree_format(self):
+        """
+        Check patching a mind map that is not in the node_array format.
+
+        Expected result:
+            - MindMapPatchError is raised.
+        """
+        with self.assertRaises(MindMapPatchError):
+            apply_operations({"format": "node_tree", "data": {"id": "root"}}, [])
@@ -0,0 +1,197 @@
+"""
+Tests for the automatic pre-grading against the reference mind map.
+"""
+from unittest.mock import Mock, patch
+
+import ddt
+from django.core.cache import cache
+from django.test import TestCase
+from submissions import api as submissions_api
+
+from mindmap import pregrading
+from mindmap.blobs import make_answer
+from mindmap.mindmap import MindMapXBlock
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+
+REFERENCE = {
+    "format": "node_tree",
+    "data": {
+        "id": "root",
+        "topic": "Photosynthesis",
+        "children": [
+            {"id": "light", "topic": "Light", "children": [{"id": "chlorophyll", "topic": "Chlorophyll"}]},
+            {"id": "water", "topic": "Water"},
+            {"id": "carbon", "topic": "Carbon dioxide"},
+        ],
+    },
+}
+
+PARTIAL_ANSWER = {
+    "format": "node_array",
+    "data": [
+        {"id": "a", "isroot": True, "topic": "  photosynthesis"},
+        {"id": "b", "parentid": "a", "topic": "LIGHT"},
+        {"id": "c", "parentid": "b", "topic": "Chlorophyl"},
+        {"id": "d", "parentid": "a", "topic": "Sugar"},
+    ],
+}
+
+
+@ddt.ddt
+class TestReferenceMap(TestCase):
+    """
+    Test suite for the comparison of the mind maps with the reference.
+    """
+
+    def test_get_tree(self):
+        """
+        Check the nodes of both formats are listed with their normalized parent topic and depth.
+        """
+        self.assertEqual(
+            [
+                ("photosynthesis", None, 0),
+                ("light", "photosynthesis", 1),
+                ("sugar", "photosynthesis", 1),
+                ("chlorophyl", "light", 2),
+            ],
+            pregrading.get_tree(PARTIAL_ANSWER),
+        )
+        self.assertEqual(5, len(pregrading.get_tree(REFERENCE)))
+
+    @ddt.data(None, {}, {"format": "node_array", "data": [{"id": "orphan", "parentid": "none"}]})
+    def test_get_tree_without_root(self, mind_map):
+        """
+        Check a mind map without root has no nodes.
+        """
+        self.assertEqual([], pregrading.get_tree(mind_map))
+
+    def test_score_reference(self):
+        """
+        Check the reference itself gets the full score, and an empty mind map none.
+        """
+        reference = pregrading.ReferenceMap(REFERENCE)
+
+        self.assertEqual({"topics": 1, "edges": 1, "depth": 1, "score": 1}, reference.score(REFERENCE))
+        self.assertEqual({"topics": 0, "edges": 0, "depth": 0, "score": 0}, reference.score({}))
+
+    def test_score_partial_answer(self):
+        """
+        Check a partial answer is scored on its exact and fuzzy matches.
+
+        Expected result:
+            - The misspelled topic gets a partial credit.
+            - The edges between matched topics count, the extra topic does not.
+            - Half of the first level and the whole second level are covered.
+        """
+        score = pregrading.ReferenceMap(REFERENCE).score(PARTIAL_ANSWER)
+
+        self.assertAlmostEqual((2 + 0.9524) / 5, score["topics"], places=3)
+        self.assertEqual(0.5, score["edges"])
+        self.assertAlmostEqual((1 / 3 + 1) / 2, score["depth"], places=3)
+        self.assertAlmostEqual(
+            0.5 * score["topics"] + 0.3 * score["edges"] + 0.2 * score["depth"], score["score"], places=3,
+        )
+
+    def test_fuzzy_matches_computed_once(self):
+        """
+        Check the fuzzy match of a topic is reused for every mind map of the batch.
+        """
+        reference = pregrading.ReferenceMap(REFERENCE)
+
+        with patch("mindmap.pregrading.difflib.SequenceMatcher", wraps=pregrading.difflib.SequenceMatcher) as matcher:
+            reference.score(PARTIAL_ANSWER)
+            reference.score(PARTIAL_ANSWER)
+
+        self.assertEqual(2, matcher.call_count)
+        self.assertEqual((None, 0.0), reference.match_topic("sugar"))
+
+    def test_gradable(self):
+        """
+        Check a reference without nodes besides the root, or whose nodes all have the topic of the root, cannot grade.
+        """
+        self.assertTrue(pregrading.ReferenceMap(REFERENCE).gradable)
+        self.assertFalse(pregrading.ReferenceMap(MindMapXBlock.mindmap_body.default).gradable)
+        self.assertFalse(pregrading.ReferenceMap({
+            "format": "node_array",
+            "data": [{"id": "r", "isroot": True, "topic": "Idea"}, {"id": "a", "parentid": "r", "topic": "idea"}],
+        }).gradable)
+
+
+class TestSuggestedScores(TestCase):
+    """
+    Test suite for the suggested scores of the submissions of a block.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up a block with a reference mind map and two submissions.
+        """
+        cache.clear()
+        self.xblock = MindMapXBlock(runtime=Mock(), field_data=Mock(), scope_ids=Mock(usage_id=ITEM_ID))
+        self.xblock.course_id = COURSE_ID
+        self.xblock.points = 50
+        self.xblock.mindmap_body = REFERENCE
+        self.submissions = [
+            submissions_api.create_submission(
+                {
+                    "student_id": f"anonymous-{index}",
+                    "course_id": COURSE_ID,
+                    "item_id": ITEM_ID,
+                    "item_type": "mindmap",
+                },
+                make_answer(mind_map),
+            )
+            for index, mind_map in enumerate((REFERENCE, PARTIAL_ANSWER))
+        ]
+
+    def test_get_suggested_scores(self):
+        """
+        Check every latest submission is scored out of the block points.
+        """
+        scores = pregrading.get_suggested_scores(self.xblock)
+
+        self.assertEqual({submission["uuid"] for submission in self.submissions}, set(scores))
+        self.assertEqual(50, scores[self.submissions[0]["uuid"]]["raw_score"])
+        partial = scores[self.submissions[1]["uuid"]]
+        self.assertEqual(round(partial["score"] * 50), partial["raw_score"])
+
+    def test_get_suggested_scores_cached(self):
+        """
+        Check the cached scores of requested submissions are returned without queries.
+        """
+        submission_id = self.submissions[1]["uuid"]
+        scores = pregrading.get_suggested_scores(self.xblock, [submission_id])
+
+        with self.assertNumQueries(0):
+            cached_scores = pregrading.get_suggested_scores(self.xblock, [submission_id])
+
+        self.assertEqual(scores, cached_scores)
+        self.xblock.points = 10
+        self.assertEqual(
+            round(scores[submission_id]["score"] * 10),
+            pregrading.get_suggested_scores(self.xblock, [submission_id])[submission_id]["raw_score"],
+        )
+
+    def test_get_suggested_scores_reference_changed(self):
+        """
+        Check the submissions are scored again when the reference changes.
+        """
+        submission_id = self.submissions[0]["uuid"]
+        pregrading.get_suggested_scores(self.xblock)
+        self.xblock.mindmap_body = PARTIAL_ANSWER
+
+        scores = pregrading.get_suggested_scores(self.xblock, [submission_id, "00000000-0000-0000-0000-000000000000"])
+
+        self.assertEqual([submission_id], list(scores))
+        self.assertLess(scores[submission_id]["raw_score"], 50)
+
+    def test_get_suggested_scores_without_reference(self):
+        """
+        Check the submissions cannot be scored against a reference without nodes.
+        """
+        self.xblock.mindmap_body = MindMapXBlock.mindmap_body.default
+
+        with self.assertRaises(ValueError):
+            pregrading.get_suggested_scores(self.xblock)
@@ -0,0 +1,135 @@
+"""
+Tests for the sampling profiler of the handlers and views.
+"""
+import json
+import os
+import pstats
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+from submissions.models import Submission
+from webob import Request, Response
+
+from mindmap import metrics, profiling
+
+COURSE_ID = "course-v1:edX+MindMap+2023"
+
+
+class FakeBlock:
+    """
+    A block with an instrumented handler.
+    """
+
+    course_id = COURSE_ID
+    scope_ids = Mock(usage_id="block-v1:edX+MindMap+2023+type@mindmap+block@test")
+
+    @metrics.instrument("handler")
+    def handler(self, request, suffix=""):  # pylint: disable=unused-argument
+        """
+        Run a query on the submissions, and call the other handler.
+        """
+        Submission.objects.count()
+        return self.other_handler(request)
+
+    @metrics.instrument("other_handler")
+    def other_handler(self, request, suffix=""):  # pylint: disable=unused-argument
+        """
+        Return a JSON response.
+        """
+        return Response(json_body={"count": 0})
+
+
+class TestProfiling(TestCase):
+    """
+    Test suite for the sampling profiler.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up a temporary profiling directory.
+        """
+        temporary_directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = os.path.join(temporary_directory.name, "profiles")
+        settings_override = override_settings(MINDMAP_PROFILING_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_profiles(self) -> list:
+        """
+        Return the names of the files of the profiling directory, without extension.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted({os.path.splitext(name)[0] for name in os.listdir(self.directory)})
+
+    @patch("mindmap.profiling.cProfile.Profile")
+    def test_disabled_by_default(self, profile_mock: Mock):
+        """
+        Check nothing is profiled with the default settings.
+        """
+        FakeBlock().handler(Request.blank("/"))
+
+        profile_mock.assert_not_called()
+        self.assertEqual([], self.get_profiles())
+
+    @override_settings(MINDMAP_PROFILING_COURSES=[COURSE_ID])
+    def test_profile_course(self):
+        """
+        Check the calls of the courses of the allowlist are profiled.
+
+        Expected result:
+            - Only the outer handler is profiled.
+            - The cProfile stats and the queries are written.
+        """
+        response = FakeBlock().handler(Request.blank("/"))
+
+        self.assertEqual({"count": 0}, response.json_body)
+        profiles = self.get_profiles()
+        self.assertEqual(1, len(profiles))
+        self.assertIn("-handler-", profiles[0])
+        base_name = os.path.join(self.directory, profiles[0])
+        self.assertTrue(pstats.Stats(f"{base_name}.prof").total_calls)
+        with open(f"{base_name}.json", encoding="utf-8") as log_file:
+            profile = json.load(log_file)
+        self.assertEqual("handler", profile["handler"])
+        self.assertEqual(COURSE_ID, profile["course_id"])
+        self.assertEqual(1, len(profile["queries"]))
+        self.assertIn("submissions_submission", profile["queries"][0]["sql"])
+        self.assertFalse(profiling.profiling.get())
+
+    @override_settings(MINDMAP_PROFILING_COURSES=["course-v1:edX+Other+2023"])
+    def test_other_course_not_profiled(self):
+        """
+        Check the calls of the courses out of the allowlist are not profiled without sampling.
+        """
+        FakeBlock().handler(Request.blank("/"))
+
+        self.assertEqual([], self.get_profiles())
+
+    @patch("mindmap.profiling.random.random")
+    def test_sample_rate(self, random_mock: Mock):
+        """
+        Check a fraction of the calls is profiled with the sample rate.
+        """
+        random_mock.side_effect = [0.05, 0.5]
+
+        with override_settings(MINDMAP_PROFILING_SAMPLE_RATE=0.1):
+            FakeBlock().other_handler(Request.blank("/"))
+            FakeBlock().other_handler(Request.blank("/"))
+
+        self.assertEqual(1, len(self.get_profiles()))
+
+    @override_settings(MINDMAP_PROFILING_COURSES=[COURSE_ID])
+    @patch("mindmap.profiling.os.makedirs")
+    def test_write_error(self, makedirs_mock: Mock):
+        """
+        Check a profiled call does not fail when the profile can not be written.
+        """
+        makedirs_mock.side_effect = PermissionError("Read-only file system")
+
+        with self.assertLogs("mindmap.profiling", level="ERROR"):
+            response = FakeBlock().handler(Request.blank("/"))
+
+        self.assertEqual(200, response.status_code)
@@ -0,0 +1,215 @@
+"""
+Tests for the server-side rendering of mind maps to SVG previews.
+"""
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+import ddt
+from django.core.cache import cache
+from django.test import TestCase
+
+from mindmap import rendering
+from mindmap.blobs import canonical_json, get_content_hash
+
+SVG_NAMESPACE = "{http://www.w3.org/2000/svg}"
+
+NODE_ARRAY = {
+    "format": "node_array",
+    "data": [
+        {"id": "root", "isroot": True, "topic": "Root"},
+        {"id": "left", "parentid": "root", "topic": "Left", "direction": "left"},
+        {"id": "first", "parentid": "root", "topic": "First"},
+        {"id": "second", "parentid": "root", "topic": "Second"},
+        {"id": "child", "parentid": "first", "topic": "Child", "background-color": "#ff0000"},
+        {"id": "collapsed", "parentid": "second", "topic": "Collapsed", "expanded": False},
+        {"id": "hidden", "parentid": "collapsed", "topic": "Hidden"},
+    ],
+}
+
+NODE_TREE = {
+    "format": "node_tree",
+    "data": {
+        "id": "root",
+        "topic": "Root",
+        "children": [
+            {"id": "left", "topic": "Left", "direction": "left"},
+            {"id": "first", "topic": "First", "children": [
+                {"id": "child", "topic": "Child", "background-color": "#ff0000"},
+            ]},
+            {"id": "second", "topic": "Second", "children": [
+                {"id": "collapsed", "topic": "Collapsed", "expanded": False, "children": [
+                    {"id": "hidden", "topic": "Hidden"},
+                ]},
+            ]},
+        ],
+    },
+}
+
+
+def get_boxes(mind_map: dict) -> dict:
+    """
+    Return the boxes of the laid out nodes keyed by label.
+    """
+    return {box["label"]: box for box in rendering.layout(mind_map)}
+
+
+@ddt.ddt
+class TestRendering(TestCase):
+    """
+    Test suite for the layout and the rendering of the mind maps.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with an empty cache.
+        """
+        cache.clear()
+
+    @ddt.data(NODE_ARRAY, NODE_TREE)
+    def test_layout(self, mind_map: dict):
+        """
+        Check the nodes are placed around the root and stacked next to their parents.
+        """
+        boxes = get_boxes(mind_map)
+
+        self.assertEqual({"Root", "Left", "First", "Second", "Child", "Collapsed"}, set(boxes))
+        self.assertEqual((0, 0), (boxes["Root"]["x"], boxes["Root"]["y"]))
+        self.assertLess(boxes["Left"]["x"], 0)
+        self.assertGreater(boxes["First"]["x"], 0)
+        self.assertEqual(
+            boxes["First"]["x"] - boxes["First"]["width"] / 2, boxes["Second"]["x"] - boxes["Second"]["width"] / 2,
+        )
+        self.assertLess(boxes["First"]["y"], boxes["Second"]["y"])
+        self.assertEqual(boxes["First"]["y"], boxes["Child"]["y"])
+        self.assertGreater(boxes["Child"]["x"], boxes["First"]["x"])
+
+    def test_layout_siblings_do_not_overlap(self):
+        """
+        Check the subtrees of siblings are stacked without overlapping.
+        """
+        nodes = [{"id": "root", "isroot": True, "topic": "Root"}]
+        for index in range(1, 40):
+            nodes.append({"id": str(index), "parentid": nodes[(index - 1) // 3]["id"], "topic": f"Topic {index}"})
+
+        boxes = rendering.layout({"format": "node_array", "data": nodes})
+
+        for side in (1, -1):
+            levels = {}
+            for box in boxes:
+                if box.get("side") == side:
+                    levels.setdefault(box["x"], []).append(box["y"])
+            for ys in levels.values():
+                ys.sort()
+                self.assertTrue(all(
+                    below - above >= rendering.NODE_HEIGHT for above, below in zip(ys, ys[1:])
+                ))
+
+    def test_render_svg(self):
+        """
+        Check the SVG is well formed, with a shape per visible node and an edge per parent.
+        """
+        svg = rendering.render_svg(NODE_ARRAY)
+
+        document = ElementTree.fromstring(svg)
+        texts = [text.text for text in document.iter(f"{SVG_NAMESPACE}text")]
+        self.assertEqual(6, len(texts))
+        self.assertNotIn("Hidden", texts)
+        self.assertEqual(5, len(list(document.iter(f"{SVG_NAMESPACE}path"))))
+        self.assertIn('fill="#ff0000"', svg)
+        self.assertRegex(document.get("viewBox"), r"^-?[\d.]+ -?[\d.]+ [\d.]+ [\d.]+$")
+
+    def test_render_svg_escapes_topics(self):
+        """
+        Check the topics and colors cannot inject markup in the SVG.
+        """
+        mind_map = {
+            "format": "node_array",
+            "data": [{
+                "id": "root", "isroot": True, "topic": '<script>alert("x")</script>',
+                "background-color": '"/><script>',
+            }],
+        }
+
+        svg = rendering.render_svg(mind_map)
+
+        self.assertNotIn("<script>", svg)
+        label = ElementTree.fromstring(svg).find(f".//{SVG_NAMESPACE}text").text
+        self.assertEqual('<script>alert("x")</script>', label)
+
+    def test_render_svg_long_topic(self):
+        """
+        Check long topics are shown on a single truncated line.
+        """
+        svg = rendering.render_svg({"format": "node_tree", "data": {"id": "root", "topic": "word\n" * 100}})
+
+        label = ElementTree.fromstring(svg).find(f".//{SVG_NAMESPACE}text").text
+        self.assertEqual(rendering.MAX_LABEL_LENGTH, len(label))
+        self.assertTrue(label.endswith("…"))
+
+    @ddt.data(
+        {},
+        {"format": "node_array", "data": []},
+        {"format": "node_array", "data": [{"id": "orphan", "parentid": "root", "topic": "Orphan"}]},
+        {"format": "node_tree", "data": None},
+        {"format": "node_tree", "data": {"id": ["root"], "topic": "Root"}},
+    )
+    def test_render_empty_mind_map(self, mind_map: dict):
+        """
+        Check a mind map without a root is rendered as an empty SVG.
+        """
+        svg = rendering.render_svg(mind_map)
+
+        self.assertEqual("0", ElementTree.fromstring(svg).get("width"))
+
+    def test_render_cycle(self):
+        """
+        Check the nodes of a cycle that are not reachable from the root are left out.
+        """
+        mind_map = {
+            "format": "node_array",
+            "data": [
+                {"id": "root", "isroot": True, "topic": "Root"},
+                {"id": "a", "parentid": "b", "topic": "A"},
+                {"id": "b", "parentid": "a", "topic": "B"},
+            ],
+        }
+
+        self.assertEqual(["Root"], [box["label"] for box in rendering.layout(mind_map)])
+
+    def test_render_invalid_ids(self):
+        """
+        Check the nodes whose id or parent id is not a string are left out.
+        """
+        mind_map = {
+            "format": "node_array",
+            "data": [
+                {"id": "root", "isroot": True, "topic": "Root"},
+                {"id": ["a"], "parentid": "root", "topic": "A"},
+                {"id": "b", "parentid": {"id": "root"}, "topic": "B"},
+                {"id": "c", "parentid": "root", "topic": "C"},
+            ],
+        }
+
+        self.assertEqual(["Root", "C"], [box["label"] for box in rendering.layout(mind_map)])
+
+    def test_measure_text(self):
+        """
+        Check wide characters are measured wider than narrow ones.
+        """
+        self.assertLess(rendering.measure_text("iiii"), rendering.measure_text("aaaa"))
+        self.assertLess(rendering.measure_text("aaaa"), rendering.measure_text("MMMM"))
+        self.assertLess(rendering.measure_text("MMMM"), rendering.measure_text("中中中中"))
+
+    def test_get_mind_map_svg_cached(self):
+        """
+        Check the previews are rendered once per content, whatever the order of the keys.
+        """
+        reordered = {"data": NODE_ARRAY["data"], "format": "node_array"}
+
+        with patch("mindmap.rendering.render_svg", wraps=rendering.render_svg) as render_svg_mock:
+            svg, content_hash = rendering.get_mind_map_svg(NODE_ARRAY)
+            cached_svg, cached_hash = rendering.get_mind_map_svg(reordered)
+
+        render_svg_mock.assert_called_once_with(NODE_ARRAY)
+        self.assertEqual((svg, content_hash), (cached_svg, cached_hash))
+        self.assertEqual(get_content_hash(canonical_json(NODE_ARRAY)), content_hash)
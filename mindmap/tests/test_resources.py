@@ -0,0 +1,92 @@
+"""
+Tests for the process-wide resource caches.
+"""
+import hashlib
+from unittest import TestCase
+from unittest.mock import patch
+
+from mindmap import resources
+
+
+class TestResources(TestCase):
+    """
+    Test suite for the resource caches.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test suite with empty caches.
+        """
+        resources.clear_resource_caches()
+        self.addCleanup(resources.clear_resource_caches)
+
+    def test_load_resource_is_cached(self):
+        """
+        Check that a resource is read from the package once.
+
+        Expected result:
+            - The second load does not read the file again.
+        """
+        first = resources.load_resource("public/css/mindmap.css")
+        second = resources.load_resource("public/css/mindmap.css")
+
+        self.assertIs(first, second)
+        cache_info = resources.load_resource.cache_info()
+        self.assertEqual((1, 1), (cache_info.misses, cache_info.hits))
+
+    def test_get_resource_hash(self):
+        """
+        Check the fingerprint of a resource.
+
+        Expected result:
+            - The hash is a short hex digest of the resource content.
+        """
+        content = resources.load_resource("public/css/mindmap.css")
+
+        self.assertEqual(
+            hashlib.sha256(content.encode("utf-8")).hexdigest()[:12],
+            resources.get_resource_hash("public/css/mindmap.css"),
+        )
+
+    def test_render_django_template(self):
+        """
+        Check rendering a cached template with different contexts.
+
+        Expected result:
+            - The template is parsed once and rendered with each context.
+        """
+        context = {"is_static": True, "in_student_view": False, "xblock_id": "first"}
+
+        first = resources.render_django_template("public/html/mindmap.html", dict(context))
+        context["xblock_id"] = "second"
+        second = resources.render_django_template("public/html/mindmap.html", dict(context))
+
+        self.assertIn("jsmind_container_first", first)
+        self.assertIn("jsmind_container_second", second)
+        self.assertEqual(1, resources.load_django_template.cache_info().misses)
+
+    def test_get_statici18n_js_path(self):
+        """
+        Check the translation file resolved for each language.
+
+        Expected result:
+            - The most specific available translation is used, defaulting to English.
+        """
+        self.assertEqual("public/js/translations/es_419/text.js", resources.get_statici18n_js_path("es-419"))
+        self.assertEqual("public/js/translations/en/text.js", resources.get_statici18n_js_path("fr"))
+        self.assertEqual(2, resources.get_statici18n_js_path.cache_info().currsize)
+
+    def test_get_jsmind_path(self):
+        """
+        Check the path of the jsMind files, when they are vendored or not.
+
+        Expected result:
+            - The vendored files are resolved in the package, the others are served from the CDN.
+        """
+        with patch("mindmap.resources.resource_exists", side_effect=lambda path: path.endswith(".js")):
+            self.assertEqual("public/vendor/jsmind/es6/jsmind.js", resources.get_jsmind_path(resources.JSMIND_BUNDLE))
+            self.assertIsNone(resources.get_jsmind_path(resources.JSMIND_STYLE))
+        self.assertEqual(
+            "https://unpkg.com/jsmind@0.7.1/style/jsmind.css", resources.get_jsmind_cdn_url(resources.JSMIND_STYLE),
+        )
+        self.assertTrue(resources.resource_exists("public/css/mindmap.css"))
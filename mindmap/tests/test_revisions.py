@@ -0,0 +1,172 @@
+"""
+Tests for the revision history of the learner mind maps.
+"""
+import json
+from unittest.mock import patch
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+
+from mindmap import revisions
+from mindmap.models import MindMapRevision
+
+ITEM_ID = "block-v1:edX+MindMap+2023+type@mindmap+block@test"
+STUDENT_ID = "test-student"
+
+
+def make_mind_map(topics: list, format_="node_array") -> dict:
+    """
+    Return a mind map with a root and a child of the root for each topic.
+    """
+    if format_ == "node_tree":
+        return {
+            "format": "node_tree",
+            "data": {
+                "id": "root",
+                "topic": "Root",
+                "children": [{"id": f"n{index}", "topic": topic} for index, topic in enumerate(topics)],
+            },
+        }
+    return {
+        "format": "node_array",
+        "meta": {"name": "test"},
+        "data": [{"id": "root", "topic": "Root", "isroot": True}] + [
+            {"id": f"n{index}", "parentid": "root", "topic": topic} for index, topic in enumerate(topics)
+        ],
+    }
+
+
+class TestRevisions(TestCase):
+    """
+    Test suite for the revisions of the learner mind maps.
+    """
+
+    def record(self, mind_map: dict, source: str = "save", **kwargs):
+        """
+        Record a revision of the test learner.
+        """
+        return revisions.record_revision(ITEM_ID, STUDENT_ID, mind_map, source, **kwargs)
+
+    def get_kinds(self) -> list:
+        """
+        Return the kinds of the revisions of the test learner, by number.
+        """
+        return list(revisions.get_revisions(ITEM_ID, STUDENT_ID).order_by("number").values_list("kind", flat=True))
+
+    def test_delta_round_trip(self):
+        """
+        Check a delta turns the previous mind map into the current one.
+
+        Expected result:
+            - Only the added, changed and removed nodes are in the delta.
+            - The nodes are reordered, moved and renamed.
+        """
+        previous = make_mind_map(["a", "b", "c", "d"])
+        current = make_mind_map(["a", "b", "c", "d"])
+        current["data"] = [current["data"][0], current["data"][3], current["data"][1], current["data"][4]]
+        current["data"][2]["topic"] = "renamed"
+        current["data"].append({"id": "new", "parentid": "n0", "topic": "new"})
+        current["meta"]["name"] = "other"
+
+        delta = revisions.make_delta(previous, current)
+
+        self.assertEqual({"n0", "n1", "new"}, set(delta["nodes"]))
+        self.assertIsNone(delta["nodes"]["n1"])
+        self.assertEqual(current, revisions.apply_delta(previous, delta))
+        self.assertEqual(current, revisions.apply_delta(previous, json.loads(json.dumps(delta))))
+
+    def test_delta_node_tree(self):
+        """
+        Check no delta is made for a mind map in the `node_tree` format.
+        """
+        self.assertIsNone(revisions.make_delta(make_mind_map(["a"]), make_mind_map(["a"], "node_tree")))
+
+    def test_record_revisions(self):
+        """
+        Check the saved mind maps are recorded as deltas from a snapshot and rebuilt.
+
+        Expected result:
+            - A mind map identical to the latest revision is not recorded.
+            - Every revision is rebuilt as it was saved.
+        """
+        mind_maps = [make_mind_map([f"topic {index}" for index in range(count)]) for count in range(1, 6)]
+        numbers = [self.record(mind_map) for mind_map in mind_maps]
+
+        self.assertEqual([1, 2, 3, 4, 5], numbers)
+        self.assertIsNone(self.record(mind_maps[-1]))
+        self.assertEqual(["snapshot"] + ["delta"] * 4, self.get_kinds())
+        for number, mind_map in zip(numbers, mind_maps):
+            self.assertEqual(mind_map, revisions.get_revision_mind_map(ITEM_ID, STUDENT_ID, number))
+        self.assertIsNone(revisions.get_revision_mind_map(ITEM_ID, STUDENT_ID, 6))
+        self.assertEqual([], revisions.list_revisions(ITEM_ID, "other-student"))
+
+    def test_record_revision_with_outdated_previous(self):
+        """
+        Check the previous revision is rebuilt when the given previous mind map is not the latest revision.
+        """
+        self.record(make_mind_map(["a"]))
+        self.record(make_mind_map(["a", "b", "c"]), previous_mind_map=make_mind_map(["x"]))
+
+        self.assertEqual(["snapshot", "delta"], self.get_kinds())
+        self.assertEqual(make_mind_map(["a", "b", "c"]), revisions.get_revision_mind_map(ITEM_ID, STUDENT_ID, 2))
+
+    def test_record_snapshots(self):
+        """
+        Check the mind maps are recorded as snapshots when a delta cannot be made or would not be smaller.
+        """
+        self.record(make_mind_map(["a"]))
+        self.record(make_mind_map(["a"], "node_tree"))
+        self.record(make_mind_map(["b" * 100, "c" * 100]))
+        renamed = make_mind_map(["d" * 100, "e" * 100])
+        renamed["data"][0]["topic"] = "Renamed"
+        self.record(renamed)
+
+        self.assertEqual(["snapshot"] * 4, self.get_kinds())
+        self.assertEqual(make_mind_map(["a"], "node_tree"), revisions.get_revision_mind_map(ITEM_ID, STUDENT_ID, 2))
+
+    @override_settings(MINDMAP_REVISION_SNAPSHOT_INTERVAL=3, MINDMAP_REVISION_MAX_COUNT=4)
+    def test_snapshot_interval_and_pruning(self):
+        """
+        Check the snapshots are stored periodically and the old revisions are deleted from a snapshot.
+
+        Expected result:
+            - A revision is rebuilt from its snapshot in a single query.
+            - The revisions before the snapshot the latest 4 ones start from are deleted.
+        """
+        for count in range(1, 11):
+            self.record(make_mind_map([f"topic {index}" for index in range(count)]))
+
+        self.assertEqual(["snapshot", "delta", "delta", "snapshot"], self.get_kinds())
+        self.assertEqual([10, 9, 8, 7], [revision["number"] for revision in revisions.list_revisions(
+            ITEM_ID, STUDENT_ID,
+        )])
+        with self.assertNumQueries(1):
+            mind_map = revisions.get_revision_mind_map(ITEM_ID, STUDENT_ID, 9)
+        self.assertEqual(make_mind_map([f"topic {index}" for index in range(9)]), mind_map)
+
+    def test_list_revisions(self):
+        """
+        Check the revisions are listed latest first by pages, without their content.
+        """
+        for count in range(1, 4):
+            self.record(make_mind_map(["topic"] * count), source="autosave")
+
+        page = revisions.list_revisions(ITEM_ID, STUDENT_ID, limit=2)
+
+        self.assertEqual([3, 2], [revision["number"] for revision in page])
+        self.assertEqual(set(revisions.REVISION_FIELDS), set(page[0]))
+        self.assertEqual("autosave", page[0]["source"])
+        self.assertEqual([1], [revision["number"] for revision in revisions.list_revisions(
+            ITEM_ID, STUDENT_ID, before=2,
+        )])
+
+    def test_record_revision_conflict(self):
+        """
+        Check a revision number recorded concurrently is skipped.
+        """
+        self.record(make_mind_map(["a"]))
+
+        with patch.object(MindMapRevision.objects, "create", side_effect=IntegrityError):
+            with self.assertLogs("mindmap.revisions", "WARNING"):
+                self.assertIsNone(self.record(make_mind_map(["b"])))
+        self.assertEqual(["snapshot"], self.get_kinds())
@@ -0,0 +1,199 @@
+"""
+Tests for the detection of near-identical mind maps among the submissions.
+"""
+import json
+from unittest.mock import patch
+
+import ddt
+from django.core.cache import cache
+from django.test import TestCase
+
+from mindmap import similarity
+
+NODE_ARRAY = {
+    "format": "node_array",
+    "data": [{"id": "root", "isroot": True, "topic": "Photosynthesis"}] + [
+        {"id": f"node_{index}", "parentid": "root", "topic": f"Topic {index}"} for index in range(20)
+    ],
+}
+
+NODE_TREE = {
+    "format": "node_tree",
+    "data": {
+        "id": "other_root",
+        "topic": "  PHOTOSYNTHESIS ",
+        "children": [{"id": f"other_{index}", "topic": f"topic  {index}"} for index in range(20)],
+    },
+}
+
+
+def make_assignment(submission_id: str, mind_map: dict, answer_hash: str = None) -> dict:
+    """
+    Return a grading assignment with a mind map.
+    """
+    return {
+        "submission_id": submission_id,
+        "student_id": f"student-{submission_id}",
+        "username": f"user-{submission_id}",
+        "submission_status": "Submitted",
+        "answer_hash": answer_hash,
+        "answer_body": {"mindmap_student_body": json.dumps(mind_map) if mind_map is not None else None},
+    }
+
+
+def make_original(prefix: str) -> dict:
+    """
+    Return a mind map without any topic in common with the others.
+    """
+    return {
+        "format": "node_array",
+        "data": [{"id": "root", "isroot": True, "topic": f"{prefix} root"}] + [
+            {"id": f"node_{index}", "parentid": "root", "topic": f"{prefix} {index}"} for index in range(20)
+        ],
+    }
+
+
+@ddt.ddt
+class TestSimilarity(TestCase):
+    """
+    Test suite for the signatures and the clustering of the mind maps.
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    @ddt.data(
+        ("Énergie  Solaire", "energie solaire"),
+        ("CELL\tWall", "cell wall"),
+        (12, "12"),
+    )
+    @ddt.unpack
+    def test_normalize_topic(self, topic, expected_topic: str):
+        """
+        Check the topics are compared without case, accents or whitespace differences.
+        """
+        self.assertEqual(expected_topic, similarity.normalize_topic(topic))
+
+    def test_get_features_ignores_ids_and_format(self):
+        """
+        Check the same mind map in both formats has the same features.
+        """
+        features = similarity.get_features(NODE_ARRAY)
+
+        self.assertEqual(features, similarity.get_features(NODE_TREE))
+        self.assertIn("t:photosynthesis", features)
+        self.assertIn("e:photosynthesis\x00topic 3", features)
+
+    @ddt.data(None, {}, {"format": "node_array", "data": "broken"})
+    def test_get_signature_empty(self, mind_map):
+        """
+        Check a mind map without nodes has no signature.
+        """
+        self.assertIsNone(similarity.get_signature(similarity.get_features(mind_map)))
+
+    def test_estimate_similarity(self):
+        """
+        Check the estimated similarity follows the similarity of the features.
+        """
+        signature = similarity.get_signature(similarity.get_features(NODE_ARRAY))
+        edited = json.loads(json.dumps(NODE_ARRAY))
+        for node in edited["data"][1:4]:
+            node["topic"] = f"Changed {node['topic']}"
+
+        self.assertEqual(1, similarity.estimate_similarity(signature, signature))
+        self.assertGreater(
+            similarity.estimate_similarity(signature, similarity.get_signature(similarity.get_features(edited))), 0.6,
+        )
+        self.assertLess(
+            similarity.estimate_similarity(
+                signature, similarity.get_signature(similarity.get_features(make_original("other"))),
+            ),
+            0.2,
+        )
+
+    def test_get_body_signature_cached(self):
+        """
+        Check the signatures are cached by the hash of the mind map.
+        """
+        body = json.dumps(NODE_ARRAY)
+        signature = similarity.get_body_signature(body, "test-hash")
+
+        with patch("mindmap.similarity.get_signature", wraps=similarity.get_signature) as get_signature_mock:
+            self.assertEqual(signature, similarity.get_body_signature(body, "test-hash"))
+            self.assertIsNone(similarity.get_body_signature(json.dumps({}), "empty-hash"))
+            self.assertIsNone(similarity.get_body_signature(json.dumps({}), "empty-hash"))
+
+        get_signature_mock.assert_called_once_with(set())
+
+    def test_find_similar_assignments(self):
+        """
+        Check the copies of a mind map are clustered, and the original ones are not.
+
+        Expected result:
+            - The copies in the other format, with edits or stored twice are in one cluster.
+            - The original and the empty submissions are left out.
+        """
+        edited = json.loads(json.dumps(NODE_ARRAY))
+        edited["data"][5]["topic"] = "Chlorophyll"
+        assignments = [
+            make_assignment("1", NODE_ARRAY, "hash-1"),
+            make_assignment("2", make_original("first")),
+            make_assignment("3", NODE_TREE),
+            make_assignment("4", edited),
+            make_assignment("5", None),
+            make_assignment("6", make_original("second")),
+            make_assignment("7", NODE_ARRAY, "hash-1"),
+        ]
+
+        clusters = similarity.find_similar_assignments(assignments)
+
+        self.assertEqual(1, len(clusters))
+        self.assertEqual(
+            ["1", "3", "4", "7"], [submission["submission_id"] for submission in clusters[0]["submissions"]],
+        )
+        self.assertGreaterEqual(clusters[0]["similarity"], similarity.SIMILARITY_THRESHOLD)
+        self.assertEqual(
+            {"submission_id": "1", "student_id": "student-1", "username": "user-1", "submission_status": "Submitted"},
+            clusters[0]["submissions"][0],
+        )
+
+    def test_find_similar_assignments_threshold(self):
+        """
+        Check only the identical mind maps are clustered with a threshold of 1.
+        """
+        edited = json.loads(json.dumps(NODE_ARRAY))
+        for node in edited["data"][1:6]:
+            node["topic"] = f"Changed {node['topic']}"
+        assignments = [
+            make_assignment("1", NODE_ARRAY),
+            make_assignment("2", edited),
+            make_assignment("3", NODE_TREE),
+        ]
+
+        clusters = similarity.find_similar_assignments(assignments, threshold=1)
+
+        self.assertEqual([["1", "3"]], [
+            [submission["submission_id"] for submission in cluster["submissions"]] for cluster in clusters
+        ])
+        self.assertEqual(1, clusters[0]["similarity"])
+
+    def test_similarity_index_clusters_largest_first(self):
+        """
+        Check the clusters are sorted by size and the unique mind maps are left out.
+        """
+        index = similarity.SimilarityIndex()
+        small = similarity.get_signature(similarity.get_features(make_original("small")))
+        large = similarity.get_signature(similarity.get_features(make_original("large")))
+        index.add("small-1", small)
+        index.add("unique", similarity.get_signature(similarity.get_features(make_original("unique"))))
+        index.add("large-1", large)
+        index.add("small-2", small)
+        index.add("large-2", large)
+        index.add("large-3", large)
+        index.add("empty", None)
+
+        clusters = index.get_clusters()
+
+        self.assertEqual(
+            [["large-1", "large-2", "large-3"], ["small-1", "small-2"]], [cluster["keys"] for cluster in clusters],
+        )
@@ -0,0 +1,122 @@
+"""
+Tests for the compact encoding of the learner mind maps.
+"""
+import json
+from unittest import TestCase
+
+import ddt
+
+from mindmap.storage import ENCODING, decode_mind_map, encode_mind_map, is_encoded
+
+
+def make_mind_map(size: int) -> dict:
+    """
+    Return a `node_array` mind map with the given number of nodes.
+    """
+    nodes = [{"id": "root", "isroot": True, "topic": "Root"}]
+    for index in range(1, size):
+        nodes.append({
+            "id": f"node_{index}",
+            "parentid": nodes[(index - 1) // 3]["id"],
+            "topic": f"Topic {index}",
+            "direction": "right" if index % 2 else "left",
+        })
+    return {"meta": {"name": "Mind Map", "version": "0.1"}, "format": "node_array", "data": nodes}
+
+
+@ddt.ddt
+class TestMindMapEncoding(TestCase):
+    """
+    Test suite for encode_mind_map and decode_mind_map.
+    """
+
+    @ddt.data(
+        make_mind_map(1),
+        make_mind_map(20),
+        make_mind_map(2000),
+        {
+            "format": "node_array",
+            "data": [
+                {"id": "root", "isroot": "true", "topic": "Root", "expanded": False},
+                {"id": "a", "parentid": "root", "topic": "A"},
+                {"id": "b", "parentid": "a", "topic": None, "background-color": "#fff"},
+            ],
+        },
+        {
+            "format": "node_array",
+            "data": [
+                {"id": "root", "isroot": True, "topic": "Root"},
+                {"id": "a", "parentid": "missing", "topic": "A"},
+            ],
+        },
+        {
+            "format": "node_array",
+            "data": [
+                {"id": "a", "topic": "A"},
+                {"id": "a", "parentid": "a", "topic": "A again"},
+            ],
+        },
+        {"format": "node_tree", "data": {"id": "root", "topic": "Root", "children": []}},
+    )
+    def test_round_trip(self, mind_map):
+        """
+        Check encoding and decoding mind maps.
+
+        Expected result:
+            - The decoded mind map is equal to the original one.
+        """
+        encoded = encode_mind_map(json.loads(json.dumps(mind_map)), compress_threshold=4096)
+
+        self.assertTrue(is_encoded(encoded))
+        self.assertEqual(mind_map, decode_mind_map(json.loads(json.dumps(encoded))))
+
+    def test_columnar_encoding(self):
+        """
+        Check the layout of an encoded `node_array` mind map.
+
+        Expected result:
+            - The node keys are stored once and the parents by position.
+        """
+        encoded = encode_mind_map(make_mind_map(3))
+
+        self.assertEqual(ENCODING, encoded["encoding"])
+        self.assertEqual(["id", "isroot", "topic", "direction"], encoded["keys"])
+        self.assertEqual({"index": [0], "values": [True]}, encoded["columns"][1])
+        self.assertEqual([-1, 0, 0], encoded["parents"])
+
+    def test_compression_threshold(self):
+        """
+        Check that large mind maps are compressed.
+
+        Expected result:
+            - Only the payloads over the threshold are compressed.
+        """
+        mind_map = make_mind_map(200)
+
+        compressed = encode_mind_map(mind_map, compress_threshold=1024)
+        uncompressed = encode_mind_map(mind_map, compress_threshold=10 ** 6)
+
+        self.assertEqual("zlib", compressed["compression"])
+        self.assertNotIn("compression", uncompressed)
+        self.assertLess(len(json.dumps(compressed)), len(json.dumps(uncompressed)) / 2)
+
+    @ddt.data({}, None, make_mind_map(3))
+    def test_decode_not_encoded(self, stored):
+        """
+        Check decoding mind maps saved without the compact encoding.
+
+        Expected result:
+            - The value is returned unchanged.
+        """
+        self.assertIs(stored, decode_mind_map(stored))
+
+    def test_encode_twice(self):
+        """
+        Check encoding a mind map that is already encoded.
+
+        Expected result:
+            - The encoded mind map is returned unchanged.
+        """
+        encoded = encode_mind_map(make_mind_map(3))
+
+        self.assertIs(encoded, encode_mind_map(encoded))
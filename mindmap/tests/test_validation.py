@@ -0,0 +1,125 @@
+"""
+Tests for the validation of the mind maps sent by the browser.
+"""
+from unittest import TestCase
+
+import ddt
+from django.test import override_settings
+
+from mindmap.validation import MindMapValidationError, get_limits, validate_mind_map
+
+
+def node_array(*nodes) -> dict:
+    """
+    Return a `node_array` mind map with a root and the given nodes.
+    """
+    return {"format": "node_array", "data": [{"id": "root", "isroot": True, "topic": "Root"}, *nodes]}
+
+
+@ddt.ddt
+class TestValidateMindMap(TestCase):
+    """
+    Test suite for validate_mind_map.
+    """
+
+    @ddt.data(
+        node_array(),
+        node_array({"id": "a", "parentid": "root", "topic": "A"}, {"id": "a1", "parentid": "a", "topic": ""}),
+        {"format": "node_array", "data": [{"id": "root", "isroot": "true", "topic": "Root"}]},
+        {"data": {"id": "root", "topic": "Root", "children": [{"id": "a", "topic": "A"}]}},
+        {"format": "node_tree", "data": {"id": "root", "topic": "Root"}},
+    )
+    def test_valid(self, mind_map):
+        """
+        Check validating valid mind maps.
+
+        Expected result:
+            - No error is raised.
+        """
+        validate_mind_map(mind_map)
+
+    @ddt.data(
+        (None, "invalid_mind_map", None),
+        ({"format": "freemind", "data": "<map/>"}, "invalid_format", None),
+        ({"format": "node_array", "data": []}, "invalid_data", None),
+        (node_array("a"), "invalid_node", None),
+        (node_array({"parentid": "root", "topic": "A"}), "invalid_id", None),
+        (node_array({"id": "a", "parentid": "root"}), "invalid_topic", "a"),
+        (node_array({"id": "root", "parentid": "root", "topic": "A"}), "duplicate_id", "root"),
+        (node_array({"id": "a", "isroot": True, "topic": "A"}), "multiple_roots", "a"),
+        ({"format": "node_array", "data": [{"id": "a", "topic": "A"}]}, "missing_root", None),
+        ({"format": "node_array", "data": [{"id": "a", "parentid": "a", "topic": "A"}]}, "missing_root", None),
+        (node_array({"id": "a", "parentid": "missing", "topic": "A"}), "invalid_parent", "a"),
+        (node_array({"id": "a", "parentid": "b", "topic": "A"}, {"id": "b", "parentid": "a", "topic": "B"}),
+         "invalid_parent", None),
+        ({"data": []}, "invalid_data", None),
+        ({"data": {"id": "root", "topic": "Root", "children": {}}}, "invalid_children", "root"),
+        ({"data": {"id": "root", "topic": "Root", "children": [{"id": "root", "topic": "A"}]}}, "duplicate_id", "root"),
+    )
+    @ddt.unpack
+    def test_invalid(self, mind_map, code, node_id):
+        """
+        Check validating mind maps with an invalid structure.
+
+        Expected result:
+            - MindMapValidationError is raised with the code and offending node.
+        """
+        with self.assertRaises(MindMapValidationError) as context:
+            validate_mind_map(mind_map)
+
+        self.assertEqual(code, context.exception.code)
+        self.assertEqual(node_id, context.exception.node_id)
+
+    @ddt.data(
+        ({"max_nodes": 2}, "too_many_nodes"),
+        ({"max_depth": 2}, "too_deep"),
+        ({"max_topic_length": 3}, "topic_too_long"),
+        ({"max_bytes": 100}, "too_large"),
+    )
+    @ddt.unpack
+    def test_limits(self, limits, code):
+        """
+        Check validating mind maps that exceed the limits.
+
+        Expected result:
+            - MindMapValidationError is raised with the code of the limit.
+        """
+        mind_map = node_array(
+            {"id": "a", "parentid": "root", "topic": "A"},
+            {"id": "a1", "parentid": "a", "topic": "Long topic"},
+        )
+        tree = {"data": {"id": "root", "topic": "Root", "children": [
+            {"id": "a", "topic": "A", "children": [{"id": "a1", "topic": "Long topic"}]},
+        ]}}
+
+        for value in (mind_map, tree):
+            with self.assertRaises(MindMapValidationError) as context:
+                validate_mind_map(value, **limits)
+            self.assertEqual(code, context.exception.code)
+
+    def test_to_dict(self):
+        """
+        Check the error returned in the JSON responses.
+
+        Expected result:
+            - The code, the message and the node id are included.
+        """
+        error = MindMapValidationError("invalid_topic", "Nodes must have a string topic", "a")
+
+        self.assertEqual(
+            {"code": "invalid_topic", "message": "Nodes must have a string topic", "node_id": "a"},
+            error.to_dict(),
+        )
+
+    @override_settings(MINDMAP_MAX_NODES=5, MINDMAP_MAX_DEPTH=3, MINDMAP_MAX_TOPIC_LENGTH=10, MINDMAP_MAX_BYTES=1000)
+    def test_get_limits(self):
+        """
+        Check the limits read from the settings.
+
+        Expected result:
+            - The limits are the configured ones.
+        """
+        self.assertEqual(
+            {"max_nodes": 5, "max_depth": 3, "max_topic_length": 10, "max_bytes": 1000},
+            get_limits(),
+        )
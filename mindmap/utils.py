@@ -2,6 +2,10 @@
 Utilities for mindmap app.
 """
 import datetime
+import functools
+from enum import Enum
+from itertools import islice
+
 import pytz
 
 
@@ -12,6 +16,13 @@ def _(text):
     return text
 
 
+class SubmissionStatus(Enum):
+    """Submission status enum"""
+    NOT_ATTEMPTED = _("Not attempted")
+    SUBMITTED = _("Submitted")
+    COMPLETED = _("Completed")
+
+
 def utcnow():
     """
     Get current date and time in UTC.
@@ -20,3 +31,54 @@ def utcnow():
         datetime.datetime: Current date and time in UTC.
     """
     return datetime.datetime.now(tz=pytz.utc)
+
+
+def chunked(iterable, size):
+    """
+    Split an iterable into lists of at most `size` elements.
+
+    Args:
+        iterable (iterable): The elements to split.
+        size (int): The maximum length of each chunk.
+
+    Yields:
+        list: The next chunk of elements.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def request_cached(method):
+    """
+    Memoize a block method for the lifetime of the block instance.
+
+    The runtime instantiates the block for each request, so the cached values
+    are shared by every call made while rendering a view or running a handler.
+    Use `clear_request_cache` to drop them after writing new data.
+
+    Args:
+        method (function): The block method to memoize.
+
+    Returns:
+        function: The memoized method.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.__dict__.setdefault("_request_cache", {})
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in cache:
+            cache[key] = method(self, *args, **kwargs)
+        return cache[key]
+
+    return wrapper
+
+
+def clear_request_cache(block):
+    """
+    Drop the values memoized with `request_cached` for the given block.
+
+    Args:
+        block (XBlock): The block to clear the cache of.
+    """
+    block.__dict__.pop("_request_cache", None)
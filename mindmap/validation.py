@@ -0,0 +1,242 @@
+"""
+Validation of the mind maps sent by the browser.
+
+The mind maps are stored in the block fields and serialized again in every
+view and grading response, so the handlers check their structure and size
+before saving them. The jsMind `node_array` and `node_tree` formats are
+supported; `node_tree` is the default format of jsMind when none is given.
+"""
+
+from __future__ import annotations
+
+import json
+from itertools import compress
+
+from django.conf import settings
+
+FORMATS = ("node_array", "node_tree")
+
+# Default limits, overridden with the MINDMAP_MAX_* settings.
+MAX_NODES = 10000
+MAX_DEPTH = 100
+MAX_TOPIC_LENGTH = 1000
+MAX_BYTES = 2 * 1024 * 1024
+
+
+class MindMapValidationError(ValueError):
+    """
+    Raised when a mind map is not valid.
+
+    Attributes:
+        code (str): A short identifier of the problem, e.g. "duplicate_id".
+        message (str): A description of the problem.
+        node_id (str): The id of the offending node, if any.
+    """
+
+    def __init__(self, code: str, message: str, node_id=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.node_id = node_id
+
+    def to_dict(self) -> dict:
+        """
+        Return the error as a dictionary for the JSON responses.
+        """
+        error = {"code": self.code, "message": self.message}
+        if self.node_id is not None:
+            error["node_id"] = self.node_id
+        return error
+
+
+def get_limits() -> dict:
+    """
+    Return the mind map limits configured in the settings.
+
+    Returns:
+        dict: The keyword arguments of `validate_mind_map`.
+    """
+    return {
+        "max_nodes": getattr(settings, "MINDMAP_MAX_NODES", MAX_NODES),
+        "max_depth": getattr(settings, "MINDMAP_MAX_DEPTH", MAX_DEPTH),
+        "max_topic_length": getattr(settings, "MINDMAP_MAX_TOPIC_LENGTH", MAX_TOPIC_LENGTH),
+        "max_bytes": getattr(settings, "MINDMAP_MAX_BYTES", MAX_BYTES),
+    }
+
+
+def validate_mind_map(
+    mind_map: dict,
+    max_nodes: int = MAX_NODES,
+    max_depth: int = MAX_DEPTH,
+    max_topic_length: int = MAX_TOPIC_LENGTH,
+    max_bytes: int = None,
+) -> None:
+    """
+    Check the structure and size of a mind map.
+
+    Args:
+        mind_map (dict): The mind map in the `node_array` or `node_tree` format.
+        max_nodes (int, optional): The maximum number of nodes.
+        max_depth (int, optional): The maximum depth, the root has depth 1.
+        max_topic_length (int, optional): The maximum length of the topics.
+        max_bytes (int, optional): The maximum size of the mind map serialized as JSON.
+            Serializing the mind map is the slowest check, so the size is only
+            checked when it is given. Handlers check the size of the request
+            body with `check_request_size` instead.
+
+    Raises:
+        MindMapValidationError: If the mind map is not valid.
+    """
+    if not isinstance(mind_map, dict):
+        raise MindMapValidationError("invalid_mind_map", "The mind map must be an object")
+    mind_map_format = mind_map.get("format") or "node_tree"
+    if mind_map_format not in FORMATS:
+        raise MindMapValidationError("invalid_format", f"Unsupported mind map format: {mind_map_format}")
+
+    if mind_map_format == "node_array":
+        validate_node_array(mind_map.get("data"), max_nodes, max_depth, max_topic_length)
+    else:
+        validate_node_tree(mind_map.get("data"), max_nodes, max_depth, max_topic_length)
+
+    if max_bytes is not None:
+        check_size(len(json.dumps(mind_map, separators=(",", ":")).encode("utf-8")), max_bytes)
+
+
+def check_size(size: int, max_bytes: int) -> None:
+    """
+    Check the size in bytes of a serialized mind map.
+
+    Raises:
+        MindMapValidationError: If the size exceeds the maximum.
+    """
+    if size > max_bytes:
+        raise MindMapValidationError("too_large", f"The mind map exceeds {max_bytes} bytes")
+
+
+def validate_node(node, max_topic_length: int):
+    """
+    Check the keys of a node and return its id.
+    """
+    if not isinstance(node, dict):
+        raise MindMapValidationError("invalid_node", "Nodes must be objects")
+    node_id = node.get("id")
+    if not isinstance(node_id, str) or not node_id:
+        raise MindMapValidationError("invalid_id", "Nodes must have a non-empty string id")
+    topic = node.get("topic")
+    if not isinstance(topic, str):
+        raise MindMapValidationError("invalid_topic", "Nodes must have a string topic", node_id)
+    if len(topic) > max_topic_length:
+        raise MindMapValidationError(
+            "topic_too_long", f"The topic exceeds {max_topic_length} characters", node_id,
+        )
+    return node_id
+
+
+def validate_nodes(nodes: list, max_topic_length: int) -> list:
+    """
+    Check the keys of the nodes and that their ids are unique.
+
+    The checks run over whole columns of the nodes, and the nodes are only
+    checked one by one to report the first offending node.
+
+    Returns:
+        list: The ids of the nodes.
+    """
+    if not all(type(node) is dict for node in nodes):  # pylint: disable=unidiomatic-typecheck
+        for node in nodes:
+            validate_node(node, max_topic_length)
+    node_ids = [node.get("id") for node in nodes]
+    topics = [node.get("topic") for node in nodes]
+    if not (
+        all(type(node_id) is str and node_id for node_id in node_ids)  # pylint: disable=unidiomatic-typecheck
+        and all(type(topic) is str for topic in topics)  # pylint: disable=unidiomatic-typecheck
+        and max(map(len, topics)) <= max_topic_length
+    ):
+        for node in nodes:
+            validate_node(node, max_topic_length)
+
+    if len(set(node_ids)) != len(node_ids):
+        seen = set()
+        duplicate_id = next(node_id for node_id in node_ids if node_id in seen or seen.add(node_id))
+        raise MindMapValidationError("duplicate_id", f"Duplicated node id: {duplicate_id}", duplicate_id)
+    return node_ids
+
+
+def validate_node_array(nodes, max_nodes: int, max_depth: int, max_topic_length: int) -> None:
+    """
+    Check the nodes of a mind map in the `node_array` format.
+    """
+    if not isinstance(nodes, list) or not nodes:
+        raise MindMapValidationError("invalid_data", "The data of a node_array mind map must be a non-empty list")
+    if len(nodes) > max_nodes:
+        raise MindMapValidationError("too_many_nodes", f"The mind map exceeds {max_nodes} nodes")
+    node_ids = validate_nodes(nodes, max_topic_length)
+
+    is_root = [node.get("isroot") in (True, "true") for node in nodes]
+    root_ids = list(compress(node_ids, is_root))
+    if not root_ids:
+        raise MindMapValidationError("missing_root", "The mind map must have a root node")
+    if len(root_ids) > 1:
+        raise MindMapValidationError("multiple_roots", "The mind map must have a single root", root_ids[1])
+
+    children = {}
+    for node_id, parent_id, root in zip(node_ids, [node.get("parentid") for node in nodes], is_root):
+        if not root:
+            children.setdefault(parent_id, []).append(node_id)
+
+    # Walk the tree from the root level by level; the nodes that are not
+    # reached have an unknown parent or are part of a cycle.
+    level = root_ids
+    depth = reached = 0
+    while level:
+        depth += 1
+        if depth > max_depth:
+            raise MindMapValidationError("too_deep", f"The mind map exceeds a depth of {max_depth}", level[0])
+        reached += len(level)
+        level = [child_id for node_id in level for child_id in children.get(node_id, ())]
+    if reached != len(nodes):
+        known_ids = set(node_ids)
+        orphan_ids = [
+            child_id for parent_id, child_ids in children.items() if parent_id not in known_ids
+            for child_id in child_ids
+        ]
+        raise MindMapValidationError(
+            "invalid_parent",
+            "Every node must descend from the root",
+            orphan_ids[0] if orphan_ids else None,
+        )
+
+
+def validate_node_tree(root, max_nodes: int, max_depth: int, max_topic_length: int) -> None:
+    """
+    Check the nodes of a mind map in the `node_tree` format.
+    """
+    if not isinstance(root, dict):
+        raise MindMapValidationError("invalid_data", "The data of a node_tree mind map must be an object")
+
+    # Flatten the tree level by level, then check the nodes as a node_array.
+    nodes = []
+    level = [root]
+    depth = 0
+    while level:
+        depth += 1
+        if len(nodes) + len(level) > max_nodes:
+            raise MindMapValidationError("too_many_nodes", f"The mind map exceeds {max_nodes} nodes")
+        if depth > max_depth:
+            raise MindMapValidationError(
+                "too_deep", f"The mind map exceeds a depth of {max_depth}", validate_node(level[0], max_topic_length),
+            )
+        if not all(type(node) is dict for node in level):  # pylint: disable=unidiomatic-typecheck
+            for node in level:
+                validate_node(node, max_topic_length)
+        nodes.extend(level)
+        level_children = [node.get("children", []) for node in level]
+        for node, node_children in zip(level, level_children):
+            if not isinstance(node_children, list):
+                raise MindMapValidationError(
+                    "invalid_children",
+                    "The children of a node must be a list",
+                    validate_node(node, max_topic_length),
+                )
+        level = [child for node_children in level_children for child in node_children]
+    validate_nodes(nodes, max_topic_length)